@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+"""
+gs 서브프로세스 vs libgs(gsapi) 파일당 지연 시간 비교
+
+    python benchmarks/bench_gsapi.py --files 50 --pages 3 --preset ebook
+    python benchmarks/bench_gsapi.py --input-dir samples/ --json
+
+작은 PDF를 하나씩 순서대로 압축하면서 파일당 시간을 잽니다.
+gsapi는 첫 파일(인터프리터 초기화 포함)과 이후 예열된 상태를 따로 표시합니다.
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import corpus  # noqa: E402
+from pdf_compress_gs import run_ghostscript  # noqa: E402
+from pdf_compress_gsapi import GhostscriptInstance, is_available  # noqa: E402
+
+
+def _percentile(values, fraction):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def summarize(latencies):
+    """지연 시간 목록(초) 요약 (밀리초)"""
+    if not latencies:
+        return {}
+    return {
+        "files": len(latencies),
+        "mean_ms": round(statistics.mean(latencies) * 1000, 2),
+        "p50_ms": round(_percentile(latencies, 0.50) * 1000, 2),
+        "p95_ms": round(_percentile(latencies, 0.95) * 1000, 2),
+        "total_s": round(sum(latencies), 3)
+    }
+
+
+def bench_subprocess(inputs, out_dir, preset):
+    latencies = []
+    for index, path in enumerate(inputs):
+        start = time.perf_counter()
+        run_ghostscript(path, os.path.join(out_dir, f"sub_{index}.pdf"), preset)
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def bench_gsapi(inputs, out_dir, preset):
+    start = time.perf_counter()
+    instance = GhostscriptInstance(preset)
+    init_seconds = time.perf_counter() - start
+    latencies = []
+    try:
+        for index, path in enumerate(inputs):
+            start = time.perf_counter()
+            instance.compress(path, os.path.join(out_dir, f"api_{index}.pdf"))
+            latencies.append(time.perf_counter() - start)
+    finally:
+        instance.close()
+    return init_seconds, latencies
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="gs 서브프로세스 vs libgs 지연 시간 비교")
+    parser.add_argument("--files", type=int, default=50, help="생성할 PDF 개수")
+    parser.add_argument("--pages", type=int, default=3, help="생성할 PDF의 페이지 수")
+    parser.add_argument("--input-dir", help="생성하지 않고 이 폴더의 PDF 사용")
+    parser.add_argument("--preset", default="ebook", choices=["screen", "ebook", "printer", "prepress"])
+    parser.add_argument("--json", action="store_true", help="결과를 JSON으로 출력")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory(prefix="bench_gsapi_") as tmp_dir:
+        if args.input_dir:
+            inputs = sorted(os.path.join(args.input_dir, name) for name in os.listdir(args.input_dir)
+                            if name.lower().endswith(".pdf"))
+        else:
+            inputs = [corpus.write_pdf(os.path.join(tmp_dir, f"in_{i}.pdf"), corpus.text_pdf(args.pages, seed=i))
+                      for i in range(args.files)]
+
+        results = {"preset": args.preset, "subprocess": summarize(bench_subprocess(inputs, tmp_dir, args.preset))}
+        if is_available():
+            init_seconds, latencies = bench_gsapi(inputs, tmp_dir, args.preset)
+            results["gsapi"] = summarize(latencies)
+            results["gsapi"]["init_ms"] = round(init_seconds * 1000, 2)
+            results["speedup"] = round(results["subprocess"]["mean_ms"] / results["gsapi"]["mean_ms"], 2)
+        else:
+            results["gsapi"] = None
+
+    if args.json:
+        print(json.dumps(results, ensure_ascii=False, indent=2))
+        return 0
+
+    print(f"파일 {len(inputs)}개, 프리셋 {args.preset}")
+    for name in ("subprocess", "gsapi"):
+        stats = results[name]
+        if not stats:
+            print(f"  {name:<10}: libgs를 찾을 수 없음")
+            continue
+        extra = f", 초기화 {stats['init_ms']} ms" if "init_ms" in stats else ""
+        print(f"  {name:<10}: 평균 {stats['mean_ms']} ms, p50 {stats['p50_ms']} ms, "
+              f"p95 {stats['p95_ms']} ms, 합계 {stats['total_s']} s{extra}")
+    if "speedup" in results:
+        print(f"  gsapi가 파일당 {results['speedup']}배 빠름")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,189 @@
+# -*- coding: utf-8 -*-
+"""
+진입점 모듈 시작 시간 벤치마크 (python -X importtime)
+
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --modules pdf_compress_cli --repeat 20 --save-baseline startup.json
+    python benchmarks/bench_startup.py --baseline startup.json --threshold 0.2
+
+파일마다 CLI/컨테이너를 새로 실행하면 모듈을 불러오는 시간이 전체 지연의 큰 부분을 차지합니다.
+측정마다 새 파이썬 프로세스에서 'import 모듈'만 실행합니다 (첫 실행은 .pyc를 만드는 준비 실행으로 제외).
+- import_ms: -X importtime이 보고한 진입점 모듈의 누적 import 시간 (반복 중 중앙값)
+- wall_ms: 인터프리터 시작부터 종료까지의 경과 시간 (반복 중 중앙값)
+- heaviest: 자체 import 시간이 가장 긴 모듈 (마지막 측정 기준)
+- loaded_heavy: 시작할 때 불러오면 안 되는 무거운 모듈 중 불러온 것 (있으면 종료 코드 1)
+--baseline과 비교해 import_ms/wall_ms가 threshold 넘게 늘어나면 종료 코드 1
+"""
+import argparse
+import json
+import os
+import platform
+import re
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_MODULES = [
+    "pdf_compress_cli",
+    "pdf_compress_api",
+    "pdf_compress_server",
+    "pdf_compress_ict_ghostscript",
+    "pdf_compress_ai_claude"
+]
+
+# 엔진을 실제로 쓰기 전에는 불러오지 않아야 하는 모듈
+HEAVY_MODULES = ["PIL", "PyPDF2", "multiprocessing", "tkinter.font", "pdf_compress_pypdf"]
+
+# GUI가 아닌 진입점은 tkinter도 불러오지 않아야 함
+GUI_MODULES = {"pdf_compress_ict_ghostscript", "pdf_compress_ai_claude"}
+
+COMPARED_METRICS = ["import_ms", "wall_ms"]
+
+# 너무 짧은 측정은 잡음이 커서 비교에서 제외 (ms)
+MIN_COMPARED_MS = 5.0
+
+HEAVIEST_COUNT = 5
+
+_IMPORTTIME_RE = re.compile(r"^import time:\s+(\d+)\s*\|\s+(\d+)\s*\|( *)(\S+)\s*$")
+
+
+def parse_importtime(stderr):
+    """-X importtime 출력 → [(모듈, 자체 µs, 누적 µs)]"""
+    rows = []
+    for line in stderr.splitlines():
+        match = _IMPORTTIME_RE.match(line)
+        if match:
+            rows.append((match.group(4), int(match.group(1)), int(match.group(2))))
+    return rows
+
+
+def measure_once(module):
+    """새 프로세스에서 모듈 하나를 불러오고 (경과 ms, importtime 행) 반환"""
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    start = time.perf_counter()
+    process = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"], cwd=ROOT,
+                             env=env, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    wall_ms = (time.perf_counter() - start) * 1000
+    stderr = process.stderr.decode("utf-8", errors="replace")
+    if process.returncode != 0:
+        raise RuntimeError(stderr.strip().splitlines()[-1] if stderr.strip() else f"종료 코드 {process.returncode}")
+    return wall_ms, parse_importtime(stderr)
+
+
+def _forbidden(module):
+    if module in GUI_MODULES:
+        return HEAVY_MODULES
+    return HEAVY_MODULES + ["tkinter"]
+
+
+def bench_module(module, repeat):
+    """모듈 하나의 시작 시간 측정 결과"""
+    measure_once(module)  # .pyc 준비
+    walls, imports = [], []
+    rows = []
+    for _ in range(repeat):
+        wall_ms, rows = measure_once(module)
+        walls.append(wall_ms)
+        imports.append(next((total for name, _, total in rows if name == module), 0) / 1000)
+    loaded = {name for name, _, _ in rows}
+    heaviest = sorted(rows, key=lambda row: row[1], reverse=True)[:HEAVIEST_COUNT]
+    return {
+        "module": module,
+        "import_ms": round(statistics.median(imports), 2),
+        "wall_ms": round(statistics.median(walls), 2),
+        "modules_loaded": len(loaded),
+        "heaviest": [{"module": name, "self_ms": round(own / 1000, 2)} for name, own, _ in heaviest],
+        "loaded_heavy": [name for name in _forbidden(module) if name in loaded]
+    }
+
+
+def compare(results, baseline, threshold):
+    """기준 결과보다 허용치 넘게 느려진 항목 목록"""
+    old_results = {result["module"]: result for result in baseline.get("results", [])}
+    regressions = []
+    for result in results:
+        old = old_results.get(result["module"])
+        if old is None:
+            continue
+        for metric in COMPARED_METRICS:
+            if not old.get(metric) or old[metric] < MIN_COMPARED_MS:
+                continue
+            if result[metric] > old[metric] * (1 + threshold):
+                regressions.append({
+                    "module": result["module"],
+                    "metric": metric,
+                    "baseline": old[metric],
+                    "current": result[metric],
+                    "change_percent": round((result[metric] / old[metric] - 1) * 100, 1)
+                })
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="진입점 모듈 시작 시간 벤치마크")
+    parser.add_argument("--modules", default=",".join(DEFAULT_MODULES), help="쉼표로 구분한 모듈 이름")
+    parser.add_argument("--repeat", type=int, default=10, help="측정 반복 횟수 (중앙값 사용)")
+    parser.add_argument("--output", help="결과 JSON 저장 경로")
+    parser.add_argument("--save-baseline", metavar="PATH", help="결과를 기준 파일로 저장")
+    parser.add_argument("--baseline", metavar="PATH", help="비교할 기준 결과 JSON")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="시작 시간 허용 증가율 (기본값: 0.2 = 20%%)")
+    parser.add_argument("--json", action="store_true", help="결과를 JSON으로 출력")
+    args = parser.parse_args(argv)
+
+    results = []
+    skipped = {}
+    for module in [name.strip() for name in args.modules.split(",") if name.strip()]:
+        try:
+            result = bench_module(module, max(1, args.repeat))
+        except RuntimeError as e:
+            # tkinter가 없는 서버 등에서는 GUI 모듈을 건너뜀
+            skipped[module] = str(e)
+            continue
+        results.append(result)
+        if not args.json:
+            print(_format_result(result), flush=True)
+
+    report = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "machine": {"python": platform.python_version(), "platform": platform.platform(),
+                    "cpus": os.cpu_count()},
+        "repeat": args.repeat,
+        "skipped": skipped,
+        "results": results
+    }
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        report["regressions"] = compare(results, baseline, args.threshold)
+    for path in (args.output, args.save_baseline):
+        if path:
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(report, f, ensure_ascii=False, indent=2)
+
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+    else:
+        for module, reason in skipped.items():
+            print(f"{module}: 건너뜀 ({reason})")
+        for regression in report.get("regressions", []):
+            print(f"시작 시간 증가: {regression['module']} {regression['metric']} "
+                  f"{regression['baseline']} → {regression['current']} ({regression['change_percent']:+}%)")
+    failed = bool(report.get("regressions")) or any(result["loaded_heavy"] for result in results)
+    return 1 if failed else 0
+
+
+def _format_result(result):
+    heaviest = ", ".join(f"{row['module']} {row['self_ms']:.1f}" for row in result["heaviest"][:3])
+    line = (f"{result['module']:<30} import {result['import_ms']:>7.1f} ms  전체 {result['wall_ms']:>7.1f} ms  "
+            f"모듈 {result['modules_loaded']:>4}개  | {heaviest}")
+    if result["loaded_heavy"]:
+        line += f"  | 무거운 모듈: {', '.join(result['loaded_heavy'])}"
+    return line
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,262 @@
+# -*- coding: utf-8 -*-
+"""
+엔진/프리셋별 압축 벤치마크 (합성 문서 묶음, 오프라인 실행)
+
+    python benchmarks/bench_suite.py --output results.json
+    python benchmarks/bench_suite.py --engines pypdf --presets medium --save-baseline baseline.json
+    python benchmarks/bench_suite.py --baseline baseline.json --threshold 0.15
+
+측정마다 새 파이썬 프로세스에서 압축하므로 이전 측정의 영향을 받지 않습니다.
+- wall_s / cpu_s: 압축 호출 구간의 경과 시간 / 사용자+시스템 CPU 시간 (gs 자식 포함, 반복 중 중앙값)
+- peak_rss: 측정 프로세스와 gs 자식 중 가장 큰 최대 RSS (바이트, 반복 중 최댓값)
+- size_ratio: 결과 크기 / 원본 크기
+- pages_per_s: 페이지 수 / wall_s
+--baseline과 비교해 시간/메모리가 threshold, 크기 비율이 size-threshold 넘게 나빠지면 종료 코드 1
+기준 결과는 같은 기계에서 만든 것과 비교해야 의미가 있습니다.
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import corpus  # noqa: E402
+
+DEFAULT_PRESETS = {
+    "ghostscript": ["screen", "ebook", "printer"],
+    "gsapi": ["ebook"],
+    "pypdf": ["high", "medium", "low"],
+    "hybrid": ["ebook"]
+}
+
+# 비교할 지표: 이름 → 나빠지는 방향의 허용치 종류
+COMPARED_METRICS = {
+    "wall_s": "threshold",
+    "cpu_s": "threshold",
+    "peak_rss": "threshold",
+    "size_ratio": "size_threshold"
+}
+
+# 너무 짧은 측정은 잡음이 커서 시간 비교에서 제외 (초)
+MIN_COMPARED_SECONDS = 0.05
+
+
+def _own_peak_rss():
+    """
+    이 프로세스의 최대 RSS (바이트)
+    ru_maxrss는 exec 전(vfork한 부모)의 값까지 이어받으므로 /proc의 VmHWM을 우선 사용
+    """
+    try:
+        with open("/proc/self/status", "rb") as f:
+            for line in f:
+                if line.startswith(b"VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def _child_main(engine, preset, input_path, output_path, result_path):
+    """측정용 자식 프로세스: 압축 한 번을 실행하고 시간을 result_path에 기록"""
+    from pdf_compress_api import compress
+
+    before = resource.getrusage(resource.RUSAGE_SELF), resource.getrusage(resource.RUSAGE_CHILDREN)
+    start = time.perf_counter()
+    compress(input_path, output_path, engine=engine, preset=preset, jobs=1)
+    wall = time.perf_counter() - start
+    after = resource.getrusage(resource.RUSAGE_SELF), resource.getrusage(resource.RUSAGE_CHILDREN)
+    cpu = sum(a.ru_utime + a.ru_stime - b.ru_utime - b.ru_stime for a, b in zip(after, before))
+    # 자식(gs) 값은 이 프로세스의 RSS보다 작을 수 없으므로 둘 중 큰 값이 실제 최대
+    peak = max(_own_peak_rss(), after[1].ru_maxrss * 1024)
+    with open(result_path, "w", encoding="utf-8") as f:
+        json.dump({"wall_s": wall, "cpu_s": cpu, "peak_rss": peak}, f)
+
+
+def measure_once(engine, preset, input_path, tmp_dir):
+    """새 프로세스에서 한 번 압축하고 (wall_s, cpu_s, peak_rss, 결과 크기) 반환"""
+    output_path = os.path.join(tmp_dir, "out.pdf")
+    result_path = os.path.join(tmp_dir, "result.json")
+    for path in (output_path, result_path):
+        if os.path.exists(path):
+            os.remove(path)
+    process = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--_child", engine, preset, input_path, output_path,
+         result_path],
+        stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, cwd=ROOT
+    )
+    if process.returncode != 0:
+        lines = process.stderr.decode("utf-8", "replace").strip().splitlines()
+        raise RuntimeError(lines[-1] if lines else f"종료 코드 {process.returncode}")
+    with open(result_path, encoding="utf-8") as f:
+        measured = json.load(f)
+    return measured["wall_s"], measured["cpu_s"], measured["peak_rss"], os.path.getsize(output_path)
+
+
+def bench_file(engine, preset, name, input_path, page_count, repeat, tmp_dir):
+    walls, cpus, peaks = [], [], []
+    output_size = 0
+    for _ in range(repeat):
+        wall, cpu, peak, output_size = measure_once(engine, preset, input_path, tmp_dir)
+        walls.append(wall)
+        cpus.append(cpu)
+        peaks.append(peak)
+    wall = statistics.median(walls)
+    input_size = os.path.getsize(input_path)
+    return {
+        "file": name,
+        "engine": engine,
+        "preset": preset,
+        "pages": page_count,
+        "input_size": input_size,
+        "output_size": output_size,
+        "wall_s": round(wall, 4),
+        "cpu_s": round(statistics.median(cpus), 4),
+        "peak_rss": max(peaks),
+        "size_ratio": round(output_size / input_size, 4) if input_size else 0.0,
+        "pages_per_s": round(page_count / wall, 2) if wall > 0 else 0.0
+    }
+
+
+def _engine_available(engine):
+    """엔진을 실행할 수 없으면 이유 문자열, 가능하면 None"""
+    from pdf_compress_engines import get_engine
+    return get_engine(engine).unavailable_reason()
+
+
+def _result_key(result):
+    return result["file"], result["engine"], result["preset"]
+
+
+def compare(results, baseline, threshold, size_threshold):
+    """기준 결과보다 허용치 넘게 나빠진 항목 목록"""
+    allowed = {"threshold": threshold, "size_threshold": size_threshold}
+    old_results = {_result_key(result): result for result in baseline.get("results", [])}
+    regressions = []
+    for result in results:
+        old = old_results.get(_result_key(result))
+        if old is None:
+            continue
+        for metric, kind in COMPARED_METRICS.items():
+            if not old.get(metric):
+                continue
+            if metric in ("wall_s", "cpu_s") and old[metric] < MIN_COMPARED_SECONDS:
+                continue
+            limit = old[metric] * (1 + allowed[kind])
+            if result[metric] > limit:
+                regressions.append({
+                    "file": result["file"],
+                    "engine": result["engine"],
+                    "preset": result["preset"],
+                    "metric": metric,
+                    "baseline": old[metric],
+                    "current": result[metric],
+                    "change_percent": round((result[metric] / old[metric] - 1) * 100, 1)
+                })
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="엔진/프리셋별 압축 벤치마크")
+    parser.add_argument("--engines", default="ghostscript,pypdf",
+                        help="쉼표로 구분한 엔진 목록 (ghostscript, gsapi, pypdf, hybrid)")
+    parser.add_argument("--presets", help="쉼표로 구분한 프리셋 (기본값: 엔진별 대표 프리셋)")
+    parser.add_argument("--corpus", default=",".join(corpus.CORPUS),
+                        help=f"쉼표로 구분한 합성 문서 이름 ({', '.join(corpus.CORPUS)})")
+    parser.add_argument("--input-dir", help="합성 문서 대신 이 폴더의 PDF 사용")
+    parser.add_argument("--repeat", type=int, default=3, help="측정 반복 횟수 (중앙값 사용)")
+    parser.add_argument("--output", help="결과 JSON 저장 경로")
+    parser.add_argument("--save-baseline", metavar="PATH", help="결과를 기준 파일로 저장")
+    parser.add_argument("--baseline", metavar="PATH", help="비교할 기준 결과 JSON")
+    parser.add_argument("--threshold", type=float, default=0.15,
+                        help="시간/메모리 허용 증가율 (기본값: 0.15 = 15%%)")
+    parser.add_argument("--size-threshold", type=float, default=0.02,
+                        help="크기 비율 허용 증가율 (기본값: 0.02 = 2%%)")
+    parser.add_argument("--json", action="store_true", help="결과를 JSON으로 출력")
+    parser.add_argument("--_child", nargs=5, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args._child:
+        _child_main(*args._child)
+        return 0
+
+    from pdf_compress_split import count_pages
+
+    engines = [engine.strip() for engine in args.engines.split(",") if engine.strip()]
+    results = []
+    skipped = {}
+    with tempfile.TemporaryDirectory(prefix="bench_suite_") as tmp_dir:
+        if args.input_dir:
+            inputs = {os.path.splitext(name)[0]: os.path.join(args.input_dir, name)
+                      for name in sorted(os.listdir(args.input_dir)) if name.lower().endswith(".pdf")}
+        else:
+            names = [name.strip() for name in args.corpus.split(",") if name.strip()]
+            inputs = corpus.build_corpus(tmp_dir, names)
+        pages = {name: count_pages(path) for name, path in inputs.items()}
+
+        for engine in engines:
+            reason = _engine_available(engine)
+            if reason:
+                skipped[engine] = reason
+                continue
+            presets = args.presets.split(",") if args.presets else DEFAULT_PRESETS[engine]
+            for preset in presets:
+                for name, path in inputs.items():
+                    try:
+                        result = bench_file(engine, preset, name, path, pages[name], args.repeat, tmp_dir)
+                    except RuntimeError as e:
+                        result = {"file": name, "engine": engine, "preset": preset, "error": str(e)}
+                    results.append(result)
+                    if not args.json:
+                        print(_format_result(result), flush=True)
+
+    report = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "machine": {"python": platform.python_version(), "platform": platform.platform(),
+                    "cpus": os.cpu_count()},
+        "repeat": args.repeat,
+        "skipped": skipped,
+        "results": results
+    }
+    measured = [result for result in results if "error" not in result]
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        report["regressions"] = compare(measured, baseline, args.threshold, args.size_threshold)
+    for path in (args.output, args.save_baseline):
+        if path:
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(report, f, ensure_ascii=False, indent=2)
+
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+    else:
+        for engine, reason in skipped.items():
+            print(f"{engine}: 건너뜀 ({reason})")
+        for regression in report.get("regressions", []):
+            print(f"성능 저하: {regression['file']} {regression['engine']}/{regression['preset']} "
+                  f"{regression['metric']} {regression['baseline']} → {regression['current']} "
+                  f"({regression['change_percent']:+}%)")
+    failed = len(measured) != len(results) or bool(report.get("regressions"))
+    return 1 if failed else 0
+
+
+def _format_result(result):
+    prefix = f"{result['file']:<12} {result['engine']:<11} {result['preset']:<8}"
+    if "error" in result:
+        return f"{prefix} 실패: {result['error']}"
+    return (f"{prefix} {result['wall_s']:>8.3f}s  CPU {result['cpu_s']:>8.3f}s  "
+            f"RSS {result['peak_rss'] / (1024 * 1024):>6.1f} MB  비율 {result['size_ratio']:.3f}  "
+            f"{result['pages_per_s']:>8.1f} 페이지/s")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
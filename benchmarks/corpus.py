@@ -0,0 +1,197 @@
+# -*- coding: utf-8 -*-
+"""
+벤치마크용 PDF 생성기 (외부 라이브러리 없이 PDF를 직접 작성)
+
+같은 인자로 호출하면 항상 같은 바이트의 파일을 만듭니다.
+"""
+import os
+import random
+import zlib
+
+PAGE_WIDTH = 595   # A4 (pt)
+PAGE_HEIGHT = 842
+
+_WORDS = ("lorem ipsum dolor sit amet consectetur adipiscing elit sed do eiusmod tempor "
+          "incididunt ut labore et dolore magna aliqua invoice total amount date page").split()
+
+
+class PDFBuilder:
+    """객체 번호를 관리하며 PDF 파일을 조립"""
+
+    def __init__(self):
+        self.objects = []
+
+    def reserve(self):
+        self.objects.append(None)
+        return len(self.objects)
+
+    def set(self, num, body):
+        self.objects[num - 1] = body
+
+    def add(self, body):
+        num = self.reserve()
+        self.set(num, body)
+        return num
+
+    def add_stream(self, data, extra="", compress=True):
+        if compress:
+            data = zlib.compress(data, 9)
+            extra = f"/Filter /FlateDecode {extra}"
+        return self.add(b"<< /Length %d %s >>\nstream\n" % (len(data), extra.encode()) + data + b"\nendstream")
+
+    def build(self, root_num):
+        out = bytearray(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+        offsets = []
+        for num, body in enumerate(self.objects, 1):
+            offsets.append(len(out))
+            if isinstance(body, str):
+                body = body.encode("latin-1")
+            out += b"%d 0 obj\n" % num + body + b"\nendobj\n"
+        xref = len(out)
+        out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(self.objects) + 1)
+        for offset in offsets:
+            out += b"%010d 00000 n \n" % offset
+        out += b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (
+            len(self.objects) + 1, root_num, xref)
+        return bytes(out)
+
+
+def _text_content(rng, lines=45):
+    parts = ["BT /F1 11 Tf 50 800 Td 14 TL"]
+    for _ in range(lines):
+        words = " ".join(rng.choice(_WORDS) for _ in range(rng.randint(6, 12)))
+        parts.append(f"({words}) '")
+    parts.append("ET")
+    return "\n".join(parts).encode("latin-1")
+
+
+def _finish(builder, page_nums, pages_num, catalog_num):
+    kids = " ".join(f"{num} 0 R" for num in page_nums)
+    builder.set(pages_num, f"<< /Type /Pages /Kids [{kids}] /Count {len(page_nums)} >>")
+    builder.set(catalog_num, f"<< /Type /Catalog /Pages {pages_num} 0 R >>")
+    return builder.build(catalog_num)
+
+
+def text_pdf(pages=1, seed=0):
+    """텍스트만 있는 PDF (기본 Helvetica, 폰트 미포함)"""
+    rng = random.Random(seed)
+    builder = PDFBuilder()
+    catalog = builder.reserve()
+    pages_num = builder.reserve()
+    font = builder.add("<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+    page_nums = []
+    for _ in range(pages):
+        content = builder.add_stream(_text_content(rng))
+        page_nums.append(builder.add(
+            f"<< /Type /Page /Parent {pages_num} 0 R /MediaBox [0 0 {PAGE_WIDTH} {PAGE_HEIGHT}] "
+            f"/Resources << /Font << /F1 {font} 0 R >> >> /Contents {content} 0 R >>"))
+    return _finish(builder, page_nums, pages_num, catalog)
+
+
+def _scan_pixels(rng, width, height):
+    """스캔한 문서처럼 보이는 8비트 회색조 픽셀 (밝은 종이 + 잡음 + 어두운 글줄)"""
+    paper = bytes(200 + b % 56 for b in range(256))  # 무작위 바이트 → 200..255
+    ink = bytes(b % 90 for b in range(256))          # 무작위 바이트 → 0..89
+    rows = []
+    line_height = max(4, height // 60)
+    for y in range(height):
+        row = rng.randbytes(width).translate(paper)
+        if (y // line_height) % 2 and height // 12 < y < height - height // 12:
+            start = width // 10 + rng.randrange(width // 20)
+            end = width - width // 10 - rng.randrange(width // 3)
+            row = row[:start] + rng.randbytes(end - start).translate(ink) + row[end:]
+        rows.append(row)
+    return b"".join(rows)
+
+
+def scanned_pdf(pages=1, seed=0, dpi=100):
+    """페이지마다 A4 전체를 덮는 스캔 이미지 한 장 (Flate 압축 회색조)"""
+    rng = random.Random(seed)
+    builder = PDFBuilder()
+    catalog = builder.reserve()
+    pages_num = builder.reserve()
+    width, height = PAGE_WIDTH * dpi // 72, PAGE_HEIGHT * dpi // 72
+    page_nums = []
+    for _ in range(pages):
+        image = builder.add_stream(
+            _scan_pixels(rng, width, height),
+            f"/Type /XObject /Subtype /Image /Width {width} /Height {height} "
+            f"/ColorSpace /DeviceGray /BitsPerComponent 8")
+        content = builder.add_stream(f"q {PAGE_WIDTH} 0 0 {PAGE_HEIGHT} 0 0 cm /Scan Do Q".encode())
+        page_nums.append(builder.add(
+            f"<< /Type /Page /Parent {pages_num} 0 R /MediaBox [0 0 {PAGE_WIDTH} {PAGE_HEIGHT}] "
+            f"/Resources << /XObject << /Scan {image} 0 R >> >> /Contents {content} 0 R >>"))
+    return _finish(builder, page_nums, pages_num, catalog)
+
+
+def vector_pdf(pages=1, seed=0, paths=2000):
+    """선/곡선/채우기가 많은 도면형 PDF"""
+    rng = random.Random(seed)
+    builder = PDFBuilder()
+    catalog = builder.reserve()
+    pages_num = builder.reserve()
+    page_nums = []
+    for _ in range(pages):
+        parts = ["0.5 w"]
+        for _ in range(paths):
+            x, y = rng.uniform(0, PAGE_WIDTH), rng.uniform(0, PAGE_HEIGHT)
+            parts.append(f"{rng.random():.3f} {rng.random():.3f} {rng.random():.3f} RG {x:.2f} {y:.2f} m")
+            for _ in range(rng.randint(1, 4)):
+                points = " ".join(f"{rng.uniform(0, PAGE_WIDTH):.2f} {rng.uniform(0, PAGE_HEIGHT):.2f}"
+                                  for _ in range(3))
+                parts.append(f"{points} c")
+            parts.append(rng.choice(("S", "s", "b")))
+        content = builder.add_stream("\n".join(parts).encode("latin-1"))
+        page_nums.append(builder.add(
+            f"<< /Type /Page /Parent {pages_num} 0 R /MediaBox [0 0 {PAGE_WIDTH} {PAGE_HEIGHT}] "
+            f"/Resources << >> /Contents {content} 0 R >>"))
+    return _finish(builder, page_nums, pages_num, catalog)
+
+
+def shared_resources_pdf(pages=1, seed=0):
+    """모든 페이지가 같은 폰트/로고 이미지/폼 XObject를 공유하는 PDF (서식 문서)"""
+    rng = random.Random(seed)
+    builder = PDFBuilder()
+    catalog = builder.reserve()
+    pages_num = builder.reserve()
+    font = builder.add("<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+    logo = builder.add_stream(
+        _scan_pixels(rng, 600, 200),
+        "/Type /XObject /Subtype /Image /Width 600 /Height 200 /ColorSpace /DeviceGray /BitsPerComponent 8")
+    header = builder.add_stream(
+        f"q 150 0 0 50 40 780 cm /Logo Do Q 0 0 1 RG 40 770 m {PAGE_WIDTH - 40} 770 l S".encode(),
+        f"/Type /XObject /Subtype /Form /BBox [0 0 {PAGE_WIDTH} {PAGE_HEIGHT}] "
+        f"/Resources << /XObject << /Logo {logo} 0 R >> >>")
+    page_nums = []
+    for _ in range(pages):
+        content = builder.add_stream(b"/Header Do\n" + _text_content(rng, lines=30))
+        page_nums.append(builder.add(
+            f"<< /Type /Page /Parent {pages_num} 0 R /MediaBox [0 0 {PAGE_WIDTH} {PAGE_HEIGHT}] "
+            f"/Resources << /Font << /F1 {font} 0 R >> /XObject << /Header {header} 0 R /Logo {logo} 0 R >> >> "
+            f"/Contents {content} 0 R >>"))
+    return _finish(builder, page_nums, pages_num, catalog)
+
+
+# 벤치마크 기본 문서 묶음: 이름 → (생성 함수, 인자)
+CORPUS = {
+    "text": (text_pdf, {"pages": 20}),
+    "scanned": (scanned_pdf, {"pages": 6}),
+    "vector": (vector_pdf, {"pages": 5}),
+    "many_pages": (text_pdf, {"pages": 500}),
+    "shared": (shared_resources_pdf, {"pages": 50})
+}
+
+
+def write_pdf(path, data):
+    with open(path, "wb") as f:
+        f.write(data)
+    return path
+
+
+def build_corpus(directory, names=None, seed=0):
+    """CORPUS의 문서를 directory에 만들고 {이름: 경로}를 반환"""
+    paths = {}
+    for name in names or CORPUS:
+        func, kwargs = CORPUS[name]
+        paths[name] = write_pdf(os.path.join(directory, f"{name}.pdf"), func(seed=seed, **kwargs))
+    return paths
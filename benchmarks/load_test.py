@@ -0,0 +1,186 @@
+# -*- coding: utf-8 -*-
+"""
+로컬 HTTP 압축 서비스 부하 테스트
+
+    python benchmarks/load_test.py --start-server --requests 200 --concurrency 16
+    python benchmarks/load_test.py --url http://127.0.0.1:8350 --input samples/a.pdf --json
+
+동시에 concurrency개 연결로 POST /compress를 보내며 요청별 지연 시간을 잽니다.
+- 200 응답만 지연 시간 백분위수(p50/p90/p99)와 처리량 계산에 사용
+- 429(대기열 초과), 504(시간 초과), 연결 오류는 따로 셈
+--start-server를 주면 빈 포트로 pdf_compress_server를 띄우고 끝나면 종료합니다.
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from urllib.parse import urlsplit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import corpus  # noqa: E402
+from bench_gsapi import _percentile  # noqa: E402
+
+CHUNK_SIZE = 64 * 1024
+
+
+async def post_file(host, port, path, body_path, length):
+    """POST 한 번 → (상태 코드, 결과 바이트 수), Expect: 100-continue로 거절 시 업로드 생략"""
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        writer.write((f"POST {path} HTTP/1.1\r\nHost: {host}:{port}\r\nContent-Type: application/pdf\r\n"
+                      f"Content-Length: {length}\r\nExpect: 100-continue\r\n\r\n").encode("latin-1"))
+        await writer.drain()
+        status, headers = await _read_response_head(reader)
+        if status == 100:
+            with open(body_path, "rb") as f:
+                for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+                    writer.write(chunk)
+                    await writer.drain()
+            status, headers = await _read_response_head(reader)
+        received = 0
+        remaining = int(headers.get("content-length", 0))
+        while remaining:
+            chunk = await reader.read(min(CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            received += len(chunk)
+            remaining -= len(chunk)
+        return status, received
+    finally:
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except (ConnectionError, OSError):
+            pass
+
+
+async def _read_response_head(reader):
+    status_line = (await reader.readline()).decode("latin-1").split()
+    if len(status_line) < 2:
+        raise ConnectionError("응답이 없습니다.")
+    headers = {}
+    while True:
+        line = (await reader.readline()).decode("latin-1")
+        if line in ("\r\n", "\n", ""):
+            break
+        name, _, value = line.partition(":")
+        headers[name.strip().lower()] = value.strip()
+    return int(status_line[1]), headers
+
+
+async def run_load(url, body_path, requests, concurrency, preset):
+    parts = urlsplit(url)
+    host, port = parts.hostname, parts.port or 80
+    path = f"/compress?preset={preset}"
+    length = os.path.getsize(body_path)
+    latencies = []
+    statuses = {}
+    errors = 0
+    next_request = 0
+
+    async def client():
+        nonlocal next_request, errors
+        while next_request < requests:
+            next_request += 1
+            start = time.perf_counter()
+            try:
+                status, _ = await post_file(host, port, path, body_path, length)
+            except (ConnectionError, OSError, asyncio.IncompleteReadError):
+                errors += 1
+                continue
+            statuses[status] = statuses.get(status, 0) + 1
+            if status == 200:
+                latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    wall = time.perf_counter() - start
+    result = {
+        "requests": requests,
+        "concurrency": concurrency,
+        "input_size": length,
+        "wall_s": round(wall, 3),
+        "ok": len(latencies),
+        "statuses": {str(code): count for code, count in sorted(statuses.items())},
+        "connection_errors": errors,
+        "throughput_rps": round(len(latencies) / wall, 2) if wall > 0 else 0.0
+    }
+    if latencies:
+        result.update({f"p{int(q * 100)}_ms": round(_percentile(latencies, q) * 1000, 1) for q in (0.5, 0.9, 0.99)})
+        result["max_ms"] = round(max(latencies) * 1000, 1)
+    return result
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _start_server(server_args):
+    port = _free_port()
+    process = subprocess.Popen([sys.executable, "-m", "pdf_compress_server", "--port", str(port), *server_args],
+                               cwd=ROOT, stderr=subprocess.DEVNULL)
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.time() + 10
+    while time.time() < deadline:
+        try:
+            with urllib.request.urlopen(f"{url}/healthz", timeout=1):
+                return process, url
+        except OSError:
+            if process.poll() is not None:
+                raise RuntimeError("서버를 시작하지 못했습니다 (Ghostscript 설치 확인).")
+            time.sleep(0.1)
+    process.kill()
+    raise RuntimeError("서버가 응답하지 않습니다.")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="HTTP 압축 서비스 부하 테스트")
+    parser.add_argument("--url", default="http://127.0.0.1:8350", help="서비스 주소")
+    parser.add_argument("--start-server", action="store_true", help="빈 포트로 서버를 직접 띄워서 테스트")
+    parser.add_argument("--server-args", default="", help="--start-server 때 서버에 넘길 인자 (예: '--concurrency 2')")
+    parser.add_argument("--input", help="보낼 PDF (기본값: 3페이지 합성 텍스트 PDF)")
+    parser.add_argument("--requests", type=int, default=100, help="총 요청 수")
+    parser.add_argument("--concurrency", type=int, default=8, help="동시 연결 수")
+    parser.add_argument("--preset", default="ebook")
+    parser.add_argument("--json", action="store_true", help="결과를 JSON으로 출력")
+    args = parser.parse_args(argv)
+
+    server = None
+    with tempfile.TemporaryDirectory(prefix="load_test_") as tmp_dir:
+        body_path = args.input or corpus.write_pdf(os.path.join(tmp_dir, "input.pdf"), corpus.text_pdf(3))
+        url = args.url
+        try:
+            if args.start_server:
+                server, url = _start_server(args.server_args.split())
+            result = asyncio.run(run_load(url, body_path, args.requests, args.concurrency, args.preset))
+            with urllib.request.urlopen(f"{url}/healthz", timeout=5) as response:
+                result["server"] = json.load(response)
+        finally:
+            if server is not None:
+                server.terminate()
+                server.wait()
+
+    if args.json:
+        print(json.dumps(result, ensure_ascii=False, indent=2))
+        return 0
+    print(f"요청 {result['requests']}개, 동시 연결 {result['concurrency']}개, 입력 {result['input_size']} bytes")
+    print(f"  성공 {result['ok']}개, 상태 코드 {result['statuses']}, 연결 오류 {result['connection_errors']}개")
+    if result["ok"]:
+        print(f"  지연 p50 {result['p50_ms']} ms, p90 {result['p90_ms']} ms, p99 {result['p99_ms']} ms, "
+              f"최대 {result['max_ms']} ms")
+    print(f"  처리량 {result['throughput_rps']} 요청/s ({result['wall_s']} s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
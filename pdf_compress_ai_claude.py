@@ -1,10 +1,15 @@
 # -*- coding: utf-8 -*-
 import tkinter as tk
 from tkinter import filedialog, messagebox, ttk
-import PyPDF2
 import os
-from PIL import Image
-import io
+
+# pdf_compress_pypdf(PyPDF2/PIL)는 압축을 시작할 때 불러옴 (시작 시간 단축)
+from pdf_compress_api import run_engine, compress
+from pdf_compress_cache import get_default_cache
+from pdf_compress_worker import CompressionWorker
+
+# 품질 콤보박스의 목표 크기 모드 항목
+TARGET_QUALITY = "목표 크기"
 
 class PDFCompressor:
     def __init__(self, root):
@@ -13,7 +18,9 @@ class PDFCompressor:
         self.root.geometry("500x400")
         
         self.selected_file = None
-        self.setup_ui()
+        self.worker = None
+        # 위젯은 빈 창이 먼저 뜬 뒤 만듦
+        self.root.after_idle(self.setup_ui)
     
     def setup_ui(self):
         main_frame = ttk.Frame(self.root, padding="20")
@@ -30,16 +37,23 @@ class PDFCompressor:
         
         ttk.Label(main_frame, text="압축 품질:").grid(row=3, column=0, sticky=tk.W, pady=5)
         self.quality_var = tk.StringVar(value="높음")
-        quality_combo = ttk.Combobox(main_frame, textvariable=self.quality_var, values=["높음", "보통", "낮음"], state="readonly")
+        quality_combo = ttk.Combobox(main_frame, textvariable=self.quality_var, values=["높음", "보통", "낮음", TARGET_QUALITY], state="readonly")
         quality_combo.grid(row=3, column=1, sticky=tk.W, padx=(10, 0), pady=5)
         
-        ttk.Button(main_frame, text="압축 시작", command=self.compress_pdf).grid(row=4, column=0, columnspan=2, pady=20)
+        ttk.Label(main_frame, text="목표 크기(MB):").grid(row=4, column=0, sticky=tk.W, pady=5)
+        self.target_size_var = tk.StringVar(value="10")
+        ttk.Entry(main_frame, textvariable=self.target_size_var, width=10).grid(row=4, column=1, sticky=tk.W, padx=(10, 0), pady=5)
+        
+        self.start_button = ttk.Button(main_frame, text="압축 시작", command=self.compress_pdf)
+        self.start_button.grid(row=5, column=0, pady=20)
+        self.cancel_button = ttk.Button(main_frame, text="취소", command=self.cancel_compression, state="disabled")
+        self.cancel_button.grid(row=5, column=1, pady=20)
         
-        self.progress = ttk.Progressbar(main_frame, mode='indeterminate')
-        self.progress.grid(row=5, column=0, columnspan=2, sticky=(tk.W, tk.E), pady=10)
+        self.progress = ttk.Progressbar(main_frame, mode='determinate', maximum=100)
+        self.progress.grid(row=6, column=0, columnspan=2, sticky=(tk.W, tk.E), pady=10)
         
         self.status_label = ttk.Label(main_frame, text="준비됨")
-        self.status_label.grid(row=6, column=0, columnspan=2, pady=5)
+        self.status_label.grid(row=7, column=0, columnspan=2, pady=5)
         
         for child in main_frame.winfo_children():
             child.grid_configure(padx=5, pady=2)
@@ -63,19 +77,62 @@ class PDFCompressor:
             messagebox.showerror("오류", "PDF 파일을 먼저 선택하세요!")
             return
         
-        self.progress.start()
+        output_path = self.selected_file.replace('.pdf', '_compressed.pdf')
+        # Tk 변수는 메인 스레드에서만 읽음
+        target_size = None
+        if self.quality_var.get() == TARGET_QUALITY:
+            try:
+                target_size = int(float(self.target_size_var.get()) * 1024 * 1024)
+            except ValueError:
+                target_size = 0
+            if target_size <= 0:
+                messagebox.showerror("오류", "목표 크기를 MB 단위 숫자로 입력하세요!")
+                return
+            quality = None
+        else:
+            # 프리셋 이름을 그대로 넘겨야 엔진이 품질과 목표 해상도(배치 크기 기준 다운샘플링)를 함께 정함
+            quality = self.quality_var.get()
+        
+        self.progress['value'] = 0
         self.status_label.config(text="압축 중...")
-        self.root.update()
+        self.set_running(True)
         
+        # 같은 파일/설정으로 압축한 적이 있으면 캐시된 결과 재사용
+        self.worker = CompressionWorker(compress, self.selected_file, output_path, engine="pypdf",
+                                        preset=quality, cache=get_default_cache(), target_size=target_size)
+        self.worker.start().attach(
+            self.root,
+            on_progress=self.on_progress,
+            on_done=lambda result: self.on_compression_finished(output_path),
+            on_error=self.on_compression_error,
+            on_cancelled=self.on_compression_cancelled
+        )
+    
+    def set_running(self, running):
+        self.start_button.config(state="disabled" if running else "normal")
+        self.cancel_button.config(state="normal" if running else "disabled")
+        if not running:
+            self.worker = None
+    
+    def cancel_compression(self):
+        if self.worker is not None and self.worker.running:
+            self.worker.cancel()
+            self.cancel_button.config(state="disabled")
+            self.status_label.config(text="취소하는 중...")
+    
+    def on_progress(self, done, total):
+        if total:
+            self.progress['value'] = done * 100 / total
+            self.status_label.config(text=f"압축 중... ({done}/{total} 페이지)")
+    
+    def on_compression_finished(self, output_path):
+        self.set_running(False)
         try:
-            output_path = self.selected_file.replace('.pdf', '_compressed.pdf')
-            self.compress_pdf_file(self.selected_file, output_path)
-            
             original_size = os.path.getsize(self.selected_file)
             compressed_size = os.path.getsize(output_path)
             reduction_percent = ((original_size - compressed_size) / original_size) * 100
             
-            self.progress.stop()
+            self.progress['value'] = 100
             self.status_label.config(text=f"압축 완료! 크기 감소: {reduction_percent:.1f}%")
             
             messagebox.showinfo("완료", 
@@ -83,53 +140,28 @@ class PDFCompressor:
                 f"원본 크기: {self.format_size(original_size)}\n"
                 f"압축 후 크기: {self.format_size(compressed_size)}\n"
                 f"파일 저장 위치: {output_path}")
-                
         except Exception as e:
-            self.progress.stop()
-            self.status_label.config(text="압축 실패")
-            messagebox.showerror("오류", f"압축 중 오류가 발생했습니다:\n{str(e)}")
+            self.on_compression_error(e)
+    
+    def on_compression_error(self, error):
+        self.set_running(False)
+        self.progress['value'] = 0
+        self.status_label.config(text="압축 실패")
+        messagebox.showerror("오류", f"압축 중 오류가 발생했습니다:\n{str(error)}")
+    
+    def on_compression_cancelled(self):
+        self.set_running(False)
+        self.progress['value'] = 0
+        self.status_label.config(text="압축이 취소되었습니다")
     
     def compress_pdf_file(self, input_path, output_path):
-        quality_settings = {
-            "높음": 85,
-            "보통": 70,
-            "낮음": 50
-        }
-        quality = quality_settings[self.quality_var.get()]
-        
-        with open(input_path, 'rb') as input_file:
-            reader = PyPDF2.PdfReader(input_file)
-            writer = PyPDF2.PdfWriter()
-            
-            for page in reader.pages:
-                page.compress_content_streams()
-                
-                if "/Resources" in page and "/XObject" in page["/Resources"]:
-                    xObject = page["/Resources"]["/XObject"].get_object()
-                    
-                    for obj in xObject:
-                        if xObject[obj]["/Subtype"] == "/Image":
-                            try:
-                                self.compress_image_in_page(xObject[obj], quality)
-                            except Exception:
-                                pass
-                
-                writer.add_page(page)
-            
-            with open(output_path, 'wb') as output_file:
-                writer.write(output_file)
+        quality = self.quality_var.get()
+        # 같은 파일/설정으로 압축한 적이 있으면 캐시된 결과 재사용
+        run_engine("pypdf", input_path, output_path, quality, cache=get_default_cache())
     
     def compress_image_in_page(self, img_obj, quality):
-        try:
-            img_data = img_obj._data
-            img = Image.open(io.BytesIO(img_data))
-            
-            output = io.BytesIO()
-            img.save(output, format='JPEG', optimize=True, quality=quality)
-            
-            img_obj._data = output.getvalue()
-        except Exception:
-            pass
+        import pdf_compress_pypdf
+        pdf_compress_pypdf.compress_image_in_page(img_obj, quality)
     
     def format_size(self, size_bytes):
         if size_bytes < 1024:
@@ -0,0 +1,655 @@
+# -*- coding: utf-8 -*-
+"""
+압축 전 빠른 분석: 얼마나 줄어들지 미리 추정
+
+    python -m pdf_compress_analyze input.pdf [--json]
+
+    from pdf_compress_analyze import analyze_pdf, recommend_preset
+    analysis = analyze_pdf("in.pdf")
+    analysis.expected_percent("ghostscript", "ebook")   # 예상 감소율 (%)
+
+xref와 객체 딕셔너리만 읽고 스트림은 디코딩하지 않습니다 (스트림 크기는 /Length 사용).
+- 이미지: 필터별 / 해상도 구간별 개수와 바이트 (해상도는 이미지가 페이지를 채운다고 보고 구한 최솟값)
+- 폰트 파일, 콘텐츠/폼 스트림(압축 안 된 것 따로), 내용이 같은 스트림 바이트
+- 엔진/프리셋별 예상 결과 크기: 이미지 다운샘플링·JPEG 재인코딩, 콘텐츠 스트림 압축,
+  폰트 서브셋(gs), 중복 제거만 반영한 대략적인 값
+이미 최적화된 파일을 건너뛰거나(일괄 압축 min_savings) 프리셋을 미리 고르는 데(recommend_preset) 씁니다.
+"""
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+import time
+from dataclasses import dataclass, field
+
+# gs 프리셋별 (컬러/회색 이미지 목표 해상도, 비슷한 JPEG quality)
+GS_PRESET_MODEL = {
+    "prepress": (300, 90),
+    "printer": (300, 85),
+    "ebook": (150, 60),
+    "screen": (72, 40)
+}
+
+# 품질 높은 순서 (recommend_preset이 이 순서로 확인)
+PRESET_ORDER = {
+    "ghostscript": ("prepress", "printer", "ebook", "screen"),
+    "pypdf": ("높음", "보통", "낮음")
+}
+
+# JPEG quality → 컬러 이미지 픽셀당 비트 수 (사진/스캔 기준 대략값, 사이는 선형 보간)
+JPEG_BITS_PER_PIXEL = ((30, 0.7), (40, 0.8), (50, 1.0), (60, 1.2), (70, 1.3), (75, 1.5),
+                       (85, 2.2), (90, 3.0), (95, 4.5))
+
+# 색 성분 수 → JPEG_BITS_PER_PIXEL에 곱할 값
+COMPONENT_FACTOR = {1: 0.6, 3: 1.0, 4: 1.3}
+
+# 이미 JPEG인 이미지를 해상도 그대로 다시 인코딩하면 많아야 이 비율까지 줄어든다고 봄 (세대 손실 때문에 더 못 낮춤)
+DCT_REENCODE_RATIO = 0.8
+
+# 압축 안 된 콘텐츠 스트림을 Flate로 압축했을 때의 비율
+CONTENT_FLATE_RATIO = 0.3
+
+# gs가 서브셋이 아닌 폰트를 서브셋으로 만들었을 때 남는 비율
+FONT_SUBSET_RATIO = 0.4
+
+# 해상도 구간 (하한 dpi, 이름)
+DPI_BUCKETS = ((300, "300+"), (200, "200-299"), (150, "150-199"), (100, "100-149"), (0, "<100"))
+UNKNOWN_DPI = "알 수 없음"
+
+# 딕셔너리를 읽을 때 처음 읽는 바이트 수 (모자라면 늘려서 다시 읽음)
+_WINDOW = 1024
+_MAX_WINDOW = 4 * 1024 * 1024
+
+_OBJ_HEADER = re.compile(rb"\s*\d+\s+\d+\s+obj\b")
+_STREAM_KEYWORD = re.compile(rb"\s*stream(\r\n|\n|\r)")
+_SKIP = re.compile(rb"(?:[\s\x00]|%[^\r\n]*)*")
+_NAME = re.compile(rb"/[^\s\x00/\[\]<>(){}%]*")
+_NUMBER = re.compile(rb"[+-]?(?:\d+\.?\d*|\.\d+)")
+_REF_TAIL = re.compile(rb"\s+(\d+)\s+R(?![^\s\x00/\[\]<>(){}%])")
+_KEYWORDS = {b"true": True, b"false": False, b"null": None}
+_NAME_ESCAPE = re.compile(rb"#([0-9A-Fa-f]{2})")
+
+_MONO_FILTERS = ("/CCITTFaxDecode", "/JBIG2Decode")
+
+_COLORSPACE_COMPONENTS = {
+    "/DeviceGray": 1, "/CalGray": 1, "/G": 1, "/Separation": 1,
+    "/DeviceRGB": 3, "/CalRGB": 3, "/RGB": 3, "/Lab": 3,
+    "/DeviceCMYK": 4, "/CMYK": 4
+}
+
+
+@dataclass
+class ImageEntry:
+    """분석한 이미지 객체 하나"""
+    number: int
+    filter: str
+    width: int
+    height: int
+    bits: int
+    components: int          # 0이면 Indexed 등 JPEG로 바꾸지 않는 색 공간
+    length: int
+    dpi: float = None
+    duplicate: bool = False  # 같은 내용의 다른 이미지가 먼저 나옴
+
+
+@dataclass
+class PdfAnalysis:
+    """분석 결과"""
+    path: str
+    file_size: int = 0
+    page_count: int = 0
+    object_count: int = 0
+    unparsed_objects: int = 0
+    images: list = field(default_factory=list)
+    image_bytes: int = 0
+    font_bytes: int = 0
+    unsubset_font_bytes: int = 0
+    content_bytes: int = 0
+    uncompressed_content_bytes: int = 0
+    duplicate_objects: int = 0
+    duplicate_bytes: int = 0
+    estimates: dict = field(default_factory=dict)  # 엔진 → {프리셋: 예상 크기}
+    seconds: float = 0.0
+
+    @property
+    def images_by_filter(self):
+        return _group(self.images, lambda image: image.filter)
+
+    @property
+    def images_by_dpi(self):
+        return _group(self.images, lambda image: dpi_bucket(image.dpi))
+
+    def expected_size(self, engine, preset):
+        engine, preset = _estimate_key(engine, preset)
+        if preset not in self.estimates[engine] and engine == "ghostscript":
+            # 사용자 프리셋은 처음 물어볼 때 그 해상도/화질로 추정
+            from pdf_compress_presets import get_custom_preset
+            custom = get_custom_preset(preset)
+            if custom is not None:
+                from pdf_compress_pypdf import DOWNSAMPLE_THRESHOLD
+                self.estimates[engine][preset] = _estimate(self, custom.color_resolution, custom.jpeg_quality,
+                                                           DOWNSAMPLE_THRESHOLD, custom.subset_fonts)
+        return self.estimates[engine][preset]
+
+    def expected_percent(self, engine, preset):
+        """예상 감소율 (%), 커질 것으로 보이면 0"""
+        if not self.file_size:
+            return 0.0
+        return max(0.0, (self.file_size - self.expected_size(engine, preset)) / self.file_size * 100)
+
+
+def _group(images, key):
+    groups = {}
+    for image in images:
+        stats = groups.setdefault(key(image), {"count": 0, "bytes": 0})
+        stats["count"] += 1
+        stats["bytes"] += image.length
+    return groups
+
+
+def dpi_bucket(dpi):
+    if dpi is None:
+        return UNKNOWN_DPI
+    for low, name in DPI_BUCKETS:
+        if dpi >= low:
+            return name
+    return DPI_BUCKETS[-1][1]
+
+
+def _estimate_key(engine, preset):
+    """(추정표의 엔진 이름, 프리셋 이름): gsapi/hybrid는 gs 추정 사용, pypdf 영문 별칭 변환"""
+    if engine == "pypdf":
+        from pdf_compress_pypdf import QUALITY_ALIASES
+        return "pypdf", QUALITY_ALIASES.get(preset, preset)
+    return "ghostscript", preset
+
+
+class Ref(tuple):
+    """간접 참조 (객체 번호)"""
+
+    @property
+    def idnum(self):
+        return self[0]
+
+    def __repr__(self):
+        return f"{self[0]} R"
+
+
+class _Truncated(ValueError):
+    """읽은 범위 안에서 객체가 끝나지 않음"""
+
+
+def _parse_value(data, pos):
+    """
+    data[pos]부터 PDF 값 하나를 읽어 (값, 다음 위치) 반환
+    이름은 '/Name' 문자열, 참조는 Ref, 문자열은 괄호/꺾쇠를 포함한 원래 바이트로 돌려줌
+    """
+    pos = _SKIP.match(data, pos).end()
+    if pos >= len(data):
+        raise _Truncated()
+    char = data[pos:pos + 1]
+    if char == b"/":
+        match = _NAME.match(data, pos)
+        return _NAME_ESCAPE.sub(lambda m: bytes([int(m.group(1), 16)]), match.group()).decode("latin-1"), match.end()
+    if data.startswith(b"<<", pos):
+        result = {}
+        pos += 2
+        while True:
+            pos = _SKIP.match(data, pos).end()
+            if data.startswith(b">>", pos):
+                return result, pos + 2
+            key, pos = _parse_value(data, pos)
+            result[key], pos = _parse_value(data, pos)
+    if char == b"[":
+        items = []
+        pos += 1
+        while True:
+            pos = _SKIP.match(data, pos).end()
+            if data.startswith(b"]", pos):
+                return items, pos + 1
+            item, pos = _parse_value(data, pos)
+            items.append(item)
+    if char == b"(":
+        depth, end = 0, pos
+        while end < len(data):
+            byte = data[end]
+            if byte == 0x5C:  # 역슬래시: 다음 글자는 건너뜀
+                end += 2
+                continue
+            depth += byte == 0x28
+            depth -= byte == 0x29
+            end += 1
+            if depth == 0:
+                return data[pos:end], end
+        raise _Truncated()
+    if char == b"<":
+        end = data.find(b">", pos)
+        if end < 0:
+            raise _Truncated()
+        return data[pos:end + 1], end + 1
+    match = _NUMBER.match(data, pos)
+    if match:
+        text = match.group()
+        if b"." in text:
+            return float(text), match.end()
+        ref = _REF_TAIL.match(data, match.end())
+        if ref:
+            return Ref((int(text),)), ref.end()
+        return int(text), match.end()
+    for keyword, value in _KEYWORDS.items():
+        if data.startswith(keyword, pos):
+            return value, pos + len(keyword)
+    raise ValueError(f"알 수 없는 토큰: {data[pos:pos + 16]!r}")
+
+
+def _from_pypdf(obj):
+    """PyPDF2 객체(객체 스트림 안의 객체)를 _parse_value와 같은 형태로 변환"""
+    from PyPDF2.generic import IndirectObject
+    if isinstance(obj, IndirectObject):
+        return Ref((obj.idnum,))
+    if isinstance(obj, dict):
+        return {str(key): _from_pypdf(value) for key, value in obj.items()}
+    if isinstance(obj, list):
+        return [_from_pypdf(item) for item in obj]
+    if isinstance(obj, str):
+        return str(obj)
+    return obj
+
+
+class _ObjectTable:
+    """xref 위치에서 객체 딕셔너리만 읽는 읽기 전용 표 (스트림 본문은 읽지 않음)"""
+
+    def __init__(self, f, reader):
+        self.f = f
+        self.reader = reader
+        self.offsets = {}
+        for generation in sorted(reader.xref):
+            for number, offset in reader.xref[generation].items():
+                if number > 0 and offset:
+                    self.offsets[number] = offset
+        self.compressed = dict(reader.xref_objStm)
+        self.entries = {}   # 번호 → (객체, 스트림 본문 위치 또는 None)
+        self.unparsed = 0
+
+    def numbers(self):
+        return sorted(set(self.offsets) | set(self.compressed))
+
+    def entry(self, number):
+        if number not in self.entries:
+            try:
+                self.entries[number] = self._load(number)
+            except Exception:
+                self.unparsed += 1
+                self.entries[number] = (None, None)
+        return self.entries[number]
+
+    def get(self, number):
+        return self.entry(number)[0]
+
+    def resolve(self, value):
+        seen = 0
+        while isinstance(value, Ref) and seen < 8:
+            value = self.get(value.idnum)
+            seen += 1
+        return value
+
+    def stream_length(self, number):
+        obj, data_offset = self.entry(number)
+        if data_offset is None:
+            return 0
+        try:
+            return int(self.resolve(obj.get("/Length")) or 0)
+        except (TypeError, ValueError):
+            return 0
+
+    def raw_stream(self, number):
+        """스트림 본문 (인코딩된 그대로, 중복 확인용)"""
+        _, data_offset = self.entry(number)
+        self.f.seek(data_offset)
+        return self.f.read(self.stream_length(number))
+
+    def _load(self, number):
+        if number not in self.offsets:
+            # 객체 스트림 안의 객체는 스트림일 수 없으므로 PyPDF2에 맡김 (객체 스트림만 디코딩)
+            from PyPDF2.generic import IndirectObject
+            return _from_pypdf(self.reader.get_object(IndirectObject(number, 0, self.reader))), None
+        offset = self.offsets[number]
+        window = _WINDOW
+        while True:
+            self.f.seek(offset)
+            data = self.f.read(window)
+            try:
+                return self._parse(data, offset, len(data) < window)
+            except _Truncated:
+                if window >= _MAX_WINDOW or len(data) < window:
+                    raise
+                window *= 4
+
+    @staticmethod
+    def _parse(data, offset, at_eof):
+        header = _OBJ_HEADER.match(data)
+        if header is None:
+            raise ValueError("객체 머리글이 없습니다.")
+        obj, end = _parse_value(data, header.end())
+        if not isinstance(obj, dict):
+            return obj, None
+        keyword = _STREAM_KEYWORD.match(data, end)
+        if keyword is None and not at_eof and len(data) - end < 16:
+            raise _Truncated()  # 'stream' 키워드가 잘렸을 수 있음
+        return obj, (offset + keyword.end() if keyword else None)
+
+
+def _names(value):
+    if value is None:
+        return []
+    return [str(item) for item in value] if isinstance(value, list) else [str(value)]
+
+
+def _refs(value):
+    items = value if isinstance(value, list) else [value]
+    return [item.idnum for item in items if isinstance(item, Ref)]
+
+
+def _components(table, colorspace):
+    """색 공간의 성분 수 (Indexed/Pattern 등 JPEG로 바꾸지 않는 색 공간은 0)"""
+    colorspace = table.resolve(colorspace)
+    if colorspace is None:
+        return 3
+    if isinstance(colorspace, list):
+        if not colorspace:
+            return 0
+        family = str(table.resolve(colorspace[0]))
+        if family == "/ICCBased" and len(colorspace) > 1:
+            profile = table.resolve(colorspace[1])
+            return int(table.resolve(profile.get("/N", 3))) if profile is not None else 3
+        if family == "/DeviceN" and len(colorspace) > 1:
+            return len(table.resolve(colorspace[1]) or [])
+        return _COLORSPACE_COMPONENTS.get(family, 0)
+    return _COLORSPACE_COMPONENTS.get(str(colorspace), 0)
+
+
+def _inherited(table, page, key):
+    """페이지 트리를 따라 올라가며 상속되는 값 찾기"""
+    node = page
+    for _ in range(64):
+        if node is None:
+            return None
+        if key in node:
+            return table.resolve(node[key])
+        node = table.resolve(node.get("/Parent"))
+    return None
+
+
+def _page_image_dpi(table, page, images):
+    """페이지에서 쓰는 이미지마다 페이지를 가득 채운다고 볼 때의 해상도를 기록 (여러 페이지면 가장 낮은 값)"""
+    resources = _inherited(table, page, "/Resources")
+    mediabox = _inherited(table, page, "/MediaBox")
+    if resources is None or not mediabox or len(mediabox) < 4:
+        return
+    xobjects = table.resolve(resources.get("/XObject"))
+    if not xobjects:
+        return
+    try:
+        width_in = abs(float(table.resolve(mediabox[2])) - float(table.resolve(mediabox[0]))) / 72
+        height_in = abs(float(table.resolve(mediabox[3])) - float(table.resolve(mediabox[1]))) / 72
+    except (TypeError, ValueError):
+        return
+    if width_in <= 0 or height_in <= 0:
+        return
+    for number in _refs(list(xobjects.values())):
+        image = images.get(number)
+        if image is None:
+            continue
+        dpi = max(image.width / width_in, image.height / height_in)
+        image.dpi = dpi if image.dpi is None else min(image.dpi, dpi)
+
+
+def _mark_duplicates(table, numbers, analysis, verify):
+    """딕셔너리(/Length 제외)와 길이가 같은 스트림을 찾아 본문 해시로 확인"""
+    candidates = {}
+    for number in numbers:
+        obj, data_offset = table.entry(number)
+        if data_offset is None or obj.get("/Type") in ("/XRef", "/ObjStm"):
+            continue
+        length = table.stream_length(number)
+        if not length:
+            continue
+        key = (length, repr(sorted((k, v) for k, v in obj.items() if k != "/Length")))
+        candidates.setdefault(key, []).append(number)
+    duplicates = set()
+    for (length, _), group in candidates.items():
+        if len(group) < 2:
+            continue
+        seen = set()
+        for number in group:
+            digest = hashlib.sha256(table.raw_stream(number)).digest() if verify else None
+            if digest in seen:
+                duplicates.add(number)
+                analysis.duplicate_objects += 1
+                analysis.duplicate_bytes += length
+            seen.add(digest)
+    return duplicates
+
+
+def _jpeg_bytes(pixels, components, quality):
+    points = JPEG_BITS_PER_PIXEL
+    if quality <= points[0][0]:
+        bits = points[0][1]
+    elif quality >= points[-1][0]:
+        bits = points[-1][1]
+    else:
+        for (q0, b0), (q1, b1) in zip(points, points[1:]):
+            if q0 <= quality <= q1:
+                bits = b0 + (b1 - b0) * (quality - q0) / (q1 - q0)
+                break
+    return pixels * bits / 8 * COMPONENT_FACTOR.get(components, 1.0)
+
+
+def _estimate_image(image, target_dpi, quality, threshold):
+    """이미지 하나의 예상 크기 (줄어들 때만 바꾼다고 봄)"""
+    if image.duplicate:
+        return 0
+    if image.bits == 1 or image.filter in _MONO_FILTERS:
+        return image.length
+    scale = 1.0
+    if image.dpi and target_dpi and image.dpi > target_dpi * threshold:
+        scale = (target_dpi / image.dpi) ** 2
+    if not image.components:
+        # Indexed 등은 무손실 그대로, 다운샘플링 비율만 반영
+        return image.length * scale
+    estimate = _jpeg_bytes(image.width * image.height * scale, image.components, quality)
+    if image.filter == "/DCTDecode" and scale == 1.0:
+        estimate = max(estimate, image.length * DCT_REENCODE_RATIO)
+    return min(image.length, estimate)
+
+
+def _estimate(analysis, target_dpi, quality, threshold, subset_fonts):
+    other = analysis.file_size - analysis.image_bytes - analysis.font_bytes - analysis.content_bytes
+    # 이미지 중복은 _estimate_image에서 0으로 셈
+    other -= analysis.duplicate_bytes - sum(image.length for image in analysis.images if image.duplicate)
+    content = (analysis.content_bytes - analysis.uncompressed_content_bytes
+                + analysis.uncompressed_content_bytes * CONTENT_FLATE_RATIO)
+    fonts = analysis.font_bytes
+    if subset_fonts:
+        fonts -= analysis.unsubset_font_bytes * (1 - FONT_SUBSET_RATIO)
+    images = sum(_estimate_image(image, target_dpi, quality, threshold) for image in analysis.images)
+    return int(max(0, other) + content + fonts + images)
+
+
+def _estimate_presets(analysis):
+    from pdf_compress_pypdf import DOWNSAMPLE_THRESHOLD, QUALITY_PRESETS, TARGET_DPI
+    analysis.estimates = {
+        "ghostscript": {preset: _estimate(analysis, dpi, quality, DOWNSAMPLE_THRESHOLD, True)
+                        for preset, (dpi, quality) in GS_PRESET_MODEL.items()},
+        "pypdf": {preset: _estimate(analysis, TARGET_DPI[preset], quality, DOWNSAMPLE_THRESHOLD, False)
+                  for preset, quality in QUALITY_PRESETS.items()}
+    }
+
+
+def analyze_pdf(path, verify_duplicates=True):
+    """
+    PDF 한 개를 분석해 PdfAnalysis 반환
+    - verify_duplicates: 중복 후보 스트림의 본문을 읽어 해시로 확인 (False면 딕셔너리/길이만 비교)
+    """
+    import PyPDF2
+
+    start = time.perf_counter()
+    analysis = PdfAnalysis(path=path, file_size=os.path.getsize(path))
+    with open(path, "rb") as f:
+        reader = PyPDF2.PdfReader(f)
+        table = _ObjectTable(f, reader)
+        numbers = table.numbers()
+        analysis.object_count = len(numbers)
+
+        images = {}
+        pages = []
+        font_files = {}      # 폰트 파일 스트림 번호 → 서브셋 여부
+        content_streams = set()
+        for number in numbers:
+            obj, data_offset = table.entry(number)
+            if not isinstance(obj, dict):
+                continue
+            kind = obj.get("/Type")
+            subtype = obj.get("/Subtype")
+            if data_offset is not None and subtype == "/Image":
+                filters = _names(table.resolve(obj.get("/Filter")))
+                images[number] = ImageEntry(
+                    number=number,
+                    filter=filters[-1] if filters else "없음",
+                    width=int(table.resolve(obj.get("/Width", 0)) or 0),
+                    height=int(table.resolve(obj.get("/Height", 0)) or 0),
+                    bits=1 if obj.get("/ImageMask") else int(table.resolve(obj.get("/BitsPerComponent", 8)) or 8),
+                    components=_components(table, obj.get("/ColorSpace")),
+                    length=table.stream_length(number)
+                )
+            elif data_offset is not None and subtype == "/Form":
+                content_streams.add(number)
+            elif kind == "/Page":
+                pages.append(obj)
+                contents = obj.get("/Contents")
+                resolved = table.resolve(contents)
+                content_streams.update(_refs(resolved if isinstance(resolved, list) else contents))
+            elif kind == "/FontDescriptor":
+                subset = "+" in str(table.resolve(obj.get("/FontName", "")))[:8]
+                for key in ("/FontFile", "/FontFile2", "/FontFile3"):
+                    for font_number in _refs(obj.get(key)):
+                        font_files[font_number] = subset
+
+        analysis.page_count = len(pages)
+        for page in pages:
+            _page_image_dpi(table, page, images)
+        # 소프트 마스크는 그 마스크를 쓰는 이미지와 같은 크기로 그려짐
+        for image in list(images.values()):
+            mask = images.get((_refs(table.get(image.number).get("/SMask")) or [None])[0])
+            if mask is not None and mask.dpi is None and image.dpi is not None:
+                mask.dpi = image.dpi * mask.width / image.width if image.width else None
+
+        for number in content_streams:
+            obj, data_offset = table.entry(number)
+            if data_offset is None:
+                continue
+            length = table.stream_length(number)
+            analysis.content_bytes += length
+            if not obj.get("/Filter"):
+                analysis.uncompressed_content_bytes += length
+        for number, subset in font_files.items():
+            length = table.stream_length(number)
+            analysis.font_bytes += length
+            if not subset:
+                analysis.unsubset_font_bytes += length
+
+        duplicates = _mark_duplicates(table, numbers, analysis, verify_duplicates)
+        for number, image in images.items():
+            image.duplicate = number in duplicates
+        analysis.images = [images[number] for number in sorted(images)]
+        analysis.image_bytes = sum(image.length for image in analysis.images)
+        analysis.unparsed_objects = table.unparsed
+
+    _estimate_presets(analysis)
+    analysis.seconds = time.perf_counter() - start
+    return analysis
+
+
+def recommend_preset(analysis, engine, min_savings=0.0):
+    """
+    예상 감소율이 min_savings(%) 이상인 프리셋 중 가장 품질이 높은 것 (없으면 None)
+    - engine: ghostscript/gsapi/hybrid는 gs 프리셋, pypdf는 높음/보통/낮음
+    """
+    family, _ = _estimate_key(engine, None)
+    for preset in PRESET_ORDER[family]:
+        if analysis.expected_percent(family, preset) >= max(min_savings, 0.0) and \
+                analysis.expected_size(family, preset) < analysis.file_size:
+            return preset
+    return None
+
+
+def analysis_to_dict(analysis):
+    """JSON 출력용"""
+    return {
+        "path": analysis.path,
+        "file_size": analysis.file_size,
+        "pages": analysis.page_count,
+        "objects": analysis.object_count,
+        "unparsed_objects": analysis.unparsed_objects,
+        "image_bytes": analysis.image_bytes,
+        "images_by_filter": analysis.images_by_filter,
+        "images_by_dpi": analysis.images_by_dpi,
+        "font_bytes": analysis.font_bytes,
+        "unsubset_font_bytes": analysis.unsubset_font_bytes,
+        "content_bytes": analysis.content_bytes,
+        "uncompressed_content_bytes": analysis.uncompressed_content_bytes,
+        "duplicate_objects": analysis.duplicate_objects,
+        "duplicate_bytes": analysis.duplicate_bytes,
+        "expected": {engine: {preset: {"size": size, "percent": round(analysis.expected_percent(engine, preset), 1)}
+                              for preset, size in presets.items()}
+                     for engine, presets in analysis.estimates.items()},
+        "seconds": round(analysis.seconds, 4)
+    }
+
+
+def format_analysis(analysis):
+    """분석 결과를 여러 줄 문자열로 반환"""
+    kb = 1024
+    lines = [f"{analysis.path}: {analysis.file_size / kb:.1f} KB, {analysis.page_count}페이지, "
+             f"객체 {analysis.object_count}개 ({analysis.seconds * 1000:.1f} ms)"]
+    lines.append(f"  이미지 {len(analysis.images)}개 {analysis.image_bytes / kb:.1f} KB")
+    for name, stats in sorted(analysis.images_by_filter.items()):
+        lines.append(f"    {name}: {stats['count']}개 {stats['bytes'] / kb:.1f} KB")
+    for _, name in DPI_BUCKETS + ((None, UNKNOWN_DPI),):
+        stats = analysis.images_by_dpi.get(name)
+        if stats:
+            lines.append(f"    {name} dpi: {stats['count']}개 {stats['bytes'] / kb:.1f} KB")
+    lines.append(f"  폰트 {analysis.font_bytes / kb:.1f} KB (서브셋 아님 {analysis.unsubset_font_bytes / kb:.1f} KB)")
+    lines.append(f"  콘텐츠 스트림 {analysis.content_bytes / kb:.1f} KB "
+                 f"(압축 안 됨 {analysis.uncompressed_content_bytes / kb:.1f} KB)")
+    lines.append(f"  중복 스트림 {analysis.duplicate_objects}개 {analysis.duplicate_bytes / kb:.1f} KB")
+    for engine, presets in analysis.estimates.items():
+        expected = ", ".join(f"{preset} {analysis.expected_percent(engine, preset):.0f}%" for preset in presets)
+        lines.append(f"  예상 감소 ({engine}): {expected}")
+    if analysis.unparsed_objects:
+        lines.append(f"  읽지 못한 객체 {analysis.unparsed_objects}개")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m pdf_compress_analyze",
+                                     description="PDF 압축 전 분석 (예상 감소율)")
+    parser.add_argument("inputs", nargs="+", help="PDF 파일")
+    parser.add_argument("--json", action="store_true", help="결과를 JSON 한 줄씩 출력")
+    args = parser.parse_args(argv)
+    status = 0
+    for path in args.inputs:
+        try:
+            analysis = analyze_pdf(path)
+        except Exception as e:
+            print(f"❌ {path}: {e}", file=sys.stderr)
+            status = 1
+            continue
+        print(json.dumps(analysis_to_dict(analysis), ensure_ascii=False) if args.json else format_analysis(analysis))
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,282 @@
+# -*- coding: utf-8 -*-
+"""
+PDF 압축 라이브러리 API (GUI 비의존)
+
+    from pdf_compress_api import compress
+    result = compress("in.pdf", "out.pdf", engine="ghostscript", preset="ebook")
+
+결과는 CompressionResult로 반환하고, 실패 시 예외를 발생시킵니다.
+엔진 모듈은 실제로 사용할 때만 불러옵니다.
+"""
+import os
+import time
+from dataclasses import dataclass
+
+from pdf_compress_engines import get_engine
+from pdf_compress_metrics import collect
+
+ENGINES = ("ghostscript", "gsapi", "pypdf", "hybrid")
+
+ENGINE_ALIASES = {
+    "gs": "ghostscript",
+    "pypdf2": "pypdf"
+}
+
+DEFAULT_PRESETS = {
+    "ghostscript": "ebook",
+    "gsapi": "ebook",
+    "pypdf": "높음",
+    "hybrid": "ebook"
+}
+
+
+@dataclass
+class CompressionResult:
+    """압축 결과"""
+    input_path: str
+    output_path: str
+    engine: str
+    preset: str
+    original_size: int
+    compressed_size: int
+    seconds: float
+    details: object = None  # 엔진/모드별 상세 결과 (예: SplitReport, ImageReport)
+    cached: bool = False
+    timings: object = None  # 단계별 소요 시간 (pdf_compress_metrics.StageTimings.as_dict())
+    resources: object = None  # gs 프로세스 CPU 시간/최대 RSS (StageTimings.resources_dict())
+
+    @property
+    def reduction_percent(self):
+        if not self.original_size:
+            return 0.0
+        return (self.original_size - self.compressed_size) / self.original_size * 100
+
+
+def format_reduction(percent):
+    """감소율 표시 ('12.3% 감소', 결과가 더 커졌으면 '2.4% 증가')"""
+    if percent < 0:
+        return f"{-percent:.1f}% 증가"
+    return f"{percent:.1f}% 감소"
+
+
+def resolve_engine(engine):
+    """엔진 이름(별칭 포함)을 정식 이름으로 변환"""
+    name = ENGINE_ALIASES.get(engine, engine)
+    if name not in ENGINES:
+        raise ValueError(f"알 수 없는 엔진입니다: {engine} (사용 가능: {', '.join(ENGINES)})")
+    return name
+
+
+def engine_version(engine):
+    """캐시 키에 쓰는 엔진 버전"""
+    return get_engine(engine).version()
+
+
+def run_engine(engine, input_path, output_path, preset, cache=None,
+               progress_callback=None, cancel_event=None, memory_limit=None, linearize=False):
+    """
+    지정한 엔진으로 파일 하나를 압축 (결과 파일만 생성)
+    - cache: ResultCache를 주면 캐시를 먼저 확인, 반환값은 캐시 적중 여부
+    - progress_callback(done_pages, total_pages) / cancel_event: 엔진에 그대로 전달
+    - memory_limit: pypdf 엔진의 메모리 제한 스트리밍 모드 (바이트)
+    - linearize: 결과를 선형화(Fast Web View)해서 씀 (pypdf는 쓸 때 바로, 다른 엔진은 결과를 다시 씀)
+    """
+    engine_options = {}
+    if memory_limit:
+        if engine != "pypdf":
+            raise ValueError("메모리 제한 스트리밍 모드는 pypdf 엔진에서만 사용할 수 있습니다.")
+        engine_options["memory_limit"] = memory_limit
+    if linearize and engine == "pypdf":
+        engine_options["linearize"] = True
+
+    def run(src, dst):
+        get_engine(engine).compress(src, dst, preset, progress_callback=progress_callback,
+                                    cancel_event=cancel_event, **engine_options)
+        if linearize:
+            from pdf_compress_linearize import ensure_linearized
+            ensure_linearized(dst)
+
+    if cache is None:
+        run(input_path, output_path)
+        return False
+
+    from pdf_compress_cache import cached_call
+    # 스트리밍 모드는 출력 바이트가 다르므로 별도 키 (제한 값 자체는 결과에 영향 없음)
+    options = {"streaming": True} if memory_limit else {}
+    if linearize:
+        options["linearize"] = True
+    return cached_call(cache, input_path, output_path, engine, preset, engine_version(engine), run, **options)
+
+
+def compress(input_path, output_path, engine="ghostscript", preset=None, split=False, jobs=None, cache=None,
+             progress_callback=None, cancel_event=None, target_size=None, target_dpi=None, memory_limit=None,
+             codec_budget=None, incremental=False, page_cache=None, linearize=False):
+    """
+    PDF 한 개를 압축하고 CompressionResult를 반환합니다.
+    - engine: 'ghostscript'(gs), 'gsapi'(libgs 프로세스 내부 실행), 'pypdf'(pypdf2)
+      또는 'hybrid'(페이지 종류별로 ghostscript/pypdf 선택, details는 HybridReport)
+    - preset: ghostscript/gsapi/hybrid는 screen/ebook/printer/prepress, pypdf는 높음/보통/낮음(high/medium/low)
+    - split: ghostscript 엔진에서 페이지 구간을 나눠 jobs개 프로세스로 병렬 압축
+    - jobs: 분할 압축 조각 수 또는 pypdf(hybrid 포함) 이미지 재인코딩 프로세스 수 (기본값: CPU 개수)
+    - cache: pdf_compress_cache.ResultCache (같은 입력/설정이면 저장된 결과 재사용)
+    - progress_callback(done, total): 페이지(분할 모드는 조각) 단위 진행률
+    - cancel_event: threading.Event가 설정되면 CompressionCancelled 발생
+    - target_size: 바이트 예산, 지정하면 preset 대신 예산 안에서 가장 높은 품질을 탐색
+    - target_dpi: pypdf 엔진의 이미지 목표 해상도 (기본값: 프리셋별 값, 0이면 해상도 유지)
+    - memory_limit: pypdf 엔진을 메모리 제한 스트리밍 모드로 실행 (바이트, 결과의 details.peak_rss 참고)
+    - codec_budget: pypdf 엔진이 이미지마다 추가 코덱 후보를 시도할 문서 전체 예산 (초, 추정치)
+      기본값은 pdf_compress_image.DEFAULT_CODEC_BUDGET, 0이면 이미지 종류별 기본 후보만, math.inf면 제한 없음
+    - incremental: 페이지 캐시에 없는 페이지만 압축하고 나머지는 재사용 (details는 IncrementalReport,
+      ghostscript/gsapi/pypdf 엔진, pdf_compress_incremental 참고)
+    - page_cache: incremental 모드의 PageCache (기본값: get_default_page_cache())
+    - linearize: 결과를 선형화(Fast Web View)해서 웹에서 첫 페이지부터 보이게 함 (pdf_compress_linearize)
+      pypdf 엔진과 기본 모드는 선형화한 결과를 캐시하고, 나머지 모드는 캐시 적중 때도 결과를 다시 선형화
+    """
+    engine = resolve_engine(engine)
+    preset = preset or DEFAULT_PRESETS[engine]
+    if not os.path.isfile(input_path):
+        raise FileNotFoundError(f"파일을 찾을 수 없습니다: {input_path}")
+    if split and engine != "ghostscript":
+        raise ValueError("페이지 분할 압축은 ghostscript 엔진에서만 사용할 수 있습니다.")
+    if target_size and engine == "hybrid":
+        raise ValueError("목표 크기 모드는 hybrid 엔진에서 사용할 수 없습니다.")
+    if split and target_size:
+        raise ValueError("페이지 분할 압축과 목표 크기 모드는 함께 사용할 수 없습니다.")
+    if target_dpi is not None and engine != "pypdf":
+        raise ValueError("이미지 목표 해상도는 pypdf 엔진에서만 지정할 수 있습니다.")
+    if memory_limit and engine != "pypdf":
+        raise ValueError("메모리 제한 스트리밍 모드는 pypdf 엔진에서만 사용할 수 있습니다.")
+    if codec_budget is not None and engine != "pypdf":
+        raise ValueError("코덱 시도 예산은 pypdf 엔진에서만 지정할 수 있습니다.")
+    if incremental and (split or target_size or memory_limit):
+        raise ValueError("페이지 단위 증분 압축은 분할/목표 크기/메모리 제한 모드와 함께 사용할 수 없습니다.")
+    if incremental and engine not in ("ghostscript", "gsapi", "pypdf"):
+        raise ValueError("페이지 단위 증분 압축은 ghostscript, gsapi, pypdf 엔진에서만 사용할 수 있습니다.")
+
+    original_size = os.path.getsize(input_path)
+    with collect() as timings:
+        start = time.perf_counter()
+        details, cached, preset = _compress(input_path, output_path, engine, preset, split, jobs, cache,
+                                            progress_callback, cancel_event, target_size, target_dpi,
+                                            memory_limit, codec_budget, incremental, page_cache, linearize)
+        if linearize:
+            from pdf_compress_linearize import ensure_linearized
+            ensure_linearized(output_path)
+        seconds = time.perf_counter() - start
+
+    return CompressionResult(
+        input_path=input_path,
+        output_path=output_path,
+        engine=engine,
+        preset=preset,
+        original_size=original_size,
+        compressed_size=os.path.getsize(output_path),
+        seconds=seconds,
+        details=details,
+        cached=cached,
+        timings=timings.as_dict(),
+        resources=timings.resources_dict()
+    )
+
+
+def _compress(input_path, output_path, engine, preset, split, jobs, cache, progress_callback, cancel_event,
+              target_size, target_dpi, memory_limit, codec_budget, incremental=False, page_cache=None,
+              linearize=False):
+    """compress()의 모드별 실행, (상세 결과, 캐시 적중 여부, 실제 프리셋 이름) 반환"""
+    details = None
+    cached = False
+    if incremental:
+        from pdf_compress_incremental import ASSEMBLY_VERSION, compress_incremental
+        from pdf_compress_cache import cached_call
+        options = {}
+        if engine == "pypdf":
+            options = {"jobs": jobs, "target_dpi": target_dpi, "codec_budget": codec_budget}
+            options = {name: value for name, value in options.items() if value is not None}
+        version = engine_version(engine)
+
+        def incremental_func(src, dst):
+            nonlocal details
+            details = compress_incremental(src, dst, engine, preset, page_cache, engine_version=version,
+                                           progress_callback=progress_callback, cancel_event=cancel_event,
+                                           **options)
+
+        if cache is None:
+            incremental_func(input_path, output_path)
+        else:
+            # 합친 결과는 엔진 출력과 바이트가 다르므로 별도 키 (jobs는 결과에 영향 없음)
+            key_options = {name: value for name, value in options.items() if name != "jobs"}
+            cached = cached_call(cache, input_path, output_path, engine, preset, version, incremental_func,
+                                 incremental=ASSEMBLY_VERSION, **key_options)
+    elif target_size:
+        from pdf_compress_target import compress_to_target
+        from pdf_compress_cache import cached_call
+        preset = "target"
+
+        def target_func(src, dst):
+            nonlocal details
+            details = compress_to_target(src, dst, target_size, engine=engine,
+                                         progress_callback=progress_callback, cancel_event=cancel_event)
+
+        if cache is None:
+            target_func(input_path, output_path)
+        else:
+            cached = cached_call(cache, input_path, output_path, engine, preset,
+                                 engine_version(engine), target_func, target_size=target_size)
+    elif split:
+        from pdf_compress_split import SPLIT_VERSION, compress_pdf_split
+        from pdf_compress_cache import cached_call
+
+        def split_func(src, dst):
+            nonlocal details
+            details = compress_pdf_split(
+                src, dst, preset, jobs=jobs, cancel_event=cancel_event,
+                progress_callback=(lambda done, total, chunk: progress_callback(done, total))
+                if progress_callback else None
+            )
+
+        if cache is None:
+            split_func(input_path, output_path)
+        else:
+            # 분할 압축은 결과 바이트가 달라질 수 있으므로 별도 키 사용
+            cached = cached_call(cache, input_path, output_path, engine, preset,
+                                 engine_version(engine), split_func, split=SPLIT_VERSION)
+    elif engine == "pypdf":
+        from pdf_compress_pypdf import compress_pdf_file
+        from pdf_compress_cache import cached_call
+
+        def pypdf_func(src, dst):
+            nonlocal details
+            options = {} if codec_budget is None else {"codec_budget": codec_budget}
+            details = compress_pdf_file(src, dst, preset, progress_callback=progress_callback,
+                                        cancel_event=cancel_event, jobs=jobs, target_dpi=target_dpi,
+                                        memory_limit=memory_limit, linearize=linearize, **options)
+
+        if cache is None:
+            pypdf_func(input_path, output_path)
+        else:
+            options = {} if target_dpi is None else {"target_dpi": target_dpi}
+            if memory_limit:
+                options["streaming"] = True
+            if codec_budget is not None:
+                options["codec_budget"] = codec_budget
+            if linearize:
+                options["linearize"] = True
+            cached = cached_call(cache, input_path, output_path, engine, preset,
+                                 engine_version(engine), pypdf_func, **options)
+    elif engine == "hybrid":
+        from pdf_compress_cache import cached_call
+
+        def hybrid_func(src, dst):
+            nonlocal details
+            details = get_engine(engine).compress(src, dst, preset, progress_callback=progress_callback,
+                                                  cancel_event=cancel_event, jobs=jobs)
+
+        if cache is None:
+            hybrid_func(input_path, output_path)
+        else:
+            cached = cached_call(cache, input_path, output_path, engine, preset,
+                                 engine_version(engine), hybrid_func)
+    else:
+        cached = run_engine(engine, input_path, output_path, preset, cache=cache,
+                            progress_callback=progress_callback, cancel_event=cancel_event, linearize=linearize)
+    return details, cached, preset
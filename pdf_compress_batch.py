@@ -0,0 +1,293 @@
+# -*- coding: utf-8 -*-
+"""
+폴더/파일 목록 일괄 압축
+
+압축 작업을 N개까지 동시에 실행하며, 큰 파일부터 먼저 시작해서
+마지막에 대용량 파일 하나만 남아 도는 상황을 줄입니다.
+- ghostscript: gs가 별도 프로세스이므로 스레드 풀로 충분
+- gsapi: 작업자 프로세스마다 예열된 libgs 인스턴스를 하나씩 두고 재사용
+- pypdf / hybrid: 파이썬 코드가 CPU를 쓰므로 프로세스 풀 사용
+"""
+import os
+import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+
+from pdf_compress_api import format_reduction, resolve_engine, run_engine, DEFAULT_PRESETS
+from pdf_compress_errors import CompressionCancelled
+from pdf_compress_metrics import collect, stage
+
+MB = 1024 * 1024
+
+
+@dataclass
+class BatchItem:
+    """일괄 압축 대상 파일 하나"""
+    input_path: str
+    output_path: str
+    size: int
+
+
+@dataclass
+class BatchResult:
+    """파일 하나의 압축 결과"""
+    input_path: str
+    output_path: str
+    original_size: int
+    compressed_size: int = 0
+    seconds: float = 0.0
+    error: str = ""
+    cached: bool = False
+    timings: dict = None  # 단계별 소요 시간 (pdf_compress_metrics)
+    resources: dict = None  # gs 프로세스 CPU 시간/최대 RSS (pdf_compress_metrics)
+    preset: str = ""
+    expected_percent: float = None  # 압축 전 분석의 예상 감소율 (분석했을 때만)
+    skipped: bool = False           # 예상 감소율이 min_savings보다 작아 원본을 복사함
+
+    @property
+    def ok(self):
+        return not self.error
+
+    @property
+    def mb_per_sec(self):
+        return (self.original_size / MB) / self.seconds if self.seconds > 0 else 0.0
+
+
+@dataclass
+class BatchReport:
+    """일괄 압축 전체 결과와 처리량"""
+    results: list = field(default_factory=list)
+    wall_seconds: float = 0.0
+    jobs: int = 1
+
+    @property
+    def succeeded(self):
+        return [r for r in self.results if r.ok]
+
+    @property
+    def failed(self):
+        return [r for r in self.results if not r.ok]
+
+    @property
+    def skipped(self):
+        return [r for r in self.results if r.skipped]
+
+    @property
+    def cache_hits(self):
+        return sum(1 for r in self.results if r.cached)
+
+    @property
+    def total_input_bytes(self):
+        return sum(r.original_size for r in self.results)
+
+    @property
+    def total_output_bytes(self):
+        return sum(r.compressed_size for r in self.succeeded)
+
+    @property
+    def files_per_sec(self):
+        return len(self.results) / self.wall_seconds if self.wall_seconds > 0 else 0.0
+
+    @property
+    def mb_per_sec(self):
+        return (self.total_input_bytes / MB) / self.wall_seconds if self.wall_seconds > 0 else 0.0
+
+
+def default_jobs():
+    """기본 동시 실행 개수 (CPU 개수)"""
+    return os.cpu_count() or 1
+
+
+def collect_pdf_files(inputs, output_dir=None, suffix="_compressed", recursive=True):
+    """
+    디렉터리 또는 파일 목록에서 압축 대상을 모읍니다.
+    - output_dir가 없으면 원본 옆에 '<이름>_compressed.pdf'로 저장
+    - 디렉터리 입력은 output_dir 아래에 같은 하위 경로 구조로 저장
+    - 같은 파일을 여러 번 주면 한 번만 압축
+    - 출력 경로가 다른 항목의 출력이나 입력과 겹치면 (다른 폴더의 같은 이름 파일 등)
+      '<이름>_compressed_2.pdf'처럼 번호를 붙여 서로 덮어쓰지 않게 함
+    """
+    items = []
+    for entry in inputs:
+        if os.path.isdir(entry):
+            for dirpath, dirnames, filenames in os.walk(entry):
+                if not recursive:
+                    dirnames[:] = []
+                dirnames.sort()
+                for name in sorted(filenames):
+                    if name.lower().endswith(".pdf"):
+                        path = os.path.join(dirpath, name)
+                        items.append((path, os.path.relpath(path, entry)))
+        elif os.path.isfile(entry):
+            items.append((entry, os.path.basename(entry)))
+        else:
+            raise FileNotFoundError(f"파일 또는 폴더를 찾을 수 없습니다: {entry}")
+
+    batch = []
+    inputs_seen = set()
+    taken = {_path_key(path) for path, _ in items}  # 입력 파일도 덮어쓰면 안 됨
+    for path, rel in items:
+        if _path_key(path) in inputs_seen:
+            continue
+        inputs_seen.add(_path_key(path))
+        if output_dir:
+            base = os.path.join(output_dir, f"{os.path.splitext(rel)[0]}{suffix}")
+        else:
+            base = f"{os.path.splitext(path)[0]}{suffix}"
+        output_path = f"{base}.pdf"
+        number = 2
+        while _path_key(output_path) in taken:
+            output_path = f"{base}_{number}.pdf"
+            number += 1
+        taken.add(_path_key(output_path))
+        batch.append(BatchItem(path, output_path, os.path.getsize(path)))
+    return batch
+
+
+def _path_key(path):
+    """같은 파일인지 비교하는 키 (대소문자를 구분하지 않는 파일 시스템 고려)"""
+    return os.path.normcase(os.path.realpath(path))
+
+
+def _preflight(item, engine, preset, min_savings, auto_preset, result):
+    """압축 전 분석으로 프리셋을 고르고 예상 감소율이 min_savings보다 작으면 result.skipped 설정"""
+    from pdf_compress_analyze import analyze_pdf, recommend_preset
+    try:
+        with stage("preflight"):
+            analysis = analyze_pdf(item.input_path)
+    except Exception:
+        return preset  # 분석하지 못한 파일은 그냥 압축
+    if auto_preset:
+        preset = recommend_preset(analysis, engine, min_savings or 0.0) or preset
+    result.expected_percent = analysis.expected_percent(engine, preset)
+    result.skipped = min_savings is not None and result.expected_percent < min_savings
+    return preset
+
+
+def _compress_one(item, engine, preset, cache=None, cancel_event=None, memory_limit=None,
+                  min_savings=None, auto_preset=False, linearize=False):
+    """작업자에서 파일 하나를 압축"""
+    result = BatchResult(item.input_path, item.output_path, item.size)
+    start = time.perf_counter()
+    with collect() as timings:
+        try:
+            out_dir = os.path.dirname(item.output_path)
+            if out_dir:
+                os.makedirs(out_dir, exist_ok=True)
+            if min_savings is not None or auto_preset:
+                preset = _preflight(item, engine, preset, min_savings, auto_preset, result)
+            result.preset = preset
+            if result.skipped:
+                shutil.copyfile(item.input_path, item.output_path)
+                if linearize:
+                    from pdf_compress_linearize import ensure_linearized
+                    ensure_linearized(item.output_path)
+            else:
+                result.cached = run_engine(engine, item.input_path, item.output_path, preset, cache=cache,
+                                           cancel_event=cancel_event, memory_limit=memory_limit,
+                                           linearize=linearize)
+            result.compressed_size = os.path.getsize(item.output_path)
+        except Exception as e:
+            result.error = str(e)
+    result.seconds = time.perf_counter() - start
+    result.timings = timings.as_dict()
+    result.resources = timings.resources_dict()
+    return result
+
+
+def compress_batch(items, quality_level=None, jobs=None, progress_callback=None, engine="ghostscript",
+                   cache=None, cancel_event=None, memory_limit=None, min_savings=None, auto_preset=False,
+                   linearize=False):
+    """
+    여러 PDF를 병렬로 압축합니다.
+    - items: collect_pdf_files()가 반환한 BatchItem 목록
+    - quality_level: 엔진별 프리셋 (기본값: 엔진 기본 프리셋)
+    - jobs: 동시에 실행할 작업 수 (기본값: CPU 개수)
+    - progress_callback(done, total, result): 파일 하나가 끝날 때마다 호출
+    - cache: pdf_compress_cache.ResultCache (적중 여부는 BatchResult.cached)
+    - cancel_event: 설정되면 대기 중인 파일은 시작하지 않고 실행 중인 gs는 종료한 뒤
+      CompressionCancelled 발생 (이미 끝난 파일은 그대로 둠)
+    - memory_limit: pypdf 엔진에서 작업자 하나당 메모리 제한 스트리밍 모드 (바이트)
+    - min_savings: 압축 전 분석(pdf_compress_analyze)의 예상 감소율(%)이 이보다 작은 파일은
+      압축하지 않고 원본을 복사 (BatchResult.skipped)
+    - auto_preset: 파일마다 예상 감소율이 min_savings 이상인 프리셋 중 가장 품질이 높은 것을 사용
+      (해당하는 프리셋이 없으면 quality_level)
+    - linearize: 결과(건너뛴 파일의 복사본 포함)를 선형화(Fast Web View)해서 씀
+    """
+    engine = resolve_engine(engine)
+    quality_level = quality_level or DEFAULT_PRESETS[engine]
+    executor_options = {}
+    if engine == "gsapi":
+        from pdf_compress_gs import default_limits
+        from pdf_compress_gsapi import is_available, warm_up
+        if is_available() and not default_limits().active:
+            executor_class = ProcessPoolExecutor
+            executor_options = {"initializer": warm_up, "initargs": (quality_level,)}
+        else:
+            # libgs가 없거나 실행 제한이 있으면 gs 서브프로세스로 대체 (libgs 실행은 제한/종료할 수 없음)
+            engine = "ghostscript"
+    if engine == "ghostscript":
+        from pdf_compress_gs import find_ghostscript_executable, GhostscriptNotFoundError
+        if not find_ghostscript_executable():
+            raise GhostscriptNotFoundError("Ghostscript를 찾을 수 없습니다.")
+        executor_class = ThreadPoolExecutor
+    elif engine in ("pypdf", "hybrid"):
+        executor_class = ProcessPoolExecutor
+
+    jobs = max(1, jobs or default_jobs())
+    # 큰 파일부터 제출: 실행기는 제출 순서대로 작업을 시작함
+    ordered = sorted(items, key=lambda item: item.size, reverse=True)
+
+    report = BatchReport(jobs=jobs)
+    start = time.perf_counter()
+    # threading.Event는 다른 프로세스로 넘길 수 없으므로 프로세스 풀은 대기 작업만 취소
+    worker_cancel = cancel_event if executor_class is ThreadPoolExecutor else None
+    with executor_class(max_workers=jobs, **executor_options) as executor:
+        futures = [executor.submit(_compress_one, item, engine, quality_level, cache, worker_cancel, memory_limit,
+                                   min_savings, auto_preset, linearize)
+                   for item in ordered]
+        for future in as_completed(futures):
+            if cancel_event is not None and cancel_event.is_set():
+                for pending in futures:
+                    pending.cancel()
+            if future.cancelled():
+                continue
+            result = future.result()
+            report.results.append(result)
+            if cache is not None and executor_class is ProcessPoolExecutor:
+                # 작업자 프로세스의 통계는 돌아오지 않으므로 여기서 합산
+                if result.cached:
+                    cache.stats.hits += 1
+                    cache.stats.bytes_saved += result.original_size
+                elif result.ok and not result.skipped:
+                    cache.stats.misses += 1
+                    cache.stats.stores += 1
+            if progress_callback:
+                progress_callback(len(report.results), len(ordered), result)
+    report.wall_seconds = time.perf_counter() - start
+    if cancel_event is not None and cancel_event.is_set():
+        raise CompressionCancelled()
+    return report
+
+
+def format_result_line(result):
+    """파일 하나의 결과를 한 줄로 표시"""
+    name = os.path.basename(result.input_path)
+    if not result.ok:
+        return f"❌ {name}: {result.error.strip().splitlines()[0] if result.error.strip() else '실패'}"
+    if result.skipped:
+        return f"⏭️ {name}: 예상 감소 {result.expected_percent:.1f}% ({result.preset}), 압축하지 않고 원본 복사"
+    reduction = (1 - result.compressed_size / result.original_size) * 100 if result.original_size else 0.0
+    return (f"✅ {name}: {result.original_size / MB:.2f} MB → {result.compressed_size / MB:.2f} MB "
+            f"({format_reduction(reduction)}, {result.seconds:.2f}s, {result.mb_per_sec:.2f} MB/s"
+            f"{', 캐시' if result.cached else ''})")
+
+
+def format_report_summary(report):
+    """전체 처리량 요약"""
+    skipped = f", 건너뜀 {len(report.skipped)}" if report.skipped else ""
+    return (f"총 {len(report.results)}개 (성공 {len(report.succeeded)}, 실패 {len(report.failed)}{skipped}) | "
+            f"{report.wall_seconds:.2f}s | {report.files_per_sec:.2f} files/s | "
+            f"{report.mb_per_sec:.2f} MB/s | 동시 작업 {report.jobs}개")
+
@@ -0,0 +1,246 @@
+# -*- coding: utf-8 -*-
+"""
+내용 기반(content-addressed) 압축 결과 캐시
+
+같은 PDF를 같은 엔진/프리셋으로 다시 압축하면 저장해 둔 결과를
+하드링크(불가능하면 복사)로 바로 돌려줍니다.
+- 키: 입력 파일 바이트의 SHA-256 + 엔진 + 프리셋(사용자 프리셋은 설정 값 해시 포함) + 엔진 버전 + 옵션
+- LRU: 항목 파일의 수정 시각을 마지막 사용 시각으로 사용 (별도 색인 파일 없음)
+- 원자적 쓰기: 같은 폴더의 임시 파일에 쓴 뒤 os.replace, 여러 작업자가 동시에 써도 안전
+"""
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+from dataclasses import dataclass
+
+HASH_CHUNK = 1024 * 1024
+DEFAULT_MAX_MB = 1024
+ENTRY_SUFFIX = ".pdf"
+
+
+@dataclass
+class CacheStats:
+    """캐시 사용 통계"""
+    hits: int = 0
+    misses: int = 0
+    stores: int = 0
+    evictions: int = 0
+    bytes_saved: int = 0  # 캐시 적중으로 다시 압축하지 않은 입력 바이트 수
+
+    @property
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+def hash_file(path):
+    """파일 내용의 SHA-256 (큰 파일도 조각 단위로 읽음)"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(HASH_CHUNK), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """디스크 기반 압축 결과 캐시 (크기 제한 + LRU 정리)"""
+    entry_suffix = ENTRY_SUFFIX  # 하위 클래스는 다른 확장자를 써서 같은 폴더 아래에 있어도 항목이 섞이지 않게 함
+
+    def __init__(self, cache_dir, max_bytes=DEFAULT_MAX_MB * 1024 * 1024, use_hardlinks=True):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.use_hardlinks = use_hardlinks
+        self.stats = CacheStats()
+        self._lock = threading.Lock()
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def __getstate__(self):
+        # 프로세스 풀 작업자로 넘길 때 잠금 객체는 제외
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    # --- 키 / 경로 ---
+    def make_key(self, input_path, engine, preset, engine_version, **options):
+        """입력 내용과 압축 설정으로 캐시 키 생성 (사용자 프리셋은 이름과 설정 값 해시)"""
+        from pdf_compress_presets import preset_fingerprint
+        params = {
+            "engine": engine,
+            "preset": str(preset),
+            "version": engine_version,
+            "options": options
+        }
+        fingerprint = preset_fingerprint(preset) if isinstance(preset, str) else None
+        if fingerprint:
+            params["preset_params"] = fingerprint
+        params = json.dumps(params, sort_keys=True)
+        digest = hashlib.sha256()
+        digest.update(hash_file(input_path).encode())
+        digest.update(params.encode())
+        return digest.hexdigest()
+
+    def _entry_path(self, key):
+        return os.path.join(self.cache_dir, key[:2], key + self.entry_suffix)
+
+    # --- 조회 / 저장 ---
+    def fetch(self, key, output_path, input_size=0):
+        """캐시에 있으면 output_path로 내보내고 True 반환"""
+        entry = self._entry_path(key)
+        try:
+            self._export(entry, output_path)
+            # 마지막 사용 시각 갱신 (LRU)
+            os.utime(entry, None)
+        except FileNotFoundError:
+            with self._lock:
+                self.stats.misses += 1
+            return False
+        with self._lock:
+            self.stats.hits += 1
+            self.stats.bytes_saved += input_size
+        return True
+
+    def store(self, key, result_path, evict=True):
+        """압축 결과를 캐시에 저장 (원자적, evict=False면 여러 항목을 저장한 뒤 evict()를 한 번만 호출)"""
+        entry = self._entry_path(key)
+        entry_dir = os.path.dirname(entry)
+        os.makedirs(entry_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(prefix=".tmp_", suffix=self.entry_suffix, dir=entry_dir)
+        try:
+            with os.fdopen(fd, "wb") as tmp, open(result_path, "rb") as src:
+                shutil.copyfileobj(src, tmp, HASH_CHUNK)
+            # mkstemp는 0600으로 만들므로 하드링크로 내보낼 때를 위해 원본 권한을 따름
+            shutil.copymode(result_path, tmp_path)
+            os.replace(tmp_path, entry)
+        except BaseException:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            raise
+        with self._lock:
+            self.stats.stores += 1
+        if evict:
+            self.evict()
+
+    def _export(self, entry, output_path):
+        """캐시 항목을 출력 위치로 하드링크 또는 복사"""
+        if os.path.exists(output_path) and not os.path.samefile(entry, output_path):
+            os.unlink(output_path)
+        elif os.path.exists(output_path):
+            return
+        if self.use_hardlinks:
+            try:
+                os.link(entry, output_path)
+                return
+            except FileNotFoundError:
+                raise
+            except OSError:
+                pass  # 다른 파일 시스템 등 하드링크 불가 → 복사
+        shutil.copyfile(entry, output_path)
+
+    # --- 정리 ---
+    def _entries(self):
+        entries = []
+        for dirpath, _, filenames in os.walk(self.cache_dir):
+            for name in filenames:
+                if not name.endswith(self.entry_suffix) or name.startswith(".tmp_"):
+                    continue
+                path = os.path.join(dirpath, name)
+                try:
+                    st = os.stat(path)
+                except FileNotFoundError:
+                    continue  # 다른 작업자가 방금 삭제함
+                entries.append((st.st_mtime, st.st_size, path))
+        return entries
+
+    def disk_usage(self):
+        """캐시가 차지하는 바이트 수"""
+        return sum(size for _, size, _ in self._entries())
+
+    def evict(self):
+        """최대 크기를 넘으면 가장 오래 사용하지 않은 항목부터 삭제"""
+        entries = self._entries()
+        total = sum(size for _, size, _ in entries)
+        if total <= self.max_bytes:
+            return 0
+        removed = 0
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.unlink(path)
+                removed += 1
+            except FileNotFoundError:
+                pass
+            total -= size
+        with self._lock:
+            self.stats.evictions += removed
+        return removed
+
+    def clear(self):
+        """캐시 항목 전체 삭제"""
+        for _, _, path in self._entries():
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+
+
+def default_cache_dir():
+    """PDF_COMPRESS_CACHE_DIR 또는 사용자 캐시 폴더"""
+    env = os.environ.get("PDF_COMPRESS_CACHE_DIR")
+    if env:
+        return env
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "pdf_compress")
+
+
+_default_cache = None
+
+
+def get_default_cache():
+    """
+    기본 캐시 (PDF_COMPRESS_CACHE=0이면 None)
+    - PDF_COMPRESS_CACHE_MB: 최대 크기 (기본값 1024MB)
+    """
+    global _default_cache
+    if os.environ.get("PDF_COMPRESS_CACHE", "1") == "0":
+        return None
+    if _default_cache is None:
+        max_mb = int(os.environ.get("PDF_COMPRESS_CACHE_MB", DEFAULT_MAX_MB))
+        _default_cache = ResultCache(default_cache_dir(), max_bytes=max_mb * 1024 * 1024)
+    return _default_cache
+
+
+def cached_call(cache, input_path, output_path, engine, preset, engine_version, compress_func, **options):
+    """
+    캐시를 거쳐 압축 함수를 호출합니다.
+    - compress_func(input_path, output_path): 캐시에 없을 때만 호출
+    - 반환값: 캐시 적중 여부
+    """
+    if cache is None:
+        compress_func(input_path, output_path)
+        return False
+    key = cache.make_key(input_path, engine, preset, engine_version, **options)
+    if cache.fetch(key, output_path, os.path.getsize(input_path)):
+        return True
+    # 이전 적중으로 하드링크된 출력 파일을 그대로 덮어쓰면 캐시 항목까지 바뀜
+    if os.path.exists(output_path) and os.stat(output_path).st_nlink > 1:
+        os.unlink(output_path)
+    compress_func(input_path, output_path)
+    cache.store(key, output_path)
+    return False
+
+
+def format_cache_stats(cache):
+    """캐시 통계 한 줄 요약"""
+    stats = cache.stats
+    return (f"캐시: 적중 {stats.hits}, 미적중 {stats.misses} ({stats.hit_rate * 100:.0f}%), "
+            f"저장 {stats.stores}, 삭제 {stats.evictions}, 재압축 생략 {stats.bytes_saved / (1024 * 1024):.1f} MB")
@@ -0,0 +1,405 @@
+# -*- coding: utf-8 -*-
+"""
+헤드리스 PDF 압축 CLI
+
+    python -m pdf_compress_cli input.pdf -o output.pdf --engine gs --preset ebook
+    python -m pdf_compress_cli scans/ -o out/ --jobs 8
+    python -m pdf_compress_cli big.pdf -o out.pdf --split --jobs 16
+    python -m pdf_compress_cli edited.pdf -o out.pdf --incremental   # 바뀐 페이지만 압축
+    python -m pdf_compress_cli report.pdf -o mail.pdf --target-size 10MB
+    python -m pdf_compress_cli mixed.pdf -o out.pdf --engine hybrid --preset ebook
+    python -m pdf_compress_cli forms/ -o out/ --preset forms   # pdf_compress_tune으로 저장한 프리셋
+    python -m pdf_compress_cli catalog.pdf -o web.pdf --linearize   # 웹에서 첫 페이지부터 표시
+    cat input.pdf | python -m pdf_compress_cli - > output.pdf
+
+입력/출력에 '-'를 지정하면 표준 입력/출력으로 스트리밍합니다.
+로그와 결과 요약은 표준 에러로 출력합니다.
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+
+from pdf_compress_api import ENGINES, ENGINE_ALIASES, compress, format_reduction, resolve_engine
+from pdf_compress_gs import add_limit_arguments, limits_from_args, set_default_limits
+from pdf_compress_target import parse_size
+
+STREAM = "-"
+COPY_CHUNK = 1024 * 1024
+
+
+def _log(message):
+    print(message, file=sys.stderr, flush=True)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="python -m pdf_compress_cli",
+        description="PDF 압축 (GUI 없이 실행)"
+    )
+    parser.add_argument("inputs", nargs="+",
+                        help="PDF 파일, 폴더 또는 '-'(표준 입력)")
+    parser.add_argument("-o", "--output",
+                        help="출력 파일, '-'(표준 출력) 또는 여러 입력일 때 출력 폴더")
+    parser.add_argument("-e", "--engine", default="ghostscript",
+                        choices=list(ENGINES) + list(ENGINE_ALIASES),
+                        help="압축 엔진 (기본값: ghostscript)")
+    parser.add_argument("-p", "--preset",
+                        help="ghostscript/gsapi/hybrid: screen/ebook/printer/prepress 또는 "
+                             "pdf_compress_tune으로 저장한 사용자 프리셋 이름, "
+                             "pypdf: high/medium/low (기본값: 엔진별 기본 프리셋)")
+    parser.add_argument("-j", "--jobs", type=int, default=None,
+                        help="여러 파일 압축, --split 또는 pypdf 이미지 재인코딩 시 동시 작업 수 (기본값: CPU 개수)")
+    parser.add_argument("--dpi", type=int, default=None,
+                        help="pypdf: 페이지에 그려지는 크기 기준 이미지 목표 해상도 (기본값: 프리셋별, 0이면 유지)")
+    parser.add_argument("--codec-budget", type=float, default=None, metavar="SECONDS",
+                        help="pypdf: 이미지마다 PNG 예측자/JPEG 2000 후보를 더 시도할 문서 전체 CPU 예산 "
+                             "(추정치, 기본값: 10초, 0이면 이미지 종류별 기본 후보만)")
+    parser.add_argument("--max-memory",
+                        help="pypdf: 메모리 제한 스트리밍 모드, 파일(작업자)당 상한 (예: 512MB)")
+    parser.add_argument("--incremental", action="store_true",
+                        help="페이지 캐시에 없는(바뀐) 페이지만 압축하고 나머지는 재사용 (ghostscript/gsapi/pypdf, 파일 하나)")
+    parser.add_argument("--page-cache-dir",
+                        help="페이지 캐시 폴더 (기본값: PDF_COMPRESS_PAGE_CACHE_DIR 또는 결과 캐시 폴더의 pages)")
+    parser.add_argument("--page-cache-max-mb", type=int, default=None,
+                        help="페이지 캐시 최대 크기 MB (기본값: PDF_COMPRESS_PAGE_CACHE_MB 또는 512)")
+    parser.add_argument("--linearize", action="store_true",
+                        help="결과를 선형화(Fast Web View)해서 웹에서 파일을 다 받기 전에 첫 페이지를 표시")
+    parser.add_argument("--split", action="store_true",
+                        help="대용량 PDF를 페이지 구간으로 나눠 병렬 압축 (ghostscript 전용)")
+    parser.add_argument("--target-size",
+                        help="목표 크기 (예: 10MB, 500KB) 이하에서 가장 높은 품질을 자동 탐색 (파일 하나만)")
+    parser.add_argument("--min-savings", type=float, metavar="PERCENT",
+                        help="여러 파일: 압축 전 분석의 예상 감소율(%%)이 이보다 작으면 압축하지 않고 원본 복사")
+    parser.add_argument("--auto-preset", action="store_true",
+                        help="여러 파일: 분석 결과로 파일마다 프리셋 선택 (--min-savings 이상 줄어드는 가장 높은 품질)")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="압축 결과 캐시를 사용하지 않음")
+    parser.add_argument("--cache-dir",
+                        help="캐시 폴더 (기본값: PDF_COMPRESS_CACHE_DIR 또는 ~/.cache/pdf_compress)")
+    parser.add_argument("--cache-max-mb", type=int, default=None,
+                        help="캐시 최대 크기 MB (기본값: 1024)")
+    parser.add_argument("--json", action="store_true",
+                        help="결과를 JSON으로 표준 에러에 출력 (단계별 소요 시간 'stages' 포함)")
+    parser.add_argument("--metrics-file",
+                        help="Prometheus textfile 수집기용 지표 파일 경로 (예: /var/lib/node_exporter/pdf.prom)")
+    parser.add_argument("--profile",
+                        help="cProfile 결과를 이 경로에 저장 (작업자 프로세스 안의 시간은 빠지므로 -j 1 권장)")
+    add_limit_arguments(parser)
+    return parser
+
+
+def _spool_stdin(tmp_dir):
+    """표준 입력을 임시 파일로 저장 (PDF는 임의 접근이 필요함)"""
+    path = os.path.join(tmp_dir, "stdin.pdf")
+    with open(path, "wb") as f:
+        shutil.copyfileobj(sys.stdin.buffer, f, COPY_CHUNK)
+    return path
+
+
+def _stream_to_stdout(path):
+    with open(path, "rb") as f:
+        shutil.copyfileobj(f, sys.stdout.buffer, COPY_CHUNK)
+    sys.stdout.buffer.flush()
+
+
+def _open_cache(args):
+    """명령줄 옵션에 맞는 캐시 (사용하지 않으면 None)"""
+    from pdf_compress_cache import ResultCache, get_default_cache, default_cache_dir, DEFAULT_MAX_MB
+    if args.no_cache:
+        return None
+    if args.cache_dir or args.cache_max_mb:
+        max_mb = args.cache_max_mb or DEFAULT_MAX_MB
+        return ResultCache(args.cache_dir or default_cache_dir(), max_bytes=max_mb * 1024 * 1024)
+    return get_default_cache()
+
+
+def _open_page_cache(args):
+    """--incremental일 때 옵션에 맞는 페이지 캐시 (옵션이 없으면 None → 기본 페이지 캐시)"""
+    if not args.incremental or not (args.page_cache_dir or args.page_cache_max_mb):
+        return None
+    from pdf_compress_incremental import PageCache, default_page_cache_dir, DEFAULT_MAX_MB
+    max_mb = args.page_cache_max_mb or DEFAULT_MAX_MB
+    return PageCache(args.page_cache_dir or default_page_cache_dir(), max_bytes=max_mb * 1024 * 1024)
+
+
+def _log_cache_stats(args, cache):
+    if cache is None:
+        return
+    from pdf_compress_cache import format_cache_stats
+    if args.json:
+        stats = cache.stats
+        _log(json.dumps({"cache": {"hits": stats.hits, "misses": stats.misses, "stores": stats.stores,
+                                   "evictions": stats.evictions, "bytes_saved": stats.bytes_saved}}))
+    else:
+        _log(format_cache_stats(cache))
+
+
+def _log_profile(profiler, limit=15):
+    """누적 시간 상위 함수 요약"""
+    import io
+    import pstats
+    text = io.StringIO()
+    pstats.Stats(profiler, stream=text).sort_stats("cumulative").print_stats(limit)
+    _log(text.getvalue().rstrip())
+
+
+def _default_output(input_path):
+    return f"{os.path.splitext(input_path)[0]}_compressed.pdf"
+
+
+def run_single(args, engine, cache, metrics=None):
+    """파일 하나 압축 (표준 입출력 스트리밍 지원)"""
+    input_path = args.inputs[0]
+    output_path = args.output or (STREAM if input_path == STREAM else _default_output(input_path))
+
+    with tempfile.TemporaryDirectory(prefix="pdf_compress_") as tmp_dir:
+        source = _spool_stdin(tmp_dir) if input_path == STREAM else input_path
+        target = os.path.join(tmp_dir, "output.pdf") if output_path == STREAM else output_path
+
+        result = compress(source, target, engine=engine, preset=args.preset,
+                          split=args.split, jobs=args.jobs, cache=cache,
+                          target_size=parse_size(args.target_size) if args.target_size else None,
+                          target_dpi=args.dpi, codec_budget=args.codec_budget,
+                          incremental=args.incremental, page_cache=_open_page_cache(args),
+                          linearize=args.linearize,
+                          memory_limit=parse_size(args.max_memory) if args.max_memory else None)
+
+        if output_path == STREAM:
+            _stream_to_stdout(target)
+
+    if args.json:
+        record = {
+            "input": input_path,
+            "output": output_path,
+            "engine": result.engine,
+            "preset": result.preset,
+            "original_size": result.original_size,
+            "compressed_size": result.compressed_size,
+            "seconds": round(result.seconds, 4),
+            "cached": result.cached,
+            "linearized": args.linearize,
+            "stages": result.timings,
+            "resources": result.resources
+        }
+        if result.details is not None and args.incremental:
+            details = result.details
+            record["pages"] = {
+                "pages": details.page_count,
+                "reused": details.reused,
+                "compressed": details.compressed,
+                "reused_bytes": details.reused_bytes,
+                "stored": details.stored,
+                "evictions": details.evictions,
+                "assembled": details.assembled,
+                "kept_original": details.kept_original,
+                "fingerprint_seconds": round(details.fingerprint_seconds, 4),
+                "compress_seconds": round(details.compress_seconds, 4),
+                "merge_seconds": round(details.merge_seconds, 4)
+            }
+        elif result.details is not None and args.target_size:
+            record["target"] = {
+                "target_bytes": result.details.target_bytes,
+                "met": result.details.met,
+                "chosen": result.details.chosen_label,
+                "sample_passes": result.details.sample_passes,
+                "full_passes": result.details.full_passes
+            }
+        elif result.details is not None and engine == "hybrid":
+            record["hybrid"] = {
+                "pages": result.details.page_count,
+                "routes": result.details.routes,
+                "ranges": [{"first_page": first, "last_page": last, "kind": kind, "engine": route}
+                           for first, last, kind, route in result.details.ranges],
+                "samples": [{"kind": s.kind, "engine": s.engine, "input_size": s.input_size,
+                             "output_size": s.output_size, "cpu_seconds": round(s.cpu_seconds, 4)}
+                            for s in result.details.samples],
+                "runs": [{"engine": run.engine, "preset": run.preset, "pages": len(run.pages),
+                          "input_size": run.input_size, "output_size": run.output_size,
+                          "seconds": round(run.seconds, 4), "kept_original": run.kept_original}
+                         for run in result.details.runs],
+                "objects_merged": result.details.objects_merged,
+                "kept_original": result.details.kept_original
+            }
+        elif result.details is not None and engine == "pypdf":
+            record["images"] = {
+                "references": result.details.references,
+                "encoded": result.details.encoded,
+                "shared_skipped": result.details.shared_skipped,
+                "merged": result.details.merged,
+                "downsampled": result.details.downsampled,
+                "kept": result.details.kept,
+                "kept_original": result.details.kept_original,
+                "peak_rss": result.details.peak_rss,
+                "peak_anon_rss": result.details.peak_anon_rss,
+                "bytes_saved": result.details.bytes_saved,
+                "seconds_saved": round(result.details.seconds_saved, 4),
+                "codecs": result.details.codecs
+            }
+            structure = result.details.structure
+            if structure is not None:
+                record["structure"] = {
+                    "objects_merged": structure.objects_merged,
+                    "dedup_bytes": structure.dedup_bytes,
+                    "unreferenced": structure.unreferenced,
+                    "unreferenced_bytes": structure.unreferenced_bytes,
+                    "packed": structure.packed,
+                    "object_stream_bytes": structure.object_stream_bytes,
+                    "first_page_bytes": structure.first_page_bytes,
+                    "bytes_saved": structure.bytes_saved
+                }
+        elif result.details is not None:
+            record["split"] = {
+                "pages": result.details.page_count,
+                "chunks": [{"first_page": c.first_page, "last_page": c.last_page,
+                            "seconds": round(c.seconds, 4), "compressed_size": c.compressed_size}
+                           for c in result.details.chunks],
+                "merge_seconds": round(result.details.merge_seconds, 4),
+                "objects_merged": result.details.objects_merged
+            }
+        _log(json.dumps(record, ensure_ascii=False))
+    else:
+        if result.details is not None and args.incremental:
+            from pdf_compress_incremental import format_incremental_report
+            _log(format_incremental_report(result.details))
+        elif result.details is not None and args.target_size:
+            from pdf_compress_target import format_target_report
+            _log(format_target_report(result.details))
+        elif result.details is not None and engine == "hybrid":
+            from pdf_compress_hybrid import format_hybrid_report
+            _log(format_hybrid_report(result.details))
+        elif result.details is not None and engine == "pypdf":
+            from pdf_compress_pypdf import format_image_report
+            _log(format_image_report(result.details))
+        elif result.details is not None:
+            from pdf_compress_split import format_split_report
+            _log(format_split_report(result.details))
+        _log(f"✅ {input_path}: {result.original_size} → {result.compressed_size} bytes "
+             f"({format_reduction(result.reduction_percent)}, {result.seconds:.2f}s"
+             f"{', 선형화' if args.linearize else ''}{', 캐시' if result.cached else ''})")
+    if metrics is not None:
+        metrics.record(result.engine, True, result.original_size, result.compressed_size, result.seconds,
+                       result.timings, result.resources)
+    _log_cache_stats(args, cache)
+    return 0
+
+
+def run_batch(args, engine, cache, metrics=None):
+    """여러 파일/폴더 일괄 압축"""
+    from pdf_compress_batch import collect_pdf_files, compress_batch, format_result_line, format_report_summary
+
+    if STREAM in args.inputs:
+        _log("❌ 여러 입력을 처리할 때는 '-'(표준 입력)를 사용할 수 없습니다.")
+        return 1
+    if args.output == STREAM:
+        _log("❌ 여러 입력을 처리할 때는 '-'(표준 출력)를 사용할 수 없습니다.")
+        return 1
+
+    items = collect_pdf_files(args.inputs, args.output)
+    if not items:
+        _log("압축할 PDF 파일이 없습니다.")
+        return 1
+
+    def on_progress(done, total, result):
+        if metrics is not None:
+            metrics.record(engine, result.ok, result.original_size, result.compressed_size, result.seconds,
+                           result.timings, result.resources)
+        if args.json:
+            _log(json.dumps({
+                "input": result.input_path,
+                "output": result.output_path,
+                "original_size": result.original_size,
+                "compressed_size": result.compressed_size,
+                "seconds": round(result.seconds, 4),
+                "cached": result.cached,
+                "preset": result.preset or None,
+                "expected_percent": None if result.expected_percent is None else round(result.expected_percent, 1),
+                "skipped": result.skipped,
+                "error": result.error or None,
+                "stages": result.timings,
+                "resources": result.resources
+            }, ensure_ascii=False))
+        else:
+            _log(f"[{done}/{total}] {format_result_line(result)}")
+
+    report = compress_batch(items, args.preset, jobs=args.jobs,
+                            progress_callback=on_progress, engine=engine, cache=cache,
+                            memory_limit=parse_size(args.max_memory) if args.max_memory else None,
+                            min_savings=args.min_savings, auto_preset=args.auto_preset,
+                            linearize=args.linearize)
+    if args.json:
+        _log(json.dumps({
+            "files": len(report.results),
+            "failed": len(report.failed),
+            "skipped": len(report.skipped),
+            "wall_seconds": round(report.wall_seconds, 4),
+            "files_per_sec": round(report.files_per_sec, 4),
+            "mb_per_sec": round(report.mb_per_sec, 4),
+            "jobs": report.jobs
+        }, ensure_ascii=False))
+    else:
+        _log(format_report_summary(report))
+    _log_cache_stats(args, cache)
+    return 0 if not report.failed else 1
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    engine = resolve_engine(args.engine)
+
+    single = len(args.inputs) == 1 and not os.path.isdir(args.inputs[0])
+    if args.split and not single:
+        _log("❌ --split은 파일 하나에만 사용할 수 있습니다.")
+        return 1
+    if args.target_size and not single:
+        _log("❌ --target-size는 파일 하나에만 사용할 수 있습니다.")
+        return 1
+    if (args.min_savings is not None or args.auto_preset) and single:
+        _log("❌ --min-savings/--auto-preset는 여러 파일(폴더)을 압축할 때 사용합니다. "
+             "파일 하나는 python -m pdf_compress_analyze로 먼저 확인하세요.")
+        return 1
+    if args.dpi is not None and not single:
+        _log("❌ --dpi는 파일 하나에만 사용할 수 있습니다.")
+        return 1
+    if args.codec_budget is not None and not single:
+        _log("❌ --codec-budget은 파일 하나에만 사용할 수 있습니다.")
+        return 1
+    if args.incremental and not single:
+        _log("❌ --incremental은 파일 하나에만 사용할 수 있습니다.")
+        return 1
+    # 작업자 프로세스(pypdf/hybrid 일괄 처리)에도 환경 변수로 전달됨
+    set_default_limits(limits_from_args(args))
+    metrics = None
+    if args.metrics_file:
+        from pdf_compress_metrics import RunMetrics
+        metrics = RunMetrics()
+    profiler = None
+    if args.profile:
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.enable()
+    try:
+        cache = _open_cache(args)
+        if single:
+            return run_single(args, engine, cache, metrics)
+        return run_batch(args, engine, cache, metrics)
+    except Exception as e:
+        _log(f"❌ {e}")
+        if metrics is not None and single:
+            metrics.record(engine, False)
+        return 1
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            profiler.dump_stats(args.profile)
+            if not args.json:
+                _log_profile(profiler)
+        if metrics is not None:
+            from pdf_compress_metrics import write_textfile
+            write_textfile(args.metrics_file, metrics)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+"""
+PdfWriter 객체 중복 제거
+
+여러 PDF(또는 분할 압축한 조각)를 합치면 같은 폰트, ICC 프로파일,
+이미지가 조각마다 따로 들어갑니다. 내용이 바이트 단위로 같은 객체를
+하나로 합치고 참조를 모두 대표 객체로 바꿉니다.
+"""
+import hashlib
+import io
+from dataclasses import dataclass
+
+# 페이지 트리 구조는 같은 내용이라도 합치면 안 됨
+_STRUCTURAL_TYPES = ("/Page", "/Pages", "/Catalog")
+
+# 'N 0 obj\n', '\nendobj\n'과 xref 표 항목 20바이트
+_OBJECT_OVERHEAD = 10 + 8 + 20
+
+
+@dataclass
+class DedupStats:
+    """중복 제거 결과"""
+    objects_merged: int = 0
+    bytes_saved: int = 0
+    rounds: int = 0
+
+
+def _canonical_bytes(obj, out, generic):
+    """키 순서와 무관하게 객체 내용을 직렬화 (해시 계산용)"""
+    if isinstance(obj, generic.IndirectObject):
+        out.append(b"R%d" % obj.idnum)
+    elif isinstance(obj, generic.StreamObject):
+        out.append(b"S")
+        _canonical_dict(obj, out, generic, skip=("/Length",))
+        out.append(hashlib.sha256(obj._data or b"").digest())
+    elif isinstance(obj, generic.DictionaryObject):
+        _canonical_dict(obj, out, generic)
+    elif isinstance(obj, generic.ArrayObject):
+        out.append(b"[")
+        for item in obj:
+            _canonical_bytes(item, out, generic)
+            out.append(b",")
+        out.append(b"]")
+    else:
+        out.append(type(obj).__name__.encode())
+        out.append(repr(obj).encode("utf-8", "backslashreplace"))
+        out.append(b";")
+
+
+def _canonical_dict(obj, out, generic, skip=()):
+    out.append(b"{")
+    for key in sorted(obj.keys()):
+        if key in skip:
+            continue
+        out.append(key.encode("utf-8", "backslashreplace"))
+        out.append(b"=")
+        # obj[key]는 간접 참조를 따라가므로 raw_get (참조는 객체 번호로, 순환 구조에서도 끝남)
+        _canonical_bytes(obj.raw_get(key), out, generic)
+        out.append(b",")
+    out.append(b"}")
+
+
+def object_digest(obj, generic):
+    """객체 내용의 SHA-256 해시"""
+    out = []
+    _canonical_bytes(obj, out, generic)
+    return hashlib.sha256(b"".join(out)).digest()
+
+
+def _is_structural(obj, generic):
+    return isinstance(obj, generic.DictionaryObject) and obj.get("/Type") in _STRUCTURAL_TYPES
+
+
+def serialized_size(obj):
+    """객체를 classic xref 형식 PDF에 썼을 때 차지하는 바이트 수 (객체 머리와 xref 항목 포함)"""
+    buffer = io.BytesIO()
+    obj.write_to_stream(buffer, None)
+    return buffer.tell() + _OBJECT_OVERHEAD
+
+
+def remap_references(writer, remap, generic):
+    """writer 전체에서 remap(idnum → 대표 idnum)에 따라 간접 참조를 교체"""
+    def visit(container):
+        items = container.items() if isinstance(container, generic.DictionaryObject) else enumerate(container)
+        for key, value in list(items):
+            if isinstance(value, generic.IndirectObject):
+                if value.pdf is writer and value.idnum in remap:
+                    container[key] = generic.IndirectObject(remap[value.idnum], 0, writer)
+            elif isinstance(value, (generic.DictionaryObject, generic.ArrayObject)):
+                visit(value)
+
+    for obj in writer._objects:
+        if isinstance(obj, (generic.DictionaryObject, generic.ArrayObject)):
+            visit(obj)
+
+
+def deduplicate_objects(writer, max_rounds=5):
+    """
+    writer 안의 내용이 같은 객체를 하나로 합칩니다.
+    - 폰트 파일이 합쳐지면 그 폰트 딕셔너리도 같아지므로 변화가 없을 때까지 반복
+    - 합쳐진 객체 자리는 null로 바꿔 객체 번호(xref)는 유지
+    """
+    from PyPDF2 import generic
+
+    stats = DedupStats()
+    for _ in range(max_rounds):
+        stats.rounds += 1
+        canonical = {}
+        remap = {}
+        for index, obj in enumerate(writer._objects):
+            if obj is None or isinstance(obj, generic.NullObject) or _is_structural(obj, generic):
+                continue
+            if not isinstance(obj, (generic.DictionaryObject, generic.ArrayObject)):
+                continue
+            idnum = index + 1
+            digest = object_digest(obj, generic)
+            if digest in canonical:
+                remap[idnum] = canonical[digest]
+            else:
+                canonical[digest] = idnum
+
+        if not remap:
+            break
+
+        remap_references(writer, remap, generic)
+        for idnum in remap:
+            stats.bytes_saved += serialized_size(writer._objects[idnum - 1])
+            writer._objects[idnum - 1] = generic.NullObject()
+        stats.objects_merged += len(remap)
+    return stats
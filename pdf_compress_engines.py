@@ -0,0 +1,161 @@
+# -*- coding: utf-8 -*-
+"""
+압축 엔진 공통 인터페이스
+
+    from pdf_compress_engines import get_engine
+    engine = get_engine("ghostscript")
+    engine.compress("in.pdf", "out.pdf", "ebook", cancel_event=event)
+
+엔진마다 함수 이름/인자가 달라서 API, 일괄 처리, 하이브리드 모드가 같은 방식으로 부를 수 있도록 감쌉니다.
+엔진 모듈(PyPDF2, libgs 등)은 메서드를 처음 부를 때 불러옵니다.
+"""
+
+
+class Engine:
+    """압축 엔진 하나 (이름, 기본 프리셋, 사용 가능 여부, 버전, 압축)"""
+    name = ""
+    default_preset = ""
+
+    def unavailable_reason(self):
+        """실행할 수 없으면 이유 문자열, 가능하면 None"""
+        return None
+
+    def version(self):
+        """캐시 키에 쓰는 엔진 버전"""
+        raise NotImplementedError
+
+    def compress(self, input_path, output_path, preset, progress_callback=None, cancel_event=None, **options):
+        """
+        파일 하나를 압축해 output_path에 씀
+        - progress_callback(done_pages, total_pages) / cancel_event: 엔진에 그대로 전달
+        - options: 엔진별 추가 설정 (지원하지 않는 설정이면 ValueError)
+        - 반환값: 엔진별 상세 결과 (없으면 None)
+        """
+        raise NotImplementedError
+
+    def _reject_options(self, options):
+        if options:
+            raise ValueError(f"{self.name} 엔진에서 지원하지 않는 설정입니다: {', '.join(sorted(options))}")
+
+
+class GhostscriptEngine(Engine):
+    """gs 실행 파일을 하위 프로세스로 실행"""
+    name = "ghostscript"
+    default_preset = "ebook"
+
+    def unavailable_reason(self):
+        from pdf_compress_gs import find_ghostscript_executable
+        return None if find_ghostscript_executable() else "gs 실행 파일 없음"
+
+    def version(self):
+        from pdf_compress_gs import ghostscript_version
+        return f"gs-{ghostscript_version()}"
+
+    def compress(self, input_path, output_path, preset, progress_callback=None, cancel_event=None, **options):
+        from pdf_compress_gs import run_ghostscript
+        self._reject_options(options)
+        run_ghostscript(input_path, output_path, preset, progress_callback=progress_callback,
+                        cancel_event=cancel_event)
+
+
+class GsapiEngine(Engine):
+    """libgs를 프로세스 안에서 실행"""
+    name = "gsapi"
+    default_preset = "ebook"
+
+    def unavailable_reason(self):
+        from pdf_compress_gsapi import is_available
+        return None if is_available() else "libgs 없음"
+
+    def version(self):
+        from pdf_compress_gsapi import libgs_version
+        from pdf_compress_gs import ghostscript_version
+        return f"libgs-{libgs_version() or ghostscript_version()}"
+
+    def compress(self, input_path, output_path, preset, progress_callback=None, cancel_event=None, **options):
+        from pdf_compress_gsapi import compress_with_gsapi
+        self._reject_options(options)
+        compress_with_gsapi(input_path, output_path, preset, progress_callback=progress_callback,
+                            cancel_event=cancel_event)
+
+
+class PypdfEngine(Engine):
+    """PyPDF2 스트림 압축 + 이미지 재인코딩"""
+    name = "pypdf"
+    default_preset = "높음"
+
+    def unavailable_reason(self):
+        try:
+            import PyPDF2  # noqa: F401
+            import PIL  # noqa: F401
+        except ImportError as e:
+            return f"{e.name} 없음"
+        return None
+
+    def version(self):
+        from pdf_compress_pypdf import engine_version
+        return engine_version()
+
+    def compress(self, input_path, output_path, preset, progress_callback=None, cancel_event=None, **options):
+        """options: jobs, target_dpi, memory_limit, codec_budget, linearize (compress_pdf_file 참고), 반환값: ImageReport"""
+        from pdf_compress_pypdf import compress_pdf_file
+        unknown = set(options) - {"jobs", "target_dpi", "memory_limit", "codec_budget", "linearize"}
+        self._reject_options(unknown)
+        return compress_pdf_file(input_path, output_path, preset, progress_callback=progress_callback,
+                                 cancel_event=cancel_event, **options)
+
+
+class HybridEngine(Engine):
+    """페이지 종류별로 ghostscript/pypdf 중 효율이 좋은 엔진을 골라 압축 (pdf_compress_hybrid 참고)"""
+    name = "hybrid"
+    default_preset = "ebook"
+
+    def unavailable_reason(self):
+        reasons = [get_engine(name).unavailable_reason() for name in ("ghostscript", "pypdf")]
+        if all(reasons):
+            return ", ".join(reasons)
+        # 페이지 분류와 합치기에 PyPDF2가 필요
+        try:
+            import PyPDF2  # noqa: F401
+        except ImportError:
+            return "PyPDF2 없음"
+        return None
+
+    def version(self):
+        from pdf_compress_hybrid import HYBRID_VERSION
+        parts = [f"hybrid-{HYBRID_VERSION}"]
+        for name in ("ghostscript", "pypdf"):
+            engine = get_engine(name)
+            if engine.unavailable_reason() is None:
+                parts.append(engine.version())
+        return "/".join(parts)
+
+    def compress(self, input_path, output_path, preset, progress_callback=None, cancel_event=None, **options):
+        """options: jobs (pypdf 이미지 재인코딩 프로세스 수), 반환값: HybridReport"""
+        from pdf_compress_hybrid import compress_hybrid
+        self._reject_options(set(options) - {"jobs"})
+        return compress_hybrid(input_path, output_path, preset, progress_callback=progress_callback,
+                               cancel_event=cancel_event, **options)
+
+
+_ENGINE_CLASSES = {
+    "ghostscript": GhostscriptEngine,
+    "gsapi": GsapiEngine,
+    "pypdf": PypdfEngine,
+    "hybrid": HybridEngine
+}
+
+_instances = {}
+
+
+def engine_names():
+    return tuple(_ENGINE_CLASSES)
+
+
+def get_engine(name):
+    """정식 엔진 이름으로 Engine 인스턴스 반환 (이름마다 하나만 만듦)"""
+    if name not in _ENGINE_CLASSES:
+        raise ValueError(f"알 수 없는 엔진입니다: {name} (사용 가능: {', '.join(_ENGINE_CLASSES)})")
+    if name not in _instances:
+        _instances[name] = _ENGINE_CLASSES[name]()
+    return _instances[name]
@@ -0,0 +1,21 @@
+# -*- coding: utf-8 -*-
+"""
+엔진 공통 예외
+"""
+import os
+
+
+class CompressionCancelled(Exception):
+    """사용자가 압축을 취소했을 때 발생"""
+
+    def __init__(self, message="압축이 취소되었습니다."):
+        super().__init__(message)
+
+
+def remove_partial_output(path):
+    """취소/실패로 남은 미완성 출력 파일 삭제"""
+    try:
+        if path and path != "-" and os.path.isfile(path):
+            os.unlink(path)
+    except OSError:
+        pass
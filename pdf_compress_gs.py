@@ -0,0 +1,613 @@
+# -*- coding: utf-8 -*-
+"""
+Ghostscript 압축 엔진 (GUI 비의존)
+
+messagebox 없이 결과를 반환하고 실패 시 예외를 발생시키므로
+배치 처리나 헤드리스 환경에서도 그대로 사용할 수 있습니다.
+"""
+import collections
+import os
+import re
+import signal
+import subprocess
+import shutil
+import sys
+import threading
+import time
+from dataclasses import dataclass
+
+from pdf_compress_errors import CompressionCancelled, remove_partial_output
+from pdf_compress_metrics import record_resources, stage
+
+QUALITY_LEVELS = ("screen", "ebook", "printer", "prepress")
+
+# -dQUIET 없이 실행하면 gs가 표준 출력에 찍는 진행 메시지
+_PAGE_RANGE_RE = re.compile(rb"Processing pages (\d+) through (\d+)")
+_PAGE_RE = re.compile(rb"^Page (\d+)")
+
+# 취소/시간 초과를 확인하는 간격 (초)
+_POLL_SECONDS = 0.1
+
+# 오류 메시지용으로 보관하는 gs 출력의 마지막 바이트 수 (나머지는 읽고 버림)
+OUTPUT_TAIL_BYTES = 64 * 1024
+_READ_CHUNK = 64 * 1024
+
+# GhostscriptLimits 기본값을 읽는 환경 변수 (작업자 프로세스에도 그대로 전달됨)
+LIMIT_ENV = {
+    "timeout": "PDF_COMPRESS_GS_TIMEOUT",
+    "cpu_seconds": "PDF_COMPRESS_GS_CPU",
+    "memory": "PDF_COMPRESS_GS_MEMORY",
+    "nice": "PDF_COMPRESS_GS_NICE",
+    "ionice": "PDF_COMPRESS_GS_IONICE"
+}
+
+
+class GhostscriptNotFoundError(RuntimeError):
+    """Ghostscript 실행 파일을 찾을 수 없을 때 발생"""
+
+
+class GhostscriptError(RuntimeError):
+    """Ghostscript 실행이 실패했을 때 발생"""
+
+    def __init__(self, message, returncode=None, stderr="", usage=None):
+        super().__init__(message)
+        self.returncode = returncode
+        self.stderr = stderr
+        self.usage = usage  # GhostscriptUsage (하위 프로세스로 실행했을 때)
+
+
+class GhostscriptTimeoutError(GhostscriptError):
+    """gs가 제한 시간 안에 끝나지 않아 종료했을 때 발생"""
+
+
+@dataclass
+class GhostscriptLimits:
+    """
+    gs 프로세스 하나에 거는 제한 (None이면 제한 없음)
+    - timeout: 경과 시간 제한 (초), 넘으면 프로세스 그룹 전체 종료
+    - cpu_seconds: CPU 시간 제한 (RLIMIT_CPU, 초)
+    - memory: 주소 공간 제한 (RLIMIT_AS, 바이트)
+    - nice: 우선순위를 이만큼 낮춤 (Windows는 0보다 크면 '낮은 우선순위')
+    - ionice: 디스크 I/O 우선순위 'idle' 또는 'best-effort[:0-7]' (Linux, ionice 명령 필요)
+    """
+    timeout: float = None
+    cpu_seconds: int = None
+    memory: int = None
+    nice: int = None
+    ionice: str = None
+
+    @classmethod
+    def from_env(cls, environ=None):
+        environ = os.environ if environ is None else environ
+        values = {}
+        for name, key in LIMIT_ENV.items():
+            value = environ.get(key)
+            if not value:
+                continue
+            if name == "ionice":
+                values[name] = value
+            elif name == "memory":
+                from pdf_compress_target import parse_size
+                values[name] = parse_size(value)
+            elif name == "timeout":
+                values[name] = float(value)
+            else:
+                values[name] = int(value)
+        return cls(**values)
+
+    def to_env(self):
+        return {key: str(getattr(self, name)) for name, key in LIMIT_ENV.items()
+                if getattr(self, name) is not None}
+
+    @property
+    def active(self):
+        """제한이 하나라도 있는지 (gsapi 엔진은 이때 gs 서브프로세스로 실행)"""
+        return bool(self.to_env())
+
+
+@dataclass
+class GhostscriptUsage:
+    """gs 실행 한 번의 자원 사용량 (wait4로 받은 rusage, 알 수 없으면 0)"""
+    wall_seconds: float = 0.0
+    user_seconds: float = 0.0
+    system_seconds: float = 0.0
+    max_rss: int = 0  # 바이트
+    returncode: int = None
+    timed_out: bool = False
+
+    @property
+    def cpu_seconds(self):
+        return self.user_seconds + self.system_seconds
+
+    @classmethod
+    def from_rusage(cls, rusage, wall_seconds, returncode):
+        if rusage is None:
+            return cls(wall_seconds=wall_seconds, returncode=returncode)
+        # ru_maxrss 단위: Linux는 KB, macOS는 바이트
+        scale = 1 if sys.platform == "darwin" else 1024
+        return cls(wall_seconds, rusage.ru_utime, rusage.ru_stime, rusage.ru_maxrss * scale, returncode)
+
+
+_default_limits = None
+
+
+def default_limits():
+    """set_default_limits()로 정한 값, 없으면 PDF_COMPRESS_GS_* 환경 변수"""
+    return _default_limits if _default_limits is not None else GhostscriptLimits.from_env()
+
+
+def set_default_limits(limits):
+    """
+    이 프로세스의 gs 실행 기본 제한을 정함
+    새로 시작하는 작업자 프로세스에도 적용되도록 환경 변수에도 기록
+    """
+    global _default_limits
+    _default_limits = limits
+    for key in LIMIT_ENV.values():
+        os.environ.pop(key, None)
+    os.environ.update(limits.to_env())
+
+
+_executable_cache = {}  # PATH → 찾은 실행 파일 경로
+
+
+def find_ghostscript_executable():
+    """
+    시스템에서 Ghostscript 실행 파일을 찾습니다.
+    (Windows: gswin64c.exe, gswin32c.exe / Linux/macOS: gs)
+    찾은 경로는 PATH별로 프로세스 안과 조사 캐시(pdf_compress_probe)에 저장해 다음 실행에서 재사용
+    """
+    search_path = os.environ.get("PATH", "")
+    if search_path in _executable_cache:
+        return _executable_cache[search_path]
+    from pdf_compress_probe import lookup, remember
+    path = lookup("gs.path", search_path)
+    if path is None:
+        if sys.platform == "win32":
+            candidates = ["gswin64c", "gswin32c", "gs"]
+        else: # Linux, macOS
+            candidates = ["gs"]
+        path = next(filter(None, (shutil.which(cmd) for cmd in candidates)), None)
+        if path is None:
+            # 못 찾은 결과는 저장하지 않음 (설치 직후 다시 찾도록)
+            return None
+        remember("gs.path", search_path, path, path)
+    _executable_cache[search_path] = path
+    return path
+
+
+def build_gs_command(gs_command, input_path, output_path, quality_level, extra_args=None, quiet=True,
+                     postscript=None):
+    """
+    Ghostscript 명령어 구성
+    - quality_level: 내장 프리셋(QUALITY_LEVELS), 저장한 사용자 프리셋 이름 또는 CustomPreset (pdf_compress_presets)
+    - extra_args: -dFirstPage 등 추가 옵션 (출력 파일 지정 앞에 삽입, 사용자 프리셋 옵션보다 우선)
+    - quiet: False면 페이지별 진행 메시지를 출력하도록 -dQUIET를 뺌
+    - postscript: 입력 파일 직전에 -c로 실행할 코드 (예: setdistillerparams)
+    """
+    compatibility = "1.4"
+    if quality_level not in QUALITY_LEVELS:
+        from pdf_compress_presets import get_custom_preset
+        custom = get_custom_preset(quality_level) if isinstance(quality_level, str) else quality_level
+        if custom is None:
+            raise ValueError(f"알 수 없는 품질 설정입니다: {quality_level}")
+        preset_args, preset_postscript = custom.gs_options()
+        quality_level, compatibility = custom.base, custom.compatibility
+        extra_args = preset_args + list(extra_args or [])
+        postscript = f"{preset_postscript} {postscript}" if postscript else preset_postscript
+    return [
+        gs_command,
+        "-sDEVICE=pdfwrite",
+        f"-dCompatibilityLevel={compatibility}",
+        f"-dPDFSETTINGS=/{quality_level}",
+        "-dNOPAUSE",
+        *(["-dQUIET"] if quiet else []),
+        "-dBATCH",
+        *(extra_args or []),
+        f"-sOutputFile={output_path}",
+        *(["-c", postscript, "-f"] if postscript else []),
+        input_path
+    ]
+
+
+def build_render_command(gs_command, input_path, output_pattern, resolution, pages=None, device="png16m"):
+    """
+    페이지를 이미지로 그리는 Ghostscript 명령어 구성
+    - output_pattern: 페이지마다 파일 하나 (예: page_%03d.png)
+    - pages: 1부터 시작하는 페이지 번호 목록 (None이면 전체)
+    """
+    return [
+        gs_command,
+        f"-sDEVICE={device}",
+        f"-r{resolution}",
+        "-dTextAlphaBits=4",
+        "-dGraphicsAlphaBits=4",
+        "-dNOPAUSE",
+        "-dQUIET",
+        "-dBATCH",
+        *([f"-sPageList={','.join(str(page) for page in pages)}"] if pages else []),
+        f"-sOutputFile={output_pattern}",
+        input_path
+    ]
+
+
+def _startupinfo():
+    """Windows에서는 콘솔 창을 숨기기 위한 STARTUPINFO 반환"""
+    if sys.platform != "win32":
+        return None
+    startupinfo = subprocess.STARTUPINFO()
+    startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
+    return startupinfo
+
+
+def require_ghostscript(gs_command=None):
+    """Ghostscript 경로를 반환하고, 없으면 GhostscriptNotFoundError 발생"""
+    if not gs_command:
+        with stage("gs.discover"):
+            gs_command = find_ghostscript_executable()
+    if not gs_command:
+        raise GhostscriptNotFoundError(
+            "Ghostscript를 찾을 수 없습니다.\n"
+            "프로그램을 사용하려면 Ghostscript를 설치하고\n"
+            "PATH 환경 변수에 추가해야 합니다."
+        )
+    return gs_command
+
+
+def run_ghostscript(input_path, output_path, quality_level, gs_command=None, extra_args=None,
+                    progress_callback=None, cancel_event=None, postscript=None, limits=None):
+    """
+    Ghostscript로 PDF 한 개를 압축합니다.
+    - 성공 시 GhostscriptUsage(시간/CPU/최대 RSS)를 반환하고,
+      실패 시 GhostscriptNotFoundError / GhostscriptError(시간 초과는 GhostscriptTimeoutError) 발생
+    - progress_callback(done_pages, total_pages): gs가 페이지를 처리할 때마다 호출 (작업 스레드에서)
+    - cancel_event: threading.Event가 설정되면 gs를 종료하고 CompressionCancelled 발생
+    - limits: GhostscriptLimits (기본값: set_default_limits() 또는 PDF_COMPRESS_GS_* 환경 변수)
+    gs와 gs가 만든 자식 프로세스는 새 프로세스 그룹에서 실행하고, 시간 초과/취소 시 그룹 전체를 종료합니다.
+    출력은 마지막 OUTPUT_TAIL_BYTES만 보관합니다.
+    """
+    gs_command = require_ghostscript(gs_command)
+    limits = limits if limits is not None else default_limits()
+    monitored = progress_callback is not None
+    command = build_gs_command(gs_command, input_path, output_path, quality_level, extra_args,
+                               quiet=not monitored, postscript=postscript)
+    return _execute(command, output_path, limits, progress_callback, cancel_event, "PDF 압축")
+
+
+def render_pages(input_path, output_pattern, resolution, pages=None, gs_command=None, cancel_event=None,
+                 limits=None):
+    """
+    PDF 페이지를 PNG로 그립니다 (프리셋 튜닝의 화질 비교용, pdf_compress_tune).
+    - output_pattern: '%03d'처럼 페이지 번호 자리가 있는 경로 (pages 순서대로 1부터 번호가 붙음)
+    - 제한/취소/반환값/예외는 run_ghostscript와 같음
+    """
+    gs_command = require_ghostscript(gs_command)
+    limits = limits if limits is not None else default_limits()
+    command = build_render_command(gs_command, input_path, output_pattern, resolution, pages)
+    return _execute(command, None, limits, None, cancel_event, "페이지 렌더링")
+
+
+def _execute(command, output_path, limits, progress_callback, cancel_event, action):
+    """gs 명령 하나를 제한을 걸어 실행하고 GhostscriptUsage 반환 (실패/취소 시 output_path 삭제)"""
+    monitored = progress_callback is not None
+    output = _TailBuffer(OUTPUT_TAIL_BYTES)
+    start = time.perf_counter()
+    try:
+        with stage("gs.spawn"):
+            process = _spawn(command, limits, monitored)
+    except FileNotFoundError as e:
+        raise GhostscriptNotFoundError("Ghostscript를 실행할 수 없습니다. 설치를 확인해주세요.") from e
+
+    # 진행률을 읽을 때는 표준 출력을 따로 읽고, 아니면 표준 에러와 합쳐서 보관
+    readers = [threading.Thread(target=output.read_from, args=(process.stderr or process.stdout,), daemon=True)]
+    if monitored:
+        readers.append(threading.Thread(target=_read_progress, args=(process.stdout, progress_callback),
+                                        daemon=True))
+    for reader in readers:
+        reader.start()
+    try:
+        with stage("gs.run"):
+            reason, rusage = _wait(process, limits, cancel_event)
+    except BaseException:
+        _kill_group(process)
+        raise
+    finally:
+        _join_readers(process, readers)
+        for stream in (process.stdout, process.stderr):
+            if stream is not None:
+                stream.close()
+
+    usage = GhostscriptUsage.from_rusage(rusage, time.perf_counter() - start, process.returncode)
+    usage.timed_out = reason == "timeout"
+    record_resources("gs", usage.cpu_seconds, usage.max_rss)
+    if reason == "cancelled":
+        remove_partial_output(output_path)
+        raise CompressionCancelled()
+    if reason == "timeout":
+        remove_partial_output(output_path)
+        text = output.text()
+        raise GhostscriptTimeoutError(
+            f"Ghostscript가 {limits.timeout:g}초 안에 끝나지 않아 종료했습니다.\n{text}",
+            returncode=process.returncode, stderr=text, usage=usage
+        )
+    if process.returncode != 0:
+        remove_partial_output(output_path)
+        text = output.text()
+        raise GhostscriptError(
+            f"{action} 중 오류가 발생했습니다{_describe_exit(process.returncode, limits)}.\n{text}",
+            returncode=process.returncode,
+            stderr=text,
+            usage=usage
+        )
+    return usage
+
+
+def add_limit_arguments(parser, timeout=True):
+    """CLI/감시 데몬 공통 gs 제한 옵션 추가 (limits_from_args로 읽음)"""
+    group = parser.add_argument_group("Ghostscript 실행 제한")
+    if timeout:
+        group.add_argument("--gs-timeout", type=float, metavar="SECONDS",
+                           help="gs 한 번의 경과 시간 제한 (넘으면 프로세스 그룹 종료)")
+    group.add_argument("--gs-cpu", type=int, metavar="SECONDS", help="gs 한 번의 CPU 시간 제한 (RLIMIT_CPU)")
+    group.add_argument("--gs-memory", metavar="SIZE", help="gs 주소 공간 제한 (예: 2G, RLIMIT_AS)")
+    group.add_argument("--nice", type=int, metavar="N", help="gs 우선순위를 N만큼 낮춤")
+    group.add_argument("--ionice", metavar="CLASS",
+                       help="gs 디스크 I/O 우선순위: idle 또는 best-effort[:0-7] (Linux)")
+
+
+def limits_from_args(args, base=None):
+    """add_limit_arguments 옵션 중 지정한 것만 base(기본값: default_limits())에 덮어씀"""
+    from dataclasses import replace
+    from pdf_compress_target import parse_size
+    values = {"timeout": getattr(args, "gs_timeout", None), "cpu_seconds": args.gs_cpu,
+              "memory": parse_size(args.gs_memory) if args.gs_memory else None,
+              "nice": args.nice, "ionice": args.ionice}
+    return replace(base if base is not None else default_limits(),
+                   **{name: value for name, value in values.items() if value is not None})
+
+
+class _TailBuffer:
+    """마지막 limit 바이트만 보관하는 출력 버퍼 (gs가 경고를 끝없이 찍어도 메모리가 늘지 않음)"""
+
+    def __init__(self, limit):
+        self.limit = limit
+        self.chunks = collections.deque()
+        self.size = 0
+        self.dropped = 0
+
+    def write(self, data):
+        self.chunks.append(data)
+        self.size += len(data)
+        while len(self.chunks) > 1 and self.size - len(self.chunks[0]) >= self.limit:
+            dropped = self.chunks.popleft()
+            self.size -= len(dropped)
+            self.dropped += len(dropped)
+
+    def read_from(self, stream):
+        for chunk in iter(lambda: stream.read1(_READ_CHUNK), b""):
+            self.write(chunk)
+
+    def text(self):
+        data = b"".join(self.chunks)
+        skipped = self.dropped + max(0, len(data) - self.limit)
+        text = data[-self.limit:].decode('utf-8', errors='ignore')
+        return f"...(앞부분 {skipped}바이트 생략)\n{text}" if skipped else text
+
+
+def _ionice_prefix(limits):
+    """ionice 설정을 적용하는 명령 앞부분 (적용할 수 없으면 빈 목록)"""
+    if not limits.ionice or not sys.platform.startswith("linux"):
+        return []
+    ionice = shutil.which("ionice")
+    if not ionice:
+        return []
+    io_class, _, level = limits.ionice.partition(":")
+    if io_class == "idle":
+        return [ionice, "-c", "3"]
+    if io_class == "best-effort":
+        return [ionice, "-c", "2", *(["-n", level] if level else [])]
+    raise ValueError(f"알 수 없는 ionice 설정입니다: {limits.ionice} (idle 또는 best-effort[:0-7])")
+
+
+def _nice_prefix(limits):
+    """우선순위를 낮추는 명령 앞부분 (POSIX nice 명령, 없으면 빈 목록)"""
+    if not limits.nice or os.name != "posix":
+        return []
+    nice = shutil.which("nice")
+    return [nice, "-n", str(limits.nice)] if nice else []
+
+
+def _rlimit_prefix(limits):
+    """
+    CPU 시간/주소 공간 제한을 거는 명령 앞부분 (설정할 것이 없으면 빈 목록)
+    util-linux prlimit이 있으면 쓰고, 없으면 (macOS 등) sh의 ulimit으로 설정한 뒤 exec
+    CPU는 소프트 제한에서 SIGXCPU, 1초 뒤 하드 제한에서 SIGKILL
+    """
+    if os.name != "posix" or not (limits.cpu_seconds or limits.memory):
+        return []
+    prlimit = shutil.which("prlimit") if sys.platform.startswith("linux") else None
+    if prlimit:
+        args = [prlimit]
+        if limits.cpu_seconds:
+            args.append(f"--cpu={limits.cpu_seconds}:{limits.cpu_seconds + 1}")
+        if limits.memory:
+            args.append(f"--as={limits.memory}:{limits.memory}")
+        return args
+    script = []
+    if limits.cpu_seconds:
+        script.append(f"ulimit -S -t {limits.cpu_seconds} && ulimit -H -t {limits.cpu_seconds + 1}")
+    if limits.memory:
+        script.append(f"ulimit -v {max(1, limits.memory // 1024)}")
+    return ["/bin/sh", "-c", " && ".join(script) + ' && exec "$@"', "sh"]
+
+
+def limit_command(command, limits):
+    """
+    gs 명령 앞에 I/O 우선순위/우선순위/자원 제한을 거는 명령을 붙임 (ionice, nice, prlimit)
+    각 명령은 제한을 건 뒤 다음 명령을 exec하므로 pid와 wait4 사용량은 gs 그대로이고,
+    preexec_fn을 쓰지 않아 여러 스레드에서 동시에 실행해도 안전 (HTTP 서비스의 asyncio 실행과 공용)
+    """
+    return _ionice_prefix(limits) + _nice_prefix(limits) + _rlimit_prefix(limits) + list(command)
+
+
+def process_group_options(limits):
+    """gs를 새 프로세스 그룹에서 시작하는 Popen/create_subprocess_exec 옵션"""
+    if os.name == "posix":
+        return {"start_new_session": True}
+    flags = subprocess.CREATE_NEW_PROCESS_GROUP
+    if limits.nice and limits.nice > 0:
+        flags |= subprocess.BELOW_NORMAL_PRIORITY_CLASS
+    return {"creationflags": flags}
+
+
+def _spawn(command, limits, monitored):
+    """gs를 새 프로세스 그룹에서 시작 (진행률을 읽지 않으면 표준 에러를 표준 출력에 합침)"""
+    return subprocess.Popen(limit_command(command, limits), stdout=subprocess.PIPE,
+                            stderr=subprocess.PIPE if monitored else subprocess.STDOUT,
+                            startupinfo=_startupinfo(), **process_group_options(limits))
+
+
+def _wait(process, limits, cancel_event):
+    """
+    gs가 끝날 때까지 기다려 (중단 이유 'cancelled'/'timeout' 또는 None, rusage) 반환
+    종료는 별도 스레드의 wait4로 받으므로 끝나는 즉시 돌아오고, 그 사이 취소/시간 초과만 확인
+    """
+    finished = threading.Event()
+    result = {}
+
+    def reap():
+        try:
+            if hasattr(os, "wait4"):
+                _, status, result["rusage"] = os.wait4(process.pid, 0)
+                process.returncode = os.waitstatus_to_exitcode(status)
+            else:
+                process.wait()
+        except ChildProcessError:
+            process.wait()
+        finally:
+            finished.set()
+
+    threading.Thread(target=reap, daemon=True).start()
+    deadline = time.monotonic() + limits.timeout if limits.timeout else None
+    poll = _POLL_SECONDS if cancel_event is not None or deadline is not None else None
+    reason = None
+    while not finished.wait(poll):
+        if cancel_event is not None and cancel_event.is_set():
+            reason = "cancelled"
+        elif deadline is not None and time.monotonic() >= deadline:
+            reason = "timeout"
+        else:
+            continue
+        _kill_group(process)
+        finished.wait()
+        break
+    return reason, result.get("rusage")
+
+
+def _join_readers(process, readers):
+    """출력 읽기 스레드 종료 대기 (gs가 끝난 뒤에도 남은 자식이 파이프를 잡고 있으면 그룹을 종료)"""
+    for reader in readers:
+        reader.join(_POLL_SECONDS)
+    if any(reader.is_alive() for reader in readers):
+        _kill_group(process, reaped=True)
+        for reader in readers:
+            reader.join()
+
+
+def _kill_group(process, reaped=False):
+    """
+    gs와 gs가 만든 프로세스를 모두 종료
+    - reaped: gs 자신은 이미 회수했지만 같은 그룹의 자식이 남아 있을 때
+      (그룹에 프로세스가 남아 있는 동안에는 그 번호가 재사용되지 않음)
+    """
+    if process.returncode is not None and not (reaped and os.name == "posix"):
+        return  # 이미 회수한 pid는 다른 프로세스에 재사용됐을 수 있음
+    try:
+        if os.name == "posix":
+            os.killpg(process.pid, signal.SIGKILL)
+        else:
+            process.kill()
+    except OSError:
+        pass
+
+
+def _describe_exit(returncode, limits):
+    """오류 메시지에 붙일 종료 원인"""
+    if returncode < 0:
+        name = signal.Signals(-returncode).name if -returncode in signal.valid_signals() else str(-returncode)
+        if limits.cpu_seconds and name in ("SIGXCPU", "SIGKILL"):
+            return f" (CPU 시간 제한 {limits.cpu_seconds}초 초과, {name})"
+        return f" (시그널 {name})"
+    if limits.memory:
+        return f" (종료 코드 {returncode}, 메모리 제한 {limits.memory / (1024 * 1024):.0f} MB에 걸렸을 수 있음)"
+    return f" (종료 코드 {returncode})"
+
+
+def _read_progress(stream, progress_callback):
+    """gs 표준 출력에서 'Processing pages A through B.' / 'Page N' 줄을 읽어 진행률 전달"""
+    first_page, total = 1, 0
+    for line in stream:
+        match = _PAGE_RANGE_RE.search(line)
+        if match:
+            first_page = int(match.group(1))
+            total = int(match.group(2)) - first_page + 1
+            if progress_callback:
+                progress_callback(0, total)
+            continue
+        match = _PAGE_RE.match(line)
+        if match and progress_callback:
+            progress_callback(int(match.group(1)) - first_page + 1, total)
+
+
+def _ps_string(text):
+    """PostScript 문자열 리터럴로 이스케이프"""
+    return "(" + text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)") + ")"
+
+
+def count_pages_with_ghostscript(input_path, gs_command=None):
+    """Ghostscript로 PDF 페이지 수를 조회"""
+    gs_command = require_ghostscript(gs_command)
+    path = os.path.abspath(input_path).replace("\\", "/")
+    command = [
+        gs_command,
+        "-q",
+        "-dNODISPLAY",
+        "-dNOPAUSE",
+        "-dBATCH",
+        f"--permit-file-read={path}",
+        "-c",
+        f"{_ps_string(path)} (r) file runpdfbegin pdfpagecount = quit"
+    ]
+    try:
+        process = subprocess.run(command, check=True, stdout=subprocess.PIPE,
+                                 stderr=subprocess.PIPE, startupinfo=_startupinfo())
+    except subprocess.CalledProcessError as e:
+        stderr = e.stderr.decode('utf-8', errors='ignore') if e.stderr else ""
+        raise GhostscriptError(f"페이지 수를 확인할 수 없습니다.\n{stderr}",
+                               returncode=e.returncode, stderr=stderr) from e
+    for line in reversed(process.stdout.decode('ascii', errors='ignore').split()):
+        if line.isdigit():
+            return int(line)
+    raise GhostscriptError("페이지 수를 확인할 수 없습니다.")
+
+
+_version_cache = {}
+
+
+def ghostscript_version(gs_command=None):
+    """
+    Ghostscript 버전 문자열 (예: '10.02.1')
+    프로세스 안에서 한 번만 조회하고, 실행 파일이 바뀌지 않았으면 조사 캐시(pdf_compress_probe)의 값을 씀
+    """
+    gs_command = require_ghostscript(gs_command)
+    if gs_command not in _version_cache:
+        from pdf_compress_probe import lookup, remember
+        executable = shutil.which(gs_command) or gs_command
+        version = lookup("gs.version", executable)
+        if version is None:
+            process = subprocess.run([gs_command, "--version"], check=True, stdout=subprocess.PIPE,
+                                     stderr=subprocess.PIPE, startupinfo=_startupinfo())
+            version = process.stdout.decode('ascii', errors='ignore').strip()
+            remember("gs.version", executable, version, executable)
+        _version_cache[gs_command] = version
+    return _version_cache[gs_command]
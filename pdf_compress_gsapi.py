@@ -0,0 +1,294 @@
+# -*- coding: utf-8 -*-
+"""
+libgs(gsapi) 기반 프로세스 내부 Ghostscript 엔진
+
+작은 PDF를 많이 압축할 때는 gs 프로세스 시작과 폰트/리소스 초기화가
+실행 시간 대부분을 차지합니다. ctypes로 libgs를 불러와 인터프리터를
+한 번만 초기화하고, 같은 프로세스에서 여러 작업에 재사용합니다.
+- libgs는 프로세스당 인스턴스 하나만 안전하므로 작업자 프로세스마다 하나씩 유지
+- 프리셋(-dPDFSETTINGS)은 초기화 시에만 적용되므로 프리셋이 바뀌면 다시 초기화
+- libgs를 찾을 수 없으면 기존 gs 서브프로세스 방식으로 대체
+- 프로세스 내부 실행에는 시간/CPU/메모리/우선순위 제한(GhostscriptLimits)을 걸 수 없으므로
+  제한이 하나라도 있으면 gs 서브프로세스(run_ghostscript)로 실행
+"""
+import ctypes
+import ctypes.util
+import os
+import sys
+import threading
+
+from pdf_compress_errors import CompressionCancelled
+from pdf_compress_gs import GhostscriptError, QUALITY_LEVELS, _ps_string, default_limits, run_ghostscript
+from pdf_compress_metrics import stage
+
+GS_ARG_ENCODING_UTF8 = 1
+GS_PERMIT_FILE_READING = 0
+GS_PERMIT_FILE_WRITING = 1
+
+# gsapi 오류 코드: quit은 정상 종료, fatal은 인스턴스를 다시 만들어야 함
+GS_ERROR_QUIT = -101
+GS_ERROR_FATAL = -100
+
+# 최근 stderr 출력만 보관 (오류 메시지용)
+STDERR_LIMIT = 64 * 1024
+
+_LIBRARY_NAMES = {
+    "win32": ["gsdll64.dll", "gsdll32.dll"],
+    "darwin": ["libgs.dylib", "libgs.10.dylib", "libgs.9.dylib"],
+}
+_DEFAULT_LIBRARY_NAMES = ["libgs.so.10", "libgs.so.9", "libgs.so"]
+
+_STDIO_FUNC = ctypes.CFUNCTYPE(ctypes.c_int, ctypes.c_void_p, ctypes.c_void_p, ctypes.c_int)
+
+
+class _Revision(ctypes.Structure):
+    _fields_ = [
+        ("product", ctypes.c_char_p),
+        ("copyright", ctypes.c_char_p),
+        ("revision", ctypes.c_long),
+        ("revisiondate", ctypes.c_long),
+    ]
+
+
+_lib = None
+_lib_loaded = False
+
+
+def load_libgs():
+    """
+    libgs를 불러옵니다 (없으면 None).
+    - PDF_COMPRESS_LIBGS 환경 변수로 경로 지정 가능
+    """
+    global _lib, _lib_loaded
+    if _lib_loaded:
+        return _lib
+    _lib_loaded = True
+
+    candidates = []
+    if os.environ.get("PDF_COMPRESS_LIBGS"):
+        candidates.append(os.environ["PDF_COMPRESS_LIBGS"])
+    found = _find_system_library()
+    if found:
+        candidates.append(found)
+    candidates += _LIBRARY_NAMES.get(sys.platform, _DEFAULT_LIBRARY_NAMES)
+
+    for name in candidates:
+        try:
+            lib = ctypes.CDLL(name)
+        except OSError:
+            continue
+        if hasattr(lib, "gsapi_new_instance") and hasattr(lib, "gsapi_init_with_args"):
+            _lib = _declare(lib)
+            break
+    return _lib
+
+
+# find_library 결과가 바뀌는 기준 파일 (Linux 동적 링커 캐시, 다른 플랫폼은 조사 캐시를 쓰지 않음)
+_LINKER_CACHE = "/etc/ld.so.cache"
+
+
+def _find_system_library():
+    """
+    ctypes.util.find_library로 찾은 libgs 이름 (없으면 None)
+    find_library는 ldconfig/gcc를 실행해 수십 ms가 걸리므로 결과를 조사 캐시(pdf_compress_probe)에 저장하고
+    ld.so.cache가 바뀌지 않았으면 재사용 (못 찾은 결과는 빈 문자열로 저장)
+    """
+    from pdf_compress_probe import lookup, remember
+    basis = _LINKER_CACHE if sys.platform.startswith("linux") else None
+    found = lookup("libgs", "find_library") if basis else None
+    if found is None:
+        found = ctypes.util.find_library("gs") or ctypes.util.find_library("gsdll64") or ""
+        if basis:
+            remember("libgs", "find_library", found, basis)
+    return found or None
+
+
+def _declare(lib):
+    """gsapi 함수 시그니처 선언"""
+    lib.gsapi_new_instance.argtypes = [ctypes.POINTER(ctypes.c_void_p), ctypes.c_void_p]
+    lib.gsapi_new_instance.restype = ctypes.c_int
+    lib.gsapi_delete_instance.argtypes = [ctypes.c_void_p]
+    lib.gsapi_delete_instance.restype = None
+    lib.gsapi_set_arg_encoding.argtypes = [ctypes.c_void_p, ctypes.c_int]
+    lib.gsapi_set_arg_encoding.restype = ctypes.c_int
+    lib.gsapi_set_stdio.argtypes = [ctypes.c_void_p, _STDIO_FUNC, _STDIO_FUNC, _STDIO_FUNC]
+    lib.gsapi_set_stdio.restype = ctypes.c_int
+    lib.gsapi_init_with_args.argtypes = [ctypes.c_void_p, ctypes.c_int, ctypes.POINTER(ctypes.c_char_p)]
+    lib.gsapi_init_with_args.restype = ctypes.c_int
+    lib.gsapi_run_string.argtypes = [ctypes.c_void_p, ctypes.c_char_p, ctypes.c_int,
+                                     ctypes.POINTER(ctypes.c_int)]
+    lib.gsapi_run_string.restype = ctypes.c_int
+    lib.gsapi_exit.argtypes = [ctypes.c_void_p]
+    lib.gsapi_exit.restype = ctypes.c_int
+    lib.gsapi_revision.argtypes = [ctypes.POINTER(_Revision), ctypes.c_int]
+    lib.gsapi_revision.restype = ctypes.c_int
+    if hasattr(lib, "gsapi_add_control_path"):
+        lib.gsapi_add_control_path.argtypes = [ctypes.c_void_p, ctypes.c_int, ctypes.c_char_p]
+        lib.gsapi_add_control_path.restype = ctypes.c_int
+    return lib
+
+
+def is_available():
+    return load_libgs() is not None
+
+
+def libgs_version():
+    """libgs 제품/버전 문자열 (예: 'GPL Ghostscript 10021')"""
+    lib = load_libgs()
+    if lib is None:
+        return None
+    revision = _Revision()
+    lib.gsapi_revision(ctypes.byref(revision), ctypes.sizeof(revision))
+    product = (revision.product or b"Ghostscript").decode("utf-8", errors="ignore")
+    return f"{product} {revision.revision}"
+
+
+class GhostscriptInstance:
+    """초기화를 마친 채로 재사용하는 libgs 인터프리터 하나"""
+
+    def __init__(self, quality_level, lib=None):
+        if quality_level not in QUALITY_LEVELS:
+            raise ValueError(f"알 수 없는 품질 설정입니다: {quality_level}")
+        self.lib = lib or load_libgs()
+        if self.lib is None:
+            raise GhostscriptError("libgs를 찾을 수 없습니다.")
+        self.quality_level = quality_level
+        self.jobs_done = 0
+        self._stderr = bytearray()
+        self._handle = ctypes.c_void_p()
+        # 콜백 객체가 가비지 컬렉션되지 않도록 참조 유지
+        self._callbacks = (_STDIO_FUNC(self._on_stdin), _STDIO_FUNC(self._on_stdout),
+                           _STDIO_FUNC(self._on_stderr))
+        self._start()
+
+    # --- stdio 콜백 ---
+    def _on_stdin(self, handle, buf, length):
+        return 0
+
+    def _on_stdout(self, handle, buf, length):
+        return length
+
+    def _on_stderr(self, handle, buf, length):
+        self._stderr += ctypes.string_at(buf, length)
+        if len(self._stderr) > STDERR_LIMIT:
+            del self._stderr[:-STDERR_LIMIT]
+        return length
+
+    # --- 생명 주기 ---
+    def _start(self):
+        code = self.lib.gsapi_new_instance(ctypes.byref(self._handle), None)
+        if code < 0:
+            raise GhostscriptError("libgs 인스턴스를 만들 수 없습니다 (프로세스당 하나만 허용).", returncode=code)
+        self.lib.gsapi_set_stdio(self._handle, *self._callbacks)
+        self.lib.gsapi_set_arg_encoding(self._handle, GS_ARG_ENCODING_UTF8)
+
+        args = [
+            "gs",
+            "-sDEVICE=pdfwrite",
+            "-dCompatibilityLevel=1.4",
+            f"-dPDFSETTINGS=/{self.quality_level}",
+            "-dNOPAUSE",
+            "-dQUIET",
+            f"-sOutputFile={os.devnull}",
+        ]
+        if not hasattr(self.lib, "gsapi_add_control_path"):
+            # 9.50 이전 libgs는 파일별 권한을 줄 수 없음
+            args.append("-dNOSAFER")
+        argv = (ctypes.c_char_p * len(args))(*[arg.encode("utf-8") for arg in args])
+        code = self.lib.gsapi_init_with_args(self._handle, len(args), argv)
+        if code < 0 and code != GS_ERROR_QUIT:
+            self._stop()
+            raise GhostscriptError(f"libgs 초기화 실패 (code {code})", returncode=code,
+                                   stderr=self._stderr.decode("utf-8", errors="ignore"))
+
+    def _stop(self):
+        if self._handle:
+            self.lib.gsapi_exit(self._handle)
+            self.lib.gsapi_delete_instance(self._handle)
+            self._handle = ctypes.c_void_p()
+
+    def close(self):
+        self._stop()
+
+    # --- 작업 ---
+    def _permit(self, kind, path):
+        if hasattr(self.lib, "gsapi_add_control_path"):
+            self.lib.gsapi_add_control_path(self._handle, kind, os.path.abspath(path).encode("utf-8"))
+
+    def _run(self, source):
+        exit_code = ctypes.c_int(0)
+        return self.lib.gsapi_run_string(self._handle, source.encode("utf-8"), 0, ctypes.byref(exit_code))
+
+    def compress(self, input_path, output_path):
+        """
+        PDF 한 개를 압축합니다.
+        출력 장치를 새 파일로 바꾼 뒤 입력을 실행하고, 다시 null 장치로 바꿔
+        pdfwrite가 결과 파일을 마무리하도록 합니다.
+        """
+        self._permit(GS_PERMIT_FILE_READING, input_path)
+        self._permit(GS_PERMIT_FILE_WRITING, output_path)
+        self._stderr.clear()
+
+        source = (
+            f"<< /OutputFile {_ps_string(os.path.abspath(output_path))} >> setpagedevice "
+            f"{_ps_string(os.path.abspath(input_path))} run "
+            f"<< /OutputFile {_ps_string(os.devnull)} >> setpagedevice\n"
+        )
+        code = self._run(source)
+        if code < 0:
+            stderr = self._stderr.decode("utf-8", errors="ignore")
+            if code <= GS_ERROR_FATAL:
+                self._stop()
+            raise GhostscriptError(f"PDF 압축 중 오류가 발생했습니다.\n{stderr}",
+                                   returncode=code, stderr=stderr)
+        self.jobs_done += 1
+
+    @property
+    def alive(self):
+        return bool(self._handle)
+
+
+# --- 프로세스별 인스턴스 ---
+_instance = None
+_instance_lock = threading.Lock()
+
+
+def get_instance(quality_level):
+    """이 프로세스의 예열된 인스턴스 (프리셋이 다르거나 죽었으면 새로 초기화)"""
+    global _instance
+    if _instance is not None and (_instance.quality_level != quality_level or not _instance.alive):
+        _instance.close()
+        _instance = None
+    if _instance is None:
+        _instance = GhostscriptInstance(quality_level)
+    return _instance
+
+
+def warm_up(quality_level):
+    """작업자 프로세스 시작 시 인터프리터를 미리 초기화 (ProcessPoolExecutor initializer용)"""
+    if is_available() and not default_limits().active:
+        with _instance_lock:
+            get_instance(quality_level)
+
+
+def compress_with_gsapi(input_path, output_path, quality_level, progress_callback=None, cancel_event=None,
+                        limits=None):
+    """
+    libgs로 PDF를 압축하고, libgs가 없으면 gs 서브프로세스로 대체합니다.
+    - 프로세스 내부 실행은 중간에 중단할 수 없으므로 취소는 시작 전에만 확인
+    - 사용자 프리셋(pdf_compress_presets)은 옵션이 인스턴스 초기화 인자와 섞이므로 gs 서브프로세스로 실행
+    - limits: GhostscriptLimits (기본값: default_limits()), 제한이 있으면 시간 초과/취소까지 지원하는
+      gs 서브프로세스로 실행
+    """
+    limits = limits if limits is not None else default_limits()
+    if not is_available() or quality_level not in QUALITY_LEVELS or limits.active:
+        run_ghostscript(input_path, output_path, quality_level, progress_callback=progress_callback,
+                        cancel_event=cancel_event, limits=limits)
+        return
+    if cancel_event is not None and cancel_event.is_set():
+        raise CompressionCancelled()
+    with _instance_lock:
+        with stage("gs.spawn"):
+            instance = get_instance(quality_level)  # 예열된 인스턴스가 있으면 거의 0
+        with stage("gs.run"):
+            instance.compress(input_path, output_path)
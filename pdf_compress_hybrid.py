@@ -0,0 +1,403 @@
+# -*- coding: utf-8 -*-
+"""
+하이브리드 모드: 페이지 종류별로 엔진 고르기
+
+    from pdf_compress_hybrid import compress_hybrid
+    report = compress_hybrid("in.pdf", "out.pdf", "ebook")
+
+텍스트/벡터 페이지는 gs로 다시 만들어도 거의 줄지 않으면서 CPU를 많이 쓰고,
+스캔(이미지) 페이지는 gs가 크게 줄이는 경우가 많습니다.
+1. 페이지마다 이미지 스트림과 콘텐츠 스트림의 바이트 수만 보고 분류 (스트림 디코딩 없음)
+2. 종류별로 몇 페이지만 뽑아 엔진마다 압축해 보고, CPU 1초당 줄인 바이트가 가장 큰 엔진을 고름
+   (어느 엔진도 거의 못 줄이면 원본 페이지를 그대로 사용)
+3. 엔진마다 맡은 페이지만 뽑아 동시에 압축한 뒤 원래 순서대로 합치고 같은 객체를 하나로 합침
+프리셋은 gs 이름(screen/ebook/printer/prepress)을 쓰고 pypdf에는 PYPDF_PRESETS로 바꿔 넘깁니다.
+"""
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+from pdf_compress_engines import get_engine
+from pdf_compress_errors import CompressionCancelled
+from pdf_compress_metrics import stage
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# 캐시 키에 들어가는 분류/선택/합치기 규칙 버전
+HYBRID_VERSION = 2
+
+DEFAULT_ENGINES = ("ghostscript", "pypdf")
+
+# gs 프리셋 → pypdf 프리셋
+PYPDF_PRESETS = {
+    "screen": "낮음",
+    "ebook": "보통",
+    "printer": "높음",
+    "prepress": "높음"
+}
+
+# 원본 페이지를 그대로 쓰는 경로 이름
+KEEP = "keep"
+
+# 페이지 종류
+IMAGE_PAGE = "image"
+TEXT_PAGE = "text"
+KIND_LABELS = {IMAGE_PAGE: "이미지", TEXT_PAGE: "텍스트/벡터"}
+
+# 페이지 바이트 중 이미지가 이 비율 이상이고 IMAGE_PAGE_MIN_BYTES 이상이면 이미지 페이지
+IMAGE_PAGE_SHARE = 0.5
+IMAGE_PAGE_MIN_BYTES = 32 * 1024
+
+# 종류별로 압축해 볼 페이지 수
+DEFAULT_SAMPLE_PAGES = 3
+
+# 표본 크기의 이 비율보다 적게 줄이는 엔진은 고르지 않음
+MIN_SAVING_SHARE = 0.01
+
+# CPU 시간이 너무 짧게 재져 점수가 튀지 않도록 하는 하한 (초)
+MIN_CPU_SECONDS = 0.01
+
+
+@dataclass
+class PageProfile:
+    """페이지 하나의 분류 결과"""
+    page: int            # 1부터 시작
+    kind: str
+    image_bytes: int = 0
+    content_bytes: int = 0
+
+
+@dataclass
+class SampleResult:
+    """종류 하나의 표본을 엔진 하나로 압축해 본 결과"""
+    kind: str
+    engine: str
+    pages: int
+    input_size: int
+    output_size: int
+    cpu_seconds: float
+
+    @property
+    def saved(self):
+        return self.input_size - self.output_size
+
+    @property
+    def score(self):
+        """CPU 1초당 줄인 바이트"""
+        return self.saved / max(self.cpu_seconds, MIN_CPU_SECONDS)
+
+
+@dataclass
+class EngineRun:
+    """엔진 하나가 맡은 페이지들을 압축한 결과"""
+    engine: str
+    preset: str
+    pages: list
+    input_size: int = 0
+    output_size: int = 0
+    seconds: float = 0.0
+    kept_original: bool = False  # 결과가 더 커서 뽑은 페이지를 그대로 사용
+
+
+@dataclass
+class HybridReport:
+    """하이브리드 압축 전체 결과"""
+    preset: str = ""
+    page_count: int = 0
+    profiles: list = field(default_factory=list)
+    routes: dict = field(default_factory=dict)     # 페이지 종류 → 엔진 (또는 KEEP)
+    samples: list = field(default_factory=list)
+    runs: list = field(default_factory=list)
+    classify_seconds: float = 0.0
+    calibrate_seconds: float = 0.0
+    compress_seconds: float = 0.0
+    merge_seconds: float = 0.0
+    original_size: int = 0
+    output_size: int = 0
+    objects_merged: int = 0
+    kept_original: bool = False
+
+    @property
+    def ranges(self):
+        """연속된 페이지를 엔진별로 묶은 [(first, last, 종류, 엔진)]"""
+        ranges = []
+        for profile in self.profiles:
+            engine = self.routes.get(profile.kind, KEEP)
+            if ranges and ranges[-1][2:] == (profile.kind, engine) and ranges[-1][1] == profile.page - 1:
+                ranges[-1] = (ranges[-1][0], profile.page, profile.kind, engine)
+            else:
+                ranges.append((profile.page, profile.page, profile.kind, engine))
+        return ranges
+
+    @property
+    def kind_counts(self):
+        counts = {}
+        for profile in self.profiles:
+            counts[profile.kind] = counts.get(profile.kind, 0) + 1
+        return counts
+
+    @property
+    def wall_seconds(self):
+        return self.classify_seconds + self.calibrate_seconds + self.compress_seconds + self.merge_seconds
+
+
+def _stream_bytes(obj):
+    return len(getattr(obj, "_data", None) or b"")
+
+
+def _page_bytes(page):
+    """페이지가 쓰는 (이미지 스트림 바이트, 콘텐츠/폼 스트림 바이트), 인코딩된 크기 그대로"""
+    image_bytes = 0
+    content_bytes = 0
+    contents = page.get("/Contents")
+    if contents is not None:
+        contents = contents.get_object()
+        for part in (contents if isinstance(contents, list) else [contents]):
+            content_bytes += _stream_bytes(part.get_object())
+    resources = page.get("/Resources")
+    xobjects = resources.get_object().get("/XObject") if resources is not None else None
+    if xobjects is not None:
+        for ref in xobjects.get_object().values():
+            xobject = ref.get_object()
+            if xobject.get("/Subtype") == "/Image":
+                image_bytes += _stream_bytes(xobject)
+            else:
+                # 폼 안쪽까지 따라가지 않음 (분류에는 대략적인 크기면 충분)
+                content_bytes += _stream_bytes(xobject)
+    return image_bytes, content_bytes
+
+
+def classify_pages(reader):
+    """PdfReader의 페이지마다 PageProfile 목록 반환"""
+    profiles = []
+    for number, page in enumerate(reader.pages, 1):
+        image_bytes, content_bytes = _page_bytes(page)
+        total = image_bytes + content_bytes
+        is_image = image_bytes >= IMAGE_PAGE_MIN_BYTES and image_bytes >= IMAGE_PAGE_SHARE * total
+        profiles.append(PageProfile(number, IMAGE_PAGE if is_image else TEXT_PAGE, image_bytes, content_bytes))
+    return profiles
+
+
+def _spread(items, count):
+    """items에서 고르게 count개 선택"""
+    if len(items) <= count:
+        return list(items)
+    step = len(items) / count
+    return [items[int(i * step + step / 2)] for i in range(count)]
+
+
+def _extract_pages(reader, pages, output_path):
+    """1부터 시작하는 페이지 번호 목록만 새 PDF로 저장 (스트림은 그대로 복사)"""
+    import PyPDF2
+    writer = PyPDF2.PdfWriter()
+    for number in pages:
+        writer.add_page(reader.pages[number - 1])
+    with open(output_path, "wb") as f:
+        writer.write(f)
+    return os.path.getsize(output_path)
+
+
+def _cpu_seconds():
+    """이 프로세스와 끝난 자식 프로세스(gs)의 CPU 시간 합계, resource가 없으면 경과 시간"""
+    if resource is None:
+        return time.perf_counter()
+    return sum(usage.ru_utime + usage.ru_stime
+               for usage in (resource.getrusage(resource.RUSAGE_SELF),
+                             resource.getrusage(resource.RUSAGE_CHILDREN)))
+
+
+def _pypdf_preset(preset):
+    """gs 프리셋에 맞는 pypdf 프리셋 (사용자 프리셋은 기본 프리셋 기준, 모르는 이름이면 None)"""
+    if preset in PYPDF_PRESETS:
+        return PYPDF_PRESETS[preset]
+    from pdf_compress_presets import get_custom_preset
+    custom = get_custom_preset(preset)
+    return PYPDF_PRESETS[custom.base] if custom is not None else None
+
+
+def _engine_preset(engine, preset):
+    return _pypdf_preset(preset) if engine == "pypdf" else preset
+
+
+def _run_engine(engine, input_path, output_path, preset, jobs=None, progress_callback=None, cancel_event=None):
+    options = {"jobs": jobs} if engine == "pypdf" else {}
+    get_engine(engine).compress(input_path, output_path, _engine_preset(engine, preset),
+                                progress_callback=progress_callback, cancel_event=cancel_event, **options)
+
+
+def _calibrate(reader, kind_pages, engines, preset, sample_pages, tmp_dir, cancel_event):
+    """종류마다 표본을 엔진별로 압축해 보고 (경로 {종류: 엔진}, SampleResult 목록) 반환"""
+    routes = {}
+    samples = []
+    for kind, pages in kind_pages.items():
+        sample_path = os.path.join(tmp_dir, f"sample_{kind}.pdf")
+        input_size = _extract_pages(reader, _spread(pages, sample_pages), sample_path)
+        best = None
+        for engine in engines:
+            if cancel_event is not None and cancel_event.is_set():
+                raise CompressionCancelled()
+            output_path = os.path.join(tmp_dir, f"sample_{kind}_{engine}.pdf")
+            # 표본은 작으므로 한 프로세스로 압축 (프로세스 풀 CPU가 섞이지 않게)
+            before = _cpu_seconds()
+            _run_engine(engine, sample_path, output_path, preset, jobs=1, cancel_event=cancel_event)
+            sample = SampleResult(kind, engine, min(len(pages), sample_pages), input_size,
+                                  os.path.getsize(output_path), _cpu_seconds() - before)
+            samples.append(sample)
+            if sample.saved < input_size * MIN_SAVING_SHARE:
+                continue
+            if best is None or sample.score > best.score:
+                best = sample
+        routes[kind] = best.engine if best else KEEP
+    return routes, samples
+
+
+def compress_hybrid(input_path, output_path, preset="ebook", engines=None, sample_pages=DEFAULT_SAMPLE_PAGES,
+                    jobs=None, progress_callback=None, cancel_event=None):
+    """
+    페이지 종류별로 고른 엔진으로 압축해 합칩니다.
+    - preset: screen/ebook/printer/prepress 또는 사용자 프리셋 (pypdf에는 PYPDF_PRESETS로 변환,
+      사용자 프리셋은 기본 프리셋 기준)
+    - engines: 후보 엔진 (기본값: ghostscript, pypdf 중 사용 가능한 것)
+    - sample_pages: 종류별로 압축해 볼 페이지 수
+    - jobs: pypdf 이미지 재인코딩 프로세스 수
+    - progress_callback(done_pages, total_pages) / cancel_event: 엔진에 그대로 전달
+    - 결과 파일이 원본보다 크면 원본을 그대로 복사
+    - 반환값: HybridReport
+    """
+    import PyPDF2
+
+    if _pypdf_preset(preset) is None:
+        raise ValueError(f"알 수 없는 프리셋입니다: {preset} (사용 가능: {', '.join(PYPDF_PRESETS)} 또는 사용자 프리셋)")
+    candidates = [name for name in (engines or DEFAULT_ENGINES) if get_engine(name).unavailable_reason() is None]
+    if not candidates:
+        reasons = [f"{name}: {get_engine(name).unavailable_reason()}" for name in (engines or DEFAULT_ENGINES)]
+        raise RuntimeError(f"사용할 수 있는 엔진이 없습니다 ({', '.join(reasons)})")
+
+    report = HybridReport(preset=preset, original_size=os.path.getsize(input_path))
+    tmp_dir = tempfile.mkdtemp(prefix=".pdf_hybrid_", dir=os.path.dirname(os.path.abspath(output_path)))
+    try:
+        with open(input_path, "rb") as f:
+            reader = PyPDF2.PdfReader(f)
+            start = time.perf_counter()
+            with stage("hybrid.classify"):
+                report.profiles = classify_pages(reader)
+            report.page_count = len(report.profiles)
+            report.classify_seconds = time.perf_counter() - start
+
+            kind_pages = {}
+            for profile in report.profiles:
+                kind_pages.setdefault(profile.kind, []).append(profile.page)
+
+            start = time.perf_counter()
+            with stage("hybrid.calibrate"):
+                report.routes, report.samples = _calibrate(reader, kind_pages, candidates, preset,
+                                                           sample_pages, tmp_dir, cancel_event)
+            report.calibrate_seconds = time.perf_counter() - start
+
+            engine_pages = {}
+            for profile in report.profiles:
+                engine_pages.setdefault(report.routes[profile.kind], []).append(profile.page)
+            report.runs = [EngineRun(engine, _engine_preset(engine, preset), pages)
+                           for engine, pages in engine_pages.items() if engine != KEEP]
+            whole = len(engine_pages) == 1
+            if not whole:
+                for run in report.runs:
+                    run.input_size = _extract_pages(reader, run.pages,
+                                                    os.path.join(tmp_dir, f"pages_{run.engine}.pdf"))
+
+        start = time.perf_counter()
+        _compress_runs(input_path, output_path, report, whole, jobs, tmp_dir, progress_callback, cancel_event)
+        report.compress_seconds = time.perf_counter() - start
+
+        if not whole:
+            start = time.perf_counter()
+            outputs = {run.engine: run for run in report.runs}
+            sources = []
+            positions = {}
+            for profile in report.profiles:
+                engine = report.routes[profile.kind]
+                if engine == KEEP:
+                    sources.append((input_path, profile.page - 1))
+                    continue
+                run = outputs[engine]
+                path = os.path.join(tmp_dir, f"pages_{engine}{'' if run.kept_original else '_out'}.pdf")
+                sources.append((path, positions.get(engine, 0)))
+                positions[engine] = positions.get(engine, 0) + 1
+            from pdf_compress_split import merge_pages
+            with stage("hybrid.merge"):
+                stats = merge_pages(sources, output_path, original=input_path)
+            report.objects_merged = stats.objects_merged
+            report.merge_seconds = time.perf_counter() - start
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    if os.path.getsize(output_path) >= report.original_size:
+        shutil.copyfile(input_path, output_path)
+        report.kept_original = True
+    report.output_size = os.path.getsize(output_path)
+    return report
+
+
+def _compress_runs(input_path, output_path, report, whole, jobs, tmp_dir, progress_callback, cancel_event):
+    """엔진별 압축을 동시에 실행 (whole이면 문서 전체를 엔진 하나로)"""
+    if whole and not report.runs:
+        shutil.copyfile(input_path, output_path)
+        return
+    done = {}
+
+    def run_one(run):
+        if whole:
+            src, dst = input_path, output_path
+            run.input_size = report.original_size
+        else:
+            src = os.path.join(tmp_dir, f"pages_{run.engine}.pdf")
+            dst = os.path.join(tmp_dir, f"pages_{run.engine}_out.pdf")
+
+        def on_progress(page, total):
+            done[run.engine] = page * len(run.pages) // max(total, 1)
+            if progress_callback:
+                progress_callback(sum(done.values()), report.page_count)
+
+        start = time.perf_counter()
+        _run_engine(run.engine, src, dst, report.preset, jobs=jobs, cancel_event=cancel_event,
+                    progress_callback=on_progress)
+        run.seconds = time.perf_counter() - start
+        run.output_size = os.path.getsize(dst)
+        if not whole and run.output_size >= run.input_size:
+            run.kept_original = True
+        on_progress(1, 1)
+
+    with ThreadPoolExecutor(max_workers=len(report.runs)) as executor:
+        for future in [executor.submit(run_one, run) for run in report.runs]:
+            future.result()
+
+
+def format_hybrid_report(report):
+    """페이지 구간별 경로, 표본 점수, 엔진별 절감량을 여러 줄 문자열로 반환"""
+    lines = []
+    for first, last, kind, engine in report.ranges:
+        pages = f"{first}" if first == last else f"{first}-{last}"
+        lines.append(f"  페이지 {pages}: {KIND_LABELS[kind]} → {'원본 유지' if engine == KEEP else engine}")
+    for sample in report.samples:
+        lines.append(f"  표본 {KIND_LABELS[sample.kind]}/{sample.engine}: {sample.input_size / 1024:.1f} KB → "
+                     f"{sample.output_size / 1024:.1f} KB, CPU {sample.cpu_seconds:.2f}s "
+                     f"({sample.score / 1024:.0f} KB/CPU초)")
+    for run in report.runs:
+        lines.append(f"  {run.engine}({run.preset}) {len(run.pages)}페이지: {run.input_size / 1024:.1f} KB → "
+                     f"{run.output_size / 1024:.1f} KB, {run.seconds:.2f}s"
+                     + (" (원본 유지)" if run.kept_original else ""))
+    kinds = ", ".join(f"{KIND_LABELS[kind]} {count}" for kind, count in report.kind_counts.items())
+    lines.append(
+        f"총 {report.page_count}페이지 ({kinds}) | {report.original_size / 1024:.1f} KB → "
+        f"{report.output_size / 1024:.1f} KB"
+        + (" (원본 유지)" if report.kept_original else "")
+        + f" | 분류 {report.classify_seconds:.2f}s + 표본 {report.calibrate_seconds:.2f}s + "
+        f"압축 {report.compress_seconds:.2f}s + 합치기 {report.merge_seconds:.2f}s"
+    )
+    return "\n".join(lines)
@@ -1,81 +1,38 @@
 import tkinter as tk
 from tkinter import filedialog, messagebox, ttk
-import subprocess
-import shutil
-import sys
 import os
-from tkinter import font
+
+# gs/일괄 압축/프리셋 모듈은 창을 띄운 뒤 처음 쓸 때 불러옴 (시작 시간 단축)
+from pdf_compress_api import run_engine, compress
+from pdf_compress_cache import get_default_cache
+from pdf_compress_worker import CompressionWorker
+
+# 압축 전 분석의 예상 감소율(%)이 이보다 작으면 이미 최적화된 파일로 보고 확인/건너뛰기
+PREFLIGHT_MIN_SAVINGS = 5.0
 
 # --- PDF 압축 핵심 기능 ---
-def compress_pdf(input_path, output_path, quality_level):
+def compress_pdf(input_path, output_path, quality_level, linearize=False):
     """
     Ghostscript를 사용하여 PDF를 압축합니다.
-    - quality_level: 'screen', 'ebook', 'printer', 'prepress' 중 하나
+    - quality_level: 'screen', 'ebook', 'printer', 'prepress' 중 하나 또는 저장한 사용자 프리셋 이름
+    - linearize: 결과를 선형화(Fast Web View)해서 웹에서 첫 페이지부터 보이게 함
     """
-    gs_command = find_ghostscript_executable()
-    if not gs_command:
-        messagebox.showerror(
-            "오류",
-            "Ghostscript를 찾을 수 없습니다.\n"
-            "프로그램을 사용하려면 Ghostscript를 설치하고\n"
-            "PATH 환경 변수에 추가해야 합니다."
-        )
-        return False
-
-    # Ghostscript 명령어 구성
-    command = [
-        gs_command,
-        "-sDEVICE=pdfwrite",
-        "-dCompatibilityLevel=1.4",
-        f"-dPDFSETTINGS=/{quality_level}",
-        "-dNOPAUSE",
-        "-dQUIET",
-        "-dBATCH",
-        f"-sOutputFile={output_path}",
-        input_path
-    ]
-
+    from pdf_compress_gs import GhostscriptError, GhostscriptNotFoundError
     try:
-        # 서브프로세스로 Ghostscript 실행
-        # Windows에서는 CREATE_NO_WINDOW 플래그로 콘솔 창 숨김
-        startupinfo = None
-        if sys.platform == "win32":
-            startupinfo = subprocess.STARTUPINFO()
-            startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
-
-        process = subprocess.run(
-            command,
-            check=True,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            startupinfo=startupinfo
-        )
+        # 같은 파일/설정으로 압축한 적이 있으면 캐시된 결과 재사용
+        run_engine("ghostscript", input_path, output_path, quality_level, cache=get_default_cache(),
+                   linearize=linearize)
         return True
-    except FileNotFoundError:
-        messagebox.showerror("오류", "Ghostscript를 실행할 수 없습니다. 설치를 확인해주세요.")
+    except GhostscriptNotFoundError as e:
+        messagebox.showerror("오류", str(e))
         return False
-    except subprocess.CalledProcessError as e:
-        error_message = f"PDF 압축 중 오류가 발생했습니다.\n{e.stderr.decode('utf-8', errors='ignore')}"
-        messagebox.showerror("압축 오류", error_message)
+    except GhostscriptError as e:
+        messagebox.showerror("압축 오류", str(e))
         return False
     except Exception as e:
         messagebox.showerror("알 수 없는 오류", f"예상치 못한 오류가 발생했습니다: {e}")
         return False
 
-def find_ghostscript_executable():
-    """
-    시스템에서 Ghostscript 실행 파일을 찾습니다.
-    (Windows: gswin64c.exe, gswin32c.exe / Linux/macOS: gs)
-    """
-    if sys.platform == "win32":
-        for cmd in ["gswin64c", "gswin32c", "gs"]:
-            if shutil.which(cmd):
-                return shutil.which(cmd)
-    else: # Linux, macOS
-        if shutil.which("gs"):
-            return shutil.which("gs")
-    return None
-
 # --- GUI 애플리케이션 ---
 class PDFCompressorApp:
     def __init__(self, root):
@@ -103,6 +60,16 @@ class PDFCompressorApp:
         self.root.configure(bg=self.colors['background'])
 
         self.input_file_path = ""
+        self.input_dir_path = ""
+        self.analysis = None  # 선택한 파일의 압축 전 분석 결과 (pdf_compress_analyze)
+        self.worker = None
+
+        # 폰트/스타일/위젯은 빈 창이 먼저 뜬 뒤 만듦
+        self.root.after_idle(self.build_ui)
+
+    def build_ui(self):
+        """폰트, 스타일, 위젯 생성"""
+        from tkinter import font
 
         # 커스텀 폰트 설정 (macOS 호환성을 위해 시스템 폰트 사용)
         try:
@@ -243,12 +210,22 @@ class PDFCompressorApp:
                                   padding="12 8")
         self.file_label.pack(anchor="w")
 
+        button_row = ttk.Frame(file_selection_frame)
+        button_row.pack(anchor="w")
+
         # 파일 찾기 버튼
-        browse_button = ttk.Button(file_selection_frame,
+        browse_button = ttk.Button(button_row,
                                  text="🔍 파일 찾기",
                                  command=self.browse_file,
                                  style="Secondary.TButton")
-        browse_button.pack(anchor="w")
+        browse_button.pack(side=tk.LEFT)
+
+        # 폴더 선택 버튼 (일괄 압축)
+        browse_folder_button = ttk.Button(button_row,
+                                        text="📂 폴더 선택",
+                                        command=self.browse_folder,
+                                        style="Secondary.TButton")
+        browse_folder_button.pack(side=tk.LEFT, padx=(8, 0))
 
     def create_quality_settings(self):
         """품질 설정 섹션 생성"""
@@ -281,6 +258,46 @@ class PDFCompressorApp:
                                  font=('Helvetica', 9))
             desc_label.pack(anchor="w", padx=(20, 0))
 
+        # pdf_compress_tune으로 저장한 사용자 프리셋
+        from pdf_compress_presets import load_presets
+        try:
+            custom_presets = load_presets()
+        except (OSError, ValueError, TypeError):
+            custom_presets = {}
+        for name, preset in sorted(custom_presets.items()):
+            option_frame = ttk.Frame(quality_card)
+            option_frame.pack(fill=tk.X, pady=5)
+
+            rb = ttk.Radiobutton(option_frame, text=f"🧪 {name} (사용자 프리셋)", variable=self.quality_var, value=name)
+            rb.pack(anchor="w")
+
+            desc_label = ttk.Label(option_frame, text=f"   {preset.description or preset.label}",
+                                 foreground=self.colors['text_secondary'],
+                                 font=('Helvetica', 9))
+            desc_label.pack(anchor="w", padx=(20, 0))
+
+        # 목표 크기 옵션: 예산 안에서 가장 높은 품질을 자동 탐색
+        target_frame = ttk.Frame(quality_card)
+        target_frame.pack(fill=tk.X, pady=5)
+
+        rb = ttk.Radiobutton(target_frame, text="🎯 목표 크기 (자동 품질)", variable=self.quality_var, value="target")
+        rb.pack(side=tk.LEFT)
+
+        self.target_size_var = tk.StringVar(value="10")
+        target_entry = ttk.Entry(target_frame, textvariable=self.target_size_var, width=8)
+        target_entry.pack(side=tk.LEFT, padx=(10, 4))
+        ttk.Label(target_frame, text="MB 이하", foreground=self.colors['text_secondary']).pack(side=tk.LEFT)
+
+        # 폴더 압축 시 압축 전 분석으로 줄어들 것이 거의 없는 파일은 원본만 복사
+        self.skip_hopeless_var = tk.BooleanVar(value=True)
+        ttk.Checkbutton(quality_card, text=f"⏭️ 예상 감소가 {PREFLIGHT_MIN_SAVINGS:.0f}% 미만인 파일은 건너뛰기 (폴더 압축)",
+                        variable=self.skip_hopeless_var).pack(anchor="w", pady=(8, 0))
+
+        # 웹 포털에 올릴 파일은 다 받기 전에 첫 페이지가 보이도록 선형화
+        self.linearize_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(quality_card, text="🌐 웹 보기용으로 저장 (첫 페이지부터 표시, Fast Web View)",
+                        variable=self.linearize_var).pack(anchor="w", pady=(4, 0))
+
     def create_progress_section(self):
         """진행률 표시 섹션 생성"""
         self.progress_card = ttk.Frame(self.main_frame, style="Card.TFrame", padding="20 15")
@@ -310,6 +327,12 @@ class PDFCompressorApp:
                                         style="Primary.TButton")
         self.compress_button.pack(fill=tk.X, ipady=5)
 
+        # 취소 버튼 (압축 중에만 표시)
+        self.cancel_button = ttk.Button(button_frame,
+                                      text="⏹️ 취소",
+                                      command=self.cancel_compression,
+                                      style="Secondary.TButton")
+
     def browse_file(self):
         # Ensure file dialog is called on the main thread
         self.root.after(0, self._browse_file_dialog)
@@ -322,6 +345,7 @@ class PDFCompressorApp:
         )
         if file_path:
             self.input_file_path = file_path
+            self.input_dir_path = ""
 
             # 파일 정보 업데이트
             file_name = os.path.basename(file_path)
@@ -334,17 +358,96 @@ class PDFCompressorApp:
 
             # 파일 정보 표시 업데이트
             file_info_text = f"📄 {display_name}\n💾 크기: {file_size:.2f} MB"
+            prediction = self.analyze_selected_file(file_path)
+            if prediction:
+                file_info_text += f"\n{prediction}"
             self.file_label.config(text=file_info_text)
 
+    def analyze_selected_file(self, file_path):
+        """압축 전 분석으로 프리셋을 미리 고르고 예상 결과 문구를 반환 (분석 실패 시 빈 문자열)"""
+        from pdf_compress_analyze import analyze_pdf, recommend_preset
+        try:
+            self.analysis = analyze_pdf(file_path)
+        except Exception:
+            self.analysis = None
+            return ""
+        preset = recommend_preset(self.analysis, "ghostscript", PREFLIGHT_MIN_SAVINGS)
+        if preset is None:
+            best = max(self.analysis.expected_percent("ghostscript", name) for name in ("screen", "ebook"))
+            return f"🔎 이미 최적화된 파일로 보입니다 (예상 감소 {best:.0f}%)"
+        from pdf_compress_gs import QUALITY_LEVELS
+        if self.quality_var.get() not in QUALITY_LEVELS:
+            # 목표 크기 모드나 사용자 프리셋을 고른 상태면 그대로 두고 예상치만 표시
+            quality = self.quality_var.get()
+            if quality == "target":
+                return f"🔎 예상 감소: {self.analysis.expected_percent('ghostscript', preset):.0f}% ({preset} 기준)"
+            return f"🔎 예상 감소: {self.analysis.expected_percent('ghostscript', quality):.0f}% ({quality})"
+        self.quality_var.set(preset)
+        return f"🔎 예상 감소: {self.analysis.expected_percent('ghostscript', preset):.0f}% ({preset} 자동 선택)"
+
+    def browse_folder(self):
+        # Ensure folder dialog is called on the main thread
+        self.root.after(0, self._browse_folder_dialog)
+
+    def _browse_folder_dialog(self):
+        """폴더 선택 다이얼로그 처리 (일괄 압축)"""
+        dir_path = filedialog.askdirectory(title="압축할 PDF 폴더 선택")
+        if not dir_path:
+            return
+
+        from pdf_compress_batch import collect_pdf_files
+        items = collect_pdf_files([dir_path])
+        if not items:
+            messagebox.showwarning("⚠️ 알림", "선택한 폴더에 PDF 파일이 없습니다.")
+            return
+
+        self.input_dir_path = dir_path
+        self.input_file_path = ""
+        self.analysis = None
+
+        total_size = sum(item.size for item in items) / (1024 * 1024)  # MB 단위
+        display_name = os.path.basename(dir_path) or dir_path
+        if len(display_name) > 40:
+            display_name = display_name[:20] + "..." + display_name[-17:]
+        self.file_label.config(text=f"📂 {display_name}\n💾 PDF {len(items)}개, 총 {total_size:.2f} MB")
+
+    def get_target_bytes(self):
+        """목표 크기 입력값(MB)을 바이트로 변환 (잘못된 값이면 None)"""
+        try:
+            target_mb = float(self.target_size_var.get())
+        except ValueError:
+            return None
+        return int(target_mb * 1024 * 1024) if target_mb > 0 else None
+
     def start_compression(self):
         """압축 프로세스 시작"""
-        if not self.input_file_path:
+        if not self.input_file_path and not self.input_dir_path:
             messagebox.showwarning("⚠️ 알림", "먼저 압축할 PDF 파일을 선택해주세요.")
             return
 
+        if self.quality_var.get() == "target":
+            if self.input_dir_path:
+                messagebox.showwarning("⚠️ 알림", "목표 크기 모드는 파일 하나에만 사용할 수 있습니다.")
+                return
+            if self.get_target_bytes() is None:
+                messagebox.showwarning("⚠️ 알림", "목표 크기를 MB 단위 숫자로 입력해주세요.")
+                return
+
+        quality = self.quality_var.get()
+        if self.input_file_path and self.analysis is not None and quality != "target":
+            expected = self.analysis.expected_percent("ghostscript", quality)
+            if expected < PREFLIGHT_MIN_SAVINGS and not messagebox.askyesno(
+                    "🔎 압축 전 분석",
+                    f"이 파일은 '{quality}' 설정으로 약 {expected:.0f}%만 줄어들 것으로 보입니다.\n그래도 압축할까요?"):
+                return
+
         # 진행률 섹션 표시
         self.show_progress_section()
 
+        if self.input_dir_path:
+            self.root.after(0, self._batch_output_dialog)
+            return
+
         # 파일 저장 다이얼로그 호출
         self.root.after(0, self._save_file_dialog)
 
@@ -392,7 +495,6 @@ class PDFCompressorApp:
         """진행률 업데이트"""
         self.progress_var.set(value)
         self.status_label.config(text=status_text)
-        self.root.update()
 
     def _save_file_dialog(self):
         """저장 파일 다이얼로그 처리"""
@@ -410,60 +512,164 @@ class PDFCompressorApp:
         # 압축 실행
         self.execute_compression(output_path)
 
+    def set_running(self, running):
+        """압축 중/대기 상태에 맞게 버튼과 커서 변경"""
+        if running:
+            self.compress_button.config(state='disabled', text="🔄 압축 중...")
+            self.cancel_button.config(state='normal', text="⏹️ 취소")
+            self.cancel_button.pack(fill=tk.X, pady=(8, 0))
+            self.root.config(cursor="watch")
+        else:
+            self.worker = None
+            self.cancel_button.pack_forget()
+            self.compress_button.config(state='normal', text="🚀 압축 시작하기")
+            self.root.config(cursor="")
+
+    def cancel_compression(self):
+        """진행 중인 압축 취소 (gs 프로세스 종료 및 미완성 파일 삭제)"""
+        if self.worker is not None and self.worker.running:
+            self.worker.cancel()
+            self.cancel_button.config(state='disabled', text="⏳ 취소 중...")
+            self.update_progress(self.progress_var.get(), "⏹️ 취소하는 중...")
+
+    def on_compression_cancelled(self):
+        """취소 완료 처리"""
+        self.set_running(False)
+        self.update_progress(0, "⏹️ 압축이 취소되었습니다")
+        self.compressed_size_label.config(text="🗜️ 압축 후 크기: 취소됨")
+        self.compression_ratio_label.config(text="📈 압축률: 취소됨")
+        self.root.after(1500, self.hide_progress_section)
+
+    def show_compression_error(self, error):
+        """압축 오류 종류에 맞는 메시지 표시"""
+        from pdf_compress_gs import GhostscriptError, GhostscriptNotFoundError
+        if isinstance(error, GhostscriptNotFoundError):
+            messagebox.showerror("오류", str(error))
+        elif isinstance(error, GhostscriptError):
+            messagebox.showerror("압축 오류", str(error))
+        else:
+            messagebox.showerror("알 수 없는 오류", f"예상치 못한 오류가 발생했습니다: {error}")
+
     def execute_compression(self, output_path):
-        """실제 압축 실행"""
+        """실제 압축 실행 (작업 스레드에서 실행하고 진행률은 큐로 전달받음)"""
         quality = self.quality_var.get()
 
         # UI 상태 업데이트
-        self.compress_button.config(state='disabled', text="🔄 압축 중...")
-        self.root.config(cursor="wait")
+        self.set_running(True)
 
         # 원본 파일 크기 계산 및 표시
         try:
             original_size = os.path.getsize(self.input_file_path) / (1024 * 1024)  # MB
             self.original_size_label.config(text=f"📄 원본 크기: {original_size:.2f} MB")
-            self.root.update()
         except Exception as e:
             self.original_size_label.config(text="📄 원본 크기: 계산 실패")
 
-        # 진행률 업데이트
-        self.update_progress(10, "🔍 파일 분석 중...")
+        self.update_progress(0, "🔍 파일 분석 중...")
 
-        # 압축 실행
-        self.update_progress(30, "🗜️ PDF 압축 중...")
-        success = compress_pdf(self.input_file_path, output_path, quality)
-
-        if success:
-            # 압축 후 파일 크기 계산 및 표시
-            try:
-                compressed_size = os.path.getsize(output_path) / (1024 * 1024)  # MB
-                self.compressed_size_label.config(text=f"🗜️ 압축 후 크기: {compressed_size:.2f} MB")
-
-                # 압축률 계산 및 표시
-                if original_size > 0:
-                    reduction = ((original_size - compressed_size) / original_size) * 100
-                    self.compression_ratio_label.config(text=f"📈 압축률: {reduction:.1f}% 감소")
-                else:
-                    self.compression_ratio_label.config(text="📈 압축률: 계산 실패")
-
-                self.root.update()
-            except Exception as e:
-                self.compressed_size_label.config(text="🗜️ 압축 후 크기: 계산 실패")
-                self.compression_ratio_label.config(text="📈 압축률: 계산 실패")
+        def on_progress(done, total):
+            if total:
+                self.update_progress(done * 100 / total, f"🗜️ PDF 압축 중... ({done}/{total} 페이지)")
 
-        # UI 상태 복원
-        self.root.config(cursor="")
-        self.compress_button.config(state='normal', text="🚀 압축 시작하기")
+        def on_done(result):
+            self.on_compression_finished(output_path, result.cached)
 
-        if success:
-            self.update_progress(100, "✅ 압축 완료!")
-            self.show_compression_result(output_path)
-        else:
+        def on_error(error):
+            self.set_running(False)
             self.update_progress(0, "❌ 압축 실패")
             self.compressed_size_label.config(text="🗜️ 압축 후 크기: 압축 실패")
             self.compression_ratio_label.config(text="📈 압축률: 압축 실패")
+            self.show_compression_error(error)
+            self.hide_progress_section()
+
+        target_size = None
+        if quality == "target":
+            target_size = self.get_target_bytes()
+            quality = None
+
+        # 같은 파일/설정으로 압축한 적이 있으면 캐시된 결과 재사용
+        self.worker = CompressionWorker(compress, self.input_file_path, output_path, engine="ghostscript",
+                                        preset=quality, cache=get_default_cache(), target_size=target_size,
+                                        linearize=self.linearize_var.get())
+        self.worker.start().attach(self.root, on_progress=on_progress, on_done=on_done,
+                                   on_error=on_error, on_cancelled=self.on_compression_cancelled)
+
+    def on_compression_finished(self, output_path, cached=False):
+        """압축 완료 후 크기 정보 표시"""
+        try:
+            original_size = os.path.getsize(self.input_file_path) / (1024 * 1024)  # MB
+            compressed_size = os.path.getsize(output_path) / (1024 * 1024)  # MB
+            self.compressed_size_label.config(text=f"🗜️ 압축 후 크기: {compressed_size:.2f} MB")
+
+            # 압축률 계산 및 표시
+            if original_size > 0:
+                reduction = ((original_size - compressed_size) / original_size) * 100
+                self.compression_ratio_label.config(text=f"📈 압축률: {reduction:.1f}% 감소")
+            else:
+                self.compression_ratio_label.config(text="📈 압축률: 계산 실패")
+        except Exception as e:
+            self.compressed_size_label.config(text="🗜️ 압축 후 크기: 계산 실패")
+            self.compression_ratio_label.config(text="📈 압축률: 계산 실패")
+
+        # UI 상태 복원
+        self.set_running(False)
+        self.update_progress(100, "✅ 압축 완료! (캐시 사용)" if cached else "✅ 압축 완료!")
+        self.show_compression_result(output_path)
+
+    def _batch_output_dialog(self):
+        """일괄 압축 결과 폴더 선택"""
+        output_dir = filedialog.askdirectory(title="압축된 PDF를 저장할 폴더 선택")
+        if not output_dir:
+            self.hide_progress_section()
+            return
+        self.execute_batch_compression(output_dir)
+
+    def execute_batch_compression(self, output_dir):
+        """폴더 일괄 압축 실행 (작업 스레드에서 gs 프로세스를 병렬 실행)"""
+        from pdf_compress_batch import collect_pdf_files, compress_batch
+        quality = self.quality_var.get()
+        items = collect_pdf_files([self.input_dir_path], output_dir)
+
+        self.set_running(True)
+
+        total_size = sum(item.size for item in items) / (1024 * 1024)
+        self.original_size_label.config(text=f"📄 원본 크기: {total_size:.2f} MB ({len(items)}개 파일)")
+        self.update_progress(0, f"🗜️ {len(items)}개 파일 압축 중...")
+
+        def on_progress(done, total, result):
+            name = os.path.basename(result.input_path)
+            self.update_progress(done * 100 / total, f"🗜️ {done}/{total} 완료 - {name}")
+
+        def on_error(error):
+            self.set_running(False)
+            self.update_progress(0, "❌ 압축 실패")
+            self.show_compression_error(error)
             self.hide_progress_section()
 
+        min_savings = PREFLIGHT_MIN_SAVINGS if self.skip_hopeless_var.get() else None
+        self.worker = CompressionWorker(compress_batch, items, quality, cache=get_default_cache(),
+                                        min_savings=min_savings, linearize=self.linearize_var.get())
+        self.worker.start().attach(self.root, on_progress=on_progress, on_done=self.on_batch_finished,
+                                   on_error=on_error, on_cancelled=self.on_compression_cancelled)
+
+    def on_batch_finished(self, report):
+        """일괄 압축 결과 표시"""
+        from pdf_compress_batch import format_report_summary
+        self.set_running(False)
+
+        compressed_size = report.total_output_bytes / (1024 * 1024)
+        self.compressed_size_label.config(text=f"🗜️ 압축 후 크기: {compressed_size:.2f} MB")
+        if report.succeeded:
+            original = sum(r.original_size for r in report.succeeded)
+            reduction = (1 - report.total_output_bytes / original) * 100 if original else 0.0
+            self.compression_ratio_label.config(text=f"📈 압축률: {reduction:.1f}% 감소")
+        self.update_progress(100, "✅ 일괄 압축 완료!")
+
+        failed = "\n".join(f"   • {os.path.basename(r.input_path)}" for r in report.failed[:10])
+        messagebox.showinfo("✅ 일괄 압축 완료",
+                            f"🎉 일괄 압축이 완료되었습니다!\n\n{format_report_summary(report)}"
+                            + (f"\n\n실패한 파일:\n{failed}" if failed else ""))
+        self.root.after(3000, self.hide_progress_section)
+
     def show_compression_result(self, output_path):
         """압축 결과 표시"""
         try:
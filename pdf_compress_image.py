@@ -0,0 +1,549 @@
+# -*- coding: utf-8 -*-
+"""
+이미지 XObject 디코딩 / 재인코딩
+
+스트림 바이트를 그대로 PIL에 넘기면 JPEG(DCT) 이미지만 열리므로
+/Filter, /DecodeParms, /Width, /Height, /BitsPerComponent, /ColorSpace로
+픽셀 데이터를 직접 복원하고, 이미지 종류(흑백/회색조/적은 색/사진)를 나눈 뒤
+종류에 맞는 후보 인코딩을 만들어 가장 작은 것을 고릅니다.
+- 흑백: CCITT G4, 적은 색: /Indexed 팔레트, 회색조/사진: JPEG (PSNR이 MIN_PSNR 이상일 때만)
+- Flate: 모든 이미지 (무손실, 색 공간/비트 수 그대로)
+- 예산이 남으면 PNG 예측자 + Flate, JPEG 2000(Pillow가 지원할 때)도 시도 (assign_budgets)
+- 원본: 후보가 더 크면 원본 유지
+작업자 프로세스에서도 쓰므로 이미지 정보는 피클 가능한 기본 자료형으로 주고받습니다.
+"""
+import io
+import math
+import zlib
+from functools import lru_cache
+
+from pdf_compress_metrics import stage
+
+# PIL이 스트림 바이트를 바로 여는 필터 (JPEG / JPEG 2000)
+PIL_FILTERS = ("/DCTDecode", "/JPXDecode")
+
+# 흑백 전용 압축은 이미 충분히 작고 JPEG로 바꾸면 오히려 커지므로 그대로 둠
+BILEVEL_FILTERS = ("/CCITTFaxDecode", "/JBIG2Decode")
+
+DEVICE_SPACES = {1: "/DeviceGray", 3: "/DeviceRGB", 4: "/DeviceCMYK"}
+PIL_MODES = {1: "L", 3: "RGB", 4: "CMYK"}
+# PNG 예측자 후보를 쓰는 모드 (성분 하나만: PyPDF2 등 일부 리더가 /Colors를 무시하고 예측자를 풀기 때문)
+PNG_MODES = ("1", "L")
+
+# 이미지 종류 (classify_image)
+BILEVEL = "bilevel"
+GRAY = "gray"
+PALETTE = "palette"
+PHOTO = "photo"
+OTHER = "other"
+
+# 팔레트로 바꿀 최대 색 수 (회색은 16단계 이하여야 비트 수가 줄어듦)
+PALETTE_COLORS = {"L": 16, "RGB": 256}
+
+# 손실 후보가 받아들여지는 최소 PSNR (dB), 선화/스크린샷처럼 JPEG가 뭉개는 이미지는 무손실 후보가 이김
+MIN_PSNR = 26.0
+
+# 코덱별 예상 CPU 시간 (초/메가픽셀), 추가 후보를 예산 안에서 고를 때 씀
+# 실제 시간이 아니라 추정치로 고르므로 작업 수/기계 부하와 무관하게 결과 바이트가 같음
+CODEC_COST = {"png": 0.05, "jpx": 0.6}
+
+# 문서 하나에서 추가 후보(PNG 예측자, JPEG 2000)에 쓸 기본 예산 (초)
+DEFAULT_CODEC_BUDGET = 10.0
+
+_SPACE_COMPONENTS = {
+    "/DeviceGray": 1, "/CalGray": 1, "/G": 1,
+    "/DeviceRGB": 3, "/CalRGB": 3, "/RGB": 3,
+    "/DeviceCMYK": 4, "/CMYK": 4
+}
+
+
+@lru_cache(maxsize=1)
+def jpeg2000_available():
+    """Pillow가 OpenJPEG와 함께 빌드되어 JPEG 2000을 쓸 수 있는지"""
+    from PIL import features
+    return bool(features.check("jpg_2000"))
+
+
+def _plain(obj):
+    """PyPDF2 객체를 기본 자료형으로 (간접 참조는 따라가고, 스트림은 None)"""
+    from PyPDF2 import generic
+
+    obj = obj.get_object() if isinstance(obj, generic.IndirectObject) else obj
+    if isinstance(obj, generic.StreamObject):
+        return None
+    if isinstance(obj, generic.DictionaryObject):
+        return {str(key): _plain(value) for key, value in obj.items()}
+    if isinstance(obj, generic.ArrayObject):
+        return [_plain(value) for value in obj]
+    if isinstance(obj, generic.BooleanObject):
+        return obj.value
+    if isinstance(obj, generic.NumberObject):
+        return int(obj)
+    if isinstance(obj, generic.FloatObject):
+        return float(obj)
+    if isinstance(obj, generic.NullObject) or obj is None:
+        return None
+    return str(obj)
+
+
+def _generic(value):
+    """_plain의 반대 (이름은 '/'로 시작하는 문자열)"""
+    from PyPDF2 import generic
+
+    if value is None:
+        return generic.NullObject()
+    if isinstance(value, bytes):
+        return generic.ByteStringObject(value)
+    if isinstance(value, bool):
+        return generic.BooleanObject(value)
+    if isinstance(value, int):
+        return generic.NumberObject(value)
+    if isinstance(value, float):
+        return generic.FloatObject(value)
+    if isinstance(value, dict):
+        return generic.DictionaryObject({generic.NameObject(k): _generic(v) for k, v in value.items()})
+    if isinstance(value, list):
+        return generic.ArrayObject(_generic(v) for v in value)
+    if value.startswith("/"):
+        return generic.NameObject(value)
+    return generic.TextStringObject(value)
+
+
+def color_components(colorspace):
+    """
+    색 공간의 성분 수와 JPEG로 바꿔도 되는지 여부
+    - 팔레트(/Indexed), /Lab, /DeviceN 등은 성분 수만 알려 주고 무손실만 허용
+    - 알 수 없으면 (None, False)
+    """
+    from PyPDF2 import generic
+
+    if colorspace is None:
+        return None, False
+    colorspace = colorspace.get_object()
+    if isinstance(colorspace, generic.NameObject):
+        components = _SPACE_COMPONENTS.get(colorspace)
+        return components, components is not None
+    if not isinstance(colorspace, generic.ArrayObject) or not colorspace:
+        return None, False
+    family = colorspace[0].get_object()
+    if family == "/ICCBased" and len(colorspace) > 1:
+        components = int(colorspace[1].get_object().get("/N", 0)) or None
+        return components, components in PIL_MODES
+    if family in ("/Indexed", "/I"):
+        return 1, False
+    if family == "/Separation":
+        return 1, True
+    if family == "/DeviceN" and len(colorspace) > 1:
+        return len(colorspace[1].get_object()), False
+    if family in ("/CalGray", "/CalRGB"):
+        return _SPACE_COMPONENTS[family], True
+    if family == "/Lab":
+        return 3, False
+    return None, False
+
+
+def image_info(image):
+    """이미지 딕셔너리에서 디코딩에 필요한 정보만 뽑음 (작업자로 넘길 수 있는 형태)"""
+    filters = _plain(image.get("/Filter"))
+    if filters is None:
+        filters = []
+    elif not isinstance(filters, list):
+        filters = [filters]
+    components, continuous = color_components(image.get("/ColorSpace"))
+    try:
+        width, height = int(image["/Width"]), int(image["/Height"])
+        bits = int(image.get("/BitsPerComponent", 8))
+    except (KeyError, TypeError, ValueError):
+        width = height = bits = 0
+    return {
+        "filters": filters,
+        "parms": _plain(image.get("/DecodeParms")),
+        "width": width,
+        "height": height,
+        "bits": bits,
+        "components": components,
+        "continuous": continuous,
+        "colorspace": _plain(image.get("/ColorSpace")),
+        "decode": _plain(image.get("/Decode")),
+        "color_key": isinstance(_plain(image.get("/Mask")), list),
+        "image_mask": _plain(image.get("/ImageMask")) is True
+    }
+
+
+def _decode(data, filters, info):
+    """filters를 차례로 풀어 원본 바이트를 얻음 (PyPDF2 필터 구현 사용)"""
+    if not filters:
+        return bytes(data)
+    from PyPDF2 import generic
+    from PyPDF2.filters import decode_stream_data
+
+    stream = generic.EncodedStreamObject()
+    stream[generic.NameObject("/Filter")] = _generic(filters)
+    if info["parms"] is not None:
+        stream[generic.NameObject("/DecodeParms")] = _generic(info["parms"])
+    stream[generic.NameObject("/Height")] = generic.NumberObject(info["height"])
+    stream._data = bytes(data)
+    decoded = decode_stream_data(stream)
+    if isinstance(decoded, str):
+        decoded = decoded.encode("latin-1")
+    return decoded
+
+
+def _jpeg_ready(img):
+    """JPEG로 저장할 수 있는 모드로 변환"""
+    if img.mode in ("L", "RGB", "CMYK"):
+        return img
+    if img.mode in ("1", "LA", "I", "I;16", "F"):
+        return img.convert("L")
+    return img.convert("RGB")
+
+
+def recompress_image(data, info, quality, size=None):
+    """
+    이미지 스트림을 다시 인코딩해 원본보다 작은 것 중 가장 작은 결과를 반환합니다.
+    - data: 스트림 바이트 (필터 적용된 상태 그대로)
+    - info: image_info() 결과 (assign_budgets()로 정한 "budget"이 있으면 추가 후보 시도 예산)
+    - size: (가로, 세로)를 주면 모든 후보를 그 크기로 줄임
+    - 반환값: (새 바이트, 딕셔너리 변경 사항, 코덱 이름) 또는 None(원본 유지)
+      변경 사항의 값이 None이면 그 키를 삭제
+    """
+    filters = info["filters"]
+    if info["image_mask"] or any(f in BILEVEL_FILTERS or f == "/Crypt" for f in filters):
+        return None
+    pil_source = bool(filters) and filters[-1] in PIL_FILTERS
+    try:
+        with stage("image.decode"):
+            raw = _decode(data, filters[:-1] if pil_source else filters, info)
+    except Exception:
+        return None
+    with stage("image.encode"):
+        return _smallest_encoding(data, raw, info, quality, size, pil_source)
+
+
+def assign_budgets(infos, total_seconds=DEFAULT_CODEC_BUDGET):
+    """
+    문서 전체의 추가 후보 시도 예산(초, CODEC_COST 기준 추정치)을 이미지 픽셀 수에 비례해 나눠
+    info["budget"]에 넣음 (math.inf면 제한 없음, budget이 없는 info도 제한 없음)
+    """
+    pixels = sum(max(0, info["width"]) * max(0, info["height"]) for info in infos)
+    for info in infos:
+        share = max(0, info["width"]) * max(0, info["height"]) / pixels if pixels else 0.0
+        info["budget"] = total_seconds * share if share else 0.0
+
+
+def _pil_image(raw, info, Image):
+    """필터를 푼 픽셀 바이트로 PIL 이미지를 만듦 (지원하지 않는 형식이면 None)"""
+    width, height, bits, components = info["width"], info["height"], info["bits"], info["components"]
+    if bits == 1 and components == 1:
+        return Image.frombytes("1", (width, height), raw)
+    if bits == 8 and components in PIL_MODES:
+        return Image.frombytes(PIL_MODES[components], (width, height), raw)
+    return None
+
+
+def _is_gray(img):
+    """RGB 이미지의 세 채널이 모두 같은지"""
+    from PIL import ImageChops
+    red, green, blue = img.split()
+    return ImageChops.difference(red, green).getbbox() is None and \
+        ImageChops.difference(green, blue).getbbox() is None
+
+
+def classify_image(img, info):
+    """
+    이미지 종류와 (종류에 맞게 바꾼 이미지, 색 목록) 반환
+    - bilevel: 흑백 두 값뿐, gray: 회색조, palette: 색이 적음 (회색 16단계/컬러 256색 이하),
+      photo: 연속 톤 컬러, other: 팔레트/Lab 등 무손실로만 다시 쓸 수 있는 이미지
+    - 색 공간/샘플 값을 바꾸는 분류(RGB → 회색, 회색 → 흑백, 팔레트)는
+      Device 색 공간이고 /Decode와 색상 키 /Mask 배열이 없을 때만
+    """
+    if img is None or not info["continuous"]:
+        return OTHER, img, None
+    if img.mode == "1":
+        return BILEVEL, img, None
+    if img.mode not in ("L", "RGB"):
+        return PHOTO, img, None
+    convertible = info.get("colorspace") in DEVICE_SPACES.values() and info.get("decode") is None \
+        and not info.get("color_key")
+    if not convertible:
+        return (GRAY if img.mode == "L" else PHOTO), img, None
+    if img.mode == "RGB" and _is_gray(img):
+        img = img.getchannel("R")
+    colors = img.getcolors(PALETTE_COLORS[img.mode])
+    if colors is not None:
+        values = sorted(color for _, color in colors)
+        if img.mode == "L" and set(values) <= {0, 255}:
+            return BILEVEL, img.point(lambda value: 255 if value else 0).convert("1", dither=0), None
+        return PALETTE, img, values
+    return (GRAY if img.mode == "L" else PHOTO), img, None
+
+
+def _plan(kind, img, info):
+    """(필수 후보, 예산이 허락하면 시도할 후보) 코덱 이름 목록"""
+    required, optional = [], ["png"]
+    if kind == BILEVEL:
+        # 1비트로 줄인 이미지는 픽셀 바이트가 1/8이라 PNG 예측자도 항상 시도
+        required, optional = ["g4", "png"], []
+    elif kind == PALETTE:
+        required = ["palette"]
+    elif kind in (GRAY, PHOTO):
+        required = ["jpeg"]
+        if jpeg2000_available():
+            optional.append("jpx")
+    optional = [codec for codec in optional if codec != "png" or (img is not None and img.mode in PNG_MODES)]
+    budget = info.get("budget")
+    if budget is None:
+        return required, optional
+    megapixels = info["width"] * info["height"] / 1e6
+    chosen = []
+    for codec in optional:
+        cost = CODEC_COST[codec] * megapixels
+        if cost > budget:
+            break
+        budget -= cost
+        chosen.append(codec)
+    return required, chosen
+
+
+def _smallest_encoding(data, raw, info, quality, size, pil_source):
+    """
+    디코딩한 바이트로 이미지 종류에 맞는 후보를 만들어 원본보다 작은 것 중 가장 작은 결과
+    size를 주면 분류한 이미지를 한 번 줄여 모든 후보에 씀
+    손실 후보(JPEG/JPEG 2000)는 PSNR이 MIN_PSNR 이상일 때만 받아들임
+    """
+    from pdf_compress_pypdf import _import_pil_image
+
+    best = None
+    best_size = len(data)
+
+    def consider(candidate, updates, codec):
+        nonlocal best, best_size
+        if candidate is not None and len(candidate) < best_size:
+            best, best_size = (candidate, updates, codec), len(candidate)
+
+    Image = _import_pil_image()
+    components = info["components"]
+    if pil_source:
+        try:
+            img = Image.open(io.BytesIO(raw))
+            if size is not None:
+                img.draft(img.mode, size)  # JPEG는 디코딩할 때 미리 줄임
+            img.load()
+        except Exception:
+            return None
+    else:
+        width, height, bits = info["width"], info["height"], info["bits"]
+        if components is None or width <= 0 or height <= 0 or bits not in (1, 2, 4, 8, 16):
+            return None
+        expected = (width * components * bits + 7) // 8 * height
+        if len(raw) < expected:
+            return None  # 손상된 스트림
+        raw = raw[:expected]
+        img = _pil_image(raw, info, Image)
+
+    kind, img, colors = classify_image(img, info)
+    resized = img is not None and size is not None and img.size != tuple(size)
+    if resized:
+        img = _resize(img, kind, size, Image)
+    if not pil_source:
+        with stage("image.flate"):
+            if resized:
+                consider(*_encode_flate(img, info))
+            else:
+                consider(zlib.compress(raw, 9), {"/Filter": "/FlateDecode", "/DecodeParms": None}, "flate")
+    required, optional = _plan(kind, img, info)
+    jpeg_psnr = None
+    for codec in required + optional:
+        try:
+            with stage(f"image.{codec}"):
+                if codec == "jpeg":
+                    candidate, updates, jpeg_psnr = _encode_jpeg(img, info, quality, Image)
+                elif codec == "jpx":
+                    candidate, updates = _encode_jpx(img, info, jpeg_psnr or MIN_PSNR, Image)
+                elif codec == "png":
+                    candidate, updates = _encode_png(img, info)
+                elif codec == "palette":
+                    candidate, updates = _encode_palette(img, colors, Image)
+                else:
+                    candidate, updates = _encode_g4(img, info)
+        except Exception:
+            continue
+        consider(candidate, updates, codec)
+    return best
+
+
+def _resize(img, kind, size, Image):
+    """
+    후보를 만들기 전에 한 번 줄임
+    흑백/팔레트/색 인덱스 이미지는 새 값이 생기지 않도록 가장 가까운 픽셀로, 연속 톤은 LANCZOS로
+    """
+    resampling = getattr(Image, "Resampling", Image)
+    if kind in (GRAY, PHOTO):
+        return img.resize(tuple(size), resampling.LANCZOS)
+    return img.resize(tuple(size), resampling.NEAREST)
+
+
+def _size_updates(img):
+    return {"/Width": img.width, "/Height": img.height}
+
+
+def _color_updates(img, info):
+    """다시 인코딩한 이미지가 원래 딕셔너리와 성분 수가 다르면 Device 색 공간으로 맞춤"""
+    bands = len(img.getbands())
+    if info["components"] is not None and info["components"] != bands:
+        return {"/ColorSpace": DEVICE_SPACES[bands], "/Decode": None}
+    return {}
+
+
+def _psnr(a, b):
+    """두 이미지의 PSNR (dB, 같으면 무한대)"""
+    from PIL import ImageChops, ImageStat
+    stat = ImageStat.Stat(ImageChops.difference(a, b))
+    mse = sum(total / count for total, count in zip(stat.sum2, stat.count)) / len(stat.sum2)
+    return math.inf if mse == 0 else 10 * math.log10(255 * 255 / mse)
+
+
+def _encode_flate(img, info):
+    """줄인 이미지의 무손실 후보: Flate (예측자 없이, 비트 수는 이미지 모드에 맞춤)"""
+    if img.mode not in ("1", "L", "RGB", "CMYK"):
+        return None, None, "flate"
+    updates = {"/Filter": "/FlateDecode", "/DecodeParms": None, "/BitsPerComponent": 1 if img.mode == "1" else 8}
+    updates.update(_size_updates(img))
+    updates.update(_color_updates(img, info))
+    return zlib.compress(img.tobytes(), 9), updates, "flate"
+
+
+def _encode_jpeg(img, info, quality, Image):
+    """연속 톤 후보: JPEG, PSNR이 MIN_PSNR보다 낮으면 버림"""
+    img = _jpeg_ready(img)
+    output = io.BytesIO()
+    img.save(output, format='JPEG', optimize=True, quality=quality)
+    psnr = _psnr(img, Image.open(io.BytesIO(output.getvalue())))
+    if psnr < MIN_PSNR:
+        return None, None, psnr
+    updates = {
+        "/Filter": "/DCTDecode",
+        "/DecodeParms": None,
+        "/BitsPerComponent": 8,
+        "/Width": img.width,
+        "/Height": img.height
+    }
+    updates.update(_color_updates(img, info))
+    return output.getvalue(), updates, psnr
+
+
+def _encode_jpx(img, info, psnr, Image):
+    """연속 톤 후보: JPEG 2000, JPEG와 같은 PSNR을 목표로 인코딩 (실제 PSNR이 MIN_PSNR보다 낮으면 버림)"""
+    img = _jpeg_ready(img)
+    if img.mode == "CMYK":
+        return None, None
+    output = io.BytesIO()
+    img.save(output, format="JPEG2000", quality_mode="dB", quality_layers=[max(psnr, MIN_PSNR)],
+             irreversible=True)
+    # 목표 PSNR은 인코더가 맞추려는 값일 뿐이므로 디코딩해서 확인
+    decoded = Image.open(io.BytesIO(output.getvalue()))
+    if decoded.mode != img.mode or _psnr(img, decoded) < MIN_PSNR:
+        return None, None
+    updates = {
+        "/Filter": "/JPXDecode",
+        "/DecodeParms": None,
+        "/BitsPerComponent": 8,
+        "/Width": img.width,
+        "/Height": img.height
+    }
+    updates.update(_color_updates(img, info))
+    return output.getvalue(), updates
+
+
+def _png_data(img, **options):
+    """PIL PNG 인코더로 만든 IDAT 데이터 (PNG 예측자를 쓴 Flate 스트림과 같음)"""
+    output = io.BytesIO()
+    img.save(output, format="PNG", compress_level=9, **options)
+    png = output.getvalue()
+    chunks = []
+    pos = 8
+    while pos + 8 <= len(png):
+        length = int.from_bytes(png[pos:pos + 4], "big")
+        if png[pos + 4:pos + 8] == b"IDAT":
+            chunks.append(png[pos + 8:pos + 8 + length])
+        pos += 12 + length
+    return b"".join(chunks)
+
+
+def _predictor_parms(img, bits):
+    return {"/Predictor": 15, "/Colors": len(img.getbands()), "/BitsPerComponent": bits,
+            "/Columns": img.width}
+
+
+def _encode_png(img, info):
+    """무손실 후보: PNG 예측자 + Flate (흑백/회색)"""
+    bits = 1 if img.mode == "1" else 8
+    updates = {"/Filter": "/FlateDecode", "/DecodeParms": _predictor_parms(img, bits), "/BitsPerComponent": bits}
+    updates.update(_size_updates(img))
+    updates.update(_color_updates(img, info))
+    return _png_data(img), updates
+
+
+def _encode_palette(img, colors, Image):
+    """무손실 후보: 쓰인 색만으로 만든 /Indexed 팔레트 (색 수에 맞춰 1/2/4/8비트)"""
+    base = img.mode
+    rgb = img.convert("RGB") if base == "L" else img
+    entries = [(color,) * 3 if base == "L" else color for color in colors]
+    palette = Image.new("P", (1, 1))
+    flat = [value for entry in entries for value in entry]
+    palette.putpalette(flat + flat[-3:] * (256 - len(entries)))
+    indexed = rgb.quantize(palette=palette, dither=Image.Dither.NONE)
+    # 가장 가까운 색으로 바꾸므로 모든 색이 정확히 팔레트에 있는지 확인
+    if indexed.getextrema()[1] >= len(entries) or \
+            indexed.convert("RGB").tobytes() != rgb.tobytes():
+        return None, None
+    bits = next(b for b in (1, 2, 4, 8) if len(entries) <= 1 << b)
+    lookup = bytes(colors) if base == "L" else bytes(flat)
+    updates = {
+        "/Filter": "/FlateDecode",
+        "/DecodeParms": _predictor_parms(indexed, bits),
+        "/BitsPerComponent": bits,
+        "/ColorSpace": ["/Indexed", DEVICE_SPACES[len(base)], len(entries) - 1, lookup],
+        "/Decode": None
+    }
+    updates.update(_size_updates(indexed))
+    return _png_data(indexed, bits=bits), updates
+
+
+def _encode_g4(img, info):
+    """흑백 후보: CCITT Group 4 (libtiff로 TIFF 한 스트립을 만들어 데이터만 꺼냄)"""
+    from PIL import Image
+    if img.mode != "1":
+        return None, None
+    output = io.BytesIO()
+    img.save(output, format="TIFF", compression="group4", tiffinfo={278: img.height})
+    tiff = Image.open(io.BytesIO(output.getvalue()))
+    offsets, counts = tiff.tag_v2[273], tiff.tag_v2[279]
+    if len(offsets) != 1:
+        return None, None
+    data = output.getvalue()[offsets[0]:offsets[0] + counts[0]]
+    # PIL은 0 비트(검정)를 팩스의 흰색 구간으로 부호화하므로 BlackIs1로 비트 값을 그대로 복원
+    updates = {
+        "/Filter": "/CCITTFaxDecode",
+        "/DecodeParms": {"/K": -1, "/Columns": img.width, "/Rows": img.height, "/BlackIs1": True},
+        "/BitsPerComponent": 1
+    }
+    updates.update(_size_updates(img))
+    updates.update(_color_updates(img, info))
+    return data, updates
+
+
+def apply_result(image, result):
+    """recompress_image() 결과를 이미지 객체에 반영, 해상도가 바뀌었으면 True"""
+    from PyPDF2 import generic
+
+    data, updates = result[:2]
+    old_size = (image.get("/Width"), image.get("/Height"))
+    image._data = data
+    for key, value in updates.items():
+        if value is None:
+            if key in image:
+                del image[key]
+        else:
+            image[generic.NameObject(key)] = _generic(value)
+    return (image.get("/Width"), image.get("/Height")) != old_size
@@ -0,0 +1,322 @@
+# -*- coding: utf-8 -*-
+"""
+페이지 단위 증분 압축 (페이지 캐시)
+
+    from pdf_compress_incremental import compress_incremental, get_default_page_cache
+    report = compress_incremental("in.pdf", "out.pdf", "ghostscript", "ebook", get_default_page_cache())
+
+문서 관리 시스템이 큰 PDF의 몇 페이지만 고쳐 다시 올리면 파일 전체의 해시가 바뀌어
+결과 캐시(pdf_compress_cache)로는 재사용할 수 없습니다.
+1. 페이지마다 지문 계산: 페이지 딕셔너리와 콘텐츠 스트림, 참조하는 리소스(폰트/이미지/폼 등)를 따라가며 해시
+   (여러 페이지가 같이 쓰는 리소스는 한 번만 해시, 스트림은 디코딩하지 않고 인코딩된 바이트 그대로)
+2. 지문 + 엔진/프리셋/엔진 버전으로 만든 키로 페이지 캐시를 조회해 압축된 한 페이지 PDF를 재사용
+3. 캐시에 없는 페이지만 뽑아 엔진 한 번으로 압축하고, 결과를 페이지마다 나눠 캐시에 저장
+4. 원래 순서대로 합치고 같은 객체(폰트 등)를 하나로 합침
+페이지 캐시는 결과 캐시와 같은 방식(크기 제한 + LRU 정리)이며 기본 위치는 결과 캐시 폴더의 pages/입니다.
+캐시 적중 여부와 관계없이 결과는 항상 페이지를 합쳐 만들고, 책갈피/이름 있는 대상/양식/문서 정보는
+원본에서 가져옵니다 (pdf_compress_split.merge_pages, 분할/하이브리드 모드와 같음).
+"""
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+from dataclasses import dataclass
+
+from pdf_compress_cache import ResultCache, default_cache_dir
+from pdf_compress_errors import CompressionCancelled
+from pdf_compress_metrics import stage
+
+# 캐시 키에 들어가는 지문 규칙 버전
+FINGERPRINT_VERSION = 1
+
+# 합친 결과 형식 버전 (결과 캐시 키에 들어감)
+ASSEMBLY_VERSION = 2
+
+DEFAULT_MAX_MB = 512
+PAGE_SUFFIX = ".page"
+
+# 페이지마다 따로 압축해도 결과를 합칠 수 있는 엔진 (hybrid는 페이지 묶음마다 경로가 달라짐)
+INCREMENTAL_ENGINES = ("ghostscript", "gsapi", "pypdf")
+
+
+@dataclass
+class IncrementalReport:
+    """증분 압축 한 번의 페이지 재사용 통계"""
+    engine: str = ""
+    preset: str = ""
+    page_count: int = 0
+    reused: int = 0             # 캐시에서 가져온 페이지 수
+    compressed: int = 0         # 이번에 압축한 페이지 수
+    reused_bytes: int = 0       # 캐시에서 가져온 한 페이지 PDF 바이트 합계
+    stored: int = 0             # 캐시에 새로 저장한 페이지 수
+    evictions: int = 0          # 저장 후 크기 제한으로 지운 항목 수
+    fingerprint_seconds: float = 0.0
+    compress_seconds: float = 0.0
+    merge_seconds: float = 0.0
+    original_size: int = 0
+    output_size: int = 0
+    assembled: bool = False     # 캐시에서 가져온 페이지와 합쳤는지
+    kept_original: bool = False
+
+    @property
+    def reuse_rate(self):
+        return self.reused / self.page_count if self.page_count else 0.0
+
+    @property
+    def wall_seconds(self):
+        return self.fingerprint_seconds + self.compress_seconds + self.merge_seconds
+
+
+class PageCache(ResultCache):
+    """압축된 한 페이지 PDF 캐시 (키는 페이지 지문 + 압축 설정)"""
+    entry_suffix = PAGE_SUFFIX
+
+    def page_key(self, fingerprint, engine, preset, engine_version, **options):
+        from pdf_compress_presets import preset_fingerprint
+        params = {
+            "fingerprint": fingerprint,
+            "engine": engine,
+            "preset": str(preset),
+            "version": engine_version,
+            "rules": FINGERPRINT_VERSION,
+            "options": options
+        }
+        custom = preset_fingerprint(preset) if isinstance(preset, str) else None
+        if custom:
+            params["preset_params"] = custom
+        return hashlib.sha256(json.dumps(params, sort_keys=True).encode()).hexdigest()
+
+
+def default_page_cache_dir():
+    """PDF_COMPRESS_PAGE_CACHE_DIR 또는 결과 캐시 폴더의 pages/"""
+    return os.environ.get("PDF_COMPRESS_PAGE_CACHE_DIR") or os.path.join(default_cache_dir(), "pages")
+
+
+_default_page_cache = None
+
+
+def get_default_page_cache():
+    """
+    기본 페이지 캐시
+    - PDF_COMPRESS_PAGE_CACHE_MB: 최대 크기 (기본값 512MB)
+    """
+    global _default_page_cache
+    if _default_page_cache is None:
+        max_mb = int(os.environ.get("PDF_COMPRESS_PAGE_CACHE_MB", DEFAULT_MAX_MB))
+        _default_page_cache = PageCache(default_page_cache_dir(), max_bytes=max_mb * 1024 * 1024)
+    return _default_page_cache
+
+
+class PageFingerprinter:
+    """
+    페이지 지문 계산기 (PdfReader 하나에 하나)
+    간접 객체의 해시를 기억해 두므로 여러 페이지가 같이 쓰는 폰트/이미지는 한 번만 읽음
+    """
+
+    def __init__(self):
+        from PyPDF2 import generic
+        self._generic = generic
+        self._memo = {}        # (객체 번호, 세대) → 해시
+        self._active = set()   # 지금 해시 중인 객체 (순환 참조 확인)
+
+    def page(self, page):
+        """페이지 하나의 지문 (상속 속성은 PdfReader가 페이지에 넣어 둔 값 사용)"""
+        digest = hashlib.sha256()
+        self._feed(digest, page)
+        return digest.hexdigest()
+
+    def _ref(self, ref):
+        key = (ref.idnum, ref.generation)
+        cached = self._memo.get(key)
+        if cached is not None:
+            return cached
+        if key in self._active:
+            return b"cycle"
+        obj = ref.get_object()
+        if isinstance(obj, self._generic.DictionaryObject) and obj.get("/Type") in ("/Page", "/Pages"):
+            return b"page"  # 링크 대상/부모 등 다른 페이지는 따라가지 않음
+        self._active.add(key)
+        try:
+            digest = hashlib.sha256()
+            self._feed(digest, obj)
+        finally:
+            self._active.discard(key)
+        value = digest.digest()
+        self._memo[key] = value
+        return value
+
+    def _feed(self, digest, obj):
+        generic = self._generic
+        if isinstance(obj, generic.IndirectObject):
+            digest.update(b"R")
+            digest.update(self._ref(obj))
+        elif isinstance(obj, generic.DictionaryObject):
+            digest.update(b"{")
+            for key in sorted(obj.keys()):
+                if key == "/Parent" or (key == "/Length" and isinstance(obj, generic.StreamObject)):
+                    continue
+                digest.update(key.encode("utf-8", "backslashreplace") + b"=")
+                self._feed(digest, obj.raw_get(key))
+                digest.update(b",")
+            digest.update(b"}")
+            if isinstance(obj, generic.StreamObject):
+                data = obj._data or b""
+                digest.update(b"S%d:" % len(data))
+                digest.update(data)
+        elif isinstance(obj, generic.ArrayObject):
+            digest.update(b"[")
+            for item in obj:
+                self._feed(digest, item)
+                digest.update(b",")
+            digest.update(b"]")
+        else:
+            digest.update(type(obj).__name__.encode())
+            digest.update(repr(obj).encode("utf-8", "backslashreplace"))
+            digest.update(b";")
+
+
+def fingerprint_pages(reader):
+    """PdfReader의 페이지마다 지문 목록"""
+    fingerprinter = PageFingerprinter()
+    return [fingerprinter.page(page) for page in reader.pages]
+
+
+def _write_page(page, output_path):
+    import PyPDF2
+    writer = PyPDF2.PdfWriter()
+    writer.add_page(page)
+    with open(output_path, "wb") as f:
+        writer.write(f)
+
+
+def _compress_pages(engine, input_path, output_path, preset, gs_command, limits, subset_fonts,
+                    progress_callback, cancel_event, options):
+    if engine == "ghostscript":
+        from pdf_compress_gs import run_ghostscript
+        # 폰트 전체를 넣으면 실행마다 서브셋이 달라도 합칠 때 같은 폰트로 합쳐지지만 CJK 폰트는 오히려 커짐
+        run_ghostscript(input_path, output_path, preset, gs_command=gs_command,
+                        extra_args=None if subset_fonts else ["-dSubsetFonts=false"],
+                        progress_callback=progress_callback, cancel_event=cancel_event, limits=limits)
+    else:
+        from pdf_compress_engines import get_engine
+        get_engine(engine).compress(input_path, output_path, preset, progress_callback=progress_callback,
+                                    cancel_event=cancel_event, **options)
+
+
+def _assemble(page_paths, output_path, input_path):
+    """한 페이지 PDF들을 순서대로 합치고 원본의 문서 단위 구조를 가져옴, 반환값: DedupStats"""
+    from pdf_compress_split import merge_pages
+    return merge_pages([(path, 0) for path in page_paths], output_path, original=input_path)
+
+
+def compress_incremental(input_path, output_path, engine="ghostscript", preset="ebook", cache=None,
+                         engine_version=None, gs_command=None, limits=None, subset_fonts=True,
+                         progress_callback=None, cancel_event=None, **options):
+    """
+    캐시에 없는 페이지만 압축하고 나머지는 페이지 캐시에서 가져와 합칩니다.
+    - engine: ghostscript, gsapi, pypdf 중 하나 (options는 엔진에 그대로 전달, 캐시 키에도 들어감)
+    - cache: PageCache (기본값: get_default_page_cache())
+    - engine_version: 캐시 키에 쓰는 엔진 버전 (기본값: 엔진에 물어봄)
+    - gs_command / limits: ghostscript 엔진의 실행 파일과 실행 제한 (run_ghostscript 참고)
+    - subset_fonts: ghostscript 엔진에서 폰트 서브셋 사용 (기본값), False면 폰트 전체를 넣어
+      따로 압축한 페이지 사이에서도 같은 폰트로 합침 (CJK 폰트는 전체가 수 MB라 오히려 커짐)
+    - progress_callback(done_pages, total_pages): 재사용한 페이지를 포함한 진행률
+    - 결과 파일이 원본보다 크면 원본을 그대로 복사
+    - 반환값: IncrementalReport
+    """
+    import PyPDF2
+
+    if engine not in INCREMENTAL_ENGINES:
+        raise ValueError(f"페이지 단위 증분 압축은 {', '.join(INCREMENTAL_ENGINES)} 엔진에서만 사용할 수 있습니다.")
+    cache = cache if cache is not None else get_default_page_cache()
+    if engine_version is None:
+        from pdf_compress_engines import get_engine
+        engine_version = get_engine(engine).version()
+    key_options = {name: value for name, value in options.items() if name != "jobs"}  # jobs는 결과에 영향 없음
+    if engine == "ghostscript" and not subset_fonts:
+        key_options["subset_fonts"] = False
+
+    report = IncrementalReport(engine=engine, preset=preset, original_size=os.path.getsize(input_path))
+    tmp_dir = tempfile.mkdtemp(prefix=".pdf_pages_", dir=os.path.dirname(os.path.abspath(output_path)))
+    try:
+        reader = PyPDF2.PdfReader(input_path)
+        start = time.perf_counter()
+        with stage("pages.fingerprint"):
+            fingerprints = fingerprint_pages(reader)
+            keys = [cache.page_key(fingerprint, engine, preset, engine_version, **key_options)
+                    for fingerprint in fingerprints]
+        report.page_count = len(keys)
+        report.fingerprint_seconds = time.perf_counter() - start
+
+        page_paths = [os.path.join(tmp_dir, f"page_{index:05d}.pdf") for index in range(len(keys))]
+        missing = []
+        for index, key in enumerate(keys):
+            if cache.fetch(key, page_paths[index]):
+                report.reused += 1
+                report.reused_bytes += os.path.getsize(page_paths[index])
+            else:
+                missing.append(index)
+        report.compressed = len(missing)
+
+        start = time.perf_counter()
+        compressed_path = os.path.join(tmp_dir, "compressed.pdf")
+        if missing:
+            whole = len(missing) == len(keys)
+            source = input_path
+            if not whole:
+                source = os.path.join(tmp_dir, "missing.pdf")
+                writer = PyPDF2.PdfWriter()
+                for index in missing:
+                    writer.add_page(reader.pages[index])
+                with open(source, "wb") as f:
+                    writer.write(f)
+
+            def on_progress(done, total):
+                if progress_callback:
+                    progress_callback(report.reused + done * len(missing) // max(total, 1), report.page_count)
+
+            with stage("pages.compress"):
+                _compress_pages(engine, source, compressed_path, preset, gs_command, limits, subset_fonts,
+                                on_progress, cancel_event, options)
+            if cancel_event is not None and cancel_event.is_set():
+                raise CompressionCancelled()
+
+            compressed = PyPDF2.PdfReader(compressed_path)
+            if len(compressed.pages) != len(missing):
+                raise RuntimeError(f"압축 결과의 페이지 수가 다릅니다 ({len(missing)} → {len(compressed.pages)})")
+            for position, index in enumerate(missing):
+                _write_page(compressed.pages[position], page_paths[index])
+                cache.store(keys[index], page_paths[index], evict=False)
+                report.stored += 1
+            report.evictions = cache.evict()
+        report.compress_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        if keys:
+            # 모두 새로 압축했어도 같은 방법으로 합쳐 결과가 캐시 상태에 따라 달라지지 않게 함
+            with stage("pages.merge"):
+                _assemble(page_paths, output_path, input_path)
+            report.assembled = report.reused > 0
+        else:
+            shutil.copyfile(input_path, output_path)
+        report.merge_seconds = time.perf_counter() - start
+        if progress_callback:
+            progress_callback(report.page_count, report.page_count)
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    if os.path.getsize(output_path) >= report.original_size:
+        shutil.copyfile(input_path, output_path)
+        report.kept_original = True
+    report.output_size = os.path.getsize(output_path)
+    return report
+
+
+def format_incremental_report(report):
+    """페이지 재사용 통계 한 줄 요약"""
+    return (f"페이지 캐시: {report.page_count}페이지 중 {report.reused}페이지 재사용 ({report.reuse_rate * 100:.0f}%, "
+            f"{report.reused_bytes / 1024:.1f} KB), {report.compressed}페이지 압축, 저장 {report.stored}, "
+            f"삭제 {report.evictions} | 지문 {report.fingerprint_seconds:.2f}s + 압축 {report.compress_seconds:.2f}s + "
+            f"합치기 {report.merge_seconds:.2f}s" + (" (원본 유지)" if report.kept_original else ""))
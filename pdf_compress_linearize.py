@@ -0,0 +1,747 @@
+# -*- coding: utf-8 -*-
+"""
+선형화(Fast Web View) PDF 작성과 첫 페이지 바이트 측정
+
+    from pdf_compress_linearize import linearize_file, first_page_cost
+    linearize_file("in.pdf", "web.pdf")
+    report = first_page_cost("web.pdf")   # 첫 페이지를 그리려면 받아야 하는 바이트
+
+    python -m pdf_compress_linearize in.pdf -o web.pdf
+    python -m pdf_compress_linearize --check a.pdf b.pdf [--json]
+
+보통 PDF는 xref가 파일 끝에 있어 브라우저가 거의 전부 받아야 첫 페이지를 그립니다.
+선형화한 PDF는 PDF 1.7 부록 F 순서로 씁니다.
+- 선형화 딕셔너리와 첫 페이지 xref, 카탈로그, 힌트 스트림, 첫 페이지 객체를 파일 앞에 둠 (/E까지만 받으면 첫 페이지 표시)
+- 나머지 페이지는 페이지 순서대로 그 페이지만 쓰는 객체를 묶고, 여러 페이지가 같이 쓰는 폰트/이미지는 그 뒤에 한 번만 둠
+- 힌트 스트림(페이지 오프셋/공유 객체 표)으로 뷰어가 필요한 페이지와 공유 객체의 범위만 요청할 수 있음
+- 객체 스트림은 쓰지 않음 (classic xref 표 두 개)
+"""
+import argparse
+import bisect
+import hashlib
+import io
+import json
+import os
+import re
+import sys
+import tempfile
+import zlib
+from dataclasses import asdict, dataclass
+
+from pdf_compress_optimize import _header
+
+# 범위 요청 한 번에 받는 크기 (pdf.js 기본값)
+DEFAULT_CHUNK_SIZE = 65536
+
+# 선형화 딕셔너리는 파일 처음 1024바이트 안에 있어야 함
+LINEARIZED_HEADER_BYTES = 1024
+
+# 첫 페이지 부분에 함께 둘 카탈로그 항목 (문서를 열 때 바로 필요한 것)
+FIRST_PAGE_CATALOG_KEYS = ("/ViewerPreferences", "/OpenAction")
+
+# 페이지 트리에서 상속되는 속성 (선형화한 파일은 페이지 트리 없이 페이지를 그리므로 페이지마다 넣음)
+INHERITABLE_KEYS = ("/Resources", "/MediaBox", "/CropBox", "/Rotate")
+
+_LINEARIZED = re.compile(rb"/Linearized\s+[\d.]+")
+_NUMBER_KEYS = {key: re.compile(rb"/" + key + rb"\s+(\d+)") for key in (b"L", b"E", b"O", b"N", b"T")}
+
+
+@dataclass
+class LinearizeInfo:
+    """선형화해서 쓴 결과"""
+    pages: int = 0
+    objects: int = 0
+    first_page_end: int = 0   # /E: 첫 페이지를 그리는 데 필요한 앞부분 바이트
+    hint_bytes: int = 0       # 힌트 스트림 객체 크기
+    shared_objects: int = 0   # 여러 페이지가 같이 써서 공유 객체 부분에 둔 객체 수
+    size: int = 0
+
+
+@dataclass
+class FirstPageReport:
+    """첫 페이지를 그리는 데 필요한 바이트 (first_page_cost)"""
+    path: str
+    file_size: int
+    linearized: bool
+    page_objects: int    # 첫 페이지를 그리는 데 읽어야 하는 객체 수 (카탈로그, 페이지 트리, 리소스 포함)
+    prefix_bytes: int    # 앞에서부터 순서대로 받을 때 필요한 바이트
+    range_bytes: int     # chunk_size 단위 범위 요청으로 받을 때 필요한 바이트
+    requests: int        # 범위 요청 수 (이어진 조각은 한 번으로 셈)
+    chunk_size: int = DEFAULT_CHUNK_SIZE
+
+    @property
+    def prefix_percent(self):
+        return self.prefix_bytes / self.file_size * 100 if self.file_size else 0.0
+
+    def as_dict(self):
+        return {**asdict(self), "prefix_percent": round(self.prefix_percent, 1)}
+
+
+class _WriterSource:
+    """PdfWriter의 객체 (키는 객체 번호)"""
+
+    def __init__(self, writer, generic):
+        self.writer = writer
+        self.generic = generic
+        self.root = self.key(writer._root)
+        info = getattr(writer, "_info", None)
+        self.info = self.key(info) if info is not None else None
+        self.file_id = getattr(writer, "_ID", None)
+        self.header = writer.pdf_header
+
+    def key(self, ref):
+        if ref.pdf is not self.writer or not 0 < ref.idnum <= len(self.writer._objects):
+            return None
+        return ref.idnum
+
+    def get(self, key):
+        obj = self.writer._objects[key - 1]
+        return None if obj is None or isinstance(obj, self.generic.NullObject) else obj
+
+
+class _ReaderSource:
+    """PdfReader의 객체 (키는 (객체 번호, 세대))"""
+
+    def __init__(self, reader, generic):
+        self.reader = reader
+        self.generic = generic
+        self.root = self.key(reader.trailer.raw_get("/Root"))
+        info = reader.trailer.raw_get("/Info") if "/Info" in reader.trailer else None
+        self.info = self.key(info) if isinstance(info, generic.IndirectObject) else None
+        self.file_id = reader.trailer.get("/ID")
+        self.header = reader.pdf_header
+
+    def key(self, ref):
+        return (ref.idnum, ref.generation)
+
+    def get(self, key):
+        try:
+            obj = self.reader.get_object(self.generic.IndirectObject(key[0], key[1], self.reader))
+        except Exception:
+            return None
+        return None if obj is None or isinstance(obj, self.generic.NullObject) else obj
+
+
+class _ObjectGraph:
+    """간접 객체 사이의 참조 (객체마다 한 번만 훑어 둠)"""
+
+    def __init__(self, source, generic):
+        self.source = source
+        self.generic = generic
+        self._children = {}
+        self.page_keys = []      # 페이지 순서
+        self.tree_nodes = set()  # /Pages 노드
+        self.page_set = set()
+        self._collect_pages()
+        self.page_set.update(self.page_keys)
+
+    def children(self, key):
+        """객체가 직접 참조하는 간접 객체 (스트림의 간접 /Length 제외, 페이지/페이지 트리의 /Parent 제외)"""
+        cached = self._children.get(key)
+        if cached is not None:
+            return cached
+        generic = self.generic
+        found = []
+        obj = self.source.get(key)
+        if obj is not None:
+            skip_parent = key in self.tree_nodes or key in self.page_set
+            stack = [(obj, True)]
+            while stack:
+                value, top = stack.pop()
+                if isinstance(value, generic.IndirectObject):
+                    child = self.source.key(value)
+                    if child is not None:
+                        found.append(child)
+                elif isinstance(value, generic.DictionaryObject):
+                    is_stream = isinstance(value, generic.StreamObject)
+                    for name in reversed(list(value)):
+                        if top and ((name == "/Parent" and skip_parent) or (name == "/Length" and is_stream)):
+                            continue
+                        stack.append((value.raw_get(name), False))
+                elif isinstance(value, generic.ArrayObject):
+                    stack.extend((item, False) for item in reversed(value))
+        self._children[key] = found
+        return found
+
+    def _collect_pages(self):
+        root = self.source.get(self.source.root) if self.source.root is not None else None
+        if root is None or "/Pages" not in root:
+            return
+        pages_ref = root.raw_get("/Pages")
+        if not isinstance(pages_ref, self.generic.IndirectObject):
+            return
+        stack = [self.source.key(pages_ref)]
+        seen = set()
+        while stack:
+            key = stack.pop()
+            if key is None or key in seen:
+                continue
+            seen.add(key)
+            node = self.source.get(key)
+            if node is None:
+                continue
+            kids = node.get("/Kids") if isinstance(node, self.generic.DictionaryObject) else None
+            if node.get("/Type") == "/Pages" or (kids is not None and node.get("/Type") != "/Page"):
+                self.tree_nodes.add(key)
+                kids = kids.get_object() if kids is not None else []
+                stack.extend(self.source.key(kid) for kid in reversed(kids)
+                             if isinstance(kid, self.generic.IndirectObject))
+            else:
+                self.page_keys.append(key)
+
+    def inherited(self, key):
+        """페이지가 상위 노드에서 상속받는 속성 {이름: 값} (페이지에 없는 것만)"""
+        page = self.source.get(key)
+        found = {}
+        node, seen = page, set()
+        while isinstance(node, self.generic.DictionaryObject) and "/Parent" in node:
+            parent = node.raw_get("/Parent")
+            parent_key = self.source.key(parent) if isinstance(parent, self.generic.IndirectObject) else None
+            if parent_key is None or parent_key in seen:
+                break
+            seen.add(parent_key)
+            node = self.source.get(parent_key)
+            if node is None:
+                break
+            for name in INHERITABLE_KEYS:
+                if name in node and name not in page and name not in found:
+                    found[name] = node.raw_get(name)
+        return found
+
+    def closure(self, starts, placed=(), stop_at_pages=True, through_placed=False):
+        """
+        starts에서 닿는 객체 (깊이 우선 순서)
+        - placed: 결과에 넣지 않을 객체 (through_placed면 그 객체를 거쳐 닿는 객체는 넣음)
+        - stop_at_pages: 시작 객체가 아닌 페이지/페이지 트리 노드에서 멈춤
+        """
+        order = []
+        placed = set(placed)
+        seen = set() if through_placed else set(placed)
+        stack = list(reversed(starts))
+        first = set(starts)
+        while stack:
+            key = stack.pop()
+            if key in seen:
+                continue
+            if stop_at_pages and key not in first and (key in self.page_set or key in self.tree_nodes):
+                continue
+            seen.add(key)
+            if self.source.get(key) is None:
+                continue
+            if key not in placed:
+                order.append(key)
+            stack.extend(reversed(self.children(key)))
+        return order
+
+
+class _BitWriter:
+    """힌트 표용 비트 단위 쓰기 (큰 자리부터)"""
+
+    def __init__(self):
+        self.data = bytearray()
+        self._value = 0
+        self._bits = 0
+
+    def write(self, value, bits):
+        if not bits:
+            return
+        self._value = (self._value << bits) | value
+        self._bits += bits
+        while self._bits >= 8:
+            self._bits -= 8
+            self.data.append((self._value >> self._bits) & 0xFF)
+        self._value &= (1 << self._bits) - 1
+
+    def flush(self):
+        """바이트 경계로 맞춤"""
+        if self._bits:
+            self.data.append((self._value << (8 - self._bits)) & 0xFF)
+        self._value = self._bits = 0
+
+
+def _nbits(value):
+    return int(value).bit_length()
+
+
+class _Linearizer:
+    """
+    객체를 부록 F 순서로 다시 번호 매겨 씀
+    - 번호: 본문(나머지 페이지, 공유 객체, 그 밖의 객체) 1..M, 첫 페이지 부분 M+1..(선형화 딕셔너리가 처음, 힌트 스트림이 끝)
+    - 힌트 표의 위치 값은 규격대로 힌트 스트림이 없다고 치고 계산
+    """
+
+    def __init__(self, source, generic):
+        self.source = source
+        self.generic = generic
+        self.graph = _ObjectGraph(source, generic)
+
+    def _plan(self):
+        graph = self.graph
+        pages = graph.page_keys
+        for key in pages:
+            inherited = graph.inherited(key)
+            if inherited:
+                graph.source.get(key).update(inherited)
+        root = self.source.root
+        catalog = self.source.get(root)
+        starts = [root]
+        for name in FIRST_PAGE_CATALOG_KEYS:
+            value = catalog.raw_get(name) if name in catalog else None
+            if isinstance(value, self.generic.IndirectObject) and self.source.key(value) is not None:
+                starts.append(self.source.key(value))
+        # 카탈로그는 /Pages, /Outlines 등을 따라가지 않음 (그 밖의 객체 부분으로)
+        self.part4 = [root] + graph.closure(starts[1:], placed={root})
+        placed = set(self.part4)
+        self.part6 = graph.closure([pages[0]], placed)
+        placed.update(self.part6)
+        first_page = set(self.part6)
+
+        closures = [graph.closure([page], set(self.part4)) for page in pages[1:]]
+        users = {}
+        for closure in closures:
+            for key in closure:
+                users[key] = users.get(key, 0) + 1
+        self.groups = [[key for key in closure if key not in first_page and users[key] == 1]
+                       for closure in closures]
+        self.part8 = []
+        for closure in closures:
+            for key in closure:
+                if key not in placed and users[key] > 1:
+                    self.part8.append(key)
+                    placed.add(key)
+        for group in self.groups:
+            placed.update(group)
+        # 나머지 페이지가 참조하는 공유 객체 (첫 페이지에 있는 것 포함)
+        self.page_shared = [[key for key in closure if key in first_page or users[key] > 1]
+                            for closure in closures]
+        others = [key for key in (root, self.source.info) if key is not None]
+        self.part9 = graph.closure(others, placed, stop_at_pages=False, through_placed=True)
+
+    def _number(self):
+        main = [key for group in self.groups for key in group] + self.part8 + self.part9
+        self.numbers = {key: number for number, key in enumerate(main, 1)}
+        self.main_count = len(main)
+        number = self.main_count + 1
+        self.lin_number = number
+        for key in self.part4 + self.part6:
+            number += 1
+            self.numbers[key] = number
+        self.hint_number = number + 1
+        self.size = self.hint_number + 1
+
+    def _serialize_value(self, value, out):
+        generic = self.generic
+        if isinstance(value, generic.IndirectObject):
+            key = self.source.key(value)
+            number = self.numbers.get(key) if key is not None else None
+            out.write(b"%d 0 R" % number if number is not None else b"null")
+        elif isinstance(value, generic.StreamObject):
+            data = value._data or b""
+            self._serialize_dict(value, out, skip="/Length", extra=b" /Length %d" % len(data))
+            out.write(b"\nstream\n")
+            out.write(data)
+            out.write(b"\nendstream")
+        elif isinstance(value, generic.DictionaryObject):
+            self._serialize_dict(value, out)
+        elif isinstance(value, generic.ArrayObject):
+            out.write(b"[")
+            for index, item in enumerate(value):
+                if index:
+                    out.write(b" ")
+                self._serialize_value(item, out)
+            out.write(b"]")
+        else:
+            value.write_to_stream(out, None)
+
+    def _serialize_dict(self, value, out, skip=None, extra=b""):
+        out.write(b"<<")
+        for name in value:
+            if name == skip:
+                continue
+            out.write(b" ")
+            self.generic.NameObject(name).write_to_stream(out, None)
+            out.write(b" ")
+            self._serialize_value(value.raw_get(name), out)
+        out.write(extra)
+        out.write(b" >>")
+
+    def _object_bytes(self, key):
+        out = io.BytesIO()
+        out.write(b"%d 0 obj\n" % self.numbers[key])
+        self._serialize_value(self.source.get(key), out)
+        out.write(b"\nendobj\n")
+        return out.getvalue()
+
+    def _hint_data(self, positions, lengths, page_lengths, hint_pos):
+        """페이지 오프셋 힌트 표 + 공유 객체 힌트 표 (위치는 힌트 스트림을 뺀 값), (데이터, /S) 반환"""
+        part6 = self.part6
+        shared_ids = {key: index for index, key in enumerate(part6)}
+        for index, key in enumerate(self.part8, len(part6)):
+            shared_ids[key] = index
+        page_objects = [len(part6)] + [len(group) for group in self.groups]
+        # 첫 페이지의 공유 객체 수는 0 (규격 표 F.4)
+        page_refs = [[]] + [[shared_ids[key] for key in shared] for shared in self.page_shared]
+
+        least_objects = min(page_objects)
+        least_length = min(page_lengths)
+        bits_objects = _nbits(max(page_objects) - least_objects)
+        bits_length = _nbits(max(page_lengths) - least_length)
+        bits_refs = _nbits(max(len(refs) for refs in page_refs))
+        total_shared = len(part6) + len(self.part8)
+        bits_ids = _nbits(total_shared - 1) if total_shared else 0
+
+        bits = _BitWriter()
+        header = ((least_objects, 32), (hint_pos, 32), (bits_objects, 16), (least_length, 32), (bits_length, 16),
+                  (0, 32), (0, 16),                       # 콘텐츠 스트림 위치는 쓰지 않음 (뷰어가 보지 않음)
+                  (least_length, 32), (bits_length, 16),  # 콘텐츠 스트림 길이는 페이지 길이로 대신함
+                  (bits_refs, 16), (bits_ids, 16), (0, 16), (1, 16))
+        for value, width in header:
+            bits.write(value, width)
+        for values, width in (([count - least_objects for count in page_objects], bits_objects),
+                              ([length - least_length for length in page_lengths], bits_length),
+                              ([len(refs) for refs in page_refs], bits_refs),
+                              ([ref for refs in page_refs for ref in refs], bits_ids)):
+            for value in values:
+                bits.write(value, width)
+            bits.flush()
+        # 분수 위치(0비트), 콘텐츠 스트림 위치(0비트)와 길이
+        for length in page_lengths:
+            bits.write(length - least_length, bits_length)
+        bits.flush()
+
+        shared_offset = len(bits.data)
+        group_lengths = [lengths[key] for key in part6 + self.part8]
+        least_group = min(group_lengths) if group_lengths else 0
+        bits_group = _nbits(max(group_lengths) - least_group) if group_lengths else 0
+        first_shared = self.part8[0] if self.part8 else None
+        header = ((self.numbers[first_shared] if first_shared is not None else 0, 32),
+                  (positions[first_shared] if first_shared is not None else 0, 32),
+                  (len(part6), 32), (total_shared, 32),
+                  (0, 16),   # 공유 객체 묶음은 모두 객체 하나
+                  (least_group, 32), (bits_group, 16))
+        for value, width in header:
+            bits.write(value, width)
+        for length in group_lengths:
+            bits.write(length - least_group, bits_group)
+        bits.flush()
+        for _ in group_lengths:
+            bits.write(0, 1)   # 서명 없음
+        bits.flush()
+        return bytes(bits.data), shared_offset
+
+    def write(self, output_file):
+        """선형화한 PDF를 output_file에 쓰고 LinearizeInfo 반환"""
+        if not self.graph.page_keys:
+            raise ValueError("페이지가 없는 PDF는 선형화할 수 없습니다.")
+        self._plan()
+        self._number()
+        blobs = {key: self._object_bytes(key) for key in self.numbers}
+        lengths = {key: len(blob) for key, blob in blobs.items()}
+
+        # 객체 스트림 출력과 같이 PDF 1.5 이상으로 올림 (JPEG 2000 이미지 등)
+        header = _header(self.source.header or "%PDF-1.4").encode("ascii") + b"\n%\xe2\xe3\xcf\xd3\n"
+        lin_template = (b"%d 0 obj\n<< /Linearized 1 /L %10d /H [ %10d %10d ] /O %d /E %10d /N %d /T %10d >>\n"
+                        b"endobj\n")
+        first_count = self.size - self.lin_number
+        first_xref_head = b"xref\n%d %d\n" % (self.lin_number, first_count)
+        first_xref_size = len(first_xref_head) + 20 * first_count
+
+        file_id = self.source.file_id
+        if file_id is not None:
+            out = io.BytesIO()
+            self._serialize_value(file_id, out)
+            id_bytes = b" /ID " + out.getvalue()
+        else:
+            digest = hashlib.md5(b"".join(blobs[key] for key in self.part6)).hexdigest().encode()
+            id_bytes = b" /ID [<%s> <%s>]" % (digest, digest)
+        info_bytes = b" /Info %d 0 R" % self.numbers[self.source.info] if self.source.info in self.numbers else b""
+        # /ID 문자열에 '%'가 있을 수 있으므로 /Prev 값만 따로 채움
+        trailer_head = (b"trailer\n<< /Size %d /Root %d 0 R" % (self.size, self.numbers[self.source.root])
+                        + info_bytes + id_bytes + b" /Prev ")
+        trailer_tail = b" >>\nstartxref\n0\n%%EOF\n"
+
+        # 힌트 스트림을 뺀 위치
+        first_page = self.numbers[self.graph.page_keys[0]]
+        page_count = len(self.graph.page_keys)
+        lin_size = len(lin_template % (self.lin_number, 0, 0, 0, first_page, 0, page_count, 0))
+        position = len(header) + lin_size
+        first_xref_pos = position
+        position += first_xref_size + len(trailer_head) + 10 + len(trailer_tail)
+        positions = {}
+        for key in self.part4:
+            positions[key] = position
+            position += lengths[key]
+        hint_pos = position
+        main_order = self.part6 + [key for group in self.groups for key in group] + self.part8 + self.part9
+        for key in main_order:
+            positions[key] = position
+            position += lengths[key]
+        main_xref_pos = position
+        page_lengths = [sum(lengths[key] for key in self.part6)] + \
+                       [sum(lengths[key] for key in group) for group in self.groups]
+
+        data, shared_offset = self._hint_data(positions, lengths, page_lengths, hint_pos)
+        compressed = zlib.compress(data, 9)
+        hint_blob = (b"%d 0 obj\n<< /Filter /FlateDecode /S %d /Length %d >>\nstream\n"
+                     % (self.hint_number, shared_offset, len(compressed)) + compressed + b"\nendstream\nendobj\n")
+        hint_size = len(hint_blob)
+
+        # 힌트 스트림 뒤의 객체는 그 크기만큼 뒤로 밀림
+        for key in main_order:
+            positions[key] += hint_size
+        main_xref_pos += hint_size
+        first_page_end = hint_pos + hint_size + page_lengths[0]
+        main_xref_head = b"xref\n0 %d\n" % (self.main_count + 1)
+        main_xref = main_xref_head + b"0000000000 65535 f \n"
+        by_number = {number: key for key, number in self.numbers.items()}
+        main_xref += b"".join(b"%010d 00000 n \n" % positions[by_number[number]]
+                              for number in range(1, self.main_count + 1))
+        main_trailer = b"trailer\n<< /Size %d >>\nstartxref\n%d\n%%%%EOF\n" % (self.main_count + 1, first_xref_pos)
+        total = main_xref_pos + len(main_xref) + len(main_trailer)
+
+        first_positions = {self.lin_number: len(header), self.hint_number: hint_pos}
+        first_positions.update((self.numbers[key], positions[key]) for key in self.part4 + self.part6)
+        first_xref = first_xref_head + b"".join(b"%010d 00000 n \n" % first_positions[number]
+                                                for number in range(self.lin_number, self.size))
+        lin = lin_template % (self.lin_number, total, hint_pos, hint_size, first_page, first_page_end, page_count,
+                              main_xref_pos + len(main_xref_head) - 1)
+
+        output_file.write(header)
+        output_file.write(lin)
+        output_file.write(first_xref)
+        output_file.write(trailer_head + b"%10d" % main_xref_pos + trailer_tail)
+        for key in self.part4:
+            output_file.write(blobs[key])
+        output_file.write(hint_blob)
+        for key in main_order:
+            output_file.write(blobs[key])
+        output_file.write(main_xref)
+        output_file.write(main_trailer)
+        return LinearizeInfo(pages=page_count, objects=len(self.numbers) + 2,
+                             first_page_end=first_page_end, hint_bytes=hint_size,
+                             shared_objects=len(self.part8), size=total)
+
+
+def write_linearized(writer, output_file):
+    """PdfWriter를 선형화해서 씀 (pdf_compress_optimize.write_optimized(linearize=True)에서 호출)"""
+    from PyPDF2 import generic
+    return _Linearizer(_WriterSource(writer, generic), generic).write(output_file)
+
+
+def linearize_file(input_path, output_path):
+    """PDF 파일을 선형화해서 output_path에 씀 (원자적), LinearizeInfo 반환"""
+    import PyPDF2
+    from PyPDF2 import generic
+    from pdf_compress_metrics import stage
+
+    with stage("linearize"):
+        reader = PyPDF2.PdfReader(input_path, strict=False)
+        if reader.is_encrypted:
+            raise ValueError("암호화된 PDF는 선형화할 수 없습니다.")
+        linearizer = _Linearizer(_ReaderSource(reader, generic), generic)
+        directory = os.path.dirname(os.path.abspath(output_path))
+        fd, tmp_path = tempfile.mkstemp(prefix=".linearize_", suffix=".pdf", dir=directory)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                info = linearizer.write(f)
+            os.replace(tmp_path, output_path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+    return info
+
+
+def _linearized_values(head, file_size):
+    """파일 앞부분에서 선형화 딕셔너리 값 {L, E, O, N, T} (없거나 /L이 파일 크기와 다르면 None)"""
+    match = _LINEARIZED.search(head)
+    if match is None:
+        return None
+    tail = head[match.start():]
+    end = tail.find(b">>")
+    tail = tail[:end] if end >= 0 else tail
+    values = {}
+    for name, pattern in _NUMBER_KEYS.items():
+        found = pattern.search(tail)
+        if found:
+            values[name.decode()] = int(found.group(1))
+    # 선형화한 뒤 증분 저장한 파일은 /L이 맞지 않아 뷰어가 선형화를 무시함
+    if values.get("L") != file_size:
+        return None
+    return values
+
+
+def is_linearized(path):
+    """선형화된 PDF인지 (파일 처음 1024바이트의 선형화 딕셔너리와 /L 확인)"""
+    try:
+        with open(path, "rb") as f:
+            head = f.read(LINEARIZED_HEADER_BYTES)
+        return _linearized_values(head, os.path.getsize(path)) is not None
+    except OSError:
+        return False
+
+
+def ensure_linearized(path):
+    """선형화되어 있지 않으면 같은 경로에 선형화해서 다시 씀 (하드링크된 캐시 항목은 건드리지 않음), 다시 썼으면 True"""
+    if is_linearized(path):
+        return False
+    linearize_file(path, path)
+    return True
+
+
+def _xref_sections(data, startxref):
+    """startxref에서 /Prev를 따라간 xref 구간 시작 위치"""
+    sections = []
+    offset = startxref
+    while offset is not None and 0 <= offset < len(data) and offset not in sections:
+        sections.append(offset)
+        if data.startswith(b"xref", offset):
+            trailer = data.find(b"trailer", offset)
+            region = data[trailer:trailer + 4096] if trailer >= 0 else b""
+        else:
+            region = data[offset:data.find(b"stream", offset)]
+        found = re.search(rb"/Prev\s+(\d+)", region)
+        offset = int(found.group(1)) if found else None
+    return sections
+
+
+def first_page_cost(path, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    첫 페이지를 그리려면 받아야 하는 바이트를 잽니다 (FirstPageReport)
+    - 필요한 객체: 카탈로그, 첫 페이지까지의 페이지 트리, 첫 페이지와 리소스(폰트/이미지/폼/주석)
+    - 객체 하나는 파일에서 다음 객체(또는 xref)가 시작하는 곳까지로 봄, 객체 스트림 안의 객체는 그 스트림 전체
+    - 선형화되지 않은 파일은 파일 끝의 startxref와 xref도 받아야 함
+    """
+    import PyPDF2
+    from PyPDF2 import generic
+
+    with open(path, "rb") as f:
+        data = f.read()
+    size = len(data)
+    reader = PyPDF2.PdfReader(io.BytesIO(data), strict=False)
+    if reader.is_encrypted:
+        try:
+            reader.decrypt("")
+        except Exception:
+            pass
+    lin = _linearized_values(data[:LINEARIZED_HEADER_BYTES], size)
+
+    offsets = {}
+    for generation, table in reader.xref.items():
+        for idnum, offset in table.items():
+            if idnum and offset:
+                offsets[(idnum, generation)] = offset
+    tail = data.rfind(b"startxref")
+    found = re.match(rb"startxref\s+(\d+)", data[tail:]) if tail >= 0 else None
+    startxref = int(found.group(1)) if found else tail
+    sections = _xref_sections(data, startxref)
+    boundaries = sorted(set(offsets.values()) | set(sections) | {size})
+
+    def span(offset):
+        index = bisect.bisect_right(boundaries, offset)
+        return offset, boundaries[index] if index < len(boundaries) else size
+
+    graph = _ObjectGraph(_ReaderSource(reader, generic), generic)
+    needed = []
+    if graph.page_keys:
+        page = graph.page_keys[0]
+        # 상속받는 속성이 있으면 페이지 트리 노드도 읽어야 함
+        ancestors = []
+        if graph.inherited(page):
+            node = graph.source.get(page)
+            while node is not None and "/Parent" in node:
+                parent = node.raw_get("/Parent")
+                key = graph.source.key(parent) if isinstance(parent, generic.IndirectObject) else None
+                if key is None or key in ancestors:
+                    break
+                ancestors.append(key)
+                node = graph.source.get(key)
+        needed = [graph.source.root] + ancestors + graph.closure([page])
+    spans = []
+    for key in dict.fromkeys(needed):
+        if key in offsets:
+            spans.append(span(offsets[key]))
+        elif key[0] in reader.xref_objStm:
+            stream_key = (reader.xref_objStm[key[0]][0], 0)
+            if stream_key in offsets:
+                spans.append(span(offsets[stream_key]))
+
+    spans.append((0, min(size, LINEARIZED_HEADER_BYTES)))
+    if lin is not None:
+        spans.append((0, min(size, lin.get("E", 0))))
+    if lin is None or any(end > lin.get("E", 0) for _, end in spans):
+        # xref를 찾으려면 파일 끝부터 읽어야 함
+        spans.append((max(0, tail), size))
+        spans.extend(span(offset) for offset in sections if offset in boundaries)
+    elif sections:
+        spans.append(span(sections[0]))
+
+    prefix = max(end for _, end in spans)
+    chunks = set()
+    for start, end in spans:
+        if end > start:
+            chunks.update(range(start // chunk_size, (end - 1) // chunk_size + 1))
+    range_bytes = sum(min(chunk_size, size - chunk * chunk_size) for chunk in chunks)
+    requests = sum(1 for chunk in chunks if chunk - 1 not in chunks)
+    return FirstPageReport(path=path, file_size=size, linearized=lin is not None, page_objects=len(set(needed)),
+                           prefix_bytes=prefix, range_bytes=range_bytes, requests=requests, chunk_size=chunk_size)
+
+
+def format_first_page_report(report):
+    """첫 페이지 바이트 한 줄 요약"""
+    return (f"{report.path}: {'선형화' if report.linearized else '선형화 안 됨'}, "
+            f"첫 페이지까지 순차 {report.prefix_bytes / 1024:.1f} KB ({report.prefix_percent:.1f}%), "
+            f"범위 요청 {report.requests}번 {report.range_bytes / 1024:.1f} KB "
+            f"/ 전체 {report.file_size / 1024:.1f} KB, 객체 {report.page_objects}개")
+
+
+def _log(message):
+    print(message, file=sys.stderr)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m pdf_compress_linearize",
+        description="PDF를 선형화(Fast Web View)하거나 첫 페이지를 그리는 데 필요한 바이트를 잽니다."
+    )
+    parser.add_argument("inputs", nargs="+", help="PDF 파일")
+    parser.add_argument("-o", "--output", help="선형화한 결과 파일 (입력 하나)")
+    parser.add_argument("--check", action="store_true", help="선형화하지 않고 첫 페이지 바이트만 측정")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE,
+                        help=f"범위 요청 크기 (바이트, 기본값: {DEFAULT_CHUNK_SIZE})")
+    parser.add_argument("--json", action="store_true", help="결과를 JSON 한 줄씩 출력")
+    args = parser.parse_args(argv)
+
+    if args.check == bool(args.output):
+        parser.error("-o/--output과 --check 중 하나를 지정하세요.")
+    if args.output and len(args.inputs) != 1:
+        parser.error("-o/--output은 입력 파일 하나에만 사용할 수 있습니다.")
+
+    paths = list(args.inputs)
+    if args.output:
+        try:
+            info = linearize_file(args.inputs[0], args.output)
+        except (OSError, ValueError) as e:
+            _log(f"선형화 실패: {e}")
+            return 1
+        if not args.json:
+            _log(f"선형화: {info.pages}페이지, 공유 객체 {info.shared_objects}개, "
+                 f"힌트 {info.hint_bytes} 바이트, 첫 페이지 끝 {info.first_page_end / 1024:.1f} KB")
+        paths.append(args.output)
+
+    status = 0
+    for path in paths:
+        try:
+            report = first_page_cost(path, args.chunk_size)
+        except Exception as e:
+            _log(f"{path}: 측정 실패: {e}")
+            status = 1
+            continue
+        if args.json:
+            print(json.dumps(report.as_dict(), ensure_ascii=False))
+        else:
+            print(format_first_page_report(report))
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,190 @@
+# -*- coding: utf-8 -*-
+"""
+단계별 소요 시간 계측과 지표 내보내기
+
+    with collect() as timings:
+        compress(...)
+    timings.as_dict()  # {"gs.run": {"count": 1, "seconds": 1.2, "max_seconds": 1.2}, ...}
+
+엔진 코드는 stage("이름")으로 구간을 감싸기만 하고, collect()로 수집 중일 때만 기록합니다.
+수집 대상은 contextvars로 찾으므로 스레드/요청마다 따로 모입니다.
+작업자 프로세스에서 잰 시간은 as_dict()로 돌려받아 merge()로 합칩니다.
+gs 같은 하위 프로세스의 CPU 시간/최대 RSS는 record_resources()로 따로 모읍니다 (resources_dict()).
+
+단계 이름
+- gs.discover / gs.spawn / gs.run: gs 실행 파일 찾기 / 프로세스 시작 / 실행
+  (gsapi는 gs.spawn이 인스턴스 준비, 분할 모드의 조각별 gs는 SplitReport 참고)
+- pypdf.read / pypdf.content / pypdf.write: PDF 읽기 / 페이지별 콘텐츠 스트림 압축 / 쓰기
+- image.decode / image.encode: 이미지 하나 디코딩 / 후보 인코딩 전체
+  (image.flate, image.jpeg, image.png, image.palette, image.g4, image.jpx: 코덱별 시도)
+- hybrid.classify / hybrid.calibrate / hybrid.merge: 하이브리드 모드의 페이지 분류 / 표본 압축 / 합치기
+- pages.fingerprint / pages.compress / pages.merge: 증분 압축의 페이지 지문 / 바뀐 페이지 압축 / 합치기
+- preflight: 일괄 압축에서 파일 하나의 압축 전 분석
+- linearize: 결과 파일을 다시 읽어 선형화 (pypdf 엔진의 메모리 안 모드는 pypdf.write에 포함)
+- http.upload / http.queue / http.download: HTTP 서비스의 업로드 수신 / 실행 대기 / 결과 전송
+"""
+import contextvars
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+
+_current = contextvars.ContextVar("pdf_compress_timings", default=None)
+
+
+class StageTimings:
+    """단계별 호출 횟수, 합계, 최대 시간"""
+
+    def __init__(self):
+        self.stages = {}
+        self.resources = {}  # 하위 프로세스 이름 → 실행 횟수, CPU 시간 합계, 최대 RSS
+
+    def add_resources(self, name, cpu_seconds, max_rss, count=1):
+        stats = self.resources.setdefault(name, {"count": 0, "cpu_seconds": 0.0, "max_rss": 0})
+        stats["count"] += count
+        stats["cpu_seconds"] += cpu_seconds
+        stats["max_rss"] = max(stats["max_rss"], max_rss)
+
+    def merge_resources(self, resources):
+        """resources_dict() 결과(다른 프로세스에서 잰 값)를 더함"""
+        for name, stats in (resources or {}).items():
+            self.add_resources(name, stats["cpu_seconds"], stats["max_rss"], stats["count"])
+
+    def resources_dict(self):
+        return {name: {"count": stats["count"], "cpu_seconds": round(stats["cpu_seconds"], 6),
+                       "max_rss": stats["max_rss"]}
+                for name, stats in sorted(self.resources.items())}
+
+    def add(self, name, seconds, count=1, max_seconds=None):
+        stats = self.stages.setdefault(name, {"count": 0, "seconds": 0.0, "max_seconds": 0.0})
+        stats["count"] += count
+        stats["seconds"] += seconds
+        stats["max_seconds"] = max(stats["max_seconds"], seconds if max_seconds is None else max_seconds)
+
+    def merge(self, stages):
+        """as_dict() 결과(다른 프로세스에서 잰 시간)를 더함"""
+        for name, stats in (stages or {}).items():
+            self.add(name, stats["seconds"], stats["count"], stats["max_seconds"])
+
+    def as_dict(self):
+        return {name: {"count": stats["count"], "seconds": round(stats["seconds"], 6),
+                       "max_seconds": round(stats["max_seconds"], 6)}
+                for name, stats in sorted(self.stages.items())}
+
+
+def current():
+    """수집 중인 StageTimings (없으면 None)"""
+    return _current.get()
+
+
+@contextmanager
+def collect(timings=None):
+    """이 블록 안에서 stage()로 잰 시간을 timings에 모음"""
+    timings = timings if timings is not None else StageTimings()
+    token = _current.set(timings)
+    try:
+        yield timings
+    finally:
+        _current.reset(token)
+
+
+@contextmanager
+def stage(name):
+    """구간 시간을 현재 수집 대상에 기록 (수집 중이 아니면 아무것도 하지 않음)"""
+    timings = _current.get()
+    if timings is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.add(name, time.perf_counter() - start)
+
+
+def record_resources(name, cpu_seconds, max_rss):
+    """하위 프로세스(gs 등) 하나의 CPU 시간/최대 RSS를 현재 수집 대상에 기록"""
+    timings = _current.get()
+    if timings is not None:
+        timings.add_resources(name, cpu_seconds, max_rss)
+
+
+def merge_into_current(stages):
+    """작업자가 돌려준 시간을 현재 수집 대상에 합침"""
+    timings = _current.get()
+    if timings is not None:
+        timings.merge(stages)
+
+
+class RunMetrics:
+    """여러 파일의 결과와 단계 시간을 모아 Prometheus 텍스트 형식으로 출력"""
+
+    def __init__(self, prefix="pdf_compress"):
+        self.prefix = prefix
+        self.files = {}      # (engine, status) → 개수
+        self.input_bytes = 0
+        self.output_bytes = 0
+        self.seconds = 0.0
+        self.timings = StageTimings()
+
+    def record(self, engine, ok, input_bytes=0, output_bytes=0, seconds=0.0, stages=None, resources=None):
+        key = (engine, "ok" if ok else "error")
+        self.files[key] = self.files.get(key, 0) + 1
+        if ok:
+            self.input_bytes += input_bytes
+            self.output_bytes += output_bytes
+        self.seconds += seconds
+        self.timings.merge(stages)
+        self.timings.merge_resources(resources)
+
+    def to_prometheus(self):
+        p = self.prefix
+        lines = [f"# HELP {p}_files_total 압축을 시도한 파일 수",
+                 f"# TYPE {p}_files_total counter"]
+        for (engine, status), count in sorted(self.files.items()):
+            lines.append(f'{p}_files_total{{engine="{engine}",status="{status}"}} {count}')
+        for name, value, help_text in (
+            ("input_bytes_total", self.input_bytes, "성공한 파일의 원본 바이트 합계"),
+            ("output_bytes_total", self.output_bytes, "성공한 파일의 결과 바이트 합계"),
+            ("seconds_total", round(self.seconds, 6), "파일별 압축 시간 합계 (초)")
+        ):
+            lines += [f"# HELP {p}_{name} {help_text}", f"# TYPE {p}_{name} counter", f"{p}_{name} {value}"]
+        lines += [f"# HELP {p}_stage_seconds 단계별 소요 시간 (초)",
+                  f"# TYPE {p}_stage_seconds summary"]
+        for name, stats in self.timings.as_dict().items():
+            lines.append(f'{p}_stage_seconds_sum{{stage="{name}"}} {stats["seconds"]}')
+            lines.append(f'{p}_stage_seconds_count{{stage="{name}"}} {stats["count"]}')
+        lines += [f"# HELP {p}_stage_max_seconds 단계 한 번의 최대 소요 시간 (초)",
+                  f"# TYPE {p}_stage_max_seconds gauge"]
+        for name, stats in self.timings.as_dict().items():
+            lines.append(f'{p}_stage_max_seconds{{stage="{name}"}} {stats["max_seconds"]}')
+        resources = self.timings.resources_dict()
+        if resources:
+            lines += [f"# HELP {p}_process_cpu_seconds_total 하위 프로세스 CPU 시간 합계 (초, wait4)",
+                      f"# TYPE {p}_process_cpu_seconds_total counter"]
+            lines += [f'{p}_process_cpu_seconds_total{{process="{name}"}} {stats["cpu_seconds"]}'
+                      for name, stats in resources.items()]
+            lines += [f"# HELP {p}_process_max_rss_bytes 하위 프로세스 하나의 최대 RSS (바이트)",
+                      f"# TYPE {p}_process_max_rss_bytes gauge"]
+            lines += [f'{p}_process_max_rss_bytes{{process="{name}"}} {stats["max_rss"]}'
+                      for name, stats in resources.items()]
+        return "\n".join(lines) + "\n"
+
+
+def write_textfile(path, metrics):
+    """
+    node_exporter textfile 수집기용 파일 쓰기
+    수집기가 쓰다 만 파일을 읽지 않도록 임시 파일에 쓴 뒤 이름을 바꿈
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix=".metrics_", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(metrics.to_prometheus())
+            f.write(f"# HELP {metrics.prefix}_last_run_timestamp_seconds 마지막 실행 종료 시각\n"
+                    f"# TYPE {metrics.prefix}_last_run_timestamp_seconds gauge\n"
+                    f"{metrics.prefix}_last_run_timestamp_seconds {time.time():.3f}\n")
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
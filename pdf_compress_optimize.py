@@ -0,0 +1,258 @@
+# -*- coding: utf-8 -*-
+"""
+PyPDF2 엔진 출력의 구조 최적화 (객체 중복 제거, 안 쓰는 객체 제거, 객체 스트림)
+
+    from pdf_compress_optimize import write_optimized
+    report = write_optimized(writer, output_file)   # writer: PyPDF2.PdfWriter
+
+여러 보고서를 합친 PDF에는 같은 폰트/ICC 프로파일/폼 XObject가 수백 번 들어 있고,
+PdfWriter는 객체마다 'N 0 obj ... endobj'와 20바이트짜리 xref 항목을 씁니다.
+- 내용이 같은 객체를 하나로 합침 (pdf_compress_dedup)
+- /Root, /Info에서 닿지 않는 객체는 쓰지 않음
+- 스트림이 아닌 객체는 Flate로 압축한 객체 스트림(/ObjStm)에 모으고 xref 스트림으로 끝냄 (PDF 1.5)
+- linearize=True면 객체 스트림 대신 첫 페이지부터 읽을 수 있는 선형화 순서로 씀 (pdf_compress_linearize)
+기법별로 줄어든 바이트는 OptimizeReport에 기록합니다.
+"""
+import io
+import zlib
+from dataclasses import dataclass
+
+from pdf_compress_dedup import deduplicate_objects, serialized_size
+
+# 객체 스트림 하나에 넣을 객체 수 (많을수록 잘 압축되지만 뷰어가 객체 하나를 읽을 때 풀어야 할 양이 늘어남)
+OBJECTS_PER_STREAM = 100
+
+# 객체 스트림을 쓰려면 필요한 최소 PDF 버전
+MIN_VERSION = (1, 5)
+
+# classic xref 표의 항목 하나 크기
+XREF_ENTRY_BYTES = 20
+
+
+@dataclass
+class OptimizeReport:
+    """구조 최적화 결과 (바이트는 classic xref 형식으로 썼을 때와 비교한 값)"""
+    objects_merged: int = 0        # 내용이 같아 대표 객체로 합친 객체 수
+    dedup_bytes: int = 0
+    unreferenced: int = 0          # 어디에서도 참조하지 않아 뺀 객체 수
+    unreferenced_bytes: int = 0
+    packed: int = 0                # 객체 스트림에 넣은 객체 수
+    object_stream_bytes: int = 0   # 객체 머리/xref 표 대신 압축한 객체 스트림/xref 스트림으로 줄어든 바이트
+    first_page_bytes: int = 0      # 선형화했을 때 첫 페이지를 그리는 데 필요한 앞부분 바이트 (/E, 아니면 0)
+
+    @property
+    def bytes_saved(self):
+        return self.dedup_bytes + self.unreferenced_bytes + self.object_stream_bytes
+
+
+def _header(header):
+    """PDF 헤더를 객체 스트림을 쓸 수 있는 버전 이상으로 올림"""
+    if isinstance(header, bytes):
+        header = header.decode("latin-1")
+    try:
+        version = tuple(int(part) for part in header.strip()[5:].split("."))
+    except ValueError:
+        version = (1, 4)
+    if version >= MIN_VERSION:
+        return header.strip()
+    return "%PDF-{}.{}".format(*MIN_VERSION)
+
+
+def _serialize(obj):
+    buffer = io.BytesIO()
+    obj.write_to_stream(buffer, None)
+    return buffer.getvalue()
+
+
+class ObjectStreamWriter:
+    """
+    스트림이 아닌 객체는 객체 스트림에 모아 쓰고, 마지막에 xref 스트림을 쓰는 PDF 작성기
+    객체 번호를 reserve()로 받아 write()로 바로 쓰므로 스트리밍 모드에서도 쓰고,
+    모으는 중인 객체는 OBJECTS_PER_STREAM개까지만 메모리에 둠
+    """
+
+    def __init__(self, output_file, header="%PDF-1.5", objects_per_stream=OBJECTS_PER_STREAM):
+        self.out = output_file
+        self.objects_per_stream = objects_per_stream
+        self.entries = {}   # 객체 번호 → (1, 파일 위치) 또는 (2, 객체 스트림 번호, 순번)
+        self.count = 0
+        self.pending = []   # (객체 번호, 직렬화한 바이트)
+        self.packed = 0
+        self.streams = 0         # 객체 스트림 수
+        self.classic_bytes = 0   # 모은 객체를 classic 형식으로 썼을 때의 크기
+        self.packed_bytes = 0    # 실제로 쓴 객체 스트림/xref 스트림 크기
+        self.out.write(_header(header).encode("ascii") + b"\n%\xe2\xe3\xcf\xd3\n")
+
+    def reserve(self):
+        """객체 번호 하나를 미리 받음 (나중에 write로 씀)"""
+        self.count += 1
+        return self.count
+
+    def write(self, number, obj):
+        from PyPDF2 import generic
+        if isinstance(obj, generic.StreamObject):
+            self._write_direct(number, _serialize(obj))
+            return
+        data = _serialize(obj)
+        self.pending.append((number, data))
+        self.classic_bytes += len(b"%d 0 obj\n" % number) + len(data) + len(b"\nendobj\n") + XREF_ENTRY_BYTES
+        if len(self.pending) >= self.objects_per_stream:
+            self._flush()
+
+    def _write_direct(self, number, data):
+        self.entries[number] = (1, self.out.tell())
+        self.out.write(b"%d 0 obj\n" % number)
+        self.out.write(data)
+        self.out.write(b"\nendobj\n")
+
+    def _flush(self):
+        """모은 객체를 객체 스트림 하나로 씀"""
+        if not self.pending:
+            return
+        from PyPDF2 import generic
+        number = self.reserve()
+        offsets = []
+        body = io.BytesIO()
+        for index, (member, data) in enumerate(self.pending):
+            offsets.append(b"%d %d" % (member, body.tell()))
+            body.write(data)
+            body.write(b"\n")
+            self.entries[member] = (2, number, index)
+        head = b" ".join(offsets) + b"\n"
+        stream = generic.EncodedStreamObject()
+        stream[generic.NameObject("/Type")] = generic.NameObject("/ObjStm")
+        stream[generic.NameObject("/N")] = generic.NumberObject(len(self.pending))
+        stream[generic.NameObject("/First")] = generic.NumberObject(len(head))
+        stream[generic.NameObject("/Filter")] = generic.NameObject("/FlateDecode")
+        stream._data = zlib.compress(head + body.getvalue(), 9)
+        start = self.out.tell()
+        self._write_direct(number, _serialize(stream))
+        self.packed_bytes += self.out.tell() - start
+        self.packed += len(self.pending)
+        self.streams += 1
+        self.pending = []
+
+    def finish(self, root_number, info_number=None, file_id=None):
+        """남은 객체를 쓰고 xref 스트림과 trailer를 씀"""
+        from PyPDF2 import generic
+        self._flush()
+        number = self.reserve()
+        xref = self.out.tell()
+        self.entries[number] = (1, xref)
+        size = self.count + 1
+        offset_width = max(2, (max(xref, self.count).bit_length() + 7) // 8)
+        rows = [b"\x00" + (0).to_bytes(offset_width, "big") + b"\xff\xff"]
+        for member in range(1, size):
+            entry = self.entries.get(member)
+            if entry is None:
+                rows.append(b"\x00" + (0).to_bytes(offset_width, "big") + b"\x00\x00")
+            elif entry[0] == 1:
+                rows.append(b"\x01" + entry[1].to_bytes(offset_width, "big") + b"\x00\x00")
+            else:
+                rows.append(b"\x02" + entry[1].to_bytes(offset_width, "big") + entry[2].to_bytes(2, "big"))
+        stream = generic.EncodedStreamObject()
+        stream.update({
+            generic.NameObject("/Type"): generic.NameObject("/XRef"),
+            generic.NameObject("/Size"): generic.NumberObject(size),
+            generic.NameObject("/W"): generic.ArrayObject(
+                generic.NumberObject(width) for width in (1, offset_width, 2)),
+            generic.NameObject("/Root"): generic.IndirectObject(root_number, 0, None),
+            generic.NameObject("/Filter"): generic.NameObject("/FlateDecode")
+        })
+        if info_number is not None:
+            stream[generic.NameObject("/Info")] = generic.IndirectObject(info_number, 0, None)
+        if file_id is not None:
+            stream[generic.NameObject("/ID")] = file_id
+        stream._data = zlib.compress(b"".join(rows), 9)
+        self._write_direct(number, _serialize(stream))
+        self.packed_bytes += self.out.tell() - xref
+        self.out.write(b"startxref\n%d\n%%%%EOF\n" % xref)
+
+    @property
+    def bytes_saved(self):
+        """모은 객체를 classic 형식(객체 머리 + xref 표)으로 썼을 때보다 줄어든 바이트"""
+        # classic 형식이면 따로 쓴 객체(스트림)도 xref 표 항목이 필요하고, 그 몫은 xref 스트림에 들어 있음
+        direct = sum(1 for entry in self.entries.values() if entry[0] == 1) - self.streams - 1
+        return self.classic_bytes + direct * XREF_ENTRY_BYTES - self.packed_bytes
+
+
+def _reachable(writer, generic):
+    """/Root, /Info에서 참조를 따라 닿는 객체 번호"""
+    seen = set()
+    stack = [ref for ref in (writer._root, getattr(writer, "_info", None)) if ref is not None]
+    while stack:
+        value = stack.pop()
+        if isinstance(value, generic.IndirectObject):
+            if value.pdf is not writer or value.idnum in seen or value.idnum > len(writer._objects):
+                continue
+            seen.add(value.idnum)
+            value = writer._objects[value.idnum - 1]
+        if isinstance(value, generic.DictionaryObject):
+            stack.extend(value.values())
+        elif isinstance(value, generic.ArrayObject):
+            stack.extend(value)
+    return seen
+
+
+def remove_unreferenced(writer, generic):
+    """닿지 않는 객체를 null로 바꿈, (객체 수, classic 형식 기준 바이트) 반환"""
+    reachable = _reachable(writer, generic)
+    count = size = 0
+    for index, obj in enumerate(writer._objects):
+        if index + 1 in reachable or obj is None or isinstance(obj, generic.NullObject):
+            continue
+        count += 1
+        size += serialized_size(obj)
+        writer._objects[index] = generic.NullObject()
+    return count, size, reachable
+
+
+def write_optimized(writer, output_file, object_streams=True, linearize=False):
+    """
+    PdfWriter를 중복 제거 → 안 쓰는 객체 제거 → 객체 스트림 순서로 최적화해 씁니다.
+    - object_streams: False면 classic xref 표로 씀 (중복/안 쓰는 객체 제거만)
+    - linearize: 객체 스트림 대신 선형화(Fast Web View)해서 씀
+    - 암호화한 writer는 객체 스트림/선형화 없이 PdfWriter.write로 씀
+    - 반환값: OptimizeReport
+    """
+    from PyPDF2 import generic
+
+    report = OptimizeReport()
+    if not writer._root:
+        writer._root = writer._add_object(writer._root_object)
+    # 아직 다른 reader를 가리키는 참조를 writer로 가져옴 (PdfWriter.write와 같음)
+    writer._sweep_indirect_references(writer._root)
+
+    stats = deduplicate_objects(writer)
+    report.objects_merged, report.dedup_bytes = stats.objects_merged, stats.bytes_saved
+    report.unreferenced, report.unreferenced_bytes, reachable = remove_unreferenced(writer, generic)
+
+    if hasattr(writer, "_encrypt") or not (object_streams or linearize):
+        writer.write(output_file)
+        return report
+    if linearize:
+        from pdf_compress_linearize import write_linearized
+        report.first_page_bytes = write_linearized(writer, output_file).first_page_end
+        return report
+
+    out = ObjectStreamWriter(output_file, writer.pdf_header)
+    # 객체 번호는 그대로 두고 빠진 번호는 xref 스트림에서 빈 항목으로 둠
+    out.count = len(writer._objects)
+    for number in sorted(reachable):
+        out.write(number, writer._objects[number - 1])
+    info = getattr(writer, "_info", None)
+    out.finish(writer._root.idnum, info.idnum if info is not None else None, getattr(writer, "_ID", None))
+    report.packed = out.packed
+    report.object_stream_bytes = out.bytes_saved
+    return report
+
+
+def format_optimize_report(report):
+    """기법별로 줄어든 바이트 한 줄 요약"""
+    if report.first_page_bytes:
+        layout = f"선형화 (첫 페이지 {report.first_page_bytes / 1024:.1f} KB)"
+    else:
+        layout = f"객체 스트림 {report.packed}개 객체 ({report.object_stream_bytes / 1024:.1f} KB)"
+    return (f"구조: 중복 객체 {report.objects_merged}개 병합 ({report.dedup_bytes / 1024:.1f} KB), "
+            f"안 쓰는 객체 {report.unreferenced}개 제거 ({report.unreferenced_bytes / 1024:.1f} KB), "
+            f"{layout} | 합계 {report.bytes_saved / 1024:.1f} KB 절약")
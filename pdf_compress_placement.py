@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+"""
+이미지 배치 크기 추적 (유효 DPI 계산용)
+
+페이지 콘텐츠 스트림을 따라가며 q/Q/cm으로 바뀌는 변환 행렬(CTM)을 추적하고,
+Do로 이미지를 그릴 때의 실제 크기(pt)를 기록합니다.
+- 폼 XObject 안에서 그리는 이미지도 /Matrix를 적용해 따라감
+- 같은 이미지를 여러 크기로 그리면 가장 큰 크기를 유지
+"""
+import math
+
+IDENTITY = (1.0, 0.0, 0.0, 1.0, 0.0, 0.0)
+
+# 폼 XObject가 서로를 참조하는 경우를 대비한 최대 깊이
+MAX_FORM_DEPTH = 8
+
+
+def multiply(m, n):
+    """변환 행렬 곱 m × n (PDF 행렬 [a b c d e f])"""
+    a, b, c, d, e, f = m
+    a2, b2, c2, d2, e2, f2 = n
+    return (
+        a * a2 + b * c2,
+        a * b2 + b * d2,
+        c * a2 + d * c2,
+        c * b2 + d * d2,
+        e * a2 + f * c2 + e2,
+        e * b2 + f * d2 + f2
+    )
+
+
+def drawn_size(ctm):
+    """단위 정사각형(이미지)이 CTM으로 그려지는 가로/세로 길이 (pt)"""
+    a, b, c, d, _, _ = ctm
+    return math.hypot(a, b), math.hypot(c, d)
+
+
+def _record(placements, key, ctm):
+    width, height = drawn_size(ctm)
+    old_width, old_height = placements.get(key, (0.0, 0.0))
+    placements[key] = (max(old_width, width), max(old_height, height))
+
+
+def collect_placements(operations, resources, pdf, placements=None, ctm=IDENTITY, depth=0):
+    """
+    콘텐츠 스트림 연산 목록에서 이미지별 최대 배치 크기를 모읍니다.
+    - operations: ContentStream.operations ([(operands, operator), ...])
+    - resources: 이 스트림의 /Resources 딕셔너리 (없으면 None)
+    - 반환값: {(객체 번호, 세대 번호): (가로 pt, 세로 pt)} (간접 객체 이미지만)
+    """
+    from PyPDF2 import generic
+
+    if placements is None:
+        placements = {}
+    xobjects = {}
+    if resources is not None and "/XObject" in resources:
+        xobjects = resources["/XObject"].get_object()
+
+    stack = []
+    for operands, operator in operations:
+        if operator == b"q":
+            stack.append(ctm)
+        elif operator == b"Q":
+            if stack:
+                ctm = stack.pop()
+        elif operator == b"cm" and len(operands) == 6:
+            try:
+                ctm = multiply(tuple(float(value) for value in operands), ctm)
+            except (TypeError, ValueError):
+                continue
+        elif operator == b"Do" and operands and operands[0] in xobjects:
+            ref = xobjects.raw_get(operands[0])
+            xobject = ref.get_object()
+            subtype = xobject.get("/Subtype")
+            if subtype == "/Image" and isinstance(ref, generic.IndirectObject):
+                _record(placements, (ref.idnum, ref.generation), ctm)
+            elif subtype == "/Form" and depth < MAX_FORM_DEPTH:
+                matrix = xobject.get("/Matrix")
+                form_ctm = ctm
+                if matrix is not None and len(matrix) == 6:
+                    form_ctm = multiply(tuple(float(value) for value in matrix), ctm)
+                form_resources = xobject.get("/Resources")
+                if form_resources is not None:
+                    form_resources = form_resources.get_object()
+                else:
+                    form_resources = resources  # 리소스가 없으면 부모 것을 물려받음
+                try:
+                    form_operations = generic.ContentStream(xobject, pdf).operations
+                except Exception:
+                    continue
+                collect_placements(form_operations, form_resources, pdf, placements, form_ctm, depth + 1)
+    return placements
+
+
+def downsample_size(pixel_size, drawn_points, target_dpi, threshold):
+    """
+    유효 DPI가 target_dpi × threshold를 넘으면 줄일 픽셀 크기를, 아니면 None을 반환
+    - 가로/세로 비율은 유지하고, 두 방향 중 더 많은 픽셀이 필요한 쪽에 맞춤
+    """
+    width, height = pixel_size
+    drawn_width, drawn_height = drawn_points
+    if width <= 0 or height <= 0 or (drawn_width <= 0 and drawn_height <= 0):
+        return None
+    scale = max(drawn_width / 72 * target_dpi / width, drawn_height / 72 * target_dpi / height)
+    if scale * threshold > 1:
+        return None
+    return max(1, round(width * scale)), max(1, round(height * scale))
@@ -0,0 +1,227 @@
+# -*- coding: utf-8 -*-
+"""
+Ghostscript 사용자 프리셋 (이름 붙인 distiller 설정)
+
+    from pdf_compress_presets import CustomPreset, save_preset
+    save_preset(CustomPreset("forms", color_resolution=200, qfactor=0.4))
+    run_ghostscript(input_path, output_path, "forms")   # 내장 프리셋 이름 자리에 그대로 사용
+
+내장 -dPDFSETTINGS 프리셋 네 개 대신 해상도/다운샘플 방식/JPEG QFactor/폰트 포함/PDF 버전을
+직접 정한 설정입니다. 보통 pdf_compress_tune으로 문서 표본에서 찾아 저장합니다.
+- 저장 위치: PDF_COMPRESS_PRESETS 또는 ~/.config/pdf_compress/presets.json (JSON 하나)
+- gs 명령을 만들 때(build_gs_command) 이름으로 찾으므로 CLI/GUI/일괄 압축/감시/HTTP 서비스에서 모두 선택 가능
+- 캐시 키에는 이름과 함께 설정 값의 해시가 들어가므로 같은 이름으로 다시 저장하면 이전 결과를 쓰지 않음
+"""
+import hashlib
+import json
+import os
+import tempfile
+from dataclasses import asdict, dataclass, field, fields
+
+from pdf_compress_gs import QUALITY_LEVELS
+
+DOWNSAMPLE_TYPES = ("Bicubic", "Average", "Subsample")
+COMPATIBILITY_LEVELS = ("1.4", "1.5", "1.6", "1.7")
+
+# QFactor → 비슷한 JPEG quality (압축 전 분석의 크기 추정용 대략값, 사이는 선형 보간)
+QFACTOR_QUALITY = ((0.15, 90), (0.25, 85), (0.4, 75), (0.55, 68), (0.76, 60), (0.9, 50), (1.2, 40), (1.6, 30))
+
+# 내장 프리셋과 pypdf 프리셋 이름은 사용자 프리셋 이름으로 쓸 수 없음
+RESERVED_NAMES = set(QUALITY_LEVELS) | {"target", "높음", "보통", "낮음", "high", "medium", "low"}
+
+
+@dataclass
+class CustomPreset:
+    """
+    이름 붙인 distiller 설정
+    - base: 여기서 정하지 않은 나머지 설정을 따를 내장 프리셋
+    - mono_resolution: 흑백(1비트) 이미지 해상도, 다운샘플 방식은 흑백에도 같이 적용
+    - embed_fonts: False면 표준 14 폰트는 넣지 않음 (-dEmbedAllFonts=false)
+    - metrics: 튜닝할 때 잰 값 (ebook 대비 크기, gs 시간, PSNR 등, 설정에는 영향 없음)
+    """
+    name: str
+    base: str = "printer"
+    color_resolution: int = 150
+    gray_resolution: int = 150
+    mono_resolution: int = 300
+    downsample_type: str = "Bicubic"
+    qfactor: float = 0.4
+    embed_fonts: bool = True
+    subset_fonts: bool = True
+    compatibility: str = "1.4"
+    description: str = ""
+    metrics: dict = field(default_factory=dict)
+
+    def __post_init__(self):
+        if not self.name or self.name in RESERVED_NAMES:
+            raise ValueError(f"사용할 수 없는 프리셋 이름입니다: {self.name!r}")
+        if self.base not in QUALITY_LEVELS:
+            raise ValueError(f"알 수 없는 기본 프리셋입니다: {self.base}")
+        if self.downsample_type not in DOWNSAMPLE_TYPES:
+            raise ValueError(f"알 수 없는 다운샘플 방식입니다: {self.downsample_type} "
+                             f"(사용 가능: {', '.join(DOWNSAMPLE_TYPES)})")
+        if self.compatibility not in COMPATIBILITY_LEVELS:
+            raise ValueError(f"알 수 없는 PDF 버전입니다: {self.compatibility}")
+        if min(self.color_resolution, self.gray_resolution, self.mono_resolution) <= 0 or self.qfactor <= 0:
+            raise ValueError("해상도와 QFactor는 0보다 커야 합니다.")
+
+    @property
+    def params(self):
+        """gs 출력에 영향을 주는 값만 (이름/설명/측정값 제외)"""
+        return {f.name: getattr(self, f.name) for f in fields(self)
+                if f.name not in ("name", "description", "metrics")}
+
+    @property
+    def fingerprint(self):
+        return hashlib.sha256(json.dumps(self.params, sort_keys=True).encode()).hexdigest()[:16]
+
+    @property
+    def jpeg_quality(self):
+        """QFactor와 비슷한 JPEG quality"""
+        points = QFACTOR_QUALITY
+        if self.qfactor <= points[0][0]:
+            return points[0][1]
+        for (q0, v0), (q1, v1) in zip(points, points[1:]):
+            if self.qfactor <= q1:
+                return v0 + (v1 - v0) * (self.qfactor - q0) / (q1 - q0)
+        return points[-1][1]
+
+    @property
+    def label(self):
+        return (f"{self.color_resolution}/{self.gray_resolution}/{self.mono_resolution}dpi "
+                f"{self.downsample_type} Q{self.qfactor:g} "
+                f"{'전체 폰트' if self.embed_fonts else '표준 폰트 제외'} PDF {self.compatibility}")
+
+    def gs_options(self):
+        """gs 옵션과 setdistillerparams 코드 (build_gs_command에서 -dPDFSETTINGS=/base 뒤에 붙음)"""
+        extra_args = [
+            "-dDownsampleColorImages=true",
+            "-dDownsampleGrayImages=true",
+            "-dDownsampleMonoImages=true",
+            f"-dColorImageDownsampleType=/{self.downsample_type}",
+            f"-dGrayImageDownsampleType=/{self.downsample_type}",
+            f"-dMonoImageDownsampleType=/{self.downsample_type}",
+            f"-dColorImageResolution={self.color_resolution}",
+            f"-dGrayImageResolution={self.gray_resolution}",
+            f"-dMonoImageResolution={self.mono_resolution}",
+            "-dAutoFilterColorImages=false",
+            "-dAutoFilterGrayImages=false",
+            "-dColorImageFilter=/DCTEncode",
+            "-dGrayImageFilter=/DCTEncode",
+            "-dPassThroughJPEGImages=false",
+            f"-dEmbedAllFonts={'true' if self.embed_fonts else 'false'}",
+            f"-dSubsetFonts={'true' if self.subset_fonts else 'false'}"
+        ]
+        image_dict = f"<< /QFactor {self.qfactor:g} /Blend 1 /HSamples [2 1 1 2] /VSamples [2 1 1 2] >>"
+        postscript = f"<< /ColorImageDict {image_dict} /GrayImageDict {image_dict} >> setdistillerparams"
+        return extra_args, postscript
+
+    @classmethod
+    def from_dict(cls, data):
+        known = {f.name for f in fields(cls)}
+        return cls(**{key: value for key, value in data.items() if key in known})
+
+
+def presets_path():
+    """PDF_COMPRESS_PRESETS 또는 사용자 설정 폴더의 presets.json"""
+    env = os.environ.get("PDF_COMPRESS_PRESETS")
+    if env:
+        return env
+    base = os.environ.get("XDG_CONFIG_HOME") or os.path.join(os.path.expanduser("~"), ".config")
+    return os.path.join(base, "pdf_compress", "presets.json")
+
+
+_loaded = {}  # 경로 → (수정 시각, {이름: CustomPreset})
+
+
+def load_presets(path=None):
+    """저장한 사용자 프리셋 {이름: CustomPreset} (파일이 없으면 빈 딕셔너리, 바뀌었을 때만 다시 읽음)"""
+    path = path or presets_path()
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return {}
+    cached = _loaded.get(path)
+    if cached is not None and cached[0] == mtime:
+        return dict(cached[1])
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    presets = {name: CustomPreset.from_dict({**value, "name": name})
+               for name, value in data.get("presets", {}).items()}
+    _loaded[path] = (mtime, presets)
+    return dict(presets)
+
+
+def _write_presets(presets, path):
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    data = {"presets": {name: {key: value for key, value in asdict(preset).items() if key != "name"}
+                        for name, preset in sorted(presets.items())}}
+    fd, tmp_path = tempfile.mkstemp(prefix=".presets_", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def save_preset(preset, path=None):
+    """사용자 프리셋 저장 (같은 이름이 있으면 덮어씀, 원자적)"""
+    path = path or presets_path()
+    presets = load_presets(path)
+    presets[preset.name] = preset
+    _write_presets(presets, path)
+
+
+def delete_preset(name, path=None):
+    """사용자 프리셋 삭제, 있었으면 True"""
+    path = path or presets_path()
+    presets = load_presets(path)
+    if presets.pop(name, None) is None:
+        return False
+    _write_presets(presets, path)
+    return True
+
+
+def get_custom_preset(name):
+    """이름으로 사용자 프리셋 찾기 (없거나 내장 프리셋 이름이면 None)"""
+    if not name or name in RESERVED_NAMES:
+        return None
+    try:
+        return load_presets().get(name)
+    except (OSError, ValueError, TypeError):
+        return None
+
+
+def is_gs_preset(name):
+    """gs 엔진에서 쓸 수 있는 프리셋 이름인지 (내장 또는 저장한 사용자 프리셋)"""
+    return name in QUALITY_LEVELS or get_custom_preset(name) is not None
+
+
+def gs_preset_names():
+    """내장 프리셋 + 사용자 프리셋 이름 (HTTP 서비스/GUI 선택지)"""
+    try:
+        custom = sorted(load_presets())
+    except (OSError, ValueError, TypeError):
+        custom = []
+    return list(QUALITY_LEVELS) + custom
+
+
+def preset_fingerprint(name):
+    """사용자 프리셋이면 설정 값 해시 (캐시 키용), 내장 프리셋이면 None"""
+    preset = get_custom_preset(name)
+    return preset.fingerprint if preset is not None else None
+
+
+def format_preset(preset):
+    """프리셋 한 줄 요약 (튜닝 측정값이 있으면 함께)"""
+    text = f"{preset.name}: {preset.label} (기본 {preset.base})"
+    metrics = preset.metrics
+    if metrics:
+        text += (f" | 표본 {metrics.get('files', 0)}개 파일에서 ebook 대비 크기 {metrics.get('ebook_ratio', 0) * 100:.0f}%, "
+                 f"PSNR {metrics.get('psnr', 0):.1f}dB, gs {metrics.get('seconds', 0):.2f}s")
+    if preset.description:
+        text += f" — {preset.description}"
+    return text
@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+"""
+실행 환경 조사 결과 캐시 (gs 실행 파일 경로/버전, libgs 이름)
+
+    from pdf_compress_probe import lookup, remember
+    version = lookup("gs.version", gs_path)
+    if version is None:
+        version = ...  # gs --version 실행
+        remember("gs.version", gs_path, version, gs_path)
+
+CLI를 파일마다 새 프로세스로 실행하면 매번 PATH를 뒤지고 'gs --version'을 실행합니다.
+조사 결과를 캐시 폴더의 probe.json에 두고 다음 프로세스에서 재사용합니다.
+- 항목마다 기준 파일(gs 실행 파일, /etc/ld.so.cache 등)의 수정 시각/크기를 함께 저장하고, 바뀌었으면 다시 조사
+- 위치: PDF_COMPRESS_PROBE_CACHE 또는 결과 캐시 폴더의 probe.json, PDF_COMPRESS_PROBE_CACHE=0이면 사용 안 함
+- 여러 프로세스가 동시에 써도 파일은 원자적으로 바뀌며, 마지막에 쓴 쪽이 남음
+"""
+import json
+import os
+import tempfile
+
+PROBE_FILE = "probe.json"
+
+_data = None  # 이 프로세스에서 읽은 probe.json 내용
+
+
+def probe_cache_path():
+    """조사 결과 파일 경로 (사용하지 않으면 None)"""
+    env = os.environ.get("PDF_COMPRESS_PROBE_CACHE")
+    if env == "0":
+        return None
+    if env:
+        return env
+    from pdf_compress_cache import default_cache_dir
+    return os.path.join(default_cache_dir(), PROBE_FILE)
+
+
+def _stamp(path):
+    """기준 파일의 [수정 시각(ns), 크기] (없으면 None)"""
+    try:
+        st = os.stat(path)
+    except (OSError, TypeError, ValueError):
+        return None
+    return [st.st_mtime_ns, st.st_size]
+
+
+def _load():
+    global _data
+    if _data is None:
+        path = probe_cache_path()
+        try:
+            with open(path, encoding="utf-8") as f:
+                _data = json.load(f)
+            if not isinstance(_data, dict):
+                _data = {}
+        except (OSError, TypeError, ValueError):
+            _data = {}
+    return _data
+
+
+def lookup(kind, key):
+    """저장한 값 (없거나 기준 파일이 바뀌었으면 None)"""
+    entry = _load().get(kind, {}).get(key)
+    if not isinstance(entry, dict) or "value" not in entry:
+        return None
+    if _stamp(entry.get("file")) != entry.get("stamp") or entry.get("stamp") is None:
+        return None
+    return entry["value"]
+
+
+def remember(kind, key, value, file_path):
+    """값을 기준 파일(file_path)의 현재 상태와 함께 저장 (기준 파일이 없거나 쓸 수 없으면 무시)"""
+    stamp = _stamp(file_path)
+    path = probe_cache_path()
+    if stamp is None or path is None:
+        return
+    data = _load()
+    data.setdefault(kind, {})[key] = {"value": value, "file": file_path, "stamp": stamp}
+    directory = os.path.dirname(os.path.abspath(path))
+    try:
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(prefix=".probe_", suffix=".tmp", dir=directory)
+    except OSError:
+        return
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+    except OSError:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+
+
+def clear():
+    """프로세스 안의 조사 결과를 버림 (다음 lookup에서 파일을 다시 읽음)"""
+    global _data
+    _data = None
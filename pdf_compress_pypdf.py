@@ -0,0 +1,400 @@
+# -*- coding: utf-8 -*-
+"""
+PyPDF2 압축 엔진 (GUI 비의존)
+
+콘텐츠 스트림 압축 + 이미지 재인코딩(JPEG/Flate 중 더 작은 쪽) 방식입니다.
+출력은 중복/안 쓰는 객체를 빼고 객체 스트림과 xref 스트림으로 씁니다 (pdf_compress_optimize).
+linearize=True면 웹에서 첫 페이지부터 보이도록 선형화해서 씁니다 (pdf_compress_linearize).
+PyPDF2 / PIL은 실제로 압축할 때만 불러와서 짧은 작업의 시작 시간을 줄입니다.
+"""
+import mmap
+import os
+import shutil
+import tempfile
+import time
+from dataclasses import dataclass, field
+from typing import Any
+
+from pdf_compress_dedup import object_digest
+from pdf_compress_errors import CompressionCancelled
+from pdf_compress_image import DEFAULT_CODEC_BUDGET, apply_result, assign_budgets, image_info, recompress_image
+from pdf_compress_metrics import collect, merge_into_current, stage
+from pdf_compress_optimize import format_optimize_report, write_optimized
+from pdf_compress_placement import collect_placements, downsample_size
+from pdf_compress_stream import peak_rss
+
+# 압축 알고리즘을 바꾸면 올려서 이전 캐시 결과를 무효화
+ENGINE_VERSION = 7
+
+# 원본 이미지가 이보다 작으면 프로세스 풀 시작 비용이 더 큼
+MIN_PARALLEL_BYTES = 4 * 1024 * 1024
+
+# 압축 품질 프리셋 (JPEG quality)
+QUALITY_PRESETS = {
+    "높음": 85,
+    "보통": 70,
+    "낮음": 50
+}
+
+# 프리셋별 이미지 목표 해상도 (페이지에 그려지는 크기 기준 dpi)
+TARGET_DPI = {
+    "높음": 200,
+    "보통": 150,
+    "낮음": 100
+}
+
+# 유효 해상도가 목표의 이 배수를 넘을 때만 줄임 (Ghostscript DownsampleThreshold 기본값과 같음)
+DOWNSAMPLE_THRESHOLD = 1.5
+
+# CLI 등에서 쓰는 영문 별칭
+QUALITY_ALIASES = {
+    "high": "높음",
+    "medium": "보통",
+    "low": "낮음"
+}
+
+
+class PyPDFNotAvailableError(RuntimeError):
+    """PyPDF2 또는 PIL이 설치되어 있지 않을 때 발생"""
+
+
+@dataclass
+class ImageReport:
+    """이미지 처리/중복 제거 결과"""
+    references: int = 0       # 페이지에서 만난 이미지 참조 수
+    encoded: int = 0          # 실제로 재인코딩한 이미지 수
+    shared_skipped: int = 0   # 같은 객체를 다시 만나 건너뛴 횟수
+    merged: int = 0           # 내용이 같은 다른 객체를 대표 객체로 합친 수
+    downsampled: int = 0      # 목표 해상도로 픽셀 수를 줄인 이미지 수
+    kept: int = 0             # 다시 인코딩해도 작아지지 않아(또는 디코딩할 수 없어) 원본을 둔 이미지 수
+    kept_original: bool = False  # 결과 파일이 원본보다 커서 원본을 그대로 복사했는지
+    peak_rss: int = 0         # 압축을 마친 시점까지 이 프로세스의 최대 RSS (바이트, 알 수 없으면 0)
+    peak_anon_rss: int = 0    # 스트리밍 모드: 파일 캐시를 뺀 최대 메모리 (바이트, Linux)
+    bytes_saved: int = 0      # 합쳐서 출력에서 빠진 이미지 바이트 수
+    encode_seconds: float = 0.0
+    structure: Any = None     # 객체 중복 제거/안 쓰는 객체 제거/객체 스트림 결과 (OptimizeReport)
+    codecs: dict = field(default_factory=dict)  # 고른 코덱 이름 → 이미지 수 (pdf_compress_image)
+
+    @property
+    def seconds_saved(self):
+        """건너뛴 이미지를 평균 인코딩 시간으로 처리했다고 가정한 추정치"""
+        if not self.encoded:
+            return 0.0
+        return self.encode_seconds / self.encoded * (self.shared_skipped + self.merged)
+
+
+def _import_pypdf():
+    try:
+        import PyPDF2
+    except ImportError as e:
+        raise PyPDFNotAvailableError("PyPDF2가 설치되어 있지 않습니다. 'pip install PyPDF2'로 설치해주세요.") from e
+    return PyPDF2
+
+
+def _import_pil_image():
+    try:
+        from PIL import Image
+    except ImportError as e:
+        raise PyPDFNotAvailableError("Pillow가 설치되어 있지 않습니다. 'pip install Pillow'로 설치해주세요.") from e
+    return Image
+
+
+def engine_version():
+    """캐시 키 등에 쓰는 엔진 버전 문자열"""
+    PyPDF2 = _import_pypdf()
+    _import_pil_image()
+    import PIL
+    return f"pypdf-engine-{ENGINE_VERSION}/PyPDF2-{PyPDF2.__version__}/Pillow-{PIL.__version__}"
+
+
+def resolve_quality(preset):
+    """프리셋 이름(높음/보통/낮음, high/medium/low) 또는 숫자를 JPEG quality로 변환"""
+    if isinstance(preset, int):
+        return preset
+    preset = QUALITY_ALIASES.get(preset, preset)
+    if preset in QUALITY_PRESETS:
+        return QUALITY_PRESETS[preset]
+    try:
+        return int(preset)
+    except (TypeError, ValueError):
+        raise ValueError(f"알 수 없는 품질 설정입니다: {preset}") from None
+
+
+def resolve_target_dpi(preset):
+    """프리셋 이름의 목표 해상도 (숫자 quality를 직접 주면 해상도는 유지)"""
+    if isinstance(preset, int):
+        return None
+    return TARGET_DPI.get(QUALITY_ALIASES.get(preset, preset))
+
+
+def compress_pdf_file(input_path, output_path, quality, progress_callback=None, cancel_event=None, jobs=1,
+                      target_dpi=None, memory_limit=None, codec_budget=DEFAULT_CODEC_BUDGET, linearize=False):
+    """
+    PyPDF2로 PDF를 압축합니다.
+    - quality: JPEG quality (1-95) 또는 프리셋 이름
+    - progress_callback(done_pages, total_pages): 페이지 하나의 이미지까지 모두 처리될 때마다 호출
+    - cancel_event: threading.Event가 설정되면 CompressionCancelled 발생 (출력 파일은 만들지 않음)
+    - jobs: 이미지 재인코딩 프로세스 수 (None이면 CPU 개수, 작업 수와 무관하게 결과 바이트는 같음)
+    - target_dpi: 페이지에 그려지는 크기 기준 목표 해상도 (None이면 프리셋 기본값, 0이면 줄이지 않음)
+      콘텐츠 스트림의 CTM을 따라가 유효 해상도를 구하고, 여러 크기로 그려진 이미지는 가장 큰 크기 기준
+    - 여러 페이지가 공유하는 이미지는 한 번만 재인코딩하고,
+      바이트 단위로 같은 이미지는 출력에서 객체 하나로 합침
+    - memory_limit: 바이트 수를 주면 메모리 제한 스트리밍 모드 (pdf_compress_stream 참고)
+    - codec_budget: 이미지 종류별 기본 후보 외에 PNG 예측자/JPEG 2000을 시도할 문서 전체 예산 (초, 추정치)
+      0이면 기본 후보만, math.inf면 제한 없음 (pdf_compress_image.assign_budgets)
+    - linearize: 객체 스트림 대신 선형화(Fast Web View)해서 씀, 스트리밍 모드는 다 쓴 뒤 파일을 다시 읽어
+      선형화 (pdf_compress_linearize)
+    - 이미지마다 원본보다 작아질 때만 바꾸고, 결과 파일이 원본보다 크면 원본을 그대로 복사
+      (linearize면 선형화한 결과와 비교해 원본을 선형화한 것이 더 작으면 그것을 씀, 선형화 오버헤드로
+      원본보다 조금 커질 수 있음)
+    - 반환값: ImageReport
+    """
+    if memory_limit:
+        from pdf_compress_stream import compress_pdf_streaming
+        report = compress_pdf_streaming(input_path, output_path, quality, memory_limit,
+                                        progress_callback=progress_callback, cancel_event=cancel_event,
+                                        jobs=jobs, target_dpi=target_dpi, codec_budget=codec_budget)
+    else:
+        report = _compress_in_memory(input_path, output_path, quality, progress_callback, cancel_event,
+                                     jobs, target_dpi, codec_budget, linearize)
+    if linearize:
+        from pdf_compress_linearize import ensure_linearized
+        ensure_linearized(output_path)
+    if os.path.getsize(output_path) < os.path.getsize(input_path):
+        return report
+    if not linearize:
+        shutil.copyfile(input_path, output_path)
+        report.kept_original = True
+        return report
+    # 원본을 선형화한 것과 비교해 작은 쪽을 씀 (원본이 이미 선형화되어 있으면 그대로 복사)
+    from pdf_compress_linearize import is_linearized, linearize_file
+    fd, original_path = tempfile.mkstemp(suffix=".pdf", dir=os.path.dirname(os.path.abspath(output_path)))
+    os.close(fd)
+    try:
+        if is_linearized(input_path):
+            shutil.copyfile(input_path, original_path)
+        else:
+            linearize_file(input_path, original_path)
+        if os.path.getsize(original_path) < os.path.getsize(output_path):
+            os.replace(original_path, output_path)
+            report.kept_original = True
+    finally:
+        if os.path.exists(original_path):
+            os.unlink(original_path)
+    return report
+
+
+def _compress_in_memory(input_path, output_path, quality, progress_callback, cancel_event, jobs, target_dpi,
+                        codec_budget, linearize=False):
+    PyPDF2 = _import_pypdf()
+    from PyPDF2 import generic
+    if target_dpi is None:
+        target_dpi = resolve_target_dpi(quality)
+    quality = resolve_quality(quality)
+    report = ImageReport()
+    processed = {}   # 원본 객체 번호 → 대표 참조
+    by_digest = {}   # 원본 내용 해시 → 대표 참조
+    pending = []     # (첫 등장 페이지 번호, 이미지 객체, 대표 객체 번호) 문서 순서
+    placements = {}  # 원본 객체 번호 → 가장 크게 그려진 크기 (pt)
+
+    with open(input_path, 'rb') as input_file:
+        with stage("pypdf.read"):
+            reader = PyPDF2.PdfReader(input_file)
+            total = len(reader.pages)
+        writer = PyPDF2.PdfWriter()
+
+        # 1단계: 페이지를 훑으며 다시 인코딩할 이미지를 모음
+        for index, page in enumerate(reader.pages):
+            if cancel_event is not None and cancel_event.is_set():
+                raise CompressionCancelled()
+            has_xobjects = "/Resources" in page and "/XObject" in page["/Resources"]
+            # compress_content_streams()와 같지만, 파싱한 연산 목록으로 이미지 배치도 함께 구함
+            with stage("pypdf.content"):
+                contents = page.get_contents()
+                if contents is not None:
+                    if not isinstance(contents, generic.ContentStream):
+                        contents = generic.ContentStream(contents, reader)
+                    if target_dpi and has_xobjects:
+                        collect_placements(contents.operations, page["/Resources"].get_object(), reader,
+                                           placements)
+                    page[generic.NameObject("/Contents")] = contents.flate_encode()
+
+            if has_xobjects:
+                xObject = page["/Resources"]["/XObject"].get_object()
+
+                for obj in list(xObject):
+                    if xObject[obj]["/Subtype"] != "/Image":
+                        continue
+                    ref = xObject.raw_get(obj)
+                    if not isinstance(ref, generic.IndirectObject):
+                        # 페이지 안에 직접 들어 있는 이미지는 공유될 수 없음
+                        pending.append((index, xObject[obj], None))
+                        continue
+                    report.references += 1
+                    key = (ref.idnum, ref.generation)
+                    if key in processed:
+                        report.shared_skipped += 1
+                    else:
+                        image = ref.get_object()
+                        digest = object_digest(image, generic)
+                        if digest in by_digest:
+                            processed[key] = by_digest[digest]
+                            report.merged += 1
+                        else:
+                            pending.append((index, image, key))
+                            processed[key] = by_digest[digest] = ref
+                    if processed[key] is not ref:
+                        xObject[generic.NameObject(obj)] = processed[key]
+
+        drawn = merge_placements(placements, processed)
+        tasks = [(index, image, target_size(image, drawn.get(key), target_dpi))
+                 for index, image, key in pending]
+
+        # 2단계: 이미지 재인코딩 (순서대로 다시 써 넣음)
+        _encode_images(tasks, quality, report, total, jobs, progress_callback, cancel_event, codec_budget)
+
+        # add_page는 객체를 복제하므로 이미지를 바꾼 뒤에 추가
+        with stage("pypdf.write"):
+            for page in reader.pages:
+                writer.add_page(page)
+            for key, ref in processed.items():
+                if ref.idnum != key[0]:
+                    report.bytes_saved += len(ref.get_object()._data or b"")
+
+            if cancel_event is not None and cancel_event.is_set():
+                raise CompressionCancelled()
+            with open(output_path, 'wb') as output_file:
+                report.structure = write_optimized(writer, output_file, linearize=linearize)
+    report.peak_rss = peak_rss()
+    return report
+
+
+def merge_placements(placements, processed):
+    """합쳐진 객체의 배치 크기를 대표 객체 번호로 모음 (가장 큰 크기 유지)"""
+    drawn = {}
+    for key, size in placements.items():
+        ref = processed.get(key)
+        canonical = (ref.idnum, ref.generation) if ref is not None else key
+        old = drawn.get(canonical, (0.0, 0.0))
+        drawn[canonical] = (max(old[0], size[0]), max(old[1], size[1]))
+    return drawn
+
+
+def target_size(image, drawn_points, target_dpi):
+    """목표 해상도로 줄일 픽셀 크기 (줄일 필요가 없거나 배치를 모르면 None)"""
+    if not target_dpi or drawn_points is None:
+        return None
+    try:
+        pixel_size = (int(image["/Width"]), int(image["/Height"]))
+    except (KeyError, TypeError, ValueError):
+        return None
+    return downsample_size(pixel_size, drawn_points, target_dpi, DOWNSAMPLE_THRESHOLD)
+
+
+def _encode_images(pending, quality, report, total_pages, jobs, progress_callback, cancel_event,
+                   codec_budget=DEFAULT_CODEC_BUDGET):
+    """
+    모은 이미지를 다시 인코딩해 각 객체의 _data에 써 넣습니다.
+    - 이미지가 작거나 jobs가 1이면 현재 프로세스에서 처리
+    - 그 외에는 원본 바이트를 임시 파일 하나에 모아 두고 작업자가 mmap으로 자기 구간만 읽음
+      (이미지마다 바이트를 피클링해 작업자에게 보내지 않음)
+    """
+    jobs = jobs or os.cpu_count() or 1
+    total_bytes = sum(len(image._data or b"") for _, image, _ in pending)
+    infos = [image_info(image) for _, image, _ in pending]
+    assign_budgets(infos, codec_budget)
+    start = time.perf_counter()
+
+    def page_done(position):
+        # position번째 이미지까지 끝났으면 다음 이미지가 처음 나온 페이지 전까지는 완료
+        if progress_callback:
+            progress_callback(pending[position + 1][0] if position + 1 < len(pending) else total_pages,
+                              total_pages)
+
+    if jobs <= 1 or len(pending) < 2 or total_bytes < MIN_PARALLEL_BYTES:
+        for position, (_, image, size) in enumerate(pending):
+            if cancel_event is not None and cancel_event.is_set():
+                raise CompressionCancelled()
+            _apply_encoded(image, recompress_image(image._data, infos[position], quality, size), report)
+            page_done(position)
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+
+        fd, spool_path = tempfile.mkstemp(prefix="pdf_images_")
+        try:
+            spans = []
+            with os.fdopen(fd, "wb") as spool:
+                for _, image, _ in pending:
+                    spans.append((spool.tell(), len(image._data or b"")))
+                    spool.write(image._data or b"")
+
+            executor = ProcessPoolExecutor(max_workers=min(jobs, len(pending)),
+                                           initializer=_attach_spool, initargs=(spool_path,))
+            try:
+                futures = [executor.submit(_encode_spooled, offset, length, info, quality, size)
+                           for (offset, length), info, (_, _, size) in zip(spans, infos, pending)]
+                for position, future in enumerate(futures):
+                    if cancel_event is not None and cancel_event.is_set():
+                        raise CompressionCancelled()
+                    result, stages = future.result()
+                    merge_into_current(stages)
+                    _apply_encoded(pending[position][1], result, report)
+                    page_done(position)
+            finally:
+                executor.shutdown(wait=True, cancel_futures=True)
+        finally:
+            os.unlink(spool_path)
+
+    if not pending and progress_callback:
+        progress_callback(total_pages, total_pages)
+    report.encoded = len(pending)
+    report.encode_seconds = time.perf_counter() - start
+
+
+def _apply_encoded(image, result, report):
+    """재인코딩 결과를 이미지 객체에 반영 (None이면 원본 유지)"""
+    if result is None:
+        report.kept += 1
+        return
+    report.codecs[result[2]] = report.codecs.get(result[2], 0) + 1
+    if apply_result(image, result):
+        report.downsampled += 1
+
+
+# --- 이미지 재인코딩 작업자 ---
+_spool = None
+
+
+def _attach_spool(spool_path):
+    """작업자 프로세스 시작 시 이미지 임시 파일을 mmap으로 열어 둠"""
+    global _spool
+    with open(spool_path, "rb") as f:
+        _spool = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def _encode_spooled(offset, length, info, quality, size):
+    """작업자에서 재인코딩, (결과, 단계별 시간)을 반환"""
+    with collect() as timings:
+        result = recompress_image(memoryview(_spool)[offset:offset + length], info, quality, size)
+    return result, timings.as_dict()
+
+
+def format_image_report(report):
+    """이미지 중복 제거 결과 한 줄 요약"""
+    return (f"이미지: 참조 {report.references}, 재인코딩 {report.encoded}, "
+            f"공유 건너뜀 {report.shared_skipped}, 중복 병합 {report.merged}, 해상도 축소 {report.downsampled}, "
+            f"원본 유지 {report.kept} "
+            f"({report.bytes_saved / 1024:.1f} KB 절약, 약 {report.seconds_saved:.2f}s 절약)"
+            + (f" | 최대 RSS {report.peak_rss / (1024 * 1024):.0f} MB" if report.peak_rss else "")
+            + (f" (파일 캐시 제외 {report.peak_anon_rss / (1024 * 1024):.0f} MB)" if report.peak_anon_rss else "")
+            + (" | 코덱 " + ", ".join(f"{name} {count}" for name, count in sorted(report.codecs.items()))
+               if report.codecs else "")
+            + (" | 결과가 더 커서 원본 파일 유지" if report.kept_original else "")
+            + (f"\n{format_optimize_report(report.structure)}" if report.structure is not None else ""))
+
+
+def compress_image_in_page(img_obj, quality):
+    """이미지 XObject를 다시 인코딩 (더 작아질 때만 바꿈)"""
+    result = recompress_image(img_obj._data, image_info(img_obj), quality)
+    if result is not None:
+        apply_result(img_obj, result)
@@ -0,0 +1,451 @@
+# -*- coding: utf-8 -*-
+"""
+로컬 HTTP 압축 서비스 (asyncio, 표준 라이브러리만 사용)
+
+    python -m pdf_compress_server --port 8350 --concurrency 4 --max-queue 16 --timeout 120
+    curl --data-binary @in.pdf -H "Content-Type: application/pdf" \\
+         "http://127.0.0.1:8350/compress?preset=ebook" -o out.pdf
+
+- POST /compress?preset=...: 요청 본문(PDF)을 받아 압축한 PDF를 돌려줌
+  업로드는 조각 단위로 임시 파일에 쓰고, 결과도 조각 단위로 보내므로 파일 전체를 메모리에 올리지 않음
+- GET /healthz: 상태 JSON, GET /metrics: Prometheus 텍스트 형식 지표
+gs는 asyncio.create_subprocess_exec로 실행하며, 명령어/제한/프로세스 그룹은 run_ghostscript()와 같은
+build_gs_command(), limit_command(), process_group_options()로 만듭니다.
+(자식은 asyncio가 회수하므로 요청별 CPU/RSS 대신 /metrics에 gs 전체의 CPU 시간/최대 RSS를 보고)
+- 동시 실행은 concurrency개, 기다리는 요청은 max-queue개까지이며 넘으면 본문을 읽기 전에 429
+  (Expect: 100-continue를 보내면 거절된 업로드는 전송 자체를 하지 않음)
+- gs가 timeout초 안에 끝나지 않으면 프로세스 그룹을 종료하고 504, 클라이언트가 끊기면 바로 종료
+- --gs-cpu/--gs-memory/--nice/--ionice: gs 하나의 CPU 시간/메모리 제한과 우선순위
+- preset에는 내장 프리셋 외에 pdf_compress_tune으로 저장한 사용자 프리셋 이름도 쓸 수 있음
+- --incremental: 페이지 캐시(pdf_compress_incremental)로 다시 올린 문서의 바뀐 페이지만 압축,
+  재사용한 페이지 수는 X-Pages-Reused 헤더(재사용/전체)로 알려 줌
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from dataclasses import replace
+from urllib.parse import parse_qs, urlsplit
+
+from pdf_compress_gs import (
+    OUTPUT_TAIL_BYTES, GhostscriptError, GhostscriptTimeoutError, _describe_exit, _kill_group, _TailBuffer,
+    add_limit_arguments, build_gs_command, default_limits, limit_command, limits_from_args,
+    process_group_options, require_ghostscript
+)
+from pdf_compress_metrics import RunMetrics, collect, stage
+from pdf_compress_presets import gs_preset_names, is_gs_preset
+
+CHUNK_SIZE = 64 * 1024
+DEFAULT_PORT = 8350
+DEFAULT_CONCURRENCY = max(1, (os.cpu_count() or 2) // 2)
+DEFAULT_MAX_QUEUE = 16
+DEFAULT_TIMEOUT = 120.0
+DEFAULT_MAX_UPLOAD_MB = 512
+HEADER_TIMEOUT = 10.0      # 요청 줄/헤더를 다 받을 때까지 (느린 연결 방지)
+READ_IDLE_TIMEOUT = 30.0   # 업로드 조각 사이 최대 대기
+MAX_HEADER_LINES = 100
+STDERR_TAIL = 2000         # 오류 응답에 넣을 gs 표준 에러 끝부분 (바이트)
+# 본문을 읽기 전에 거절한 요청은 이만큼까지 읽어 버려서 클라이언트가 연결 재설정 대신 응답을 받게 함
+DISCARD_LIMIT = 1024 * 1024
+DISCARD_TIMEOUT = 1.0
+
+_REASONS = {
+    200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+    411: "Length Required", 413: "Payload Too Large", 429: "Too Many Requests",
+    500: "Internal Server Error", 503: "Service Unavailable", 504: "Gateway Timeout"
+}
+
+
+class HttpError(Exception):
+    """상태 코드와 함께 응답할 요청 오류"""
+
+    def __init__(self, status, message, headers=None):
+        super().__init__(message)
+        self.status = status
+        self.headers = headers or {}
+        self.unread = 0  # 아직 읽지 않은 요청 본문 바이트 수
+
+
+class CompressionServer:
+    """요청 수락/대기열/동시 실행 제한과 지표"""
+
+    def __init__(self, gs_command=None, concurrency=DEFAULT_CONCURRENCY, max_queue=DEFAULT_MAX_QUEUE,
+                 timeout=DEFAULT_TIMEOUT, max_upload=DEFAULT_MAX_UPLOAD_MB * 1024 * 1024, tmp_dir=None,
+                 default_preset="ebook", limits=None, page_cache=None):
+        self.gs_command = require_ghostscript(gs_command)
+        # 경과 시간 제한은 timeout 인자로 정하고 나머지는 limits(기본값: default_limits())를 따름
+        self.limits = replace(limits if limits is not None else default_limits(), timeout=timeout)
+        self.concurrency = concurrency
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self.max_upload = max_upload
+        self.tmp_dir = tmp_dir
+        self.default_preset = default_preset
+        # 페이지 캐시를 주면 요청마다 바뀐 페이지만 압축 (pdf_compress_incremental.PageCache)
+        self.page_cache = page_cache
+        self.engine_version = None
+        if page_cache is not None:
+            from pdf_compress_engines import get_engine
+            self.engine_version = get_engine("ghostscript").version()
+        self.metrics = RunMetrics()
+        self.responses = {}   # 상태 코드 → 개수
+        self.active = 0       # gs 실행 중
+        self.waiting = 0      # 수락했지만 실행 차례를 기다리는 중 (업로드 중 포함)
+        self.started = time.time()
+        self._slots = None
+
+    # --- HTTP 처리 ---
+    async def handle(self, reader, writer):
+        status = 500
+        try:
+            method, path, query, headers = await asyncio.wait_for(_read_head(reader), HEADER_TIMEOUT)
+            if path == "/compress":
+                if method != "POST":
+                    raise HttpError(405, "POST만 사용할 수 있습니다.", {"Allow": "POST"})
+                status = await self._compress(reader, writer, query, headers)
+            elif path == "/healthz" and method == "GET":
+                status = await _send_json(writer, 200, self.health())
+            elif path == "/metrics" and method == "GET":
+                status = await _send(writer, 200, self.prometheus().encode("utf-8"),
+                                     "text/plain; version=0.0.4; charset=utf-8")
+            else:
+                raise HttpError(404, "알 수 없는 경로입니다.")
+        except HttpError as e:
+            status = await _send_json(writer, e.status, {"error": str(e)}, e.headers)
+            if 0 < e.unread <= DISCARD_LIMIT:
+                await _discard(reader, e.unread)
+        except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError):
+            status = 400  # 요청을 끝까지 받지 못함 (응답할 수 없을 수도 있음)
+        except Exception as e:
+            status = await _send_json(writer, 500, {"error": str(e)})
+        finally:
+            self.responses[status] = self.responses.get(status, 0) + 1
+            try:
+                writer.close()
+                await writer.wait_closed()
+            except (ConnectionError, OSError):
+                pass
+
+    async def _compress(self, reader, writer, query, headers):
+        preset = query.get("preset", [self.default_preset])[0]
+        if not is_gs_preset(preset):
+            raise HttpError(400, f"알 수 없는 프리셋입니다: {preset}")
+        if "content-length" not in headers:
+            raise HttpError(411, "Content-Length 헤더가 필요합니다.")
+        try:
+            length = int(headers["content-length"])
+        except ValueError:
+            raise HttpError(400, "Content-Length가 올바르지 않습니다.") from None
+        try:
+            if length <= 0 or length > self.max_upload:
+                raise HttpError(413, f"업로드 크기는 1 ~ {self.max_upload} 바이트여야 합니다.")
+            # 본문을 받기 전에 거절해야 대기열이 꽉 찼을 때 대역폭/디스크를 쓰지 않음
+            if self.active + self.waiting >= self.concurrency + self.max_queue:
+                raise HttpError(429, "대기 중인 요청이 너무 많습니다.", {"Retry-After": "1"})
+        except HttpError as e:
+            if headers.get("expect", "").lower() != "100-continue":
+                e.unread = length
+            raise
+        if headers.get("expect", "").lower() == "100-continue":
+            writer.write(b"HTTP/1.1 100 Continue\r\n\r\n")
+            await writer.drain()
+
+        self.waiting += 1
+        waiting = True
+        start = time.perf_counter()
+        with tempfile.TemporaryDirectory(prefix="pdf_server_", dir=self.tmp_dir) as tmp_dir, \
+                collect() as timings:
+            try:
+                input_path = os.path.join(tmp_dir, "input.pdf")
+                output_path = os.path.join(tmp_dir, "output.pdf")
+                with stage("http.upload"):
+                    await _receive_body(reader, length, input_path)
+                with stage("http.queue"):
+                    await self._slots.acquire()
+                self.waiting -= 1
+                waiting = False
+                self.active += 1
+                try:
+                    pages = await self._run_gs(input_path, output_path, preset)
+                finally:
+                    self.active -= 1
+                    self._slots.release()
+            except BaseException:
+                self.metrics.record("ghostscript", False, seconds=time.perf_counter() - start,
+                                    stages=timings.as_dict(), resources=timings.resources_dict())
+                raise
+            finally:
+                if waiting:
+                    self.waiting -= 1
+
+            compressed_size = os.path.getsize(output_path)
+            seconds = time.perf_counter() - start
+            response_headers = {
+                "X-Original-Size": str(length),
+                "X-Compressed-Size": str(compressed_size),
+                "X-Seconds": f"{seconds:.4f}"
+            }
+            if pages is not None:
+                response_headers["X-Pages-Reused"] = f"{pages.reused}/{pages.page_count}"
+            with stage("http.download"):
+                status = await _send_file(writer, output_path, response_headers)
+        self.metrics.record("ghostscript", True, length, compressed_size, seconds, timings.as_dict(),
+                            timings.resources_dict())
+        return status
+
+    async def _run_gs(self, input_path, output_path, preset):
+        """gs 실행 (페이지 캐시를 쓰면 IncrementalReport, 아니면 None 반환)"""
+        if self.page_cache is not None:
+            return await self._run_incremental(input_path, output_path, preset)
+        command = limit_command(build_gs_command(self.gs_command, input_path, output_path, preset), self.limits)
+        output = _TailBuffer(OUTPUT_TAIL_BYTES)
+        with stage("gs.spawn"):
+            process = await asyncio.create_subprocess_exec(
+                *command, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.STDOUT,
+                **process_group_options(self.limits))
+
+        async def drain():
+            # gs 출력은 마지막 OUTPUT_TAIL_BYTES만 보관
+            while True:
+                data = await process.stdout.read(CHUNK_SIZE)
+                if not data:
+                    break
+                output.write(data)
+            await process.wait()
+
+        try:
+            with stage("gs.run"):
+                await asyncio.wait_for(drain(), self.timeout)
+        except asyncio.TimeoutError:
+            _kill_group(process)
+            await process.wait()
+            raise HttpError(504, f"압축이 {self.timeout:g}초 안에 끝나지 않았습니다.") from None
+        except BaseException:
+            # 클라이언트가 끊겨 작업이 취소되어도 gs와 gs가 만든 프로세스를 남기지 않음
+            if process.returncode is None:
+                _kill_group(process)
+                await process.wait()
+            raise
+        if process.returncode != 0:
+            tail = output.text()[-STDERR_TAIL:]
+            raise HttpError(500, f"Ghostscript 오류{_describe_exit(process.returncode, self.limits)}\n{tail}")
+        return None
+
+    async def _run_incremental(self, input_path, output_path, preset):
+        """페이지 캐시 모드 (바뀐 페이지만 뽑아 run_ghostscript로 압축하므로 스레드에서 실행)"""
+        from pdf_compress_incremental import compress_incremental
+        cancel_event = threading.Event()
+        # 단계 시간/자원 사용량은 to_thread가 복사한 컨텍스트로 이 요청의 timings에 기록됨
+        task = asyncio.ensure_future(asyncio.to_thread(
+            compress_incremental, input_path, output_path, "ghostscript", preset, self.page_cache,
+            gs_command=self.gs_command, cancel_event=cancel_event, limits=self.limits,
+            engine_version=self.engine_version))
+        try:
+            return await asyncio.shield(task)
+        except GhostscriptTimeoutError:
+            raise HttpError(504, f"압축이 {self.timeout:g}초 안에 끝나지 않았습니다.") from None
+        except GhostscriptError as e:
+            first_line = str(e).splitlines()[0]
+            raise HttpError(500, f"Ghostscript 오류: {first_line}\n{e.stderr[-STDERR_TAIL:]}") from None
+        except asyncio.CancelledError:
+            # 클라이언트가 끊겨 작업이 취소되어도 gs를 남기지 않음 (임시 폴더를 지우기 전에 종료 대기)
+            cancel_event.set()
+            await asyncio.wait([task])
+            raise
+
+    # --- 상태 / 지표 ---
+    def health(self):
+        health = {
+            "status": "ok",
+            "gs": self.gs_command,
+            "active": self.active,
+            "waiting": self.waiting,
+            "concurrency": self.concurrency,
+            "max_queue": self.max_queue,
+            "uptime_seconds": round(time.time() - self.started, 1)
+        }
+        if self.page_cache is not None:
+            stats = self.page_cache.stats
+            health["page_cache"] = {"hits": stats.hits, "misses": stats.misses, "stores": stats.stores,
+                                    "evictions": stats.evictions}
+        return health
+
+    def prometheus(self):
+        p = self.metrics.prefix
+        lines = [self.metrics.to_prometheus().rstrip("\n"),
+                 f"# HELP {p}_http_responses_total 상태 코드별 HTTP 응답 수",
+                 f"# TYPE {p}_http_responses_total counter"]
+        for code, count in sorted(self.responses.items()):
+            lines.append(f'{p}_http_responses_total{{code="{code}"}} {count}')
+        for name, value, help_text in (
+            ("active", self.active, "실행 중인 gs 수"),
+            ("waiting", self.waiting, "업로드 중이거나 실행 차례를 기다리는 요청 수")
+        ):
+            lines += [f"# HELP {p}_{name} {help_text}", f"# TYPE {p}_{name} gauge", f"{p}_{name} {value}"]
+        children = _children_usage()
+        if children is not None:
+            for name, kind, value, help_text in (
+                ("gs_children_cpu_seconds_total", "counter", children[0], "끝난 gs 프로세스의 CPU 시간 합계 (초)"),
+                ("gs_children_max_rss_bytes", "gauge", children[1], "끝난 gs 프로세스 중 가장 큰 최대 RSS (바이트)")
+            ):
+                lines += [f"# HELP {p}_{name} {help_text}", f"# TYPE {p}_{name} {kind}", f"{p}_{name} {value}"]
+        return "\n".join(lines) + "\n"
+
+    async def serve(self, host, port, ready=None):
+        self._slots = asyncio.Semaphore(self.concurrency)
+        server = await asyncio.start_server(self.handle, host, port)
+        if ready is not None:
+            ready(server)
+        async with server:
+            await server.serve_forever()
+
+
+def _children_usage():
+    """이 프로세스가 회수한 자식(gs)의 (CPU 시간 합계, 최대 RSS 바이트), 알 수 없으면 None"""
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    scale = 1 if sys.platform == "darwin" else 1024
+    return round(usage.ru_utime + usage.ru_stime, 3), usage.ru_maxrss * scale
+
+
+async def _read_head(reader):
+    """요청 줄과 헤더 읽기 → (메서드, 경로, 쿼리 딕셔너리, 소문자 헤더 딕셔너리)"""
+    request_line = (await reader.readline()).decode("latin-1").strip()
+    parts = request_line.split()
+    if len(parts) != 3 or not parts[2].startswith("HTTP/"):
+        raise HttpError(400, "요청 줄이 올바르지 않습니다.")
+    headers = {}
+    for _ in range(MAX_HEADER_LINES):
+        line = (await reader.readline()).decode("latin-1")
+        if line in ("\r\n", "\n", ""):
+            break
+        name, _, value = line.partition(":")
+        headers[name.strip().lower()] = value.strip()
+    else:
+        raise HttpError(400, "헤더가 너무 많습니다.")
+    url = urlsplit(parts[1])
+    return parts[0].upper(), url.path, parse_qs(url.query), headers
+
+
+async def _receive_body(reader, length, path):
+    """본문 length 바이트를 조각 단위로 파일에 저장"""
+    remaining = length
+    with open(path, "wb") as f:
+        while remaining:
+            chunk = await asyncio.wait_for(reader.read(min(CHUNK_SIZE, remaining)), READ_IDLE_TIMEOUT)
+            if not chunk:
+                raise asyncio.IncompleteReadError(b"", remaining)
+            f.write(chunk)
+            remaining -= len(chunk)
+
+
+async def _discard(reader, length):
+    try:
+        while length > 0:
+            chunk = await asyncio.wait_for(reader.read(min(CHUNK_SIZE, length)), DISCARD_TIMEOUT)
+            if not chunk:
+                return
+            length -= len(chunk)
+    except (asyncio.TimeoutError, ConnectionError):
+        pass
+
+
+def _head(status, content_type, length, headers=None):
+    lines = [f"HTTP/1.1 {status} {_REASONS.get(status, '')}",
+             f"Content-Type: {content_type}",
+             f"Content-Length: {length}",
+             "Connection: close"]
+    lines += [f"{name}: {value}" for name, value in (headers or {}).items()]
+    return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1")
+
+
+async def _send(writer, status, body, content_type, headers=None):
+    writer.write(_head(status, content_type, len(body), headers) + body)
+    await writer.drain()
+    return status
+
+
+async def _send_json(writer, status, payload, headers=None):
+    body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+    return await _send(writer, status, body, "application/json; charset=utf-8", headers)
+
+
+async def _send_file(writer, path, headers):
+    """파일을 조각 단위로 보냄 (drain으로 느린 클라이언트에 맞춰 속도 조절)"""
+    writer.write(_head(200, "application/pdf", os.path.getsize(path), headers))
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            writer.write(chunk)
+            await writer.drain()
+    return 200
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m pdf_compress_server", description="로컬 HTTP PDF 압축 서비스")
+    parser.add_argument("--host", default="127.0.0.1", help="수신 주소 (기본값: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"포트 (기본값: {DEFAULT_PORT})")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY, help="동시에 실행할 gs 수")
+    parser.add_argument("--max-queue", type=int, default=DEFAULT_MAX_QUEUE,
+                        help="실행을 기다릴 수 있는 요청 수, 넘으면 429")
+    parser.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT, help="요청 하나의 gs 실행 제한 시간 (초)")
+    parser.add_argument("--max-upload-mb", type=int, default=DEFAULT_MAX_UPLOAD_MB, help="최대 업로드 크기 (MB)")
+    parser.add_argument("--preset", default="ebook",
+                        help="preset 파라미터가 없을 때 기본값 (screen/ebook/printer/prepress 또는 사용자 프리셋)")
+    parser.add_argument("--tmp-dir", help="업로드/결과 임시 파일 폴더")
+    parser.add_argument("--incremental", action="store_true",
+                        help="페이지 캐시로 다시 올린 문서의 바뀐 페이지만 압축 (PyPDF2 필요)")
+    parser.add_argument("--page-cache-dir",
+                        help="페이지 캐시 폴더 (기본값: PDF_COMPRESS_PAGE_CACHE_DIR 또는 결과 캐시 폴더의 pages)")
+    parser.add_argument("--page-cache-max-mb", type=int, default=None,
+                        help="페이지 캐시 최대 크기 MB (기본값: PDF_COMPRESS_PAGE_CACHE_MB 또는 512)")
+    add_limit_arguments(parser, timeout=False)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if not is_gs_preset(args.preset):
+        print(f"❌ 알 수 없는 프리셋입니다: {args.preset} (사용 가능: {', '.join(gs_preset_names())})",
+              file=sys.stderr)
+        return 1
+    try:
+        page_cache = None
+        if args.incremental:
+            from pdf_compress_incremental import (
+                DEFAULT_MAX_MB, PageCache, default_page_cache_dir, get_default_page_cache
+            )
+            if args.page_cache_dir or args.page_cache_max_mb:
+                max_mb = args.page_cache_max_mb or DEFAULT_MAX_MB
+                page_cache = PageCache(args.page_cache_dir or default_page_cache_dir(),
+                                       max_bytes=max_mb * 1024 * 1024)
+            else:
+                page_cache = get_default_page_cache()
+        server = CompressionServer(concurrency=max(1, args.concurrency), max_queue=max(0, args.max_queue),
+                                   timeout=args.timeout, max_upload=args.max_upload_mb * 1024 * 1024,
+                                   tmp_dir=args.tmp_dir, default_preset=args.preset,
+                                   limits=limits_from_args(args), page_cache=page_cache)
+    except Exception as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 1
+
+    def ready(listener):
+        address = listener.sockets[0].getsockname()
+        print(f"압축 서비스 시작: http://{address[0]}:{address[1]} (gs {server.concurrency}개, "
+              f"대기 {server.max_queue}개, 제한 시간 {server.timeout:g}초)", file=sys.stderr, flush=True)
+
+    try:
+        asyncio.run(server.serve(args.host, args.port, ready))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,325 @@
+# -*- coding: utf-8 -*-
+"""
+대용량 PDF 페이지 구간 분할 병렬 압축
+
+gs -sDEVICE=pdfwrite 프로세스 하나는 코어 하나만 사용하므로,
+문서를 -dFirstPage/-dLastPage 구간으로 나눠 여러 gs 프로세스로 동시에
+압축한 뒤 하나의 PDF로 다시 합칩니다. 합칠 때 조각마다 따로 들어간
+폰트/이미지 등 같은 리소스는 하나로 합치고, 원본의 책갈피/이름 있는 대상/양식/페이지 레이블/문서 정보를
+가져와 링크 대상을 합친 문서의 페이지로 바꿉니다 (조각 경계를 넘는 링크 포함).
+"""
+import math
+import os
+import shutil
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+
+from pdf_compress_gs import (
+    run_ghostscript, require_ghostscript, count_pages_with_ghostscript
+)
+
+# 조각 하나에 들어갈 최소 페이지 수 (너무 잘게 나누면 gs 시작 비용이 커짐)
+MIN_PAGES_PER_CHUNK = 20
+
+# 코어당 조각 수: 페이지마다 무게가 달라도 코어가 놀지 않도록 여유 있게 나눔
+CHUNKS_PER_JOB = 2
+
+# 분할 결과 형식 버전 (합치는 방식이 바뀌면 캐시 키가 달라지도록)
+SPLIT_VERSION = 2
+
+# 합칠 때 원본에서 가져오는 카탈로그 항목
+CATALOG_KEYS = ("/Outlines", "/Names", "/Dests", "/AcroForm", "/PageLabels", "/PageMode", "/PageLayout",
+                "/ViewerPreferences", "/OpenAction", "/Metadata", "/Lang", "/MarkInfo")
+
+# 조각 출력 대신 원본의 것을 쓰는 주석 (대상 페이지/양식 필드를 가리킴)
+CARRIED_ANNOTATIONS = ("/Link", "/Widget")
+
+
+@dataclass
+class ChunkResult:
+    """페이지 구간 하나의 압축 결과"""
+    first_page: int
+    last_page: int
+    output_path: str
+    seconds: float = 0.0
+    compressed_size: int = 0
+
+
+@dataclass
+class SplitReport:
+    """분할 압축 전체 결과"""
+    page_count: int = 0
+    jobs: int = 1
+    chunks: list = field(default_factory=list)
+    count_seconds: float = 0.0
+    compress_seconds: float = 0.0
+    merge_seconds: float = 0.0
+    objects_merged: int = 0
+    dedup_bytes_saved: int = 0
+
+    @property
+    def wall_seconds(self):
+        return self.count_seconds + self.compress_seconds + self.merge_seconds
+
+    @property
+    def chunk_cpu_seconds(self):
+        """조각별 gs 실행 시간 합계 (병렬화하지 않았을 때의 예상 시간)"""
+        return sum(chunk.seconds for chunk in self.chunks)
+
+    @property
+    def speedup(self):
+        return self.chunk_cpu_seconds / self.compress_seconds if self.compress_seconds > 0 else 0.0
+
+
+def count_pages(input_path, gs_command=None):
+    """페이지 수 조회 (PyPDF2가 있으면 xref만 읽어서 빠르게, 없으면 gs 사용)"""
+    try:
+        import PyPDF2
+    except ImportError:
+        return count_pages_with_ghostscript(input_path, gs_command)
+    try:
+        return len(PyPDF2.PdfReader(input_path).pages)
+    except Exception:
+        return count_pages_with_ghostscript(input_path, gs_command)
+
+
+def plan_page_ranges(page_count, jobs, min_pages=MIN_PAGES_PER_CHUNK):
+    """페이지를 거의 같은 크기의 (first, last) 구간으로 나눔 (1부터 시작, 양 끝 포함)"""
+    if page_count <= 0:
+        return []
+    chunk_count = max(1, min(jobs * CHUNKS_PER_JOB, page_count // max(1, min_pages)))
+    size = math.ceil(page_count / chunk_count)
+    return [(first, min(first + size - 1, page_count))
+            for first in range(1, page_count + 1, size)]
+
+
+def _compress_chunk(input_path, chunk, quality_level, gs_command, subset_fonts, cancel_event=None):
+    start = time.perf_counter()
+    extra_args = [f"-dFirstPage={chunk.first_page}", f"-dLastPage={chunk.last_page}"]
+    if not subset_fonts:
+        # 조각마다 서브셋이 달라지면 합칠 때 같은 폰트로 인식할 수 없음
+        extra_args.append("-dSubsetFonts=false")
+    run_ghostscript(input_path, chunk.output_path, quality_level,
+                    gs_command=gs_command, extra_args=extra_args, cancel_event=cancel_event)
+    chunk.seconds = time.perf_counter() - start
+    chunk.compressed_size = os.path.getsize(chunk.output_path)
+    return chunk
+
+
+def merge_chunks(chunk_paths, output_path, original=None):
+    """
+    압축된 조각들을 순서대로 합치고 같은 객체를 하나로 합칩니다.
+    - original: 원본 PDF 경로 (문서 단위 구조를 가져옴, merge_pages 참고)
+    - 반환값: DedupStats
+    """
+    return merge_pages([(path, None) for path in chunk_paths], output_path, original)
+
+
+def merge_pages(page_sources, output_path, original=None):
+    """
+    (파일 경로, 0부터 시작하는 페이지 번호) 순서대로 페이지를 모아 한 PDF로 쓰고 같은 객체를 하나로 합칩니다.
+    - 페이지 번호가 None이면 그 파일의 모든 페이지
+    - original: 모은 페이지가 원본의 페이지 순서와 같을 때 원본 경로를 주면 책갈피/이름/양식/페이지 레이블/
+      문서 정보와 링크/양식 주석을 원본에서 가져오고, 원본 페이지를 가리키는 참조를 합친 페이지로 바꿈
+    - 반환값: DedupStats
+    """
+    import PyPDF2
+    from pdf_compress_dedup import deduplicate_objects
+
+    writer = PyPDF2.PdfWriter()
+    readers = {}
+    for path, index in page_sources:
+        if path not in readers:
+            # 경로로 열면 파일을 메모리로 읽고 바로 닫으므로 조각이 많아도 파일 핸들이 쌓이지 않음
+            readers[path] = PyPDF2.PdfReader(path)
+        pages = readers[path].pages
+        for page in (pages if index is None else [pages[index]]):
+            writer.add_page(page)
+    if original is not None:
+        carry_document_structure(PyPDF2.PdfReader(original), writer)
+    stats = deduplicate_objects(writer)
+    with open(output_path, "wb") as output_file:
+        writer.write(output_file)
+    return stats
+
+
+class _StructureCopier:
+    """원본 객체를 writer로 복사하면서 원본 페이지 참조를 합친 문서의 페이지로 바꿈"""
+
+    def __init__(self, writer, page_map, generic):
+        self.writer = writer
+        self.page_map = page_map  # 원본 페이지 (번호, 세대) → writer 페이지 참조
+        self.generic = generic
+        self.copied = {}
+        self.queue = []
+
+    def copy(self, obj):
+        generic = self.generic
+        if isinstance(obj, generic.IndirectObject):
+            key = (obj.idnum, obj.generation)
+            if key in self.page_map:
+                return self.page_map[key]
+            if key not in self.copied:
+                target = obj.get_object()
+                if isinstance(target, generic.DictionaryObject) and target.get("/Type") in ("/Pages", "/Page"):
+                    # 페이지 트리 노드나 합친 문서에 없는 페이지는 가리킬 수 없음
+                    return generic.NullObject()
+                self.copied[key] = self.writer._add_object(generic.NullObject())
+                self.queue.append((self.copied[key], target))
+            return self.copied[key]
+        if isinstance(obj, generic.StreamObject):
+            new = generic.EncodedStreamObject()
+            for name, value in obj.items():
+                new[name] = self.copy(value)
+            new._data = obj._data
+            return new
+        if isinstance(obj, generic.DictionaryObject):
+            return generic.DictionaryObject({name: self.copy(value) for name, value in obj.items()})
+        if isinstance(obj, generic.ArrayObject):
+            return generic.ArrayObject([self.copy(value) for value in obj])
+        return obj
+
+    def drain(self):
+        """참조한 객체를 모두 복사 (책갈피 /Next 사슬이 길어도 재귀하지 않음)"""
+        while self.queue:
+            ref, target = self.queue.pop()
+            self.writer._objects[ref.idnum - 1] = self.copy(target)
+
+
+def _annotations(page, generic):
+    annots = page.get("/Annots")
+    annots = annots.get_object() if annots is not None else None
+    return list(annots) if isinstance(annots, generic.ArrayObject) else []
+
+
+def carry_document_structure(original, writer):
+    """
+    원본(PdfReader)의 문서 단위 구조를 페이지를 모은 writer로 가져옴 (페이지 수가 다르거나 암호화되어 있으면 무시)
+    - CATALOG_KEYS 항목과 문서 정보(/Info)를 복사하고, 원본 페이지를 가리키던 대상은 같은 순번의 페이지로
+    - 페이지의 링크/양식 주석은 원본의 것으로 바꿈 (조각 경계를 넘는 링크는 엔진 출력에서 빠지므로)
+    """
+    from PyPDF2 import generic
+
+    if original.is_encrypted:
+        return
+    kids = writer._pages.get_object()["/Kids"]
+    if len(original.pages) != len(kids):
+        return
+    page_map = {(page.indirect_reference.idnum, page.indirect_reference.generation): kid
+                for page, kid in zip(original.pages, kids)}
+    copier = _StructureCopier(writer, page_map, generic)
+
+    root = original.trailer["/Root"]
+    for name in CATALOG_KEYS:
+        if name in root:
+            writer._root_object[generic.NameObject(name)] = copier.copy(root.raw_get(name))
+    info = original.trailer.get("/Info")
+    if info is not None:
+        target = writer._info.get_object()
+        for name, value in info.get_object().items():
+            target[generic.NameObject(name)] = copier.copy(value)
+
+    for page, kid in zip(original.pages, kids):
+        merged = kid.get_object()
+        annots = [annot for annot in _annotations(merged, generic)
+                  if annot.get_object().get("/Subtype") not in CARRIED_ANNOTATIONS]
+        annots += [copier.copy(annot) for annot in _annotations(page, generic)
+                   if annot.get_object().get("/Subtype") in CARRIED_ANNOTATIONS]
+        if annots:
+            merged[generic.NameObject("/Annots")] = generic.ArrayObject(annots)
+        elif "/Annots" in merged:
+            del merged["/Annots"]
+    copier.drain()
+
+
+class _AnyEvent:
+    """여러 이벤트 중 하나라도 설정되면 설정된 것으로 봄 (run_ghostscript는 is_set()만 사용)"""
+
+    def __init__(self, *events):
+        self.events = [event for event in events if event is not None]
+
+    def is_set(self):
+        return any(event.is_set() for event in self.events)
+
+
+def compress_pdf_split(input_path, output_path, quality_level, jobs=None,
+                       min_pages=MIN_PAGES_PER_CHUNK, subset_fonts=True,
+                       progress_callback=None, cancel_event=None):
+    """
+    PDF를 페이지 구간으로 나눠 병렬 압축한 뒤 합칩니다.
+    - jobs: 동시 gs 프로세스 수 (기본값: CPU 개수)
+    - subset_fonts: 조각별 폰트 서브셋 사용 (기본값), False면 폰트 전체를 넣어 조각 사이에서 하나로 합침
+      (같은 폰트를 많이 쓰는 라틴 문서는 작아질 수 있지만 CJK 폰트는 전체가 수 MB라 오히려 커짐)
+    - progress_callback(done, total, chunk): 조각 하나가 끝날 때마다 호출
+    - cancel_event: 설정되면 실행 중인 gs를 모두 종료하고 CompressionCancelled 발생
+    - 반환값: SplitReport
+    """
+    gs_command = require_ghostscript()
+    jobs = max(1, jobs or os.cpu_count() or 1)
+    report = SplitReport(jobs=jobs)
+
+    start = time.perf_counter()
+    report.page_count = count_pages(input_path, gs_command)
+    report.count_seconds = time.perf_counter() - start
+
+    ranges = plan_page_ranges(report.page_count, jobs, min_pages)
+    if len(ranges) <= 1:
+        # 나눌 만큼 크지 않으면 한 번에 압축
+        start = time.perf_counter()
+        run_ghostscript(input_path, output_path, quality_level, gs_command=gs_command,
+                        cancel_event=cancel_event)
+        report.compress_seconds = time.perf_counter() - start
+        report.chunks.append(ChunkResult(1, report.page_count, output_path, report.compress_seconds,
+                                         os.path.getsize(output_path)))
+        return report
+
+    # 조각은 출력 파일과 같은 디스크에 저장 (대용량 파일을 /tmp로 옮기지 않도록)
+    tmp_dir = tempfile.mkdtemp(prefix=".pdf_split_", dir=os.path.dirname(os.path.abspath(output_path)))
+    try:
+        chunks = [ChunkResult(first, last, os.path.join(tmp_dir, f"chunk_{index:04d}.pdf"))
+                  for index, (first, last) in enumerate(ranges)]
+
+        start = time.perf_counter()
+        # 조각 하나가 실패하면 나머지 gs를 바로 종료하고 대기 중인 조각은 시작하지 않음
+        failed = threading.Event()
+        chunk_cancel = _AnyEvent(cancel_event, failed)
+        executor = ThreadPoolExecutor(max_workers=jobs)
+        try:
+            futures = [executor.submit(_compress_chunk, input_path, chunk, quality_level,
+                                       gs_command, subset_fonts, chunk_cancel) for chunk in chunks]
+            for done, future in enumerate(as_completed(futures), 1):
+                chunk = future.result()
+                if progress_callback:
+                    progress_callback(done, len(chunks), chunk)
+        except BaseException:
+            failed.set()
+            raise
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+        report.compress_seconds = time.perf_counter() - start
+        report.chunks = chunks
+
+        start = time.perf_counter()
+        stats = merge_chunks([chunk.output_path for chunk in chunks], output_path, original=input_path)
+        report.merge_seconds = time.perf_counter() - start
+        report.objects_merged = stats.objects_merged
+        report.dedup_bytes_saved = stats.bytes_saved
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    return report
+
+
+def format_split_report(report):
+    """조각별 시간과 전체 요약을 여러 줄 문자열로 반환"""
+    lines = [f"  페이지 {c.first_page}-{c.last_page}: {c.seconds:.2f}s, {c.compressed_size / 1024:.1f} KB"
+             for c in report.chunks]
+    lines.append(
+        f"총 {report.page_count}페이지, 조각 {len(report.chunks)}개, 동시 작업 {report.jobs}개 | "
+        f"페이지 수 확인 {report.count_seconds:.2f}s + 압축 {report.compress_seconds:.2f}s + "
+        f"합치기 {report.merge_seconds:.2f}s (병렬 효과 {report.speedup:.1f}배) | "
+        f"중복 객체 {report.objects_merged}개 제거 ({report.dedup_bytes_saved / 1024:.1f} KB)"
+    )
+    return "\n".join(lines)
@@ -0,0 +1,385 @@
+# -*- coding: utf-8 -*-
+"""
+PyPDF2 엔진의 메모리 제한 스트리밍 모드
+
+기본 모드는 모든 페이지를 PdfWriter 하나에 모아 두었다가 마지막에 쓰고,
+원본/재인코딩 이미지를 모두 메모리에 들고 있어 큰 PDF에서 메모리가 부족해집니다.
+스트리밍 모드는
+- 입력을 mmap으로 읽고, 페이지마다 PyPDF2 객체 캐시를 비움
+- 1단계에서 원본 이미지 바이트를 임시 파일로 내보내(spill) 메모리에 들고 있지 않음
+- 처리한 객체는 바로 출력 파일에 쓰고 위치(xref)만 기억
+  (스트림이 아닌 객체는 100개씩 객체 스트림으로 묶음, pdf_compress_optimize.ObjectStreamWriter)
+- 동시에 처리 중인 이미지의 예상 메모리 합계가 memory_limit를 넘지 않게 제한
+"""
+import mmap
+import os
+import sys
+import tempfile
+import time
+import zlib
+
+from pdf_compress_dedup import object_digest
+from pdf_compress_errors import CompressionCancelled
+from pdf_compress_image import DEFAULT_CODEC_BUDGET
+from pdf_compress_optimize import ObjectStreamWriter, OptimizeReport
+from pdf_compress_placement import collect_placements
+
+
+def peak_rss():
+    """이 프로세스의 최대 RSS (바이트, 알 수 없으면 0)"""
+    try:
+        import resource
+    except ImportError:  # Windows
+        return 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux는 KB, macOS는 바이트 단위
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def anon_rss():
+    """
+    현재 익명 메모리 RSS (바이트, Linux 외에는 0)
+    mmap으로 읽은 입력 파일 페이지는 언제든 회수되는 파일 캐시이므로 빼고 봄
+    """
+    try:
+        with open("/proc/self/status", "rb") as f:
+            for line in f:
+                if line.startswith(b"RssAnon:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return 0
+
+
+def _estimated_memory(image_size, width, height):
+    """이미지 하나를 재인코딩하는 동안 필요한 메모리 추정 (원본 + 디코딩한 RGBA 픽셀)"""
+    return image_size + max(0, width) * max(0, height) * 4
+
+
+class _ObjectCopier:
+    """입력 객체를 출력 번호로 바꿔 복사하고, 아직 쓰지 않은 참조 객체는 대기열에 넣음"""
+
+    def __init__(self, reader, writer, generic, fixed):
+        self.reader = reader
+        self.writer = writer
+        self.generic = generic
+        self.numbers = dict(fixed)  # 입력 (번호, 세대) → 출력 번호
+        self.queue = []
+
+    def number_for(self, key):
+        if key not in self.numbers:
+            self.numbers[key] = self.writer.reserve()
+            self.queue.append(key)
+        return self.numbers[key]
+
+    def copy(self, obj):
+        generic = self.generic
+        if isinstance(obj, generic.IndirectObject):
+            return generic.IndirectObject(self.number_for((obj.idnum, obj.generation)), 0, None)
+        if isinstance(obj, generic.StreamObject):
+            # _data는 필터 유무와 관계없이 파일에 들어 있던 그대로의 바이트
+            new = generic.EncodedStreamObject()
+            for key, value in obj.items():
+                new[key] = self.copy(value)
+            new._data = obj._data
+            return new
+        if isinstance(obj, generic.DictionaryObject):
+            return generic.DictionaryObject({key: self.copy(value) for key, value in obj.items()})
+        if isinstance(obj, generic.ArrayObject):
+            return generic.ArrayObject([self.copy(value) for value in obj])
+        return obj
+
+    def drain(self):
+        """대기열의 객체를 모두 출력 (쓰는 도중 새로 참조된 객체 포함)"""
+        while self.queue:
+            idnum, generation = self.queue.pop(0)
+            obj = self.reader.get_object(self.generic.IndirectObject(idnum, generation, self.reader))
+            if obj is None:
+                obj = self.generic.NullObject()
+            self.writer.write(self.numbers[(idnum, generation)], self.copy(obj))
+
+
+def _page_tree_keys(reader, generic):
+    """입력의 /Pages 노드와 /Catalog 객체 번호 (출력에서는 새로 만든 것으로 대체)"""
+    root_ref = reader.trailer.raw_get("/Root")
+    keys = set()
+    if isinstance(root_ref, generic.IndirectObject):
+        keys.add((root_ref.idnum, root_ref.generation))
+    stack = [reader.trailer["/Root"].raw_get("/Pages")]
+    while stack:
+        ref = stack.pop()
+        if not isinstance(ref, generic.IndirectObject) or (ref.idnum, ref.generation) in keys:
+            continue
+        node = ref.get_object()
+        if node.get("/Type") == "/Pages":
+            keys.add((ref.idnum, ref.generation))
+            stack.extend(node.get("/Kids", []))
+    return keys
+
+
+def _release(reader, data, report):
+    """
+    PyPDF2 객체 캐시를 비우고, mmap으로 읽은 입력 페이지를 RSS에서 내려놓음
+    (파일 페이지 캐시에는 남아 있으므로 다시 읽어도 디스크를 읽지 않음)
+    비우기 직전이 메모리를 가장 많이 쓰는 시점이므로 여기서 익명 메모리 최대값을 기록
+    """
+    report.peak_anon_rss = max(report.peak_anon_rss, anon_rss())
+    reader.resolved_objects.clear()
+    if hasattr(mmap, "MADV_DONTNEED"):
+        data.madvise(mmap.MADV_DONTNEED)
+
+
+def _page_content(page, generic):
+    """페이지 콘텐츠 스트림(여러 개면 이어 붙임)을 Flate로 압축한 새 스트림"""
+    contents = page.raw_get("/Contents") if "/Contents" in page else None
+    if contents is None:
+        return None
+    contents = contents.get_object()
+    parts = contents if isinstance(contents, generic.ArrayObject) else [contents]
+    data = b"\n".join(part.get_object().get_data() for part in parts)
+    stream = generic.EncodedStreamObject()
+    stream[generic.NameObject("/Filter")] = generic.NameObject("/FlateDecode")
+    stream._data = zlib.compress(data)
+    return stream
+
+
+def compress_pdf_streaming(input_path, output_path, quality, memory_limit, progress_callback=None,
+                           cancel_event=None, jobs=1, target_dpi=None,
+                           codec_budget=DEFAULT_CODEC_BUDGET):
+    """
+    메모리 사용량을 제한하며 PyPDF2 엔진으로 압축합니다.
+    - memory_limit: 동시에 재인코딩하는 이미지의 예상 메모리 합계 상한 (바이트)
+      큰 이미지 하나가 상한을 넘더라도 그 이미지는 단독으로 처리
+    - progress_callback(done, total): 이미지 하나 또는 페이지 하나를 쓸 때마다 호출
+    - 그 외 인자와 반환값은 pdf_compress_pypdf.compress_pdf_file과 같음
+      (report.peak_rss: mmap한 입력 파일 페이지 포함, report.peak_anon_rss: 파일 캐시를 뺀 최대값)
+    """
+    from pdf_compress_image import apply_result, assign_budgets, image_info, recompress_image
+    from pdf_compress_metrics import stage
+    from pdf_compress_pypdf import (ImageReport, _attach_spool, _encode_spooled, _import_pypdf,
+                                    merge_placements, resolve_quality, resolve_target_dpi, target_size)
+
+    PyPDF2 = _import_pypdf()
+    from PyPDF2 import generic
+    if target_dpi is None:
+        target_dpi = resolve_target_dpi(quality)
+    quality = resolve_quality(quality)
+    report = ImageReport()
+
+    def check_cancel():
+        if cancel_event is not None and cancel_event.is_set():
+            raise CompressionCancelled()
+
+    with open(input_path, "rb") as input_file, \
+            mmap.mmap(input_file.fileno(), 0, access=mmap.ACCESS_READ) as data, \
+            tempfile.TemporaryDirectory(prefix="pdf_stream_",
+                                        dir=os.path.dirname(os.path.abspath(output_path))) as tmp_dir:
+        with stage("pypdf.read"):
+            reader = PyPDF2.PdfReader(data)
+            if reader.is_encrypted:
+                raise ValueError("암호화된 PDF는 스트리밍 모드로 압축할 수 없습니다.")
+            page_count = len(reader.pages)
+        _release(reader, data, report)
+
+        # --- 1단계: 이미지 찾기 / 중복 판별 / 배치 크기, 원본 바이트는 임시 파일로 ---
+        processed = {}   # 원본 객체 번호 → 대표 참조
+        by_digest = {}
+        placements = {}
+        images = []      # (대표 객체 번호, 이미지 딕셔너리(데이터 제외), spool 위치, 길이)
+        spool_path = os.path.join(tmp_dir, "images.bin")
+        with open(spool_path, "wb") as spool:
+            for page in reader.pages:
+                check_cancel()
+                resources = page["/Resources"].get_object() if "/Resources" in page else None
+                if resources is None or "/XObject" not in resources:
+                    continue
+                if target_dpi and "/Contents" in page:
+                    operations = generic.ContentStream(page.raw_get("/Contents"), reader).operations
+                    collect_placements(operations, resources, reader, placements)
+                    del operations
+                xobjects = resources["/XObject"].get_object()
+                for name in xobjects:
+                    ref = xobjects.raw_get(name)
+                    if not isinstance(ref, generic.IndirectObject):
+                        continue  # 페이지에 직접 들어 있는 이미지는 그대로 복사
+                    image = ref.get_object()
+                    if image.get("/Subtype") != "/Image":
+                        continue
+                    report.references += 1
+                    key = (ref.idnum, ref.generation)
+                    if key in processed:
+                        report.shared_skipped += 1
+                        continue
+                    digest = object_digest(image, generic)
+                    if digest in by_digest:
+                        processed[key] = by_digest[digest]
+                        report.merged += 1
+                        continue
+                    processed[key] = by_digest[digest] = ref
+                    raw = image._data or b""
+                    header = generic.DictionaryObject({k: v for k, v in image.items() if k != "/Length"})
+                    images.append((key, header, image_info(image), spool.tell(), len(raw)))
+                    spool.write(raw)
+                # 다음 페이지로 넘어가기 전에 PyPDF2가 캐시한 객체(이미지 데이터 포함)를 버림
+                _release(reader, data, report)
+
+        drawn = merge_placements(placements, processed)
+        tasks = [(key, header, info, offset, length, target_size(header, drawn.get(key), target_dpi))
+                 for key, header, info, offset, length in images]
+        assign_budgets([info for _, _, info, _, _ in images], codec_budget)
+        total = len(tasks) + page_count
+        done = 0
+
+        # --- 2단계: 출력 작성 ---
+        with open(output_path, "wb") as output_file, open(spool_path, "rb") as spool:
+            writer = ObjectStreamWriter(output_file, reader.pdf_header or "%PDF-1.4")
+            catalog_number = writer.reserve()
+            pages_number = writer.reserve()
+            fixed = {key: pages_number for key in _page_tree_keys(reader, generic)}
+            root_ref = reader.trailer.raw_get("/Root")
+            fixed[(root_ref.idnum, root_ref.generation)] = catalog_number
+            page_numbers = []
+            for page in reader.pages:
+                ref = page.indirect_reference
+                page_numbers.append(writer.reserve())
+                fixed[(ref.idnum, ref.generation)] = page_numbers[-1]
+            for key, *_ in tasks:
+                fixed[key] = writer.reserve()
+            # 합쳐진 이미지 참조는 대표 객체 번호로
+            for key, ref in processed.items():
+                fixed[key] = fixed[(ref.idnum, ref.generation)]
+            copier = _ObjectCopier(reader, writer, generic, fixed)
+            written_sizes = {}
+
+            def write_image(task, encoded):
+                nonlocal done
+                key, header, info, offset, length, new_size = task
+                image = generic.EncodedStreamObject()
+                for name, value in header.items():
+                    image[name] = copier.copy(value)
+                if encoded is None:
+                    spool.seek(offset)
+                    image._data = spool.read(length)
+                    report.kept += 1
+                else:
+                    report.codecs[encoded[2]] = report.codecs.get(encoded[2], 0) + 1
+                    if apply_result(image, encoded):
+                        report.downsampled += 1
+                writer.write(fixed[key], image)
+                written_sizes[key] = len(image._data)
+                copier.drain()
+                _release(reader, data, report)
+                done += 1
+                if progress_callback:
+                    progress_callback(done, total)
+
+            start = time.perf_counter()
+            if jobs is None:
+                jobs = os.cpu_count() or 1
+            if jobs <= 1 or len(tasks) < 2:
+                for task in tasks:
+                    check_cancel()
+                    key, header, info, offset, length, new_size = task
+                    spool.seek(offset)
+                    write_image(task, recompress_image(spool.read(length), info, quality, new_size))
+            else:
+                _encode_bounded(tasks, quality, jobs, memory_limit, spool_path, write_image, check_cancel,
+                                _attach_spool, _encode_spooled)
+            report.encoded = len(tasks)
+            report.encode_seconds = time.perf_counter() - start
+
+            for page, number in zip(reader.pages, page_numbers):
+                check_cancel()
+                new_page = generic.DictionaryObject()
+                for name, value in page.items():
+                    if name in ("/Parent", "/Contents"):
+                        continue
+                    new_page[name] = copier.copy(value)
+                new_page[generic.NameObject("/Parent")] = generic.IndirectObject(pages_number, 0, None)
+                with stage("pypdf.content"):
+                    content = _page_content(page, generic)
+                if content is not None:
+                    content_number = writer.reserve()
+                    writer.write(content_number, content)
+                    new_page[generic.NameObject("/Contents")] = generic.IndirectObject(content_number, 0, None)
+                writer.write(number, new_page)
+                copier.drain()
+                _release(reader, data, report)
+                done += 1
+                if progress_callback:
+                    progress_callback(done, total)
+
+            # 나머지 객체는 나오는 대로 이미 썼으므로 페이지 트리와 xref만 남음
+            with stage("pypdf.write"):
+                writer.write(pages_number, generic.DictionaryObject({
+                    generic.NameObject("/Type"): generic.NameObject("/Pages"),
+                    generic.NameObject("/Kids"): generic.ArrayObject(
+                        generic.IndirectObject(number, 0, None) for number in page_numbers),
+                    generic.NameObject("/Count"): generic.NumberObject(len(page_numbers))
+                }))
+                # 책갈피/이름/양식/메타데이터 등 카탈로그의 나머지 항목과 문서 정보는 그대로 복사
+                catalog = generic.DictionaryObject()
+                for name, value in reader.trailer["/Root"].items():
+                    if name != "/Pages":
+                        catalog[name] = copier.copy(value)
+                catalog[generic.NameObject("/Type")] = generic.NameObject("/Catalog")
+                catalog[generic.NameObject("/Pages")] = generic.IndirectObject(pages_number, 0, None)
+                writer.write(catalog_number, catalog)
+                info = reader.trailer.raw_get("/Info") if "/Info" in reader.trailer else None
+                info_number = None
+                if isinstance(info, generic.IndirectObject):
+                    info_number = copier.copy(info).idnum
+                elif info is not None:
+                    info_number = writer.reserve()
+                    writer.write(info_number, copier.copy(info))
+                copier.drain()
+                writer.finish(catalog_number, info_number, reader.trailer.get("/ID"))
+            # 중복 이미지는 위에서 합쳤고, 페이지/카탈로그/문서 정보에서 참조하는 객체만 복사하므로 남는 객체가 없음
+            report.structure = OptimizeReport(packed=writer.packed, object_stream_bytes=writer.bytes_saved)
+
+        for key, ref in processed.items():
+            if (ref.idnum, ref.generation) != key:
+                report.bytes_saved += written_sizes[(ref.idnum, ref.generation)]
+    report.peak_rss = peak_rss()
+    return report
+
+
+def _encode_bounded(tasks, quality, jobs, memory_limit, spool_path, write_image, check_cancel,
+                    attach_spool, encode_spooled):
+    """
+    프로세스 풀에서 재인코딩하되, 처리 중인 이미지의 예상 메모리 합계를 memory_limit 이하로 유지
+    - 결과는 제출한 순서대로 써서 작업 수와 무관하게 같은 출력
+    """
+    from collections import deque
+    from concurrent.futures import ProcessPoolExecutor
+
+    from pdf_compress_metrics import merge_into_current
+
+    executor = ProcessPoolExecutor(max_workers=min(jobs, len(tasks)),
+                                   initializer=attach_spool, initargs=(spool_path,))
+    try:
+        in_flight = deque()
+        used = 0
+        next_task = 0
+        while next_task < len(tasks) or in_flight:
+            check_cancel()
+            while next_task < len(tasks):
+                task = tasks[next_task]
+                key, header, info, offset, length, new_size = task
+                try:
+                    cost = _estimated_memory(length, int(header.get("/Width", 0)), int(header.get("/Height", 0)))
+                except (TypeError, ValueError):
+                    cost = length
+                if in_flight and used + cost > memory_limit:
+                    break
+                in_flight.append((task, cost, executor.submit(encode_spooled, offset, length, info, quality,
+                                                              new_size)))
+                used += cost
+                next_task += 1
+            task, cost, future = in_flight.popleft()
+            encoded, stages = future.result()
+            merge_into_current(stages)
+            used -= cost
+            write_image(task, encoded)
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
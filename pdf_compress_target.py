@@ -0,0 +1,300 @@
+# -*- coding: utf-8 -*-
+"""
+목표 크기 모드: 바이트 예산 안에서 가장 높은 품질 찾기
+
+이메일 첨부 제한(예: 10MB)처럼 크기 상한이 정해져 있을 때
+프리셋을 추측하는 대신 품질 단계를 자동으로 탐색합니다.
+- ghostscript: 이미지 해상도 + JPEG QFactor 단계
+- pypdf: JPEG quality 단계
+1. 고르게 고른 몇 페이지만 압축해 단계별 전체 크기를 추정 (이진 탐색)
+2. 예산에 맞을 것으로 보이는 가장 높은 품질로 전체 압축
+3. 실제 크기/추정 크기 비율로 추정치를 보정하며 최대 N번까지만 전체 압축 반복
+"""
+import os
+import shutil
+import tempfile
+import time
+from dataclasses import dataclass, field
+
+from pdf_compress_errors import CompressionCancelled
+
+# 품질 높은 순서: (이미지 해상도 dpi, JPEG QFactor — 클수록 손실 큼)
+GS_LEVELS = [
+    (300, 0.15),
+    (200, 0.25),
+    (150, 0.40),
+    (120, 0.55),
+    (100, 0.76),
+    (72, 0.90),
+    (60, 1.20),
+    (48, 1.60)
+]
+
+# 품질 높은 순서: JPEG quality
+PYPDF_LEVELS = [90, 85, 75, 65, 55, 45, 35, 25, 15]
+
+# 해상도/QFactor 외 설정(폰트 포함 등)은 이 프리셋을 따름
+GS_BASE_PRESET = "printer"
+
+DEFAULT_SAMPLE_PAGES = 8
+DEFAULT_MAX_FULL_PASSES = 3
+
+# 샘플 추정은 오차가 있으므로 예산보다 조금 작게 잡음
+ESTIMATE_SAFETY = 0.95
+
+
+@dataclass
+class TargetAttempt:
+    """품질 단계 하나를 시도한 결과"""
+    level: int
+    label: str
+    size: int
+    seconds: float
+    full: bool
+
+
+@dataclass
+class TargetReport:
+    """목표 크기 탐색 결과"""
+    target_bytes: int
+    engine: str
+    page_count: int = 0
+    sample_pages: int = 0
+    attempts: list = field(default_factory=list)
+    chosen_level: int = -1
+    chosen_label: str = ""
+    output_size: int = 0
+    met: bool = False
+
+    @property
+    def full_passes(self):
+        return sum(1 for attempt in self.attempts if attempt.full)
+
+    @property
+    def sample_passes(self):
+        return sum(1 for attempt in self.attempts if not attempt.full)
+
+
+def parse_size(text):
+    """'10MB', '500k', '1.5G', '123456' 같은 크기 문자열을 바이트로 변환"""
+    value = str(text).strip().upper().replace(" ", "")
+    if value.endswith("B"):
+        value = value[:-1]
+    units = {"K": 1024, "M": 1024 ** 2, "G": 1024 ** 3}
+    multiplier = 1
+    if value and value[-1] in units:
+        multiplier = units[value[-1]]
+        value = value[:-1]
+    try:
+        size = int(float(value) * multiplier)
+    except ValueError:
+        raise ValueError(f"크기 형식이 올바르지 않습니다: {text}") from None
+    if size <= 0:
+        raise ValueError(f"목표 크기는 0보다 커야 합니다: {text}")
+    return size
+
+
+def gs_level_options(resolution, qfactor):
+    """해상도/QFactor 단계를 gs 옵션과 setdistillerparams 코드로 변환"""
+    extra_args = [
+        "-dDownsampleColorImages=true",
+        "-dDownsampleGrayImages=true",
+        "-dDownsampleMonoImages=true",
+        "-dColorImageDownsampleType=/Bicubic",
+        "-dGrayImageDownsampleType=/Bicubic",
+        f"-dColorImageResolution={resolution}",
+        f"-dGrayImageResolution={resolution}",
+        f"-dMonoImageResolution={min(resolution * 2, 600)}",
+        "-dColorImageDownsampleThreshold=1.0",
+        "-dGrayImageDownsampleThreshold=1.0",
+        "-dAutoFilterColorImages=false",
+        "-dAutoFilterGrayImages=false",
+        "-dColorImageFilter=/DCTEncode",
+        "-dGrayImageFilter=/DCTEncode",
+        "-dPassThroughJPEGImages=false"
+    ]
+    image_dict = f"<< /QFactor {qfactor} /Blend 1 /HSamples [2 1 1 2] /VSamples [2 1 1 2] >>"
+    postscript = f"<< /ColorImageDict {image_dict} /GrayImageDict {image_dict} >> setdistillerparams"
+    return extra_args, postscript
+
+
+def _sample_page_numbers(page_count, sample_pages):
+    """문서 전체에 고르게 퍼진 페이지 번호 (1부터)"""
+    if page_count <= sample_pages:
+        return list(range(1, page_count + 1))
+    step = page_count / sample_pages
+    return sorted({int(step * i + step / 2) + 1 for i in range(sample_pages)})
+
+
+class _Engine:
+    """엔진별 '단계 하나로 압축' 방법"""
+
+    def __init__(self, engine, input_path, tmp_dir, cancel_event):
+        self.engine = engine
+        self.input_path = input_path
+        self.tmp_dir = tmp_dir
+        self.cancel_event = cancel_event
+        self.levels = GS_LEVELS if engine == "ghostscript" else PYPDF_LEVELS
+        self._sample_input = None
+
+    def label(self, level):
+        if self.engine == "ghostscript":
+            resolution, qfactor = self.levels[level]
+            return f"{resolution}dpi/Q{qfactor}"
+        return f"JPEG {self.levels[level]}"
+
+    def prepare_sample(self, pages):
+        """pypdf는 샘플 페이지만 담은 PDF를 따로 만듦 (gs는 -sPageList 사용)"""
+        if self.engine == "ghostscript":
+            self._sample_input = pages
+            return
+        import PyPDF2
+        path = os.path.join(self.tmp_dir, "sample_input.pdf")
+        with open(self.input_path, "rb") as f:
+            reader = PyPDF2.PdfReader(f)
+            writer = PyPDF2.PdfWriter()
+            for number in pages:
+                writer.add_page(reader.pages[number - 1])
+            with open(path, "wb") as out:
+                writer.write(out)
+        self._sample_input = path
+
+    def run(self, level, output_path, sample=False):
+        if self.cancel_event is not None and self.cancel_event.is_set():
+            raise CompressionCancelled()
+        if self.engine == "ghostscript":
+            from pdf_compress_gs import run_ghostscript
+            extra_args, postscript = gs_level_options(*self.levels[level])
+            if sample:
+                extra_args.append("-sPageList=" + ",".join(str(n) for n in self._sample_input))
+            run_ghostscript(self.input_path, output_path, GS_BASE_PRESET, extra_args=extra_args,
+                            postscript=postscript, cancel_event=self.cancel_event)
+        else:
+            from pdf_compress_pypdf import compress_pdf_file
+            source = self._sample_input if sample else self.input_path
+            compress_pdf_file(source, output_path, self.levels[level], cancel_event=self.cancel_event)
+
+
+def compress_to_target(input_path, output_path, target_bytes, engine="ghostscript",
+                       max_full_passes=DEFAULT_MAX_FULL_PASSES, sample_pages=DEFAULT_SAMPLE_PAGES,
+                       progress_callback=None, cancel_event=None):
+    """
+    target_bytes 이하가 되는 가장 높은 품질로 압축합니다.
+    - engine: 'ghostscript' 또는 'pypdf'
+    - max_full_passes: 문서 전체 압축 최대 횟수
+    - progress_callback(done, total): 시도 한 번이 끝날 때마다 호출 (total은 예상 최대 횟수)
+    - 예산을 맞추지 못하면 가장 작은 결과를 저장하고 report.met = False
+    - 반환값: TargetReport
+    """
+    from pdf_compress_split import count_pages
+
+    if engine == "gsapi":
+        engine = "ghostscript"  # 단계별 옵션이 달라 인스턴스를 재사용할 수 없음
+    report = TargetReport(target_bytes=target_bytes, engine=engine)
+    report.page_count = count_pages(input_path)
+    pages = _sample_page_numbers(report.page_count, sample_pages)
+    report.sample_pages = len(pages)
+    whole = len(pages) >= report.page_count  # 샘플이 곧 전체 문서인 경우
+
+    tmp_dir = tempfile.mkdtemp(prefix=".pdf_target_", dir=os.path.dirname(os.path.abspath(output_path)))
+    try:
+        runner = _Engine(engine, input_path, tmp_dir, cancel_event)
+        level_count = len(runner.levels)
+        expected_total = (level_count.bit_length() + (0 if whole else max_full_passes))
+
+        def attempt(level, full):
+            path = os.path.join(tmp_dir, f"{'full' if full else 'sample'}_{level}.pdf")
+            start = time.perf_counter()
+            runner.run(level, path, sample=not full)
+            result = TargetAttempt(level, runner.label(level), os.path.getsize(path),
+                                   time.perf_counter() - start, full)
+            report.attempts.append(result)
+            if progress_callback:
+                progress_callback(min(len(report.attempts), expected_total), expected_total)
+            return result, path
+
+        # --- 1단계: 샘플 페이지로 단계별 전체 크기 추정 ---
+        estimates = {}
+        full_outputs = {}  # level → (size, path)
+        if not whole:
+            runner.prepare_sample(pages)
+
+        def estimate(level):
+            if level not in estimates:
+                result, path = attempt(level, full=whole)
+                if whole:
+                    estimates[level] = result.size
+                    full_outputs[level] = (result.size, path)
+                else:
+                    estimates[level] = result.size / len(pages) * report.page_count
+            return estimates[level]
+
+        budget = target_bytes if whole else target_bytes * ESTIMATE_SAFETY
+        lo, hi = 0, level_count - 1
+        candidate = level_count - 1
+        while lo <= hi:
+            mid = (lo + hi) // 2
+            if estimate(mid) <= budget:
+                candidate = mid
+                hi = mid - 1
+            else:
+                lo = mid + 1
+
+        # --- 2단계: 전체 압축 (추정치를 실제 비율로 보정하며 반복) ---
+        if not whole:
+            fit_best = level_count        # 예산을 맞춘 가장 높은 품질 단계
+            bad_worst = -1                # 예산을 넘은 가장 낮은 품질 단계
+            ratio = 1.0
+            for _ in range(max_full_passes):
+                result, path = attempt(candidate, full=True)
+                full_outputs[candidate] = (result.size, path)
+                ratio = result.size / estimate(candidate) if estimate(candidate) else 1.0
+                if result.size <= target_bytes:
+                    fit_best = min(fit_best, candidate)
+                else:
+                    bad_worst = max(bad_worst, candidate)
+
+                # 아직 확인하지 않은 단계 중 보정 추정으로 예산에 맞는 가장 높은 품질
+                next_level = None
+                for level in range(bad_worst + 1, fit_best):
+                    if level in full_outputs:
+                        continue
+                    if estimate(level) * ratio <= target_bytes:
+                        next_level = level
+                        break
+                if next_level is None and fit_best == level_count:
+                    # 아직 맞춘 적이 없으면 더 낮은 품질로 계속 시도
+                    lower = [level for level in range(bad_worst + 1, level_count) if level not in full_outputs]
+                    next_level = lower[0] if lower else None
+                if next_level is None:
+                    break
+                candidate = next_level
+
+        # --- 결과 선택 ---
+        fitting = [level for level, (size, _) in full_outputs.items() if size <= target_bytes]
+        if fitting:
+            chosen = min(fitting)
+            report.met = True
+        else:
+            chosen = min(full_outputs, key=lambda level: full_outputs[level][0])
+        size, path = full_outputs[chosen]
+        shutil.move(path, output_path)
+        report.chosen_level = chosen
+        report.chosen_label = runner.label(chosen)
+        report.output_size = size
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    return report
+
+
+def format_target_report(report):
+    """탐색 결과 요약"""
+    lines = [f"  {'전체' if a.full else '샘플'} {a.label}: {a.size / 1024:.1f} KB ({a.seconds:.2f}s)"
+             for a in report.attempts]
+    status = "달성" if report.met else "미달성 (가장 작은 결과 저장)"
+    lines.append(
+        f"목표 {report.target_bytes / (1024 * 1024):.2f} MB {status} | 선택: {report.chosen_label}, "
+        f"{report.output_size / (1024 * 1024):.2f} MB | 샘플 {report.sample_passes}회"
+        f"({report.sample_pages}페이지) + 전체 {report.full_passes}회"
+    )
+    return "\n".join(lines)
@@ -0,0 +1,478 @@
+# -*- coding: utf-8 -*-
+"""
+문서 표본으로 Ghostscript 사용자 프리셋 튜닝
+
+    python -m pdf_compress_tune samples/ --name forms --min-psnr 38
+    python -m pdf_compress_tune samples/ --name photos --search grid \\
+        --grid color_resolution=150,200 --grid qfactor=0.4,0.76
+    python -m pdf_compress_tune --list
+    python -m pdf_compress_tune --delete forms
+
+내장 프리셋 네 개가 문서 구성에 맞지 않을 때, 표본(파일 몇 개 × 고르게 고른 페이지 몇 장)을
+distiller 설정 조합마다 gs로 압축해
+- 크기: 표본 출력 바이트 합계 (내장 ebook 프리셋 대비 비율도 표시)
+- 시간: gs CPU 시간 합계 (wait4)
+- 화질: 원본과 결과 페이지를 같은 해상도(RENDER_DPI)로 그려 비교한 PSNR (페이지 평균, dB)
+을 재고, 화질 하한(--min-psnr)을 넘는 조합 중 가장 작은 것(같으면 빠른 것)을 이름 붙여 저장합니다.
+저장한 프리셋은 CLI/GUI/일괄 압축/감시/HTTP 서비스의 프리셋 자리에 이름으로 쓸 수 있습니다 (pdf_compress_presets).
+
+탐색 방법
+- adaptive(기본): 기준 설정에서 시작해 매개변수 하나씩 후보 값으로 바꿔 보고 나아지면 유지하기를
+  더 나아지지 않을 때까지 반복 (좌표 하강, 모든 조합의 일부만 시도)
+- grid: --grid로 준 값의 모든 조합 (주지 않은 매개변수는 기준 설정)
+두 방법 모두 같은 설정은 한 번만 재고, --max-trials번을 넘게 시도하지 않습니다.
+"""
+import argparse
+import itertools
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+from pdf_compress_gs import QUALITY_LEVELS, render_pages, require_ghostscript, run_ghostscript
+from pdf_compress_presets import (
+    COMPATIBILITY_LEVELS, DOWNSAMPLE_TYPES, CustomPreset, delete_preset, format_preset, load_presets,
+    presets_path, save_preset
+)
+
+# 매개변수별 후보 값 (adaptive는 이 순서로 시도)
+SEARCH_SPACE = {
+    "color_resolution": (300, 200, 150, 120, 100, 72),
+    "gray_resolution": (300, 200, 150, 120, 100, 72),
+    "qfactor": (0.15, 0.25, 0.4, 0.55, 0.76, 0.9, 1.2),
+    "mono_resolution": (600, 400, 300, 200),
+    "downsample_type": DOWNSAMPLE_TYPES,
+    "embed_fonts": (True, False),
+    "compatibility": COMPATIBILITY_LEVELS
+}
+
+# 탐색 시작점 (printer 기반, ebook 해상도에 조금 더 높은 화질)
+BASELINE = {
+    "base": "printer",
+    "color_resolution": 150,
+    "gray_resolution": 150,
+    "mono_resolution": 300,
+    "downsample_type": "Bicubic",
+    "qfactor": 0.4,
+    "embed_fonts": True,
+    "compatibility": "1.4"
+}
+
+# 크기를 비교할 기준 내장 프리셋
+REFERENCE_PRESET = "ebook"
+
+DEFAULT_MIN_PSNR = 35.0
+DEFAULT_SAMPLE_FILES = 5
+DEFAULT_SAMPLE_PAGES = 3
+DEFAULT_MAX_TRIALS = 40
+
+# 화질 비교용 렌더링 해상도 (dpi), 낮을수록 빠르지만 다운샘플링 차이가 덜 보임
+RENDER_DPI = 72
+
+# 크기가 같을 때 이만큼(비율) 넘게 빨라야 더 나은 설정으로 봄 (gs 시간의 측정 잡음 무시)
+TIME_TOLERANCE = 0.05
+
+# 원본과 같은 페이지의 PSNR은 무한대이므로 평균을 낼 때 이 값으로 자름
+PSNR_CAP = 60.0
+
+
+@dataclass
+class SampleFile:
+    """표본 파일 하나와 비교용으로 그려 둔 원본 페이지"""
+    path: str
+    page_count: int
+    pages: list                 # 1부터 시작하는 표본 페이지 번호
+    renders: list = field(default_factory=list)   # 원본 페이지 PNG 경로 (pages 순서)
+
+
+@dataclass
+class Trial:
+    """설정 하나를 표본 전체에 적용한 결과"""
+    label: str
+    params: dict                # CustomPreset 인자 (내장 프리셋이면 비어 있음)
+    preset: str = ""            # 내장 프리셋 이름 (기준 측정용)
+    size: int = 0               # 표본 출력 바이트 합계
+    seconds: float = 0.0        # gs CPU 시간 합계
+    psnr: float = 0.0           # 페이지 평균 PSNR (dB, PSNR_CAP으로 자름)
+    min_psnr: float = 0.0       # 가장 나쁜 페이지의 PSNR
+    error: str = ""
+
+    def feasible(self, min_psnr):
+        return not self.error and self.psnr >= min_psnr
+
+
+@dataclass
+class TuneReport:
+    """튜닝 결과"""
+    search: str
+    min_psnr: float
+    files: list = field(default_factory=list)       # SampleFile
+    references: list = field(default_factory=list)  # 내장 프리셋 Trial
+    trials: list = field(default_factory=list)      # 사용자 설정 Trial (시도한 순서)
+    chosen: Trial = None
+    preset: CustomPreset = None
+    seconds: float = 0.0
+
+    @property
+    def pages(self):
+        return sum(len(sample.pages) for sample in self.files)
+
+    def reference(self, name=REFERENCE_PRESET):
+        return next((trial for trial in self.references if trial.preset == name), None)
+
+
+def _trial_key(params):
+    return tuple(sorted(params.items()))
+
+
+def _label(params):
+    return CustomPreset("_", **params).label
+
+
+def _spread(count, wanted):
+    """0..count-1 중 고르게 퍼진 wanted개의 번호"""
+    if count <= wanted:
+        return list(range(count))
+    step = count / wanted
+    return sorted({int(step * i + step / 2) for i in range(wanted)})
+
+
+def _psnr_of(reference_path, output_path):
+    from PIL import Image
+    from pdf_compress_image import _psnr
+    with Image.open(reference_path) as a, Image.open(output_path) as b:
+        a, b = a.convert("RGB"), b.convert("RGB")
+        if a.size != b.size:
+            b = b.resize(a.size)
+        return min(_psnr(a, b), PSNR_CAP)
+
+
+class _Tuner:
+    """표본 준비와 설정 하나 측정 (같은 설정은 다시 재지 않음)"""
+
+    def __init__(self, files, tmp_dir, jobs, min_psnr, cancel_event=None, progress_callback=None):
+        self.files = files
+        self.tmp_dir = tmp_dir
+        self.jobs = jobs
+        self.min_psnr = min_psnr
+        self.cancel_event = cancel_event
+        self.progress_callback = progress_callback
+        self.measured = {}
+        self.count = 0
+
+    def _map(self, func, items):
+        with ThreadPoolExecutor(max_workers=self.jobs) as executor:
+            return list(executor.map(func, items))
+
+    def render_originals(self):
+        def render(indexed):
+            index, sample = indexed
+            pattern = os.path.join(self.tmp_dir, f"orig_{index}_%03d.png")
+            render_pages(sample.path, pattern, RENDER_DPI, sample.pages, cancel_event=self.cancel_event)
+            sample.renders = [pattern % (number + 1) for number in range(len(sample.pages))]
+        self._map(render, enumerate(self.files))
+
+    def _measure_file(self, indexed, quality_level, trial_dir):
+        index, sample = indexed
+        output_path = os.path.join(trial_dir, f"out_{index}.pdf")
+        usage = run_ghostscript(sample.path, output_path, quality_level,
+                                extra_args=["-sPageList=" + ",".join(str(page) for page in sample.pages)],
+                                cancel_event=self.cancel_event)
+        pattern = os.path.join(trial_dir, f"out_{index}_%03d.png")
+        render_pages(output_path, pattern, RENDER_DPI, cancel_event=self.cancel_event)
+        scores = [_psnr_of(reference, pattern % (number + 1)) for number, reference in enumerate(sample.renders)]
+        return os.path.getsize(output_path), usage.cpu_seconds or usage.wall_seconds, scores
+
+    def measure(self, params=None, preset=""):
+        """사용자 설정(params) 또는 내장 프리셋(preset)으로 표본을 압축해 Trial 반환"""
+        key = _trial_key(params) if params else preset
+        if key in self.measured:
+            return self.measured[key]
+        quality_level = CustomPreset("_tune", **params) if params else preset
+        trial = Trial(label=preset or _label(params), params=dict(params or {}), preset=preset)
+        self.count += 1
+        trial_dir = tempfile.mkdtemp(prefix=f"trial_{self.count}_", dir=self.tmp_dir)
+        try:
+            results = self._map(lambda indexed: self._measure_file(indexed, quality_level, trial_dir),
+                                enumerate(self.files))
+            scores = [score for _, _, file_scores in results for score in file_scores]
+            trial.size = sum(size for size, _, _ in results)
+            trial.seconds = sum(seconds for _, seconds, _ in results)
+            trial.psnr = sum(scores) / len(scores) if scores else 0.0
+            trial.min_psnr = min(scores) if scores else 0.0
+        except Exception as e:
+            from pdf_compress_errors import CompressionCancelled
+            if isinstance(e, CompressionCancelled):
+                raise
+            trial.error = str(e).splitlines()[0] if str(e) else type(e).__name__
+        finally:
+            shutil.rmtree(trial_dir, ignore_errors=True)
+        self.measured[key] = trial
+        if self.progress_callback:
+            self.progress_callback(trial)
+        return trial
+
+    def better(self, a, b):
+        """a가 b보다 나은지: 화질 하한을 넘는 것 > 작은 것 > 확실히 빠른 것 (둘 다 못 넘으면 화질 높은 것)"""
+        if b is None:
+            return True
+        fa, fb = a.feasible(self.min_psnr), b.feasible(self.min_psnr)
+        if fa != fb:
+            return fa
+        if not fa:
+            return (not a.error, a.psnr) > (not b.error, b.psnr)
+        if a.size != b.size:
+            return a.size < b.size
+        return a.seconds < b.seconds * (1 - TIME_TOLERANCE)
+
+
+def select_samples(inputs, sample_files=DEFAULT_SAMPLE_FILES, sample_pages=DEFAULT_SAMPLE_PAGES):
+    """입력 파일/폴더에서 고르게 sample_files개 파일과 파일마다 sample_pages쪽을 고름"""
+    from pdf_compress_batch import collect_pdf_files
+    from pdf_compress_split import count_pages
+    from pdf_compress_target import _sample_page_numbers
+
+    items = collect_pdf_files(inputs)
+    files = []
+    for index in _spread(len(items), sample_files):
+        path = items[index].input_path
+        try:
+            page_count = count_pages(path)
+        except Exception:
+            continue  # 읽을 수 없는 파일은 표본에서 뺌
+        if page_count > 0:
+            files.append(SampleFile(path, page_count, _sample_page_numbers(page_count, sample_pages)))
+    return files
+
+
+def parse_grid(specs):
+    """['qfactor=0.4,0.76', ...] → {'qfactor': (0.4, 0.76)} (값은 SEARCH_SPACE와 같은 자료형으로)"""
+    grid = {}
+    for spec in specs or []:
+        name, _, values = spec.partition("=")
+        name = name.strip()
+        if name not in SEARCH_SPACE or not values:
+            raise ValueError(f"격자 형식이 올바르지 않습니다: {spec} (매개변수: {', '.join(SEARCH_SPACE)})")
+        sample = SEARCH_SPACE[name][0]
+        parsed = []
+        for value in values.split(","):
+            value = value.strip()
+            if isinstance(sample, bool):
+                parsed.append(value.lower() in ("1", "true", "yes", "on"))
+            elif isinstance(sample, int):
+                parsed.append(int(value))
+            elif isinstance(sample, float):
+                parsed.append(float(value))
+            else:
+                parsed.append(value)
+        grid[name] = tuple(dict.fromkeys(parsed))
+    return grid
+
+
+def _adaptive(tuner, max_trials):
+    current = dict(BASELINE)
+    best = tuner.measure(current)
+    changed = True
+    while changed and tuner.count < max_trials:
+        changed = False
+        for name, values in SEARCH_SPACE.items():
+            for value in values:
+                if value == current[name] or tuner.count >= max_trials:
+                    continue
+                candidate = {**current, name: value}
+                trial = tuner.measure(candidate)
+                if tuner.better(trial, best):
+                    best, current, changed = trial, candidate, True
+    return best
+
+
+def _grid(tuner, grid, max_trials):
+    names = list(grid)
+    best = None
+    for values in itertools.product(*(grid[name] for name in names)):
+        if tuner.count >= max_trials:
+            break
+        trial = tuner.measure({**BASELINE, **dict(zip(names, values))})
+        if tuner.better(trial, best):
+            best = trial
+    return best
+
+
+def tune_preset(inputs, name=None, search="adaptive", grid=None, min_psnr=DEFAULT_MIN_PSNR,
+                sample_files=DEFAULT_SAMPLE_FILES, sample_pages=DEFAULT_SAMPLE_PAGES,
+                max_trials=DEFAULT_MAX_TRIALS, jobs=None, save=True, progress_callback=None, cancel_event=None):
+    """
+    표본으로 distiller 설정을 탐색합니다.
+    - search: 'adaptive' 또는 'grid' (grid: {매개변수: 후보 값들}, parse_grid 참고)
+    - name: 주면 고른 설정을 이 이름의 사용자 프리셋으로 저장 (save=False면 저장하지 않음)
+    - min_psnr: 표본 페이지 평균 PSNR 하한 (dB), 넘는 조합이 없으면 화질이 가장 높은 조합을 고름
+    - jobs: 동시에 실행할 gs 수 (기본값: CPU 개수)
+    - progress_callback(trial): 설정 하나를 잴 때마다 호출
+    - 반환값: TuneReport
+    """
+    if search not in ("adaptive", "grid"):
+        raise ValueError(f"알 수 없는 탐색 방법입니다: {search}")
+    if search == "grid" and not grid:
+        raise ValueError("grid 탐색에는 --grid로 후보 값을 하나 이상 지정해야 합니다.")
+    if name is not None:
+        CustomPreset(name)  # 저장할 수 없는 이름이면 표본을 재기 전에 ValueError
+    require_ghostscript()
+    start = time.perf_counter()
+    report = TuneReport(search=search, min_psnr=min_psnr)
+    report.files = select_samples(inputs, sample_files, sample_pages)
+    if not report.files:
+        raise ValueError("표본으로 쓸 PDF가 없습니다.")
+
+    tmp_dir = tempfile.mkdtemp(prefix="pdf_tune_")
+    try:
+        tuner = _Tuner(report.files, tmp_dir, max(1, jobs or os.cpu_count() or 1), min_psnr, cancel_event,
+                       progress_callback)
+        tuner.render_originals()
+        report.references = [tuner.measure(preset=preset) for preset in QUALITY_LEVELS]
+        tuner.count = 0  # 기준 측정은 시도 횟수에 넣지 않음
+        best = _grid(tuner, grid, max_trials) if search == "grid" else _adaptive(tuner, max_trials)
+        report.trials = [trial for trial in tuner.measured.values() if not trial.preset]
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    report.chosen = best
+    report.seconds = time.perf_counter() - start
+    if name is not None and best is not None and not best.error:
+        reference = report.reference()
+        report.preset = CustomPreset(
+            name, **best.params,
+            description=f"{len(report.files)}개 파일 {report.pages}쪽 표본, PSNR {min_psnr:g}dB 이상 중 가장 작은 설정",
+            metrics={
+                "files": len(report.files),
+                "pages": report.pages,
+                "sample_bytes": best.size,
+                "ebook_ratio": round(best.size / reference.size, 4) if reference and reference.size else 0.0,
+                "psnr": round(best.psnr, 2),
+                "min_psnr": round(best.min_psnr, 2),
+                "seconds": round(best.seconds, 3),
+                "tuned_at": time.strftime("%Y-%m-%dT%H:%M:%S")
+            }
+        )
+        if save:
+            save_preset(report.preset)
+    return report
+
+
+def format_trial(trial, min_psnr, reference=None):
+    if trial.error:
+        return f"  ✖ {trial.label}: 실패 ({trial.error})"
+    mark = "✔" if trial.feasible(min_psnr) else " "
+    ratio = f", {REFERENCE_PRESET} 대비 {trial.size / reference.size * 100:.0f}%" if reference and reference.size else ""
+    return (f"  {mark} {trial.label}: {trial.size / 1024:.1f} KB{ratio}, gs {trial.seconds:.2f}s, "
+            f"PSNR 평균 {trial.psnr:.1f} / 최저 {trial.min_psnr:.1f} dB")
+
+
+def format_tune_report(report):
+    """기준 프리셋, 시도한 설정(작은 순), 선택 결과를 여러 줄로 요약"""
+    reference = report.reference()
+    lines = [f"표본: {len(report.files)}개 파일, {report.pages}쪽 (렌더링 {RENDER_DPI}dpi)", "내장 프리셋:"]
+    lines += [format_trial(trial, report.min_psnr, reference) for trial in report.references]
+    lines.append(f"시도한 설정 {len(report.trials)}개 ({report.search}, ✔ = PSNR {report.min_psnr:g}dB 이상):")
+    lines += [format_trial(trial, report.min_psnr, reference)
+              for trial in sorted(report.trials, key=lambda trial: (bool(trial.error), trial.size))]
+    if report.chosen is None or report.chosen.error:
+        lines.append("선택할 수 있는 설정이 없습니다.")
+    else:
+        feasible = report.chosen.feasible(report.min_psnr)
+        lines.append(f"선택: {report.chosen.label}"
+                     + ("" if feasible else f" (PSNR {report.min_psnr:g}dB를 넘는 설정이 없어 화질이 가장 높은 설정)"))
+    if report.preset is not None:
+        lines.append(f"저장: {format_preset(report.preset)}")
+    lines.append(f"소요 시간 {report.seconds:.1f}s")
+    return "\n".join(lines)
+
+
+def _trial_dict(trial):
+    return {"label": trial.label, "preset": trial.preset or None, "params": trial.params, "size": trial.size,
+            "seconds": round(trial.seconds, 4), "psnr": round(trial.psnr, 2),
+            "min_psnr": round(trial.min_psnr, 2), "error": trial.error or None}
+
+
+def _log(message):
+    print(message, file=sys.stderr, flush=True)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m pdf_compress_tune",
+                                     description="문서 표본으로 Ghostscript 사용자 프리셋 튜닝")
+    parser.add_argument("inputs", nargs="*", help="표본 PDF 파일 또는 폴더")
+    parser.add_argument("-n", "--name", help="고른 설정을 이 이름의 사용자 프리셋으로 저장")
+    parser.add_argument("--search", choices=("adaptive", "grid"), default="adaptive",
+                        help="탐색 방법 (기본값: adaptive)")
+    parser.add_argument("--grid", action="append", metavar="PARAM=V1,V2",
+                        help=f"grid 탐색 후보 값, 여러 번 지정 (매개변수: {', '.join(SEARCH_SPACE)})")
+    parser.add_argument("--min-psnr", type=float, default=DEFAULT_MIN_PSNR,
+                        help=f"표본 페이지 평균 PSNR 하한 dB (기본값: {DEFAULT_MIN_PSNR:g})")
+    parser.add_argument("--sample-files", type=int, default=DEFAULT_SAMPLE_FILES,
+                        help=f"표본 파일 수 (기본값: {DEFAULT_SAMPLE_FILES})")
+    parser.add_argument("--sample-pages", type=int, default=DEFAULT_SAMPLE_PAGES,
+                        help=f"파일마다 표본 페이지 수 (기본값: {DEFAULT_SAMPLE_PAGES})")
+    parser.add_argument("--max-trials", type=int, default=DEFAULT_MAX_TRIALS,
+                        help=f"시도할 설정 수 상한 (기본값: {DEFAULT_MAX_TRIALS})")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="동시 gs 수 (기본값: CPU 개수)")
+    parser.add_argument("--dry-run", action="store_true", help="결과만 출력하고 프리셋은 저장하지 않음")
+    parser.add_argument("--json", action="store_true", help="결과를 JSON으로 표준 출력에 출력")
+    parser.add_argument("--list", action="store_true", help=f"저장한 사용자 프리셋 목록 ({presets_path()})")
+    parser.add_argument("--delete", metavar="NAME", help="사용자 프리셋 삭제")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.list:
+        presets = load_presets()
+        if not presets:
+            _log(f"저장한 사용자 프리셋이 없습니다 ({presets_path()})")
+        for preset in presets.values():
+            print(format_preset(preset))
+        return 0
+    if args.delete:
+        if not delete_preset(args.delete):
+            _log(f"❌ 사용자 프리셋이 없습니다: {args.delete}")
+            return 1
+        _log(f"🗑️ 삭제: {args.delete}")
+        return 0
+    if not args.inputs:
+        _log("❌ 표본 PDF 파일 또는 폴더를 지정하세요.")
+        return 1
+
+    def progress(trial):
+        if not args.json:
+            _log(format_trial(trial, args.min_psnr))
+
+    try:
+        report = tune_preset(args.inputs, name=args.name, search=args.search, grid=parse_grid(args.grid),
+                             min_psnr=args.min_psnr, sample_files=max(1, args.sample_files),
+                             sample_pages=max(1, args.sample_pages), max_trials=max(1, args.max_trials),
+                             jobs=args.jobs, save=not args.dry_run, progress_callback=progress)
+    except Exception as e:
+        _log(f"❌ {e}")
+        return 1
+
+    if args.json:
+        print(json.dumps({
+            "search": report.search,
+            "min_psnr": report.min_psnr,
+            "files": [{"path": sample.path, "pages": sample.pages} for sample in report.files],
+            "references": [_trial_dict(trial) for trial in report.references],
+            "trials": [_trial_dict(trial) for trial in report.trials],
+            "chosen": _trial_dict(report.chosen) if report.chosen else None,
+            "saved": report.preset.name if report.preset is not None and not args.dry_run else None,
+            "seconds": round(report.seconds, 3)
+        }, ensure_ascii=False))
+    else:
+        _log(format_tune_report(report))
+    return 0 if report.chosen is not None and not report.chosen.error else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
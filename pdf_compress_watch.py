@@ -0,0 +1,471 @@
+# -*- coding: utf-8 -*-
+"""
+감시 폴더 데몬: 스캐너가 떨어뜨린 PDF를 자동으로 압축
+
+    python -m pdf_compress_watch scans/ -o compressed/ --queue-dir ~/.pdf_watch --jobs 4
+
+1. 입력 폴더를 주기적으로 훑어 크기/수정 시각이 settle초 동안 변하지 않은 PDF만 작업으로 등록
+2. 작업은 디스크 큐에 저장 (상태별 폴더 + 작업당 JSON 파일, os.replace로 상태 전환)
+   - 도중에 죽어도 재시작하면 running 작업을 pending으로 되돌려 이어서 처리
+   - 끝난 파일(경로 + 크기 + 수정 시각이 같은 파일)은 다시 처리하지 않음
+3. jobs개 작업자가 pdf_compress_api.compress()로 압축하고 결과를 출력 폴더로 옮김
+   (--archive-dir이면 원본을 보관 폴더의 같은 상대 경로로 옮김, 옮기지 못하면 실패로 보고 재시도)
+4. 실패하면 지수 백오프로 max-retries번까지 다시 시도, 그래도 실패하면 failed에 남김
+대기 중인 작업이 max-queue개 이상이면 새 파일은 입력 폴더에 둔 채 등록을 미룹니다.
+"""
+import argparse
+import errno
+import hashlib
+import json
+import os
+import random
+import shutil
+import signal
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+
+from pdf_compress_api import DEFAULT_PRESETS, ENGINES, ENGINE_ALIASES, compress, resolve_engine
+from pdf_compress_errors import CompressionCancelled, remove_partial_output
+from pdf_compress_gs import add_limit_arguments, limits_from_args, set_default_limits
+
+DEFAULT_POLL_SECONDS = 2.0
+DEFAULT_SETTLE_SECONDS = 5.0
+DEFAULT_MAX_QUEUE = 1000
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_BACKOFF_SECONDS = 30.0
+MAX_BACKOFF_SECONDS = 3600.0
+
+
+def _log(message):
+    print(message, file=sys.stderr, flush=True)
+
+
+@dataclass
+class Job:
+    """큐에 저장되는 작업 하나"""
+    id: str
+    input_path: str
+    output_path: str
+    size: int
+    mtime_ns: int
+    attempts: int = 0
+    next_attempt: float = 0.0  # 이 시각(time.time()) 이후에 실행
+    error: str = ""
+    created: float = 0.0
+    finished: float = 0.0
+
+
+def job_id(input_path, size, mtime_ns):
+    """경로 + 크기 + 수정 시각으로 만든 작업 ID (같은 파일을 다시 넣어도 같은 ID)"""
+    key = f"{os.path.abspath(input_path)}\0{size}\0{mtime_ns}"
+    return hashlib.sha256(key.encode("utf-8", "surrogateescape")).hexdigest()[:32]
+
+
+def backoff_delay(attempts, base=DEFAULT_BACKOFF_SECONDS, maximum=MAX_BACKOFF_SECONDS):
+    """attempts번째 실패 뒤 기다릴 시간 (지수 증가 + ±20% 흔들기, 동시에 몰리지 않게)"""
+    delay = min(maximum, base * 2 ** max(0, attempts - 1))
+    return delay * random.uniform(0.8, 1.2)
+
+
+class JobQueue:
+    """
+    디렉터리 기반 작업 큐
+    - root/{pending,running,done,failed}/<작업 ID>.json
+    - 내용 변경: 같은 폴더의 임시 파일에 쓰고 fsync 후 os.replace
+    - 상태 전환: 폴더 사이 os.replace (같은 파일 시스템 안에서 원자적)
+    한 프로세스의 한 스레드(데몬 메인 루프)에서만 사용합니다.
+    """
+    STATES = ("pending", "running", "done", "failed")
+
+    def __init__(self, root):
+        self.root = root
+        for state in self.STATES:
+            os.makedirs(os.path.join(root, state), exist_ok=True)
+
+    def _path(self, state, job_id_):
+        return os.path.join(self.root, state, f"{job_id_}.json")
+
+    def _write(self, state, job):
+        path = self._path(state, job.id)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(asdict(job), f, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+    def _move(self, job, source, target):
+        """source 폴더에서 내용을 먼저 갱신한 뒤 target 폴더로 옮김 (중간에 죽어도 한 곳에만 존재)"""
+        self._write(source, job)
+        os.replace(self._path(source, job.id), self._path(target, job.id))
+
+    def _load(self, path):
+        with open(path, encoding="utf-8") as f:
+            return Job(**json.load(f))
+
+    def jobs(self, state):
+        found = []
+        directory = os.path.join(self.root, state)
+        for name in os.listdir(directory):
+            if not name.endswith(".json"):
+                continue
+            try:
+                found.append(self._load(os.path.join(directory, name)))
+            except (OSError, ValueError, TypeError):
+                continue  # 쓰다 만 임시 파일 등은 무시
+        return found
+
+    def state_of(self, job_id_):
+        for state in self.STATES:
+            if os.path.exists(self._path(state, job_id_)):
+                return state
+        return None
+
+    def count(self, state):
+        return sum(1 for name in os.listdir(os.path.join(self.root, state)) if name.endswith(".json"))
+
+    def enqueue(self, job):
+        job.created = job.created or time.time()
+        self._write("pending", job)
+
+    def recover(self):
+        """이전 실행이 죽으면서 running에 남긴 작업을 pending으로 (시도 횟수는 올림)"""
+        recovered = 0
+        for job in self.jobs("running"):
+            job.attempts += 1
+            job.error = "이전 실행이 작업 도중 종료됨"
+            self._move(job, "running", "pending")
+            recovered += 1
+        return recovered
+
+    def claim(self, now=None):
+        """실행할 시각이 된 가장 오래된 pending 작업을 running으로 옮겨 반환 (없으면 None)"""
+        now = time.time() if now is None else now
+        ready = [job for job in self.jobs("pending") if job.next_attempt <= now]
+        if not ready:
+            return None
+        job = min(ready, key=lambda job: (job.next_attempt, job.created))
+        os.replace(self._path("pending", job.id), self._path("running", job.id))
+        return job
+
+    def complete(self, job):
+        job.finished = time.time()
+        job.error = ""
+        self._move(job, "running", "done")
+
+    def retry(self, job, error, delay):
+        job.attempts += 1
+        job.error = error
+        job.next_attempt = time.time() + delay
+        self._move(job, "running", "pending")
+
+    def fail(self, job, error):
+        job.attempts += 1
+        job.error = error
+        job.finished = time.time()
+        self._move(job, "running", "failed")
+
+    def release(self, job):
+        """취소된 작업을 시도 횟수 변경 없이 pending으로 되돌림"""
+        self._move(job, "running", "pending")
+
+
+class StabilityTracker:
+    """파일 크기/수정 시각이 settle초 동안 그대로인지 추적 (스캐너가 아직 쓰는 중인 파일 제외)"""
+
+    def __init__(self, settle_seconds):
+        self.settle_seconds = settle_seconds
+        self._seen = {}  # 경로 → (크기, 수정 시각, 처음 그 상태로 본 시각)
+
+    def stable(self, path, stat, now):
+        signature = (stat.st_size, stat.st_mtime_ns)
+        previous = self._seen.get(path)
+        if previous is None or previous[:2] != signature:
+            self._seen[path] = (*signature, now)
+            return False
+        return stat.st_size > 0 and now - previous[2] >= self.settle_seconds
+
+    def forget(self, path):
+        self._seen.pop(path, None)
+
+    def prune(self, existing):
+        for path in list(self._seen):
+            if path not in existing:
+                del self._seen[path]
+
+
+def scan_inputs(input_dirs, recursive=False):
+    """입력 폴더의 PDF 파일 (경로, 입력 폴더) 목록, 숨김 파일 제외"""
+    found = []
+    for root in input_dirs:
+        for directory, subdirs, names in os.walk(root):
+            subdirs[:] = [name for name in subdirs if not name.startswith(".")] if recursive else []
+            for name in sorted(names):
+                if name.lower().endswith(".pdf") and not name.startswith("."):
+                    found.append((os.path.join(directory, name), root))
+    return found
+
+
+def root_folders(input_dirs):
+    """
+    입력 폴더마다 출력/보관 폴더 안의 하위 폴더 이름
+    폴더가 하나면 ""(바로 아래), 여럿이면 폴더 이름 (이름이 겹치면 _2, _3 …)
+    여러 입력 폴더의 같은 상대 경로 파일(in1/x.pdf, in2/x.pdf)이 서로 덮어쓰지 않도록
+    """
+    if len(input_dirs) <= 1:
+        return {root: "" for root in input_dirs}
+    folders = {}
+    taken = set()
+    for root in input_dirs:
+        base = os.path.basename(os.path.normpath(root)) or "input"
+        name, number = base, 2
+        while os.path.normcase(name) in taken:
+            name = f"{base}_{number}"
+            number += 1
+        taken.add(os.path.normcase(name))
+        folders[root] = name
+    return folders
+
+
+class WatchDaemon:
+    """입력 폴더 감시 + 디스크 큐 + 작업자 풀"""
+
+    def __init__(self, input_dirs, output_dir, queue_dir, engine="ghostscript", preset=None, jobs=2,
+                 poll_seconds=DEFAULT_POLL_SECONDS, settle_seconds=DEFAULT_SETTLE_SECONDS,
+                 max_queue=DEFAULT_MAX_QUEUE, max_retries=DEFAULT_MAX_RETRIES,
+                 backoff_seconds=DEFAULT_BACKOFF_SECONDS, recursive=False, archive_dir=None,
+                 cache=None, metrics_file=None, json_log=False):
+        self.input_dirs = [os.path.abspath(path) for path in input_dirs]
+        self.root_folders = root_folders(self.input_dirs)
+        self.output_dir = os.path.abspath(output_dir)
+        self.queue = JobQueue(queue_dir)
+        self.engine = resolve_engine(engine)
+        self.preset = preset or DEFAULT_PRESETS[self.engine]
+        self.jobs = max(1, jobs)
+        self.poll_seconds = poll_seconds
+        self.max_queue = max_queue
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+        self.recursive = recursive
+        self.archive_dir = os.path.abspath(archive_dir) if archive_dir else None
+        self.cache = cache
+        self.json_log = json_log
+        self.tracker = StabilityTracker(settle_seconds)
+        self.stop_event = threading.Event()
+        self.metrics = None
+        self.metrics_file = metrics_file
+        if metrics_file:
+            from pdf_compress_metrics import RunMetrics
+            self.metrics = RunMetrics()
+
+    # --- 로그 ---
+    def _event(self, kind, job, **fields):
+        if self.json_log:
+            _log(json.dumps({"event": kind, "job": job.id, "input": job.input_path, "output": job.output_path,
+                             "attempts": job.attempts, **fields}, ensure_ascii=False))
+            return
+        name = os.path.basename(job.input_path)
+        if kind == "done":
+            _log(f"✅ {name}: {fields['original_size']} → {fields['compressed_size']} bytes "
+                 f"({fields['seconds']:.2f}s)")
+        elif kind == "retry":
+            _log(f"⚠️ {name}: {fields['error']} ({job.attempts}번째 실패, {fields['delay']:.0f}초 뒤 재시도)")
+        elif kind == "failed":
+            _log(f"❌ {name}: {fields['error']} (재시도 {self.max_retries}회 초과)")
+        elif kind == "queued":
+            _log(f"📥 {name}")
+
+    # --- 감시 ---
+    def _output_path(self, input_path, root):
+        return os.path.join(self.output_dir, self.root_folders.get(root, ""), os.path.relpath(input_path, root))
+
+    def _is_own_output(self, path):
+        """출력/보관 폴더가 입력 폴더 안에 있을 때 결과 파일을 다시 압축하지 않도록"""
+        for directory in (self.output_dir, self.archive_dir):
+            if directory and os.path.commonpath([directory, path]) == directory:
+                return True
+        return False
+
+    def scan(self, now=None):
+        """안정된 새 파일을 큐에 넣고 넣은 개수를 반환 (큐가 가득 차면 다음 주기로 미룸)"""
+        now = time.time() if now is None else now
+        backlog = self.queue.count("pending") + self.queue.count("running")
+        added = 0
+        existing = set()
+        for path, root in scan_inputs(self.input_dirs, self.recursive):
+            if self._is_own_output(path):
+                continue
+            existing.add(path)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            if not self.tracker.stable(path, stat, now):
+                continue
+            job = Job(job_id(path, stat.st_size, stat.st_mtime_ns), path, self._output_path(path, root),
+                      stat.st_size, stat.st_mtime_ns)
+            if self.queue.state_of(job.id) is not None:
+                continue  # 이미 등록했거나 끝난 파일
+            if backlog >= self.max_queue:
+                break  # 백프레셔: 파일은 입력 폴더에 그대로 두고 다음 주기에 다시 확인
+            self.queue.enqueue(job)
+            self.tracker.forget(path)
+            backlog += 1
+            added += 1
+            self._event("queued", job)
+        self.tracker.prune(existing)
+        return added
+
+    # --- 실행 ---
+    def _run_job(self, job):
+        """작업자 스레드: 출력 폴더의 임시 파일로 압축한 뒤 최종 이름으로 옮기고 원본을 보관"""
+        os.makedirs(os.path.dirname(job.output_path), exist_ok=True)
+        tmp_path = f"{job.output_path}.{job.id[:8]}.part"
+        try:
+            result = compress(job.input_path, tmp_path, engine=self.engine, preset=self.preset, jobs=1,
+                              cache=self.cache, cancel_event=self.stop_event)
+            os.replace(tmp_path, job.output_path)
+        except BaseException:
+            remove_partial_output(tmp_path)
+            raise
+        if self.archive_dir:
+            self._archive(job)
+        return result
+
+    def _archive_path(self, job):
+        """보관 경로 (출력 경로와 같은 상대 경로, 입력 폴더가 여럿이면 입력 폴더 이름의 하위 폴더 포함)"""
+        return os.path.join(self.archive_dir, os.path.relpath(job.output_path, self.output_dir))
+
+    def _archive(self, job):
+        """
+        원본을 보관 폴더로 옮김
+        다른 파일 시스템이면 os.replace가 EXDEV로 실패하므로 임시 이름으로 복사(shutil.move)한 뒤 바꿈
+        옮기지 못하면 OSError가 그대로 올라가 작업 실패/재시도로 처리됨
+        """
+        archived = self._archive_path(job)
+        os.makedirs(os.path.dirname(archived), exist_ok=True)
+        try:
+            os.replace(job.input_path, archived)
+            return
+        except OSError as e:
+            if e.errno != errno.EXDEV:
+                raise
+        tmp_path = f"{archived}.{job.id[:8]}.part"
+        try:
+            shutil.move(job.input_path, tmp_path)
+            os.replace(tmp_path, archived)
+        except BaseException:
+            remove_partial_output(tmp_path)
+            raise
+
+    def _finish(self, job, future):
+        """메인 스레드: 작업 결과에 따라 큐 상태 전환"""
+        try:
+            result = future.result()
+        except CompressionCancelled:
+            self.queue.release(job)
+            return
+        except Exception as e:
+            error = str(e).strip().splitlines()[0] if str(e).strip() else type(e).__name__
+            if job.attempts >= self.max_retries:
+                self.queue.fail(job, error)
+                self._event("failed", job, error=error)
+            else:
+                delay = backoff_delay(job.attempts + 1, self.backoff_seconds)
+                self.queue.retry(job, error, delay)
+                self._event("retry", job, error=error, delay=round(delay, 1))
+            if self.metrics is not None:
+                self.metrics.record(self.engine, False)
+            return
+        self.queue.complete(job)
+        self._event("done", job, original_size=result.original_size, compressed_size=result.compressed_size,
+                    seconds=round(result.seconds, 4), cached=result.cached)
+        if self.metrics is not None:
+            self.metrics.record(self.engine, True, result.original_size, result.compressed_size,
+                                result.seconds, result.timings, result.resources)
+
+    def run(self):
+        """stop_event가 설정될 때까지 감시 (실행 중인 작업은 취소 후 pending으로 되돌림)"""
+        recovered = self.queue.recover()
+        if recovered:
+            _log(f"이전 실행에서 중단된 작업 {recovered}개를 다시 대기열에 넣었습니다.")
+        running = {}
+        with ThreadPoolExecutor(max_workers=self.jobs) as executor:
+            while not self.stop_event.is_set():
+                self.scan()
+                while len(running) < self.jobs:
+                    job = self.queue.claim()
+                    if job is None:
+                        break
+                    running[executor.submit(self._run_job, job)] = job
+                for future in [future for future in running if future.done()]:
+                    self._finish(running.pop(future), future)
+                if self.metrics is not None:
+                    from pdf_compress_metrics import write_textfile
+                    write_textfile(self.metrics_file, self.metrics)
+                self.stop_event.wait(self.poll_seconds)
+            for future, job in running.items():
+                self._finish(job, future)  # 취소된 작업은 pending으로 돌아감
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m pdf_compress_watch",
+                                     description="감시 폴더의 PDF를 자동으로 압축하는 데몬")
+    parser.add_argument("inputs", nargs="+", help="감시할 입력 폴더")
+    parser.add_argument("-o", "--output", required=True, help="압축 결과를 둘 폴더")
+    parser.add_argument("--queue-dir", help="작업 큐 폴더 (기본값: 출력 폴더/.queue)")
+    parser.add_argument("-e", "--engine", default="ghostscript", choices=list(ENGINES) + list(ENGINE_ALIASES),
+                        help="압축 엔진 (기본값: ghostscript)")
+    parser.add_argument("-p", "--preset", help="엔진별 프리셋 (기본값: 엔진별 기본 프리셋)")
+    parser.add_argument("-j", "--jobs", type=int, default=2, help="동시에 압축할 파일 수 (기본값: 2)")
+    parser.add_argument("--poll", type=float, default=DEFAULT_POLL_SECONDS, help="폴더 확인 간격 (초)")
+    parser.add_argument("--settle", type=float, default=DEFAULT_SETTLE_SECONDS,
+                        help="파일 크기가 이 시간(초) 동안 그대로면 쓰기가 끝난 것으로 봄")
+    parser.add_argument("--max-queue", type=int, default=DEFAULT_MAX_QUEUE,
+                        help="대기 + 실행 중 작업 상한, 넘으면 새 파일 등록을 미룸")
+    parser.add_argument("--max-retries", type=int, default=DEFAULT_MAX_RETRIES, help="실패 시 재시도 횟수")
+    parser.add_argument("--backoff", type=float, default=DEFAULT_BACKOFF_SECONDS,
+                        help="첫 재시도 대기 시간 (초, 실패할 때마다 두 배)")
+    parser.add_argument("--recursive", action="store_true", help="하위 폴더까지 감시")
+    parser.add_argument("--archive-dir", help="압축에 성공한 원본을 옮길 폴더 (기본값: 원본 유지)")
+    parser.add_argument("--no-cache", action="store_true", help="압축 결과 캐시를 사용하지 않음")
+    parser.add_argument("--metrics-file", help="Prometheus textfile 수집기용 지표 파일 경로")
+    parser.add_argument("--json", action="store_true", help="작업 이벤트를 JSON으로 표준 에러에 출력")
+    add_limit_arguments(parser)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    for path in args.inputs:
+        if not os.path.isdir(path):
+            _log(f"❌ 폴더를 찾을 수 없습니다: {path}")
+            return 1
+    cache = None
+    if not args.no_cache:
+        from pdf_compress_cache import get_default_cache
+        cache = get_default_cache()
+    daemon = WatchDaemon(args.inputs, args.output, args.queue_dir or os.path.join(args.output, ".queue"),
+                         engine=args.engine, preset=args.preset, jobs=args.jobs, poll_seconds=args.poll,
+                         settle_seconds=args.settle, max_queue=args.max_queue, max_retries=args.max_retries,
+                         backoff_seconds=args.backoff, recursive=args.recursive, archive_dir=args.archive_dir,
+                         cache=cache, metrics_file=args.metrics_file, json_log=args.json)
+    set_default_limits(limits_from_args(args))
+
+    def stop(signum, frame):
+        _log("종료 신호를 받았습니다. 실행 중인 작업을 정리합니다...")
+        daemon.stop_event.set()
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+    _log(f"감시 시작: {', '.join(daemon.input_dirs)} → {daemon.output_dir} "
+         f"({daemon.engine}/{daemon.preset}, 작업 {daemon.jobs}개)")
+    daemon.run()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
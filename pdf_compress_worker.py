@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+"""
+GUI용 백그라운드 압축 작업자
+
+압축 함수를 별도 스레드에서 실행하고, 진행률/완료/오류를 큐로 전달합니다.
+Tk 위젯은 메인 스레드에서만 다뤄야 하므로 GUI는 root.after로 큐를 읽어
+화면을 갱신합니다 (root.update()로 이벤트 루프를 억지로 돌리지 않음).
+"""
+import queue
+import threading
+
+from pdf_compress_errors import CompressionCancelled
+
+POLL_INTERVAL_MS = 100
+
+
+class CompressionWorker:
+    """
+    target(*args, progress_callback=..., cancel_event=..., **kwargs)를
+    작업 스레드에서 실행합니다.
+    """
+
+    def __init__(self, target, *args, **kwargs):
+        self.target = target
+        self.args = args
+        self.kwargs = kwargs
+        self.events = queue.Queue()
+        self.cancel_event = threading.Event()
+        self.thread = None
+
+    def start(self):
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+        return self
+
+    def cancel(self):
+        """취소 요청 (실행 중인 gs 프로세스는 종료되고 미완성 출력은 삭제됨)"""
+        self.cancel_event.set()
+
+    @property
+    def running(self):
+        return self.thread is not None and self.thread.is_alive()
+
+    def _progress(self, *progress):
+        self.events.put(("progress", progress))
+
+    def _run(self):
+        try:
+            result = self.target(*self.args, progress_callback=self._progress,
+                                 cancel_event=self.cancel_event, **self.kwargs)
+        except CompressionCancelled:
+            self.events.put(("cancelled", None))
+        except Exception as e:
+            self.events.put(("error", e))
+        else:
+            self.events.put(("done", result))
+
+    def attach(self, root, on_progress=None, on_done=None, on_error=None, on_cancelled=None,
+               interval_ms=POLL_INTERVAL_MS):
+        """
+        Tk 메인 루프에서 주기적으로 큐를 읽어 콜백을 호출합니다.
+        - on_progress(*progress), on_done(result), on_error(exception), on_cancelled()
+        """
+        handlers = {
+            "progress": lambda progress: on_progress and on_progress(*progress),
+            "done": lambda result: on_done and on_done(result),
+            "error": lambda error: on_error and on_error(error),
+            "cancelled": lambda _: on_cancelled and on_cancelled()
+        }
+
+        def poll():
+            while True:
+                try:
+                    kind, payload = self.events.get_nowait()
+                except queue.Empty:
+                    root.after(interval_ms, poll)
+                    return
+                handlers[kind](payload)
+                if kind != "progress":
+                    return
+
+        root.after(interval_ms, poll)
+        return self
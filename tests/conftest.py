@@ -0,0 +1,22 @@
+# -*- coding: utf-8 -*-
+"""테스트 공통 설정: 저장소 루트의 모듈과 벤치마크 문서 생성기(benchmarks/corpus.py)를 불러올 수 있게 함"""
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for path in (ROOT, os.path.join(ROOT, "benchmarks")):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+
+@pytest.fixture
+def corpus_pdf(tmp_path):
+    """benchmarks/corpus.py의 문서를 tmp_path에 만들어 경로를 반환하는 함수"""
+    import corpus
+
+    def build(func_name, **kwargs):
+        path = tmp_path / f"{func_name}.pdf"
+        return corpus.write_pdf(str(path), getattr(corpus, func_name)(**kwargs))
+    return build
@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+"""pdf_compress_linearize: 부록 F 선형화 출력의 구조 확인"""
+import os
+import re
+
+import pytest
+
+PyPDF2 = pytest.importorskip("PyPDF2")
+
+from pdf_compress_linearize import (  # noqa: E402
+    LINEARIZED_HEADER_BYTES, _linearized_values, ensure_linearized, is_linearized, linearize_file
+)
+
+
+def _contents(reader):
+    return [page.get_contents().get_data() for page in reader.pages]
+
+
+@pytest.mark.parametrize("func_name, pages", [("text_pdf", 6), ("shared_resources_pdf", 8)])
+def test_linearize_file(corpus_pdf, tmp_path, func_name, pages):
+    source = corpus_pdf(func_name, pages=pages)
+    output = str(tmp_path / "web.pdf")
+    info = linearize_file(source, output)
+
+    with open(output, "rb") as f:
+        data = f.read()
+    assert is_linearized(output)
+    assert data.startswith(b"%PDF-1.")
+    values = _linearized_values(data[:LINEARIZED_HEADER_BYTES], len(data))
+    assert values is not None
+    assert values["L"] == len(data) == info.size
+    assert values["N"] == pages == info.pages
+    assert values["E"] == info.first_page_end
+    assert 0 < values["E"] < values["L"]
+
+    # /T: 주 xref 표 첫 항목 바로 앞의 공백
+    assert data[values["T"]:values["T"] + 21] == b"\n0000000000 65535 f \n"
+    # /H: 힌트 스트림 객체의 위치와 길이
+    hint = re.search(rb"/H \[\s*(\d+)\s+(\d+)\s*\]", data[:LINEARIZED_HEADER_BYTES])
+    offset, length = int(hint.group(1)), int(hint.group(2))
+    assert re.match(rb"\d+ 0 obj\n", data[offset:])
+    assert data[offset:offset + length].endswith(b"endstream\nendobj\n")
+
+    # /E: 첫 페이지 부분은 객체 경계에서 끝나고, 첫 페이지와 그 콘텐츠 스트림은 모두 그 앞에 있어야 함
+    assert data[:values["E"]].endswith(b"endobj\n")
+    assert re.match(rb"\d+ 0 obj\n", data[values["E"]:])
+    reader = PyPDF2.PdfReader(output, strict=True)
+    page = reader.pages[0]
+    assert page.indirect_reference.idnum == values["O"]
+    for number in (values["O"], page.raw_get("/Contents").idnum):
+        start = data.index(b"\n%d 0 obj\n" % number) + 1
+        assert data.index(b"endobj\n", start) + len(b"endobj\n") <= values["E"]
+
+    original = PyPDF2.PdfReader(source)
+    assert len(reader.pages) == len(original.pages)
+    assert _contents(reader) == _contents(original)
+
+
+def test_ensure_linearized_is_idempotent(corpus_pdf):
+    path = corpus_pdf("text_pdf", pages=3)
+    assert not is_linearized(path)
+    assert ensure_linearized(path)
+    size = os.path.getsize(path)
+    assert not ensure_linearized(path)
+    assert os.path.getsize(path) == size
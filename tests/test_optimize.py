@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+"""pdf_compress_optimize: 객체 스트림 + xref 스트림 출력이 다시 읽히는지 확인"""
+import io
+import re
+import zlib
+
+import pytest
+
+PyPDF2 = pytest.importorskip("PyPDF2")
+
+from pdf_compress_optimize import ObjectStreamWriter, write_optimized  # noqa: E402
+
+
+def _xref_entries(data):
+    """마지막 xref 스트림을 직접 풀어 {객체 번호: (종류, 값1, 값2)} 반환"""
+    start = int(re.search(rb"startxref\n(\d+)\n%%EOF\n$", data).group(1))
+    head = data[start:data.index(b"stream\n", start)]
+    assert b"/Type /XRef" in head
+    widths = [int(value) for value in re.search(rb"/W \[\s*(\d+)\s+(\d+)\s+(\d+)\s*\]", head).groups()]
+    length = int(re.search(rb"/Length (\d+)", head).group(1))
+    body_start = data.index(b"stream\n", start) + len(b"stream\n")
+    rows = zlib.decompress(data[body_start:body_start + length])
+    row_size = sum(widths)
+    entries = {}
+    for number in range(len(rows) // row_size):
+        row = rows[number * row_size:(number + 1) * row_size]
+        fields, pos = [], 0
+        for width in widths:
+            fields.append(int.from_bytes(row[pos:pos + width], "big"))
+            pos += width
+        entries[number] = tuple(fields)
+    return entries
+
+
+def _check_entries(data, reader):
+    entries = _xref_entries(data)
+    streams = 0
+    for number, (kind, first, second) in entries.items():
+        if kind == 1:
+            assert data[first:].startswith(b"%d 0 obj" % number)
+        elif kind == 2:
+            assert entries[first][0] == 1
+            assert reader.get_object(PyPDF2.generic.IndirectObject(number, 0, reader)) is not None
+            streams += 1
+    return streams
+
+
+def test_write_optimized_object_streams(corpus_pdf):
+    source = corpus_pdf("shared_resources_pdf", pages=6)
+    original = PyPDF2.PdfReader(source)
+    writer = PyPDF2.PdfWriter()
+    for page in original.pages:
+        writer.add_page(page)
+    writer.add_metadata({"/Title": "optimize"})
+
+    output = io.BytesIO()
+    report = write_optimized(writer, output)
+    data = output.getvalue()
+    assert report.packed > 0
+    assert b"/Type /ObjStm" in data
+    assert re.match(rb"%PDF-1\.[5-7]\n", data)
+
+    reader = PyPDF2.PdfReader(io.BytesIO(data), strict=True)
+    assert _check_entries(data, reader) == report.packed
+    assert len(reader.pages) == len(original.pages)
+    assert [page.get_contents().get_data() for page in reader.pages] == \
+        [page.get_contents().get_data() for page in original.pages]
+    assert reader.metadata["/Title"] == "optimize"
+
+
+def test_object_stream_writer_splits_streams():
+    from PyPDF2 import generic
+
+    output = io.BytesIO()
+    out = ObjectStreamWriter(output, objects_per_stream=3)
+    catalog, pages, page = out.reserve(), out.reserve(), out.reserve()
+    content = generic.DecodedStreamObject()
+    content.set_data(b"0 0 m 10 10 l S")
+    content_number = out.reserve()
+    out.write(content_number, content)
+    extra = [out.reserve() for _ in range(5)]
+    for number in extra:
+        out.write(number, generic.DictionaryObject({generic.NameObject("/N"): generic.NumberObject(number)}))
+    out.write(page, generic.DictionaryObject({
+        generic.NameObject("/Type"): generic.NameObject("/Page"),
+        generic.NameObject("/Parent"): generic.IndirectObject(pages, 0, None),
+        generic.NameObject("/MediaBox"): generic.ArrayObject(generic.NumberObject(v) for v in (0, 0, 100, 100)),
+        generic.NameObject("/Resources"): generic.DictionaryObject(),
+        generic.NameObject("/Contents"): generic.IndirectObject(content_number, 0, None)
+    }))
+    out.write(pages, generic.DictionaryObject({
+        generic.NameObject("/Type"): generic.NameObject("/Pages"),
+        generic.NameObject("/Kids"): generic.ArrayObject([generic.IndirectObject(page, 0, None)]),
+        generic.NameObject("/Count"): generic.NumberObject(1)
+    }))
+    out.write(catalog, generic.DictionaryObject({
+        generic.NameObject("/Type"): generic.NameObject("/Catalog"),
+        generic.NameObject("/Pages"): generic.IndirectObject(pages, 0, None)
+    }))
+    out.finish(catalog)
+    data = output.getvalue()
+
+    assert out.streams == 3  # 8개 객체를 3개씩
+    reader = PyPDF2.PdfReader(io.BytesIO(data), strict=True)
+    assert _check_entries(data, reader) == out.packed == 8
+    assert len(reader.pages) == 1
+    assert reader.pages[0].get_contents().get_data() == b"0 0 m 10 10 l S"
+    for number in extra:
+        assert reader.get_object(PyPDF2.generic.IndirectObject(number, 0, reader))["/N"] == number